@@ -31,6 +31,7 @@ from .error_classifier import (
 )
 from .llm_client import LLMClient
 from .llm_service import LLMService
+from .plan_stream_parser import IncrementalPlanParser
 from .prompt_builder import PromptBuilder
 from .reflection_engine import ReflectionEngine, ReflectionResult
 from .state_verifier import (
@@ -89,4 +90,6 @@ __all__ = [
     "get_context_condenser",
     "CompressionStrategy",
     "CompressionStats",
+    # Plan Stream Parser (incremental step emission)
+    "IncrementalPlanParser",
 ]
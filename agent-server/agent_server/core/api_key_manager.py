@@ -220,6 +220,29 @@ class GeminiKeyManager:
             # All keys in cooldown - return the one with shortest wait
             return self._get_shortest_cooldown_key()
 
+    async def get_alternate_key(
+        self, exclude_key: str
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Get an active key other than exclude_key, without rotating.
+
+        Used for hedged requests that run alongside the primary key.
+
+        Returns:
+            Tuple of (api_key, key_id) or (None, None) if no other key is active
+        """
+        async with self._lock:
+            self._auto_expire_cooldowns()
+            count = len(self._keys)
+            for offset in range(1, count + 1):
+                key_state = self._keys[(self._current_index + offset) % count]
+                if (
+                    key_state.key != exclude_key
+                    and key_state.status == KeyStatus.ACTIVE
+                ):
+                    return key_state.key, key_state.id
+            return None, None
+
     def _get_shortest_cooldown_key(self) -> Tuple[Optional[str], Optional[str]]:
         """Get key with shortest remaining cooldown"""
         available_keys = [k for k in self._keys if k.enabled]
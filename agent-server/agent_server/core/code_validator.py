@@ -21,6 +21,8 @@ from enum import Enum
 from io import StringIO
 from typing import Any, Dict, List, Optional, Tuple
 
+from hdsp_agent_core.llm.metrics import timed
+
 
 class IssueSeverity(Enum):
     """검증 이슈 심각도"""
@@ -923,6 +925,11 @@ class CodeValidator:
 
     def full_validation(self, code: str) -> ValidationResult:
         """전체 검증 수행"""
+        with timed("hdsp_validation_duration_seconds", operation="full"):
+            return self._run_full_validation(code)
+
+    def _run_full_validation(self, code: str) -> ValidationResult:
+        """문법 → 의존성 → 미정의 이름 → Ruff/Pyflakes 순서로 검사"""
         all_issues = []
 
         # 1. 문법 검사
@@ -10,6 +10,8 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Dict, List, Optional, Tuple
 
+from hdsp_agent_core.llm.token_counter import get_token_counter
+
 logger = logging.getLogger(__name__)
 
 
@@ -49,9 +51,6 @@ class ContextCondenser:
         "default": 4000,
     }
 
-    # Token estimation: average tokens per word (conservative)
-    TOKENS_PER_WORD = 1.3
-
     def __init__(self, provider: str = "default"):
         """Initialize condenser with provider-specific settings.
 
@@ -74,8 +73,8 @@ class ContextCondenser:
     def estimate_tokens(self, text: str) -> int:
         """Estimate token count for text.
 
-        Uses word count with a conservative multiplier.
-        More accurate than character count for most text.
+        Uses the provider's shared token counter (tokenizer-backed where
+        available), memoized by content hash across calls.
 
         Args:
             text: Input text to estimate
@@ -85,8 +84,7 @@ class ContextCondenser:
         """
         if not text:
             return 0
-        words = len(text.split())
-        return int(words * self.TOKENS_PER_WORD)
+        return get_token_counter(self._provider).count(text)
 
     def get_token_limit(self) -> int:
         """Get token limit for current provider.
@@ -0,0 +1,311 @@
+"""
+Embedding Cache - Persistent vector cache shared by all embedding backends.
+
+Knowledge base content rarely changes between restarts, so vectors are
+kept on disk and reused instead of re-running the model:
+
+- One cache per namespace (backend, model name, prefix mode), so vectors
+  from different models or E5 "query:"/"passage:" prefixes never mix
+- Entries are keyed by a hash of the NFC-normalized, stripped text
+- Vectors live in a float16/float32 memory-mapped file; an append-only
+  log maps text hashes to rows, so a write costs one log line
+- Size-bounded: once `max_entries` rows are used, the least recently
+  used row is overwritten
+
+Layout (per namespace):
+    <cache_dir>/<namespace hash>/meta.json   namespace, dimension, dtype
+    <cache_dir>/<namespace hash>/vectors.bin row-major vectors
+    <cache_dir>/<namespace hash>/index.log   "<text hash> <row>" lines
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import shutil
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from hdsp_agent_core.models.rag import EmbeddingConfig
+
+logger = logging.getLogger(__name__)
+
+_INITIAL_ROWS = 1024
+
+
+class EmbeddingCache:
+    """
+    Disk-backed text -> vector cache for one embedding namespace.
+
+    Usage:
+        cache = get_embedding_cache("local|e5-small|passage", config)
+        vectors = await embed_with_cache(cache, texts, compute)
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        namespace: str,
+        max_entries: int = 200_000,
+        dtype: str = "float16",
+    ):
+        digest = hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:16]
+        self._dir = Path(directory) / digest
+        self._namespace = namespace
+        self._max_entries = max(1, max_entries)
+        self._dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        # text hash -> row, least recently used first
+        self._rows: "OrderedDict[str, int]" = OrderedDict()
+        self._next_row = 0
+        self._dimension: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def key(text: str) -> str:
+        """Cache key for a text"""
+        normalized = unicodedata.normalize("NFC", text).strip()
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self._dimension
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached vectors for texts (None where missing)"""
+        results: List[Optional[List[float]]] = []
+        with self._lock:
+            for text in texts:
+                key = self.key(text)
+                row = self._rows.get(key)
+                if row is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                self._rows.move_to_end(key)
+                self.hits += 1
+                results.append(self._vectors[row].astype(np.float32).tolist())
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[List[float]]) -> None:
+        """Store vectors and append their rows to the index log"""
+        if not texts:
+            return
+        with self._lock:
+            dimension = len(vectors[0])
+            if self._dimension != dimension:
+                if self._dimension is not None:
+                    logger.info(
+                        f"Embedding dimension changed ({self._dimension} -> "
+                        f"{dimension}), clearing cache {self._namespace}"
+                    )
+                self._reset(dimension)
+
+            lines = []
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                if key in self._rows:
+                    continue
+                row = self._allocate_row()
+                self._vectors[row] = np.asarray(vector, dtype=self._dtype)
+                self._rows[key] = row
+                lines.append(f"{key} {row}\n")
+
+            if lines:
+                self._vectors.flush()
+                with open(self._dir / "index.log", "a", encoding="utf-8") as log:
+                    log.writelines(lines)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._rows), "hits": self.hits, "misses": self.misses}
+
+    # ========== Storage ==========
+
+    def _load(self) -> None:
+        meta_path = self._dir / "meta.json"
+        if not meta_path.exists():
+            return
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            namespace, dtype = meta.get("namespace"), meta.get("dtype")
+            if namespace != self._namespace or dtype != str(self._dtype):
+                logger.info(f"Embedding cache format changed: {self._dir}")
+                return
+            self._dimension = int(meta["dimension"])
+            self._open_vectors()
+            self._replay_log()
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding cache {self._dir}: {e}")
+            self._rows.clear()
+            self._next_row = 0
+            self._dimension = None
+            self._vectors = None
+
+    def _replay_log(self) -> None:
+        log_path = self._dir / "index.log"
+        if not log_path.exists():
+            return
+        capacity = len(self._vectors)
+        owners: Dict[int, str] = {}
+        lines = 0
+        with open(log_path, encoding="utf-8") as log:
+            for line in log:
+                parts = line.split()
+                if len(parts) != 2 or not parts[1].isdigit():
+                    continue
+                lines += 1
+                key, row = parts[0], int(parts[1])
+                if row >= capacity or row >= self._max_entries:
+                    continue
+                # A reused row belongs to its latest key
+                previous = owners.get(row)
+                if previous is not None and previous != key:
+                    self._rows.pop(previous, None)
+                owners[row] = key
+                self._rows.pop(key, None)
+                self._rows[key] = row
+                self._next_row = max(self._next_row, row + 1)
+
+        if lines > 2 * len(self._rows) + _INITIAL_ROWS:
+            self._compact_log()
+
+    def _compact_log(self) -> None:
+        tmp_path = self._dir / "index.log.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as log:
+            log.writelines(f"{key} {row}\n" for key, row in self._rows.items())
+        tmp_path.replace(self._dir / "index.log")
+
+    def _reset(self, dimension: int) -> None:
+        self._vectors = None
+        if self._dir.exists():
+            shutil.rmtree(self._dir)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._rows.clear()
+        self._next_row = 0
+        self._dimension = dimension
+        meta = {
+            "namespace": self._namespace,
+            "dimension": dimension,
+            "dtype": str(self._dtype),
+        }
+        (self._dir / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        self._open_vectors(min_rows=min(_INITIAL_ROWS, self._max_entries))
+
+    def _open_vectors(self, min_rows: int = 0) -> None:
+        path = self._dir / "vectors.bin"
+        row_bytes = self._dimension * self._dtype.itemsize
+        size = path.stat().st_size if path.exists() else 0
+        rows = max(size // row_bytes, min_rows)
+        if rows * row_bytes != size:
+            with open(path, "ab") as f:
+                f.truncate(rows * row_bytes)
+        self._vectors = np.memmap(
+            path, dtype=self._dtype, mode="r+", shape=(rows, self._dimension)
+        )
+
+    def _allocate_row(self) -> int:
+        if self._next_row < self._max_entries:
+            row = self._next_row
+            self._next_row += 1
+            if row >= len(self._vectors):
+                self._vectors.flush()
+                grown = min(
+                    self._max_entries, max(_INITIAL_ROWS, 2 * len(self._vectors))
+                )
+                self._vectors = None
+                self._open_vectors(min_rows=grown)
+            return row
+        # Full: overwrite the least recently used row
+        _, row = self._rows.popitem(last=False)
+        return row
+
+
+async def embed_with_cache(
+    cache: Optional[EmbeddingCache],
+    texts: List[str],
+    compute: Callable[[List[str]], Awaitable[List[List[float]]]],
+) -> List[List[float]]:
+    """
+    Embed texts, computing only the ones missing from the cache.
+
+    Cache write failures are logged; they never fail the embedding call.
+    """
+    if cache is None:
+        return await compute(texts)
+
+    vectors = cache.get_many(texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if not missing:
+        return vectors
+
+    unique = list(dict.fromkeys(texts[i] for i in missing))
+    computed = await compute(unique)
+    by_text = dict(zip(unique, computed))
+    for i in missing:
+        vectors[i] = by_text[texts[i]]
+    try:
+        await asyncio.to_thread(cache.put_many, unique, computed)
+    except Exception as e:
+        logger.warning(f"Failed to write embedding cache: {e}")
+    return vectors
+
+
+# ============ Singleton Accessor ============
+
+_embedding_caches: Dict[Tuple[str, str], EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(
+    namespace: str, config: "EmbeddingConfig"
+) -> Optional[EmbeddingCache]:
+    """
+    Get the shared cache for a namespace, or None if caching is disabled.
+
+    Args:
+        namespace: Backend, model and prefix mode, e.g. "local|e5-small|query"
+        config: EmbeddingConfig with the cache settings
+    """
+    if not config.is_cache_enabled():
+        return None
+    key = (config.get_cache_dir(), namespace)
+    with _caches_lock:
+        cache = _embedding_caches.get(key)
+        if cache is None:
+            cache = EmbeddingCache(
+                Path(key[0]),
+                namespace,
+                max_entries=config.cache_max_entries,
+                dtype=config.cache_dtype,
+            )
+            _embedding_caches[key] = cache
+        return cache
+
+
+def reset_embedding_caches() -> None:
+    """
+    Drop the cache instances (for testing purposes). Files stay on disk.
+    """
+    with _caches_lock:
+        _embedding_caches.clear()
@@ -7,15 +7,25 @@ Features:
 - Thread-safe singleton pattern with async support
 - Configurable model and device
 - E5 model prefix handling for optimal performance
+- Persistent embedding cache (see EmbeddingCache), so unchanged texts are
+  not re-encoded after a restart
+- Query LRU cache and micro-batching (see QueryEmbeddingBatcher)
+- Optional Matryoshka truncation (EmbeddingConfig.truncate_dim)
 
 Default model: intfloat/multilingual-e5-small (384 dimensions, Korean support)
 """
 
 import asyncio
+import functools
 import logging
 from typing import TYPE_CHECKING, List, Optional
 
+from agent_server.core.embedding_cache import embed_with_cache, get_embedding_cache
+from agent_server.core.matryoshka import truncate_embeddings, truncated_dimension
+from agent_server.core.query_embedder import QueryEmbeddingBatcher
+
 if TYPE_CHECKING:
+    from agent_server.core.embedding_cache import EmbeddingCache
     from hdsp_agent_core.models.rag import EmbeddingConfig
 
 logger = logging.getLogger(__name__)
@@ -57,6 +67,12 @@ class EmbeddingService:
         self._dimension: Optional[int] = None
         self._is_e5_model: bool = False
         self._load_lock = asyncio.Lock()  # Thread-safe lazy loading
+        self._query_batcher = QueryEmbeddingBatcher(
+            self._encode_cached_queries,
+            max_batch=self._config.query_batch_size,
+            max_wait=self._config.query_batch_wait_ms / 1000,
+            cache_size=self._config.query_cache_size,
+        )
 
     async def _ensure_model_loaded(self):
         """Lazy load the embedding model (thread-safe, async)"""
@@ -104,12 +120,12 @@ class EmbeddingService:
 
     @property
     def dimension(self) -> int:
-        """Get embedding dimension (must be loaded first)"""
+        """Get embedding dimension after truncation (must be loaded first)"""
         if self._dimension is None:
             raise RuntimeError(
                 "Embedding dimension not available. Model not loaded yet."
             )
-        return self._dimension
+        return truncated_dimension(self._dimension, self._config.get_truncate_dim())
 
     def _prepare_texts(self, texts: List[str], is_query: bool = False) -> List[str]:
         """
@@ -125,6 +141,23 @@ class EmbeddingService:
         prefix = "query: " if is_query else "passage: "
         return [prefix + text for text in texts]
 
+    def _get_cache(self, is_query: bool = False) -> Optional["EmbeddingCache"]:
+        """Embedding cache for this model and prefix mode (None if disabled)"""
+        model_name = self._config.get_model_name()
+        # Same check as _ensure_model_loaded, so hits need no loaded model
+        if "e5" in model_name.lower():
+            prefix_mode = "query" if is_query else "passage"
+        else:
+            prefix_mode = "none"
+        namespace = (
+            f"local|{model_name}|{prefix_mode}"
+            f"|normalize={self._config.normalize_embeddings}"
+        )
+        truncate_dim = self._config.get_truncate_dim()
+        if truncate_dim:
+            namespace += f"|dim={truncate_dim}"
+        return get_embedding_cache(namespace, self._config)
+
     async def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for a list of texts (documents/passages).
@@ -138,6 +171,15 @@ class EmbeddingService:
         if not texts:
             return []
 
+        return await embed_with_cache(self._get_cache(), texts, self._encode_passages)
+
+    async def _encode_passages(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        show_progress_bar: Optional[bool] = None,
+    ) -> List[List[float]]:
+        """Run the model on passages (cache misses only)"""
         await self._ensure_model_loaded()
 
         # Prepare texts with prefix if E5 model
@@ -148,12 +190,16 @@ class EmbeddingService:
             embeddings = await asyncio.to_thread(
                 self._model.encode,
                 prepared_texts,
-                batch_size=self._config.batch_size,
-                show_progress_bar=len(texts) > 100,
+                batch_size=batch_size or self._config.batch_size,
+                show_progress_bar=(
+                    len(texts) > 100 if show_progress_bar is None else show_progress_bar
+                ),
                 convert_to_numpy=True,
                 normalize_embeddings=self._config.normalize_embeddings,
             )
-            return embeddings.tolist()
+            return truncate_embeddings(
+                embeddings.tolist(), self._config.get_truncate_dim()
+            )
         except Exception as e:
             logger.error(f"Failed to generate embeddings: {e}")
             raise
@@ -173,20 +219,32 @@ class EmbeddingService:
         if not query:
             raise ValueError("Query cannot be empty")
 
+        return await self._query_batcher.embed(query)
+
+    async def _encode_cached_queries(self, queries: List[str]) -> List[List[float]]:
+        """Batch of queries not in the LRU cache"""
+        return await embed_with_cache(
+            self._get_cache(is_query=True), queries, self._encode_queries
+        )
+
+    async def _encode_queries(self, queries: List[str]) -> List[List[float]]:
+        """Run the model on queries (cache misses only)"""
         await self._ensure_model_loaded()
 
-        # Prepare query with prefix if E5 model
-        prepared_query = self._prepare_texts([query], is_query=True)[0]
+        # Prepare queries with prefix if E5 model
+        prepared_queries = self._prepare_texts(queries, is_query=True)
 
         try:
             # Run in separate thread to avoid blocking event loop
-            embedding = await asyncio.to_thread(
+            embeddings = await asyncio.to_thread(
                 self._model.encode,
-                prepared_query,
+                prepared_queries,
                 convert_to_numpy=True,
                 normalize_embeddings=self._config.normalize_embeddings,
             )
-            return embedding.tolist()
+            return truncate_embeddings(
+                embeddings.tolist(), self._config.get_truncate_dim()
+            )
         except Exception as e:
             logger.error(f"Failed to generate query embedding: {e}")
             raise
@@ -207,25 +265,10 @@ class EmbeddingService:
         if not texts:
             return []
 
-        await self._ensure_model_loaded()
-
-        prepared_texts = self._prepare_texts(texts, is_query=False)
-        effective_batch_size = batch_size or self._config.batch_size
-
-        try:
-            # Run in separate thread to avoid blocking event loop
-            embeddings = await asyncio.to_thread(
-                self._model.encode,
-                prepared_texts,
-                batch_size=effective_batch_size,
-                show_progress_bar=True,
-                convert_to_numpy=True,
-                normalize_embeddings=self._config.normalize_embeddings,
-            )
-            return embeddings.tolist()
-        except Exception as e:
-            logger.error(f"Failed to generate batch embeddings: {e}")
-            raise
+        encode = functools.partial(
+            self._encode_passages, batch_size=batch_size, show_progress_bar=True
+        )
+        return await embed_with_cache(self._get_cache(), texts, encode)
 
     def get_model_info(self) -> dict:
         """Get information about the loaded model"""
@@ -235,6 +278,7 @@ class EmbeddingService:
             "device": self._config.get_device(),
             "is_e5_model": self._is_e5_model,
             "normalize_embeddings": self._config.normalize_embeddings,
+            "truncate_dim": self._config.get_truncate_dim(),
             "loaded": self._model is not None,
         }
 
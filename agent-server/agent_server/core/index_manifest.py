@@ -0,0 +1,137 @@
+"""
+Index Manifest - Local record of what is indexed in the vector store.
+
+Maps each indexed file to its content hash, mtime, size and point IDs, so
+startup and reindex scans decide "unchanged" with a local stat() instead of
+a vector store query per file:
+
+- mtime and size match: unchanged, nothing is read
+- otherwise the file is hashed; same hash: unchanged (stat refreshed)
+- different hash: re-indexed; the recorded point IDs say what to delete
+
+The manifest is a JSON file written atomically. It is only a cache of the
+collection's state: RAGManager reconciles it against the collection when
+it is missing, unreadable or its chunk total disagrees with the collection.
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class ManifestEntry:
+    """Indexed state of one file"""
+
+    content_hash: Optional[str]
+    mtime_ns: Optional[int] = None
+    size: Optional[int] = None
+    chunk_ids: List[str] = field(default_factory=list)
+
+    def matches_stat(self, stat: os.stat_result) -> bool:
+        """Cheap unchanged check (no read)"""
+        return (
+            self.content_hash is not None
+            and self.mtime_ns == stat.st_mtime_ns
+            and self.size == stat.st_size
+        )
+
+
+class IndexManifest:
+    """
+    File path -> ManifestEntry, persisted as JSON.
+
+    Usage:
+        manifest = IndexManifest(path)
+        manifest.load()
+        entry = manifest.get(str(file_path))
+        manifest.set(str(file_path), ManifestEntry(...))
+        manifest.save()
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self._path = Path(path) if path else None
+        self._entries: Dict[str, ManifestEntry] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    @property
+    def path(self) -> Optional[Path]:
+        return self._path
+
+    def load(self) -> bool:
+        """Read the manifest file; False if missing or unreadable"""
+        self.loaded = False
+        self._entries = {}
+        if self._path is None or not self._path.exists():
+            return False
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+            if data.get("version") != MANIFEST_VERSION:
+                logger.info("Index manifest version changed, rebuilding")
+                return False
+            self._entries = {
+                file_path: ManifestEntry(**entry)
+                for file_path, entry in data.get("files", {}).items()
+            }
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable index manifest {self._path}: {e}")
+            self._entries = {}
+            return False
+        self.loaded = True
+        return True
+
+    def save(self) -> None:
+        """Write atomically (temp file + rename)"""
+        if self._path is None:
+            return
+        with self._lock:
+            data = {
+                "version": MANIFEST_VERSION,
+                "files": {fp: asdict(e) for fp, e in self._entries.items()},
+            }
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self._path)
+        self.loaded = True
+
+    def get(self, file_path: str) -> Optional[ManifestEntry]:
+        with self._lock:
+            return self._entries.get(file_path)
+
+    def set(self, file_path: str, entry: ManifestEntry) -> None:
+        with self._lock:
+            self._entries[file_path] = entry
+
+    def remove(self, file_path: str) -> Optional[ManifestEntry]:
+        with self._lock:
+            return self._entries.pop(file_path, None)
+
+    def replace_all(self, entries: Dict[str, ManifestEntry]) -> None:
+        with self._lock:
+            self._entries = dict(entries)
+
+    def files(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def items(self) -> Iterator:
+        with self._lock:
+            return iter(list(self._entries.items()))
+
+    def total_chunks(self) -> int:
+        with self._lock:
+            return sum(len(e.chunk_ids) for e in self._entries.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
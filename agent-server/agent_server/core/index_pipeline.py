@@ -0,0 +1,265 @@
+"""
+Index Pipeline - Batched, pipelined knowledge base indexing.
+
+Three stages connected by bounded queues:
+
+1. Load: `read_workers` files are read and chunked in parallel
+   (file I/O and chunking run in worker threads).
+2. Embed: chunks are pooled across file boundaries into batches of
+   `embed_batch_size`, so the embedder sees large batches even when the
+   knowledge base is made of many small files.
+3. Upsert: embedded points are written in batches of `upsert_batch_size`
+   while the next embedding batch is already being computed.
+
+Bounded queues keep memory flat: a slow stage back-pressures the stages
+before it instead of buffering the whole knowledge base.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+)
+
+if TYPE_CHECKING:
+    from hdsp_agent_core.models.rag import IndexingConfig
+
+logger = logging.getLogger(__name__)
+
+# A loader returns the file's chunks ({"content", "payload"} and optionally
+# a point "id"), or None to skip
+Loader = Callable[[Path], Awaitable[Optional[List[Dict[str, Any]]]]]
+Embedder = Callable[[List[str]], Awaitable[List[List[float]]]]
+# An upserter writes embedded PendingPoints
+Upserter = Callable[[List["PendingPoint"]], Awaitable[None]]
+
+
+@dataclass
+class PendingPoint:
+    """One chunk on its way through the pipeline"""
+
+    file_path: Path
+    content: str
+    payload: Dict[str, Any]
+    vector: Optional[List[float]] = None
+    point_id: Optional[str] = None
+
+
+@dataclass
+class IndexRunStats:
+    """Outcome of one pipeline run"""
+
+    indexed: int = 0
+    skipped: int = 0
+    chunks: int = 0
+    # Unchanged chunks of edited files, kept without re-embedding
+    reused: int = 0
+    embed_batches: int = 0
+    upsert_batches: int = 0
+    errors: List[Dict[str, str]] = field(default_factory=list)
+    failed_files: Set[Path] = field(default_factory=set)
+    elapsed: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "indexed": self.indexed,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "chunks": self.chunks,
+            "reused": self.reused,
+            "embed_batches": self.embed_batches,
+            "upsert_batches": self.upsert_batches,
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+_DONE = object()
+# How long a partial embedding batch waits for more chunks
+_BATCH_LINGER = 0.05
+
+
+class IndexPipeline:
+    """
+    Pipelined load -> embed -> upsert indexer.
+
+    Usage:
+        pipeline = IndexPipeline(load, embed, upsert, config.indexing)
+        stats = await pipeline.run(files)
+    """
+
+    def __init__(
+        self,
+        load: Loader,
+        embed: Embedder,
+        upsert: Upserter,
+        config: Optional["IndexingConfig"] = None,
+    ):
+        from hdsp_agent_core.models.rag import IndexingConfig
+
+        self._load = load
+        self._embed = embed
+        self._upsert = upsert
+        self._config = config or IndexingConfig()
+
+    async def run(self, files: Iterable[Path]) -> IndexRunStats:
+        """Index files; a file counts as indexed once all its chunks are written"""
+        stats = IndexRunStats()
+        started = time.perf_counter()
+        queue_size = max(1, self._config.queue_size)
+        # Chunks per file still to be written (file is complete at zero)
+        remaining: Dict[Path, int] = {}
+        chunk_queue: asyncio.Queue = asyncio.Queue(
+            maxsize=queue_size * max(1, self._config.embed_batch_size)
+        )
+        point_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+        tasks = [
+            asyncio.create_task(self._load_stage(files, chunk_queue, remaining, stats)),
+            asyncio.create_task(self._embed_stage(chunk_queue, point_queue, stats)),
+            asyncio.create_task(self._upsert_stage(point_queue, remaining, stats)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # A stage died: stop the others instead of blocking on its queue
+            for task in tasks:
+                task.cancel()
+            raise
+
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    def _fail(self, stats: IndexRunStats, file_path: Path, error: Exception) -> None:
+        if file_path in stats.failed_files:
+            return
+        stats.failed_files.add(file_path)
+        stats.errors.append({"file": str(file_path), "error": str(error)})
+        logger.error(f"Failed to index {file_path}: {error}")
+
+    async def _load_stage(
+        self,
+        files: Iterable[Path],
+        chunk_queue: asyncio.Queue,
+        remaining: Dict[Path, int],
+        stats: IndexRunStats,
+    ) -> None:
+        file_iter = iter(files)
+
+        async def worker() -> None:
+            for file_path in file_iter:
+                try:
+                    chunks = await self._load(file_path)
+                except Exception as e:
+                    self._fail(stats, file_path, e)
+                    continue
+                if chunks is None:
+                    stats.skipped += 1
+                    continue
+                if not chunks:
+                    continue
+                remaining[file_path] = len(chunks)
+                for chunk in chunks:
+                    await chunk_queue.put(
+                        PendingPoint(
+                            file_path,
+                            chunk["content"],
+                            chunk["payload"],
+                            point_id=chunk.get("id"),
+                        )
+                    )
+
+        workers = max(1, self._config.read_workers)
+        await asyncio.gather(*[worker() for _ in range(workers)])
+        await chunk_queue.put(_DONE)
+
+    async def _embed_stage(
+        self,
+        chunk_queue: asyncio.Queue,
+        point_queue: asyncio.Queue,
+        stats: IndexRunStats,
+    ) -> None:
+        batch_size = max(1, self._config.embed_batch_size)
+        batch: List[PendingPoint] = []
+
+        async def flush() -> None:
+            items = [p for p in batch if p.file_path not in stats.failed_files]
+            batch.clear()
+            if not items:
+                return
+            try:
+                vectors = await self._embed([p.content for p in items])
+            except Exception as e:
+                for p in items:
+                    self._fail(stats, p.file_path, e)
+                return
+            for p, vector in zip(items, vectors):
+                p.vector = vector
+            stats.embed_batches += 1
+            await point_queue.put(items)
+
+        while True:
+            if batch:
+                # Top up a partial batch; flush it once loaders go quiet
+                try:
+                    item = await asyncio.wait_for(
+                        chunk_queue.get(), timeout=_BATCH_LINGER
+                    )
+                except asyncio.TimeoutError:
+                    await flush()
+                    continue
+            else:
+                item = await chunk_queue.get()
+            if item is _DONE:
+                break
+            batch.append(item)
+            if len(batch) >= batch_size:
+                await flush()
+        await flush()
+        await point_queue.put(_DONE)
+
+    async def _upsert_stage(
+        self,
+        point_queue: asyncio.Queue,
+        remaining: Dict[Path, int],
+        stats: IndexRunStats,
+    ) -> None:
+        batch_size = max(1, self._config.upsert_batch_size)
+        batch: List[PendingPoint] = []
+
+        async def flush() -> None:
+            items = [p for p in batch if p.file_path not in stats.failed_files]
+            batch.clear()
+            if not items:
+                return
+            try:
+                await self._upsert(items)
+            except Exception as e:
+                for p in items:
+                    self._fail(stats, p.file_path, e)
+                return
+            stats.upsert_batches += 1
+            stats.chunks += len(items)
+            for p in items:
+                remaining[p.file_path] -= 1
+                if remaining[p.file_path] == 0:
+                    stats.indexed += 1
+
+        while True:
+            items = await point_queue.get()
+            if items is _DONE:
+                break
+            batch.extend(items)
+            if len(batch) >= batch_size:
+                await flush()
+        await flush()
@@ -0,0 +1,199 @@
+"""
+Lexical Index - In-process BM25 inverted index over knowledge base chunks.
+
+Dense retrieval is weak on exact API names ("dd.read_csv",
+"pl.scan_parquet"); a lexical stage catches them cheaply. The index is
+kept in sync with the vector store point by point (RAGManager adds,
+removes and re-labels chunks here whenever it writes to Qdrant), so it
+needs no rebuild when files change.
+
+Tokenization keeps dotted names whole and also indexes their parts:
+    "dd.read_csv" -> dd.read_csv, dd, read_csv, read, csv
+Common English stopwords are dropped, so filler words in a question
+("what is the ...") cannot produce matches on their own.
+"""
+
+import heapq
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from agent_server.core.vector_store import matches_filters
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+(?:\.\w+)*")
+
+_STOPWORDS = frozenset("""
+    a about above after again all also am an and any are as at be because been
+    before being below between both but by can could did do does doing down
+    during each few for from further had has have having he her here hers him
+    his how i if in into is it its itself just me more most my no nor not now
+    of off on once only or other our ours out over own same she should so some
+    such than that the their theirs them then there these they this those
+    through to too under until up very was we were what when where which while
+    who whom why will with would you your yours
+    """.split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased tokens without stopwords, expanding dotted and snake_case names"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        parts = token.split(".") if "." in token else [token]
+        if len(parts) > 1:
+            tokens.extend(parts)
+        for part in parts:
+            if "_" in part.strip("_"):
+                tokens.extend(p for p in part.split("_") if p)
+    return [t for t in tokens if t not in _STOPWORDS]
+
+
+@dataclass
+class LexicalHit:
+    """One BM25 match"""
+
+    doc_id: str
+    score: float
+    content: str
+    payload: Dict[str, Any]
+    # score relative to every query term occurring once in an
+    # average-length chunk (~1.0 for a full match)
+    normalized_score: float = 0.0
+
+
+@dataclass
+class _Document:
+    content: str
+    payload: Dict[str, Any]
+    terms: Counter
+    length: int
+
+
+class LexicalIndex:
+    """
+    Incrementally maintained BM25 index.
+
+    Usage:
+        index = LexicalIndex()
+        index.add(point_id, content, payload)
+        hits = index.search("dd.read_csv", limit=20, filters={"source": "dask.md"})
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self._k1 = k1
+        self._b = b
+        # term -> {doc_id: term frequency}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._docs: Dict[str, _Document] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc_id: str, content: str, payload: Dict[str, Any]) -> None:
+        """Index a chunk (replacing any previous version of doc_id)"""
+        terms = Counter(tokenize(content))
+        with self._lock:
+            self._remove(doc_id)
+            length = sum(terms.values())
+            self._docs[doc_id] = _Document(content, payload, terms, length)
+            self._total_length += length
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+
+    def remove_where(self, key: str, value: Any) -> None:
+        """Remove chunks whose payload[key] equals value"""
+        with self._lock:
+            doomed = [
+                d for d, doc in self._docs.items() if doc.payload.get(key) == value
+            ]
+            for doc_id in doomed:
+                self._remove(doc_id)
+
+    def update_payload(self, doc_id: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            if doc_id in self._docs:
+                self._docs[doc_id].payload = payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._total_length = 0
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[LexicalHit]:
+        """
+        Top `limit` chunks by BM25 score (only chunks matching a term).
+
+        Query terms missing from the corpus still count towards the
+        normalization, so matching one of many query words scores low.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self._docs:
+                return []
+            n_docs = len(self._docs)
+            avg_length = self._total_length / n_docs
+            scores: Dict[str, float] = {}
+            ideal = 0.0
+            for term in terms:
+                postings = self._postings.get(term)
+                df = len(postings) if postings else 0
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                ideal += idf
+                if not postings:
+                    continue
+                for doc_id, tf in postings.items():
+                    length = self._docs[doc_id].length
+                    norm = self._k1 * (1 - self._b + self._b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * (
+                        tf * (self._k1 + 1) / (tf + norm)
+                    )
+
+            if filters:
+                scores = {
+                    d: s
+                    for d, s in scores.items()
+                    if matches_filters(self._docs[d].payload, filters)
+                }
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [
+                LexicalHit(
+                    doc_id,
+                    score,
+                    self._docs[doc_id].content,
+                    self._docs[doc_id].payload,
+                    score / ideal,
+                )
+                for doc_id, score in top
+            ]
+
+    def _remove(self, doc_id: str) -> None:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc.length
+        for term in doc.terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
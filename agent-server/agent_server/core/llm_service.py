@@ -3,13 +3,45 @@ LLM Service - Handles interactions with different LLM providers
 """
 
 import asyncio
-import json
-import ssl
+import logging
+import time
 from contextlib import asynccontextmanager
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import aiohttp
-import certifi
+from hdsp_agent_core.llm.circuit_breaker import (
+    CircuitOpenError,
+    get_circuit_breaker,
+    get_retry_budget,
+)
+from hdsp_agent_core.llm.concurrency import get_limiter_registry
+from hdsp_agent_core.llm.fake_provider import FakeLLMConfig, FakeLLMProvider
+from hdsp_agent_core.llm.hedging import (
+    get_hedge_policy,
+    is_hedging_enabled,
+    is_server_key_hedging_enabled,
+)
+from hdsp_agent_core.llm.http_pool import get_http_pool
+from hdsp_agent_core.llm.metrics import track_llm_call
+from hdsp_agent_core.llm.prompt_cache import (
+    get_context_cache,
+    is_context_cache_enabled,
+    split_static_prefix,
+)
+from hdsp_agent_core.llm.response_cache import get_response_cache, make_cache_key
+from hdsp_agent_core.llm.routing import (
+    METRIC_TTFT,
+    get_llm_router,
+    is_failover_error,
+    is_routing_enabled,
+)
+from hdsp_agent_core.llm.single_flight import get_single_flight
+from hdsp_agent_core.llm.sse import iter_sse_json
+
+logger = logging.getLogger(__name__)
+
+# Set once the "hedging without a backup key" warning has been logged
+_warned_no_backup_key = False
 
 
 class LLMService:
@@ -18,15 +50,17 @@ class LLMService:
     def __init__(self, config: Dict[str, Any], key_manager=None):
         self.config = config
         self.provider = config.get("provider", "gemini")
-        self._key_manager = key_manager  # Optional injection for testing
-        # Create SSL context with certifi certificates
-        self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+        self._key_manager = key_manager  # Optional injection (hedging backup keys)
+        # Process-wide keep-alive connection pool (shared across instances)
+        self._http_pool = get_http_pool()
+        if self.provider == "gemini" and self._hedging_enabled():
+            self._warn_if_no_backup_key()
 
     def _get_key_manager(self):
-        """Get key manager if using Gemini provider"""
+        """Injected key manager, else the server's (HDSP_LLM_HEDGE_SERVER_KEYS only)"""
         if self._key_manager:
             return self._key_manager
-        if self.provider == "gemini":
+        if self.provider == "gemini" and is_server_key_hedging_enabled():
             try:
                 from hdsp_agent_core.managers.config_manager import ConfigManager
 
@@ -45,15 +79,23 @@ class LLMService:
 
         NOTE: Server receives SINGLE API key from client per request.
         Key rotation is managed by the frontend (financial security compliance).
+        Hedging follows the same rule: backups come from the request's
+        gemini.apiKeys; server-owned keys only with HDSP_LLM_HEDGE_SERVER_KEYS.
         """
         cfg = self.config.get("gemini", {})
         api_key = cfg.get("apiKey")
         if not api_key:
             raise ValueError("Gemini API key not configured")
         model = cfg.get("model", "gemini-2.5-pro")
-        base_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}"
+        base_url = f"{self._get_gemini_api_base()}/models/{model}"
         return api_key, model, base_url
 
+    def _get_gemini_api_base(self) -> str:
+        """Gemini API root (gemini.baseUrl overrides, e.g. for a proxy)"""
+        cfg = self.config.get("gemini", {})
+        base = cfg.get("baseUrl", "https://generativelanguage.googleapis.com/v1beta")
+        return base.rstrip("/")
+
     def _get_openai_config(self) -> tuple[str, str, Dict[str, str]]:
         """Get OpenAI config: (model, url, headers). Raises if api_key missing."""
         cfg = self.config.get("openai", {})
@@ -79,6 +121,27 @@ class LLMService:
             headers["Authorization"] = f"Bearer {cfg['apiKey']}"
         return model, url, headers
 
+    def _get_fake_provider(self) -> FakeLLMProvider:
+        """Offline provider for load tests (settings from env / config "fake")"""
+        return FakeLLMProvider(FakeLLMConfig.from_config(self.config.get("fake")))
+
+    def _get_limiter(self, provider: str, secret: Optional[str]):
+        """Adaptive concurrency limiter for provider + API key (or endpoint)"""
+        return get_limiter_registry().get(provider, secret)
+
+    def _get_breaker(self, provider: str, endpoint: str):
+        """Circuit breaker for a provider endpoint (shared across instances)"""
+        return get_circuit_breaker(f"{provider.lower()}:{endpoint}")
+
+    def _record_breaker_status(self, breaker, status: int) -> None:
+        """5xx counts against the provider; 429 is per-key and neutral"""
+        if status >= 500:
+            breaker.record_failure()
+        elif status == 429:
+            breaker.release()
+        else:
+            breaker.record_success()
+
     # ========== Message/Payload Builders ==========
 
     def _build_prompt(self, prompt: str, context: Optional[str] = None) -> str:
@@ -104,12 +167,19 @@ class LLMService:
         provider: str = "API",
         retryable_statuses: tuple = (503, 429),
     ):
-        """Execute operation with exponential backoff retry logic"""
+        """Execute operation with exponential backoff retry logic
+
+        Retries are drawn from the global retry budget; an open circuit
+        fails immediately.
+        """
+        retry_budget = get_retry_budget()
         for attempt in range(max_retries):
             try:
                 return await operation()
+            except CircuitOpenError:
+                raise
             except asyncio.TimeoutError:
-                if attempt < max_retries - 1:
+                if attempt < max_retries - 1 and retry_budget.try_spend():
                     wait_time = (2**attempt) * 3
                     print(
                         f"[LLMService] Request timeout. Retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})"
@@ -121,7 +191,7 @@ class LLMService:
                 error_msg = str(e)
                 # ★ Rate limit (429) 에러는 재시도 가능
                 if "rate limit" in error_msg.lower() or "(429)" in error_msg:
-                    if attempt < max_retries - 1:
+                    if attempt < max_retries - 1 and retry_budget.try_spend():
                         # 429 에러는 더 긴 대기 시간 사용 (40-80초)
                         wait_time = 40 + (attempt * 20)
                         print(
@@ -134,7 +204,7 @@ class LLMService:
                     )
                 # ★ 서버 과부하 (503) 에러도 재시도 가능
                 if "overloaded" in error_msg.lower() or "(503)" in error_msg:
-                    if attempt < max_retries - 1:
+                    if attempt < max_retries - 1 and retry_budget.try_spend():
                         wait_time = (2**attempt) * 5
                         print(
                             f"[LLMService] Server overloaded. Retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})"
@@ -148,7 +218,7 @@ class LLMService:
                 if "timeout" in error_msg.lower():
                     raise
                 # 네트워크 에러 재시도
-                if attempt < max_retries - 1:
+                if attempt < max_retries - 1 and retry_budget.try_spend():
                     wait_time = (2**attempt) * 2
                     print(
                         f"[LLMService] Network error: {e}. Retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})"
@@ -157,39 +227,72 @@ class LLMService:
                     continue
                 raise
 
+    def _endpoint_slot(
+        self, provider: str, url: str, headers: Optional[Dict[str, str]]
+    ):
+        """Limiter slot for an OpenAI-compatible endpoint (per URL and auth)
+
+        Callers hold it around their metrics tracker, so queueing for a
+        slot is not timed as part of the call.
+        """
+        auth = (headers or {}).get("Authorization", "")
+        return self._get_limiter(provider.lower(), f"{url}|{auth}").slot()
+
     @asynccontextmanager
     async def _request(
         self,
         url: str,
         payload: Dict[str, Any],
-        headers: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]],
+        slot,
         timeout_seconds: int = 60,
         provider: str = "API",
+        call=None,
     ):
-        """Context manager for HTTP POST requests with automatic session cleanup"""
+        """Context manager for HTTP POST requests over the pooled keep-alive session
+
+        Fails fast with CircuitOpenError while the endpoint's circuit is open.
+
+        Args:
+            slot: Held limiter slot (see _endpoint_slot); marked on 429/503
+            call: Optional metrics tracker; receives the response status
+        """
         timeout = aiohttp.ClientTimeout(total=timeout_seconds)
-        connector = aiohttp.TCPConnector(ssl=self._ssl_context)
-        async with aiohttp.ClientSession(
-            timeout=timeout, connector=connector
-        ) as session:
-            async with session.post(url, json=payload, headers=headers) as response:
+        session = self._http_pool.get_session(url)
+        breaker = self._get_breaker(provider, url)
+        breaker.check()
+        get_retry_budget().record_request()
+        try:
+            async with session.post(
+                url, json=payload, headers=headers, timeout=timeout
+            ) as response:
+                if call is not None:
+                    call.set_status(response.status)
+                self._record_breaker_status(breaker, response.status)
                 if response.status != 200:
                     error_text = await response.text()
+                    if response.status in (429, 503):
+                        slot.mark_overload()
                     print(f"[LLMService] {provider} API Error: {error_text}")
                     raise Exception(f"{provider} API error: {error_text}")
                 yield response
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            breaker.record_failure()
+            raise
 
     async def _request_json(
         self,
         url: str,
         payload: Dict[str, Any],
-        headers: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]],
+        slot,
         timeout_seconds: int = 60,
         provider: str = "API",
+        call=None,
     ) -> Dict[str, Any]:
         """Make request and return JSON response"""
         async with self._request(
-            url, payload, headers, timeout_seconds, provider
+            url, payload, headers, slot, timeout_seconds, provider, call
         ) as response:
             return await response.json()
 
@@ -198,17 +301,26 @@ class LLMService:
         url: str,
         payload: Dict[str, Any],
         headers: Optional[Dict[str, str]],
+        slot,
         provider: str,
-        line_parser,
+        extractor,
+        call=None,
     ):
-        """Stream response and yield parsed content"""
+        """Stream an SSE response and yield the text extracted from each event"""
         async with self._request(
-            url, payload, headers, timeout_seconds=120, provider=provider
+            url,
+            payload,
+            headers,
+            slot,
+            timeout_seconds=120,
+            provider=provider,
+            call=call,
         ) as response:
-            async for line in response.content:
-                line_text = line.decode("utf-8").strip()
-                content = line_parser(line_text)
+            async for data in iter_sse_json(response.content):
+                content = extractor(data)
                 if content:
+                    if call is not None:
+                        call.add_output(content)
                     yield content
 
     # ========== Response Parsers ==========
@@ -240,18 +352,17 @@ class LLMService:
             return text
         raise Exception("No valid response from Gemini API")
 
-    def _parse_sse_line(self, line_text: str, extractor) -> Optional[str]:
-        """Parse SSE line with given extractor function"""
-        if not line_text.startswith("data: "):
-            return None
-        data_str = line_text[6:]
-        if data_str == "[DONE]":
-            return None
-        try:
-            data = json.loads(data_str)
-            return extractor(data)
-        except json.JSONDecodeError:
-            return None
+    def _record_usage(self, call, data: Dict[str, Any]) -> None:
+        """Pass provider-reported token usage (OpenAI or Gemini format) to the tracker"""
+        usage = data.get("usage")
+        if usage:
+            call.set_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+            return
+        usage = data.get("usageMetadata")
+        if usage:
+            call.set_usage(
+                usage.get("promptTokenCount"), usage.get("candidatesTokenCount")
+            )
 
     def _extract_openai_delta(self, data: Dict[str, Any]) -> Optional[str]:
         """Extract content delta from OpenAI stream data"""
@@ -260,14 +371,6 @@ class LLMService:
             return delta.get("content", "") or None
         return None
 
-    def _parse_openai_stream_line(self, line_text: str) -> Optional[str]:
-        """Parse a single SSE line from OpenAI-compatible stream"""
-        return self._parse_sse_line(line_text, self._extract_openai_delta)
-
-    def _parse_gemini_stream_line(self, line_text: str) -> Optional[str]:
-        """Parse a single SSE line from Gemini stream"""
-        return self._parse_sse_line(line_text, self._extract_gemini_text)
-
     def _build_openai_payload(
         self,
         model: str,
@@ -340,62 +443,339 @@ class LLMService:
 
         return payload
 
+    # ========== Gemini Context Caching ==========
+
+    def _context_cache_enabled(self) -> bool:
+        """Context caching opt-in: gemini.contextCache, else HDSP_LLM_GEMINI_CONTEXT_CACHE"""
+        enabled = self.config.get("gemini", {}).get("contextCache")
+        if enabled is not None:
+            return bool(enabled)
+        return is_context_cache_enabled()
+
+    async def _create_gemini_cached_content(
+        self, api_key: str, model: str, prefix: str
+    ) -> str:
+        """Register a static prompt prefix with Gemini; returns the cachedContents name"""
+        url = f"{self._get_gemini_api_base()}/cachedContents?key={api_key}"
+        payload = {
+            "model": f"models/{model}",
+            "contents": [{"role": "user", "parts": [{"text": prefix}]}],
+            "ttl": f"{int(get_context_cache().ttl_seconds)}s",
+        }
+        session = self._http_pool.get_session(url)
+        timeout = aiohttp.ClientTimeout(total=60)
+        async with session.post(url, json=payload, timeout=timeout) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(
+                    f"Gemini cachedContents error ({response.status}): {error_text[:200]}"
+                )
+            data = await response.json()
+        print(f"[LLMService] Registered Gemini context cache: {data['name']}")
+        return data["name"]
+
+    async def _build_gemini_request(
+        self, prompt: str, api_key: str, model: str
+    ) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Gemini payload; a registered static prefix is replaced by its cache handle
+
+        Returns (payload, cached_prefix). cached_prefix is None when the full
+        prompt is sent.
+        """
+        payload = self._build_gemini_payload(prompt)
+        if not self._context_cache_enabled():
+            return payload, None
+        prefix, suffix = split_static_prefix(prompt)
+        if prefix is None or not suffix:
+            return payload, None
+
+        name = await get_context_cache().get_or_create(
+            api_key,
+            model,
+            prefix,
+            lambda: self._create_gemini_cached_content(api_key, model, prefix),
+        )
+        if name is None:
+            return payload, None
+        payload["cachedContent"] = name
+        payload["contents"] = [{"role": "user", "parts": [{"text": suffix}]}]
+        return payload, prefix
+
+    def _drop_gemini_cache_handle(
+        self, api_key: str, model: str, prefix: str, prompt: str
+    ) -> Dict[str, Any]:
+        """Invalidate a rejected cache handle; returns the full-prompt payload"""
+        print(
+            "[LLMService] Gemini context cache handle rejected, resending full prompt"
+        )
+        get_context_cache().invalidate(api_key, model, prefix)
+        return self._build_gemini_payload(prompt)
+
     async def generate_response_stream(
         self, prompt: str, context: Optional[str] = None
     ):
-        """Generate a streaming response from the configured LLM provider (async generator)"""
-        if self.provider == "gemini":
+        """Generate a streaming response from the configured LLM provider (async generator)
+
+        Concurrent identical streams share one upstream call (single-flight).
+        """
+        async for chunk in get_single_flight().stream(
+            self._cache_key(prompt, context),
+            lambda: self._stream_uncached(prompt, context),
+        ):
+            yield chunk
+
+    async def _stream_uncached(self, prompt: str, context: Optional[str] = None):
+        """Stream from the configured provider, or the best backend in routing mode"""
+        if is_routing_enabled(self.config):
+            async for chunk in self._stream_routed(prompt, context):
+                yield chunk
+            return
+        async for chunk in self._stream_dispatch(self.provider, prompt, context):
+            yield chunk
+
+    async def _stream_dispatch(
+        self, provider: str, prompt: str, context: Optional[str] = None
+    ):
+        """Dispatch a streaming call to the given provider"""
+        if provider == "gemini":
             async for chunk in self._call_gemini_stream(prompt, context):
                 yield chunk
-        elif self.provider == "vllm":
+        elif provider == "vllm":
             async for chunk in self._call_vllm_stream(prompt, context):
                 yield chunk
-        elif self.provider == "openai":
+        elif provider == "openai":
             async for chunk in self._call_openai_stream(prompt, context):
                 yield chunk
+        elif provider == "fake":
+            async for chunk in self._get_fake_provider().stream(
+                self._build_prompt(prompt, context)
+            ):
+                yield chunk
         else:
-            raise ValueError(f"Unsupported provider: {self.provider}")
+            raise ValueError(f"Unsupported provider: {provider}")
 
     async def generate_response(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        cache: bool = False,
+        cache_if: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """Generate a response from the configured LLM provider
+
+        Args:
+            cache: Serve/store the response via the shared response cache.
+                Opt-in per call site; only for deterministic prompts.
+            cache_if: Store only responses it accepts (e.g. ones that parse),
+                so a malformed response is not replayed for the whole TTL
+
+        Concurrent identical requests are coalesced (single-flight).
+        """
+        key = self._cache_key(prompt, context)
+        response_cache = get_response_cache() if cache else None
+        if response_cache is not None:
+            cached = response_cache.get(key)
+            if cached is not None and (cache_if is None or cache_if(cached)):
+                return cached
+
+        # Concurrent identical requests share one upstream call
+        response = await get_single_flight().do(
+            key, lambda: self._generate_uncached(prompt, context)
+        )
+        if response_cache is not None and (cache_if is None or cache_if(response)):
+            response_cache.set(key, response)
+        return response
+
+    async def _generate_uncached(
         self, prompt: str, context: Optional[str] = None
     ) -> str:
-        """Generate a response from the configured LLM provider"""
+        """Call the configured provider, or the best backend in routing mode"""
+        if is_routing_enabled(self.config):
+            return await self._generate_routed(prompt, context)
+        return await self._dispatch(self.provider, prompt, context)
 
-        if self.provider == "gemini":
+    async def _dispatch(
+        self, provider: str, prompt: str, context: Optional[str] = None
+    ) -> str:
+        """Dispatch a non-streaming call to the given provider"""
+        if provider == "gemini":
+            if self._hedging_enabled():
+                return await self._call_gemini_hedged(prompt, context)
             return await self._call_gemini(prompt, context)
-        elif self.provider == "vllm":
+        elif provider == "vllm":
             return await self._call_vllm(prompt, context)
-        elif self.provider == "openai":
+        elif provider == "openai":
             return await self._call_openai(prompt, context)
+        elif provider == "fake":
+            return await self._get_fake_provider().generate(
+                self._build_prompt(prompt, context)
+            )
         else:
-            raise ValueError(f"Unsupported provider: {self.provider}")
+            raise ValueError(f"Unsupported provider: {provider}")
+
+    # ========== Latency-Aware Routing ==========
+
+    def _routing_backends(self) -> Dict[str, str]:
+        """Configured backends as {"provider:model": provider}, default first"""
+        backends = {}
+        providers = sorted(
+            ("gemini", "openai", "vllm"), key=lambda p: p != self.provider
+        )
+        for provider in providers:
+            cfg = self.config.get(provider) or {}
+            configured = (
+                cfg.get("endpoint") if provider == "vllm" else cfg.get("apiKey")
+            )
+            if configured:
+                backends[f"{provider}:{cfg.get('model', '')}"] = provider
+        return backends
+
+    async def _generate_routed(self, prompt: str, context: Optional[str] = None) -> str:
+        """Send to the best-scoring backend, failing over on backend errors"""
+        router = get_llm_router()
+        backends = self._routing_backends()
+        if not backends:
+            return await self._dispatch(self.provider, prompt, context)
+
+        last_error: Optional[Exception] = None
+        for name in router.rank(list(backends)):
+            started = time.monotonic()
+            try:
+                response = await self._dispatch(backends[name], prompt, context)
+            except Exception as e:
+                if not is_failover_error(e):
+                    raise
+                router.record_failure(name, str(e))
+                print(f"[LLMService] Backend {name} failed, failing over: {e}")
+                last_error = e
+                continue
+            router.record_success(name, latency=time.monotonic() - started)
+            return response
+        raise last_error
+
+    async def _stream_routed(self, prompt: str, context: Optional[str] = None):
+        """Stream from the best-scoring backend; fail over before the first chunk"""
+        router = get_llm_router()
+        backends = self._routing_backends()
+        if not backends:
+            async for chunk in self._stream_dispatch(self.provider, prompt, context):
+                yield chunk
+            return
+
+        last_error: Optional[Exception] = None
+        for name in router.rank(list(backends), METRIC_TTFT):
+            started = time.monotonic()
+            ttft: Optional[float] = None
+            try:
+                async for chunk in self._stream_dispatch(
+                    backends[name], prompt, context
+                ):
+                    if ttft is None:
+                        ttft = time.monotonic() - started
+                    yield chunk
+            except Exception as e:
+                if not is_failover_error(e):
+                    raise
+                router.record_failure(name, str(e))
+                if ttft is not None:
+                    # Chunks already reached the client; can't switch mid-stream
+                    raise
+                print(f"[LLMService] Backend {name} failed, failing over: {e}")
+                last_error = e
+                continue
+            router.record_success(name, ttft=ttft)
+            return
+        raise last_error
+
+    def _cache_key(self, prompt: str, context: Optional[str] = None) -> str:
+        """Response cache / single-flight key: settings + credentials + inputs"""
+        cfg = self.config.get(self.provider, {}) or {}
+        params = {
+            k: v for k, v in cfg.items() if k not in ("apiKey", "apiKeys", "hedge")
+        }
+        return make_cache_key(
+            self.provider,
+            params.pop("model", ""),
+            prompt,
+            context,
+            params,
+            credential=self._credentials(),
+        )
+
+    def _credentials(self) -> str:
+        """API keys of every configured provider (routing may use any of them)"""
+        return "|".join(
+            f"{provider}={(self.config.get(provider) or {}).get('apiKey') or ''}"
+            for provider in ("gemini", "openai", "vllm")
+        )
 
     async def _call_gemini(
-        self, prompt: str, context: Optional[str] = None, max_retries: int = 3
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        max_retries: int = 3,
+        api_key: Optional[str] = None,
+        first_byte: Optional[asyncio.Event] = None,
     ) -> str:
         """Call Google Gemini API with single API key.
 
         NOTE: Server does NOT manage key rotation (financial security compliance).
         On 429 rate limit, error is returned to client for frontend key rotation.
+
+        Args:
+            api_key: Override the configured key (hedged requests)
+            first_byte: Set once response headers arrive (hedging TTFB signal)
         """
-        api_key, model, base_url = self._get_gemini_config()
+        config_key, model, base_url = self._get_gemini_config()
+        api_key = api_key or config_key
         full_prompt = self._build_prompt(prompt, context)
-        payload = self._build_gemini_payload(full_prompt)
+        payload, cached_prefix = await self._build_gemini_request(
+            full_prompt, api_key, model
+        )
 
         url = f"{base_url}:generateContent?key={api_key}"
         print(f"[LLMService] Calling Gemini API with model: {model}")
 
-        for attempt in range(max_retries):
+        breaker = self._get_breaker("gemini", model)
+        retry_budget = get_retry_budget()
+        retry_budget.record_request()
+
+        overload_wait = 0
+        # A rejected cache handle is resent at once, without using up an attempt
+        next_attempt = 0
+        while next_attempt < max_retries:
+            attempt = next_attempt
+            next_attempt += 1
+            if overload_wait:
+                print(f"[LLMService] Waiting {overload_wait}s before retry...")
+                await asyncio.sleep(overload_wait)
+                overload_wait = 0
+            # Open circuit: fail fast (not retried, routing fails over)
+            breaker.check()
             try:
                 timeout = aiohttp.ClientTimeout(total=60)
-                connector = aiohttp.TCPConnector(ssl=self._ssl_context)
-                async with aiohttp.ClientSession(
-                    timeout=timeout, connector=connector
-                ) as session:
-                    async with session.post(url, json=payload) as response:
+                session = self._http_pool.get_session(url)
+                async with self._get_limiter(
+                    "gemini", api_key
+                ).slot() as slot, track_llm_call(
+                    "gemini",
+                    model,
+                    "generateContent",
+                    full_prompt,
+                    attempt=attempt + 1,
+                    api_key=api_key,
+                ) as call:
+                    async with session.post(
+                        url, json=payload, timeout=timeout
+                    ) as response:
+                        call.set_status(response.status)
+                        self._record_breaker_status(breaker, response.status)
+                        if first_byte is not None:
+                            first_byte.set()
                         # 429 Rate limit - return to client for key rotation
                         if response.status == 429:
                             error_text = await response.text()
+                            slot.mark_overload()
                             print(
                                 f"[LLMService] Rate limit (429): {error_text[:100]}..."
                             )
@@ -404,20 +784,25 @@ class LLMService:
                         # 503 Server overload - retry with backoff
                         if response.status == 503:
                             error_text = await response.text()
+                            slot.mark_overload()
                             print(
                                 f"[LLMService] Server overloaded (503): {error_text[:100]}..."
                             )
-                            if attempt < max_retries - 1:
-                                wait_time = (2**attempt) * 5
-                                print(
-                                    f"[LLMService] Waiting {wait_time}s before retry..."
-                                )
-                                await asyncio.sleep(wait_time)
+                            if attempt < max_retries - 1 and retry_budget.try_spend():
+                                # Sleep after leaving the slot and the tracker
+                                overload_wait = (2**attempt) * 5
                                 continue
                             raise Exception(f"Server overloaded: {error_text}")
 
                         if response.status != 200:
                             error_text = await response.text()
+                            if cached_prefix and response.status in (400, 403, 404):
+                                payload = self._drop_gemini_cache_handle(
+                                    api_key, model, cached_prefix, full_prompt
+                                )
+                                cached_prefix = None
+                                next_attempt = attempt
+                                continue
                             print(f"[LLMService] Gemini API Error: {error_text}")
                             raise Exception(f"Gemini API error: {error_text}")
 
@@ -438,6 +823,8 @@ class LLMService:
                                 )
 
                         response_text = self._parse_gemini_response(data)
+                        call.add_output(response_text)
+                        self._record_usage(call, data)
                         print(
                             f"[LLMService] Successfully received response from {model} (length: {len(response_text)} chars)"
                         )
@@ -445,7 +832,8 @@ class LLMService:
                         return response_text
 
             except asyncio.TimeoutError:
-                if attempt < max_retries - 1:
+                breaker.record_failure()
+                if attempt < max_retries - 1 and retry_budget.try_spend():
                     wait_time = (2**attempt) * 3
                     print(f"[LLMService] Timeout. Retrying in {wait_time}s...")
                     await asyncio.sleep(wait_time)
@@ -460,8 +848,10 @@ class LLMService:
                 # API error - don't retry
                 if "API error" in error_msg:
                     raise
+                if isinstance(e, aiohttp.ClientError):
+                    breaker.record_failure()
                 # Network error - retry with delay
-                if attempt < max_retries - 1:
+                if attempt < max_retries - 1 and retry_budget.try_spend():
                     wait_time = (2**attempt) * 2
                     print(
                         f"[LLMService] Network error: {e}. Retrying in {wait_time}s..."
@@ -472,6 +862,66 @@ class LLMService:
 
         raise Exception("Max retries exceeded")
 
+    def _hedging_enabled(self) -> bool:
+        """Hedging opt-in: gemini.hedge in config, else HDSP_LLM_HEDGE_ENABLED"""
+        hedge = self.config.get("gemini", {}).get("hedge")
+        if hedge is not None:
+            return bool(hedge)
+        return is_hedging_enabled()
+
+    def _configured_backup_keys(self, exclude_key: Optional[str]) -> list:
+        """gemini.apiKeys entries other than exclude_key"""
+        keys = self.config.get("gemini", {}).get("apiKeys") or []
+        return [k for k in keys if k and k.strip() and k != exclude_key]
+
+    def _warn_if_no_backup_key(self) -> None:
+        """Log once per process when hedging is on but can never hedge"""
+        global _warned_no_backup_key
+        if _warned_no_backup_key or self._get_key_manager() is not None:
+            return
+        primary_key = self.config.get("gemini", {}).get("apiKey")
+        if self._configured_backup_keys(primary_key):
+            return
+        _warned_no_backup_key = True
+        logger.warning(
+            "Gemini hedging is enabled but the request carries no backup key "
+            "(gemini.apiKeys) and HDSP_LLM_HEDGE_SERVER_KEYS is off; "
+            "requests will not be hedged"
+        )
+
+    async def _get_backup_gemini_key(self, exclude_key: str) -> Optional[str]:
+        """Another key for hedged requests: the request's, else the key manager's"""
+        backup_keys = self._configured_backup_keys(exclude_key)
+        if backup_keys:
+            return backup_keys[0]
+        key_manager = self._get_key_manager()
+        if key_manager is None or not hasattr(key_manager, "get_alternate_key"):
+            return None
+        try:
+            api_key, _ = await key_manager.get_alternate_key(exclude_key)
+        except Exception as e:
+            print(f"[LLMService] No backup key for hedging: {e}")
+            return None
+        return api_key
+
+    async def _call_gemini_hedged(
+        self, prompt: str, context: Optional[str] = None
+    ) -> str:
+        """Call Gemini, duplicating onto another key if the first byte is slow"""
+        primary_key, model, _ = self._get_gemini_config()
+        backup_key = await self._get_backup_gemini_key(primary_key)
+
+        async def primary(first_byte: asyncio.Event) -> str:
+            return await self._call_gemini(prompt, context, first_byte=first_byte)
+
+        async def backup(first_byte: asyncio.Event) -> str:
+            return await self._call_gemini(
+                prompt, context, api_key=backup_key, first_byte=first_byte
+            )
+
+        policy = get_hedge_policy(f"gemini:{model}")
+        return await policy.run(primary, backup if backup_key else None)
+
     async def _call_vllm(self, prompt: str, context: Optional[str] = None) -> str:
         """Call vLLM endpoint with OpenAI Compatible API"""
         model, url, headers = self._get_vllm_config()
@@ -479,8 +929,16 @@ class LLMService:
         messages = [{"role": "user", "content": full_prompt}]
         payload = self._build_openai_payload(model, messages, stream=False)
 
-        data = await self._request_json(url, payload, headers, provider="vLLM")
-        return self._parse_openai_response(data)
+        async with self._endpoint_slot("vLLM", url, headers) as slot, track_llm_call(
+            "vllm", model, "chat/completions", full_prompt
+        ) as call:
+            data = await self._request_json(
+                url, payload, headers, slot, provider="vLLM", call=call
+            )
+            response_text = self._parse_openai_response(data)
+            call.add_output(response_text)
+            self._record_usage(call, data)
+        return response_text
 
     async def _call_openai(self, prompt: str, context: Optional[str] = None) -> str:
         """Call OpenAI API"""
@@ -490,8 +948,21 @@ class LLMService:
             model, messages, max_tokens=2000, stream=False
         )
 
-        data = await self._request_json(url, payload, headers, provider="OpenAI")
-        return self._parse_openai_response(data)
+        prompt_text = self._build_prompt(prompt, context)
+        async with self._endpoint_slot("OpenAI", url, headers) as slot, track_llm_call(
+            "openai",
+            model,
+            "chat/completions",
+            prompt_text,
+            api_key=headers.get("Authorization"),
+        ) as call:
+            data = await self._request_json(
+                url, payload, headers, slot, provider="OpenAI", call=call
+            )
+            response_text = self._parse_openai_response(data)
+            call.add_output(response_text)
+            self._record_usage(call, data)
+        return response_text
 
     async def _call_gemini_stream(
         self, prompt: str, context: Optional[str] = None, max_retries: int = 3
@@ -503,22 +974,52 @@ class LLMService:
         """
         api_key, model, base_url = self._get_gemini_config()
         full_prompt = self._build_prompt(prompt, context)
-        payload = self._build_gemini_payload(full_prompt)
+        payload, cached_prefix = await self._build_gemini_request(
+            full_prompt, api_key, model
+        )
 
         url = f"{base_url}:streamGenerateContent?key={api_key}&alt=sse"
         print(f"[LLMService] Calling Gemini Stream API with model: {model}")
 
-        for attempt in range(max_retries):
+        breaker = self._get_breaker("gemini", model)
+        retry_budget = get_retry_budget()
+        retry_budget.record_request()
+
+        overload_wait = 0
+        # A rejected cache handle is resent at once, without using up an attempt
+        next_attempt = 0
+        while next_attempt < max_retries:
+            attempt = next_attempt
+            next_attempt += 1
+            if overload_wait:
+                print(f"[LLMService] Waiting {overload_wait}s before retry...")
+                await asyncio.sleep(overload_wait)
+                overload_wait = 0
+            # Open circuit: fail fast (not retried, routing fails over)
+            breaker.check()
             try:
                 timeout = aiohttp.ClientTimeout(total=120)
-                connector = aiohttp.TCPConnector(ssl=self._ssl_context)
-                async with aiohttp.ClientSession(
-                    timeout=timeout, connector=connector
-                ) as session:
-                    async with session.post(url, json=payload) as response:
+                session = self._http_pool.get_session(url)
+                async with self._get_limiter(
+                    "gemini", api_key
+                ).slot() as slot, track_llm_call(
+                    "gemini",
+                    model,
+                    "streamGenerateContent",
+                    full_prompt,
+                    attempt=attempt + 1,
+                    api_key=api_key,
+                    stream=True,
+                ) as call:
+                    async with session.post(
+                        url, json=payload, timeout=timeout
+                    ) as response:
+                        call.set_status(response.status)
+                        self._record_breaker_status(breaker, response.status)
                         # 429 Rate limit - return to client for key rotation
                         if response.status == 429:
                             error_text = await response.text()
+                            slot.mark_overload()
                             print(
                                 f"[LLMService] Rate limit (429) stream: {error_text[:100]}..."
                             )
@@ -527,34 +1028,40 @@ class LLMService:
                         # 503 Server overload - retry with backoff
                         if response.status == 503:
                             error_text = await response.text()
+                            slot.mark_overload()
                             print(
                                 f"[LLMService] Server overloaded (503) stream: {error_text[:100]}..."
                             )
-                            if attempt < max_retries - 1:
-                                wait_time = (2**attempt) * 5
-                                print(
-                                    f"[LLMService] Waiting {wait_time}s before retry..."
-                                )
-                                await asyncio.sleep(wait_time)
+                            if attempt < max_retries - 1 and retry_budget.try_spend():
+                                # Sleep after leaving the slot and the tracker
+                                overload_wait = (2**attempt) * 5
                                 continue
                             raise Exception(f"Server overloaded: {error_text}")
 
                         if response.status != 200:
                             error_text = await response.text()
+                            if cached_prefix and response.status in (400, 403, 404):
+                                payload = self._drop_gemini_cache_handle(
+                                    api_key, model, cached_prefix, full_prompt
+                                )
+                                cached_prefix = None
+                                next_attempt = attempt
+                                continue
                             print(f"[LLMService] Gemini Stream API Error: {error_text}")
                             raise Exception(f"Gemini API error: {error_text}")
 
                         # Success - stream the response
                         print("[LLMService] Successfully connected to Gemini stream")
-                        async for line in response.content:
-                            line_text = line.decode("utf-8").strip()
-                            content = self._parse_gemini_stream_line(line_text)
+                        async for data in iter_sse_json(response.content):
+                            content = self._extract_gemini_text(data)
                             if content:
+                                call.add_output(content)
                                 yield content
                         return  # Successfully completed streaming
 
             except asyncio.TimeoutError:
-                if attempt < max_retries - 1:
+                breaker.record_failure()
+                if attempt < max_retries - 1 and retry_budget.try_spend():
                     wait_time = (2**attempt) * 3
                     print(f"[LLMService] Timeout. Retrying in {wait_time}s...")
                     await asyncio.sleep(wait_time)
@@ -569,8 +1076,10 @@ class LLMService:
                 # API error - don't retry
                 if "API error" in error_msg:
                     raise
+                if isinstance(e, aiohttp.ClientError):
+                    breaker.record_failure()
                 # Network error - retry with delay
-                if attempt < max_retries - 1:
+                if attempt < max_retries - 1 and retry_budget.try_spend():
                     wait_time = (2**attempt) * 2
                     print(
                         f"[LLMService] Network error: {e}. Retrying in {wait_time}s..."
@@ -588,10 +1097,13 @@ class LLMService:
         messages = [{"role": "user", "content": full_prompt}]
         payload = self._build_openai_payload(model, messages, stream=True)
 
-        async for content in self._stream_response(
-            url, payload, headers, "vLLM", self._parse_openai_stream_line
-        ):
-            yield content
+        async with self._endpoint_slot("vLLM", url, headers) as slot, track_llm_call(
+            "vllm", model, "chat/completions", full_prompt, stream=True
+        ) as call:
+            async for content in self._stream_response(
+                url, payload, headers, slot, "vLLM", self._extract_openai_delta, call
+            ):
+                yield content
 
     async def _call_openai_stream(self, prompt: str, context: Optional[str] = None):
         """Call OpenAI API with streaming"""
@@ -601,10 +1113,19 @@ class LLMService:
             model, messages, max_tokens=2000, stream=True
         )
 
-        async for content in self._stream_response(
-            url, payload, headers, "OpenAI", self._parse_openai_stream_line
-        ):
-            yield content
+        prompt_text = self._build_prompt(prompt, context)
+        async with self._endpoint_slot("OpenAI", url, headers) as slot, track_llm_call(
+            "openai",
+            model,
+            "chat/completions",
+            prompt_text,
+            api_key=headers.get("Authorization"),
+            stream=True,
+        ) as call:
+            async for content in self._stream_response(
+                url, payload, headers, slot, "OpenAI", self._extract_openai_delta, call
+            ):
+                yield content
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -613,7 +1134,10 @@ class LLMService:
 
 
 async def call_llm(
-    prompt: str, config: Dict[str, Any], context: Optional[str] = None
+    prompt: str,
+    config: Dict[str, Any],
+    context: Optional[str] = None,
+    cache: bool = False,
 ) -> str:
     """
     Convenience function to call LLM with the given config.
@@ -622,12 +1146,13 @@ async def call_llm(
         prompt: The prompt to send to the LLM
         config: LLM configuration dictionary
         context: Optional context to include
+        cache: Use the shared response cache
 
     Returns:
         The LLM response string
     """
     service = LLMService(config)
-    return await service.generate_response(prompt, context)
+    return await service.generate_response(prompt, context, cache=cache)
 
 
 async def call_llm_stream(
@@ -0,0 +1,34 @@
+"""
+Matryoshka Truncation - Shorter embeddings from models trained for it.
+
+Matryoshka-trained models (Qwen3-Embedding, nomic-embed, ...) put the
+most information in the leading dimensions, so the first N components of
+a vector, re-normalized, are a usable N-dimensional embedding. Storing
+1024 of qwen3-embedding-8b's 8192 dimensions cuts vector memory and scan
+cost 8x for a small recall loss.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+
+def truncated_dimension(native: int, truncate_dim: Optional[int]) -> int:
+    """Dimension of vectors after truncation"""
+    if truncate_dim and truncate_dim < native:
+        return truncate_dim
+    return native
+
+
+def truncate_embeddings(
+    vectors: List[List[float]], truncate_dim: Optional[int]
+) -> List[List[float]]:
+    """Keep the first truncate_dim components of each vector, unit-normalized"""
+    if not vectors:
+        return vectors
+    native = len(vectors[0])
+    if truncated_dimension(native, truncate_dim) == native:
+        return vectors
+    matrix = np.asarray(vectors, dtype=np.float32)[:, :truncate_dim]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return (matrix / np.where(norms == 0, 1.0, norms)).tolist()
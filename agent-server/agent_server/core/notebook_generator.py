@@ -1,7 +1,17 @@
 """
 Notebook Generator - Creates Jupyter notebooks from prompts using LLM
+
+Cells are generated concurrently (bounded by a semaphore) and assembled in
+plan order. In batched mode consecutive cells are requested in one
+structured LLM call; cells missing from a batch response are generated
+individually.
+
+Environment Variables:
+    HDSP_NOTEBOOK_CELL_CONCURRENCY: Concurrent cell LLM calls (default: 4)
+    HDSP_NOTEBOOK_CELL_BATCH_SIZE: Cells per LLM call, 0/1 = one call per cell (default: 0)
 """
 
+import asyncio
 import json
 import os
 import re
@@ -13,9 +23,21 @@ from typing import Any, Dict, List, Optional
 class NotebookGenerator:
     """Generate Jupyter notebooks from natural language prompts"""
 
-    def __init__(self, llm_service, task_manager):
+    def __init__(
+        self,
+        llm_service,
+        task_manager,
+        max_concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ):
         self.llm_service = llm_service
         self.task_manager = task_manager
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get("HDSP_NOTEBOOK_CELL_CONCURRENCY", 4))
+        if batch_size is None:
+            batch_size = int(os.environ.get("HDSP_NOTEBOOK_CELL_BATCH_SIZE", 0))
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_size = max(1, batch_size)
 
     def _extract_json_from_response(self, response_text: str) -> Optional[Dict]:
         """Extract JSON object from LLM response text"""
@@ -28,9 +50,16 @@ class NotebookGenerator:
                 return None
         return None
 
-    async def _call_llm_for_json(self, prompt: str, fallback: dict) -> dict:
+    async def _call_llm_for_json(
+        self, prompt: str, fallback: dict, cache: bool = False
+    ) -> dict:
         """Call LLM and extract JSON response, with fallback"""
-        response_text = await self.llm_service.generate_response(prompt)
+        # Only responses that yield JSON are cached
+        response_text = await self.llm_service.generate_response(
+            prompt,
+            cache=cache,
+            cache_if=lambda r: self._extract_json_from_response(r) is not None,
+        )
         result = self._extract_json_from_response(response_text)
         return result if result else fallback
 
@@ -107,7 +136,7 @@ JSON만 응답하세요:"""
             "estimated_cells": 10,
             "analysis_type": "general",
         }
-        return await self._call_llm_for_json(analysis_prompt, fallback)
+        return await self._call_llm_for_json(analysis_prompt, fallback, cache=True)
 
     async def _create_notebook_plan(
         self, prompt: str, analysis: Dict[str, Any]
@@ -162,43 +191,125 @@ JSON만 응답하세요:"""
     async def _generate_cells(
         self, task_id: str, plan: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
-        """Generate actual cell content based on plan"""
-        cells = []
+        """Generate actual cell content based on plan (concurrently, in plan order)"""
         planned_cells = plan.get("cells", [])
         total_cells = len(planned_cells)
-
-        for idx, cell_plan in enumerate(planned_cells):
-            # Update progress (30% -> 80%)
-            progress = 30 + int((idx / total_cells) * 50)
+        contents: List[Optional[str]] = [None] * total_cells
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        completed = 0
+
+        def report(count: int) -> None:
+            # Update progress (30% -> 80%) as cells finish
+            nonlocal completed
+            completed += count
+            progress = 30 + int((completed / total_cells) * 50)
             self.task_manager.update_progress(
-                task_id, progress, f"셀 생성 중... ({idx+1}/{total_cells})"
+                task_id, progress, f"셀 생성 중... ({completed}/{total_cells})"
             )
 
-            cell_type = cell_plan.get("type", "code")
-            purpose = cell_plan.get("purpose", "")
-            content_hint = cell_plan.get("content_hint", "")
+        async def run_cell(idx: int) -> None:
+            async with semaphore:
+                contents[idx] = await self._generate_cell_content(planned_cells[idx])
+            report(1)
+
+        async def run_batch(indices: List[int]) -> None:
+            async with semaphore:
+                batch = await self._generate_cell_batch(
+                    [planned_cells[i] for i in indices]
+                )
+            done = [i for i, content in zip(indices, batch) if content is not None]
+            for i, content in zip(indices, batch):
+                contents[i] = content
+            if done:
+                report(len(done))
+            # Cells missing from the batch response are generated one by one
+            await asyncio.gather(*[run_cell(i) for i in indices if i not in done])
+
+        indices = list(range(total_cells))
+        if self.batch_size > 1:
+            jobs = [
+                run_batch(indices[i : i + self.batch_size])
+                for i in range(0, total_cells, self.batch_size)
+            ]
+        else:
+            jobs = [run_cell(i) for i in indices]
 
-            if cell_type == "markdown":
-                content = await self._generate_markdown_cell(purpose, content_hint)
+        tasks = [asyncio.ensure_future(job) for job in jobs]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # One failed cell fails the notebook; stop the in-flight calls
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return [
+            self._build_cell(cell_plan.get("type", "code"), content)
+            for cell_plan, content in zip(planned_cells, contents)
+        ]
+
+    async def _generate_cell_content(self, cell_plan: Dict[str, Any]) -> str:
+        """Generate the content of one planned cell"""
+        purpose = cell_plan.get("purpose", "")
+        content_hint = cell_plan.get("content_hint", "")
+        if cell_plan.get("type", "code") == "markdown":
+            return await self._generate_markdown_cell(purpose, content_hint)
+        return await self._generate_code_cell(purpose, content_hint)
+
+    async def _generate_cell_batch(
+        self, cell_plans: List[Dict[str, Any]]
+    ) -> List[Optional[str]]:
+        """Generate several cells in one structured call (None = missing)"""
+        cell_lines = "\n".join(
+            f"{i}. [{plan.get('type', 'code')}] 목적: {plan.get('purpose', '')}"
+            f" / 힌트: {plan.get('content_hint', '')}"
+            for i, plan in enumerate(cell_plans)
+        )
+        prompt = f"""다음 Jupyter 노트북 셀들을 순서대로 작성해주세요:
+
+{cell_lines}
+
+- markdown 셀: 마크다운 내용만 작성
+- code 셀: 실행 가능한 Python 코드만 작성 (주석은 한국어로 간단히)
+
+다음 JSON 형식으로 응답하세요:
+{{"cells": [{{"index": 0, "content": "셀 내용"}}, ...]}}
+
+JSON만 응답하세요:"""
+
+        result = await self._call_llm_for_json(prompt, {"cells": []})
+        contents: List[Optional[str]] = [None] * len(cell_plans)
+        for item in result.get("cells") or []:
+            if not isinstance(item, dict):
+                continue
+            idx = item.get("index")
+            content = item.get("content")
+            if not isinstance(idx, int) or not 0 <= idx < len(cell_plans):
+                continue
+            if not isinstance(content, str) or not content.strip():
+                continue
+            if cell_plans[idx].get("type", "code") == "markdown":
+                contents[idx] = content.strip()
             else:
-                content = await self._generate_code_cell(purpose, content_hint)
+                contents[idx] = self._remove_code_block_markers(content.strip())
+        return contents
 
-            # Jupyter notebook source requires each line to end with \n (except the last line)
-            lines = content.split("\n")
-            source_lines = (
-                [line + "\n" for line in lines[:-1]] + [lines[-1]] if lines else []
-            )
+    def _build_cell(self, cell_type: str, content: str) -> Dict[str, Any]:
+        """Build an nbformat cell dict from generated content"""
+        # Jupyter notebook source requires each line to end with \n (except the last line)
+        lines = content.split("\n")
+        source_lines = (
+            [line + "\n" for line in lines[:-1]] + [lines[-1]] if lines else []
+        )
 
-            cells.append(
-                {"cell_type": cell_type, "metadata": {}, "source": source_lines}
-            )
+        cell = {"cell_type": cell_type, "metadata": {}, "source": source_lines}
 
-            # Add execution_count for code cells
-            if cell_type == "code":
-                cells[-1]["execution_count"] = None
-                cells[-1]["outputs"] = []
+        # Add execution_count for code cells
+        if cell_type == "code":
+            cell["execution_count"] = None
+            cell["outputs"] = []
 
-        return cells
+        return cell
 
     async def _generate_markdown_cell(self, purpose: str, hint: str) -> str:
         """Generate markdown cell content"""
@@ -0,0 +1,366 @@
+"""
+NumPy Vector Store - Exact in-process search for small knowledge bases.
+
+The shipped knowledge base is a few dozen KB of markdown; running Qdrant
+(with its on-disk storage and locking) for it costs more at startup than
+searching it exactly. NumpyVectorStore keeps:
+
+- one contiguous float32 matrix of unit-normalized vectors
+- parallel arrays of point IDs and payloads
+- boolean filter masks, computed once per (field, value) and reused
+  until the next write
+
+Search is a single matrix-vector product shared by every query in a
+batch, then argpartition for the top k. The store persists to a snapshot
+directory: each save writes vectors.npy + points.json into a fresh
+snapshot-* subdirectory and then atomically replaces the CURRENT pointer
+file, so a crash never pairs files from different saves. On startup the
+matrix is memory mapped from the snapshot and only copied into RAM on
+the first write.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agent_server.core.vector_store import (
+    StoredPoint,
+    VectorQuery,
+    VectorStore,
+    matches_filters,
+)
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_VERSION = 1
+# Names the snapshot-* subdirectory holding the current snapshot
+_POINTER_FILE = "CURRENT"
+
+# Searches over more floats than this run in a worker thread
+_INLINE_SEARCH_FLOATS = 4_000_000
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-memory VectorStore with exact cosine search.
+
+    Usage:
+        store = NumpyVectorStore(Path("~/.hdsp_agent/vector_store/hdsp_knowledge"))
+        await store.ensure_collection(384)
+        hits = await store.search(vector, [VectorQuery(limit=5)])
+        await store.flush()  # write the snapshot
+    """
+
+    backend = "numpy"
+
+    def __init__(self, directory: Optional[Path] = None):
+        self._dir = directory
+        self._dimension = 0
+        # Rows [0, size) are live; capacity grows by doubling
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._masks: Dict[Tuple[str, Any], np.ndarray] = {}
+        self._dirty = False
+        # Bumped on every write, so a save only clears _dirty if nothing
+        # changed while it was writing
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    # ========== VectorStore ==========
+
+    async def ensure_collection(self, dimension: int) -> None:
+        if self._dir is not None and not self._dimension:
+            await asyncio.to_thread(self._load_snapshot)
+        if self._dimension and self._dimension != dimension:
+            logger.warning(
+                f"Vector snapshot dimension {self._dimension} != {dimension}, "
+                "discarding it"
+            )
+            self._reset(dimension)
+        elif not self._dimension:
+            self._reset(dimension)
+        logger.info(
+            f"NumPy vector store ready: {self._size} points, dim={self._dimension}"
+        )
+
+    async def count(self) -> int:
+        return self._size
+
+    async def scroll(
+        self, fields: Optional[List[str]] = None, page_size: int = 1024
+    ) -> AsyncIterator[List[StoredPoint]]:
+        with self._lock:
+            points = [
+                StoredPoint(point_id, self._select(payload, fields))
+                for point_id, payload in zip(self._ids, self._payloads)
+            ]
+        for start in range(0, len(points), page_size):
+            yield points[start : start + page_size]
+
+    async def upsert(
+        self,
+        ids: List[str],
+        vectors: List[List[float]],
+        payloads: List[Dict[str, Any]],
+    ) -> None:
+        if not ids:
+            return
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            self._writable(self._size + len(ids))
+            for point_id, vector, payload in zip(ids, matrix, payloads):
+                row = self._rows.get(point_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._rows[point_id] = row
+                    self._ids.append(point_id)
+                    self._payloads.append(payload)
+                else:
+                    self._payloads[row] = payload
+                self._vectors[row] = vector
+            self._changed()
+
+    async def overwrite_payloads(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        with self._lock:
+            for point_id, payload in payloads.items():
+                row = self._rows.get(point_id)
+                if row is not None:
+                    self._payloads[row] = payload
+            self._changed()
+
+    async def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            self._delete_rows([self._rows[i] for i in set(ids) if i in self._rows])
+
+    async def delete_where(self, filters: Dict[str, Any]) -> None:
+        with self._lock:
+            mask = self._filter_mask(filters)
+            self._delete_rows(np.flatnonzero(mask).tolist())
+
+    async def search(
+        self, vector: List[float], queries: List[VectorQuery]
+    ) -> List[List[StoredPoint]]:
+        if not queries:
+            return []
+        if self._size * max(self._dimension, 1) > _INLINE_SEARCH_FLOATS:
+            return await asyncio.to_thread(self._search, vector, queries)
+        return self._search(vector, queries)
+
+    async def flush(self) -> None:
+        if self._dir is not None and self._dirty:
+            await asyncio.to_thread(self._save_snapshot)
+
+    async def close(self) -> None:
+        await self.flush()
+
+    # ========== Search ==========
+
+    def _search(
+        self, vector: List[float], queries: List[VectorQuery]
+    ) -> List[List[StoredPoint]]:
+        query = _normalize(np.asarray(vector, dtype=np.float32)[None, :])[0]
+        with self._lock:
+            if not self._size:
+                return [[] for _ in queries]
+            # One product serves every query in the batch
+            scores = self._vectors[: self._size] @ query
+            return [self._top_k(scores, q) for q in queries]
+
+    def _top_k(self, scores: np.ndarray, query: VectorQuery) -> List[StoredPoint]:
+        mask = None
+        if query.filters:
+            mask = self._filter_mask(query.filters)
+        if query.ids is not None:
+            id_mask = np.zeros(self._size, dtype=bool)
+            id_mask[[self._rows[i] for i in query.ids if i in self._rows]] = True
+            mask = id_mask if mask is None else mask & id_mask
+        if query.score_threshold is not None:
+            above = scores >= query.score_threshold
+            mask = above if mask is None else mask & above
+
+        if mask is None:
+            candidates = scores
+            rows = None
+        else:
+            rows = np.flatnonzero(mask)
+            candidates = scores[rows]
+        k = min(query.limit, len(candidates))
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-candidates, k - 1)[:k]
+        top = top[np.argsort(-candidates[top], kind="stable")]
+        if rows is not None:
+            top = rows[top]
+        return [
+            StoredPoint(self._ids[r], self._payloads[r], float(scores[r])) for r in top
+        ]
+
+    def _filter_mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        """AND of the cached per-(field, value) masks"""
+        mask = np.ones(self._size, dtype=bool)
+        for key, value in filters.items():
+            cache_key = (key, tuple(value) if isinstance(value, list) else value)
+            field_mask = self._masks.get(cache_key)
+            if field_mask is None:
+                field_mask = np.fromiter(
+                    (matches_filters(p, {key: value}) for p in self._payloads),
+                    dtype=bool,
+                    count=self._size,
+                )
+                self._masks[cache_key] = field_mask
+            mask &= field_mask
+        return mask
+
+    # ========== Storage ==========
+
+    def _reset(self, dimension: int) -> None:
+        with self._lock:
+            self._dimension = dimension
+            self._vectors = np.zeros((0, dimension), dtype=np.float32)
+            self._size = 0
+            self._ids = []
+            self._payloads = []
+            self._rows = {}
+            self._changed()
+
+    def _writable(self, rows: int) -> None:
+        """Make the matrix an in-memory array with room for `rows` rows"""
+        capacity = self._vectors.shape[0]
+        if rows <= capacity and not isinstance(self._vectors, np.memmap):
+            return
+        new_capacity = max(rows, capacity * 2 if rows > capacity else capacity, 64)
+        grown = np.zeros((new_capacity, self._dimension), dtype=np.float32)
+        grown[: self._size] = self._vectors[: self._size]
+        self._vectors = grown
+
+    def _delete_rows(self, rows: List[int]) -> None:
+        """Delete rows, filling each hole with the last live row"""
+        if not rows:
+            return
+        self._writable(self._size)
+        for row in sorted(rows, reverse=True):
+            last = self._size - 1
+            del self._rows[self._ids[row]]
+            if row != last:
+                self._vectors[row] = self._vectors[last]
+                self._ids[row] = self._ids[last]
+                self._payloads[row] = self._payloads[last]
+                self._rows[self._ids[row]] = row
+            self._ids.pop()
+            self._payloads.pop()
+            self._size -= 1
+        self._changed()
+
+    def _changed(self) -> None:
+        self._masks.clear()
+        self._dirty = True
+        self._generation += 1
+
+    @staticmethod
+    def _select(payload: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+        if fields is None:
+            return payload
+        return {k: payload[k] for k in fields if k in payload}
+
+    # ========== Snapshot ==========
+
+    def _save_snapshot(self) -> None:
+        """Write a new snapshot directory, then swap the pointer to it"""
+        with self._save_lock:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                vectors = np.ascontiguousarray(self._vectors[: self._size])
+                points = {
+                    "version": _SNAPSHOT_VERSION,
+                    "dimension": self._dimension,
+                    "ids": list(self._ids),
+                    "payloads": list(self._payloads),
+                }
+                generation = self._generation
+
+            name = f"snapshot-{uuid.uuid4().hex}"
+            snapshot_dir = self._dir / name
+            snapshot_dir.mkdir()
+            with open(snapshot_dir / "vectors.npy", "wb") as f:
+                np.save(f, vectors)
+                f.flush()
+                os.fsync(f.fileno())
+            with open(snapshot_dir / "points.json", "w", encoding="utf-8") as f:
+                f.write(json.dumps(points, ensure_ascii=False))
+                f.flush()
+                os.fsync(f.fileno())
+            pointer_tmp = self._dir / f"{_POINTER_FILE}.tmp"
+            pointer_tmp.write_text(name)
+            os.replace(pointer_tmp, self._dir / _POINTER_FILE)
+
+            with self._lock:
+                if self._generation == generation:
+                    self._dirty = False
+            self._remove_stale_snapshots(keep=name)
+        logger.info(f"Vector snapshot saved: {len(points['ids'])} points")
+
+    def _remove_stale_snapshots(self, keep: str) -> None:
+        """Delete older (or half-written) snapshots and pre-pointer files"""
+        for path in self._dir.glob("snapshot-*"):
+            if path.name != keep:
+                shutil.rmtree(path, ignore_errors=True)
+        for name in ("vectors.npy", "points.json"):
+            (self._dir / name).unlink(missing_ok=True)
+
+    def _snapshot_dir(self) -> Optional[Path]:
+        """Directory of the current snapshot (the top level before pointers)"""
+        pointer = self._dir / _POINTER_FILE
+        if pointer.exists():
+            return self._dir / pointer.read_text().strip()
+        if (self._dir / "points.json").exists():
+            return self._dir
+        return None
+
+    def _load_snapshot(self) -> None:
+        """Memory-map the snapshot (a bad snapshot is ignored)"""
+        try:
+            snapshot_dir = self._snapshot_dir()
+            if snapshot_dir is None:
+                return
+            points = json.loads((snapshot_dir / "points.json").read_text())
+            vectors = np.load(snapshot_dir / "vectors.npy", mmap_mode="r")
+            if (
+                points.get("version") != _SNAPSHOT_VERSION
+                or vectors.shape != (len(points["ids"]), points["dimension"])
+                or len(points["payloads"]) != len(points["ids"])
+            ):
+                raise ValueError("snapshot files disagree")
+        except Exception as e:
+            logger.warning(f"Ignoring vector snapshot in {self._dir}: {e}")
+            return
+
+        with self._lock:
+            self._dimension = points["dimension"]
+            self._vectors = vectors
+            self._size = len(points["ids"])
+            self._ids = points["ids"]
+            self._payloads = points["payloads"]
+            self._rows = {point_id: row for row, point_id in enumerate(self._ids)}
+            self._masks.clear()
+            self._dirty = False
+        logger.info(f"Vector snapshot loaded: {self._size} points")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """Unit-normalize rows, so dot products are cosine similarities"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
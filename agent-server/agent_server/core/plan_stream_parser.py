@@ -0,0 +1,134 @@
+"""
+Plan Stream Parser - Incremental JSON parser for streamed plan responses
+
+Consumes LLM output chunk by chunk and returns each ``plan.steps[i]`` object
+as soon as its closing brace arrives, so the client can start on step 1
+while later steps are still being generated.
+
+Only structure is tracked (strings, escapes, object keys, nesting); the
+completed step text is handed to json.loads. Text before the first "{"
+(e.g. a ```json fence) is ignored.
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalPlanParser:
+    """
+    Streaming extractor for ``{"plan": {"steps": [...]}}`` step objects.
+
+    Usage:
+        parser = IncrementalPlanParser()
+        async for chunk in llm_stream:
+            for step in parser.feed(chunk):
+                ...
+    """
+
+    # Key path from the root object to the steps array
+    STEPS_PATH: Tuple[str, ...] = ("plan", "steps")
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        # Frames: {"type": "obj"|"arr", "start": int, "key": str, "expect_key": bool}
+        self._stack: List[Dict[str, Any]] = []
+        self.steps_emitted = 0
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Add streamed text; return steps completed by this chunk"""
+        self._buffer += chunk
+        completed: List[Dict[str, Any]] = []
+
+        buffer = self._buffer
+        while self._pos < len(buffer) and not self.done:
+            char = buffer[self._pos]
+
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._push("obj")
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        raw = buffer[self._string_start : self._pos + 1]
+                        self._stack[-1]["key"] = json.loads(raw)
+                self._pos += 1
+                continue
+
+            if char == '"':
+                top = self._stack[-1] if self._stack else None
+                self._in_string = True
+                self._string_start = self._pos
+                self._string_is_key = bool(
+                    top and top["type"] == "obj" and top["expect_key"]
+                )
+            elif char == "{":
+                self._push("obj")
+            elif char == "[":
+                self._push("arr")
+            elif char in "}]":
+                step = self._pop()
+                if step is not None:
+                    completed.append(step)
+            elif char == ":":
+                if self._stack and self._stack[-1]["type"] == "obj":
+                    self._stack[-1]["expect_key"] = False
+            elif char == ",":
+                if self._stack and self._stack[-1]["type"] == "obj":
+                    self._stack[-1]["expect_key"] = True
+            self._pos += 1
+
+        return completed
+
+    def _push(self, frame_type: str) -> None:
+        self._stack.append(
+            {"type": frame_type, "start": self._pos, "key": None, "expect_key": True}
+        )
+
+    def _pop(self) -> Optional[Dict[str, Any]]:
+        """Close the current container; return it if it was a plan step"""
+        if not self._stack:
+            return None
+        frame = self._stack.pop()
+        if not self._stack:
+            self.done = True
+            return None
+        if frame["type"] != "obj" or not self._in_steps_array():
+            return None
+
+        raw = self._buffer[frame["start"] : self._pos + 1]
+        try:
+            step = json.loads(raw)
+        except json.JSONDecodeError as e:
+            logger.debug(f"Skipping unparsable streamed step: {e}")
+            return None
+        self.steps_emitted += 1
+        return step
+
+    def _in_steps_array(self) -> bool:
+        """True if the top of the stack is the plan.steps array"""
+        depth = len(self.STEPS_PATH)
+        if len(self._stack) != depth + 1 or self._stack[-1]["type"] != "arr":
+            return False
+        return all(
+            self._stack[i]["type"] == "obj" and self._stack[i]["key"] == key
+            for i, key in enumerate(self.STEPS_PATH)
+        )
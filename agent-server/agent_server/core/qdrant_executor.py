@@ -0,0 +1,68 @@
+"""
+Qdrant Executor - Non-blocking Qdrant access from the async server.
+
+QdrantClient is synchronous: called inside `async def` it holds the
+event loop for the whole request and stalls every concurrent chat
+stream. QdrantExecutor gives RAG code one awaitable entry point:
+
+- server/cloud mode: the client is an AsyncQdrantClient, awaited directly
+- local mode: the embedded (file-based) client is not safe for concurrent
+  use, so its calls run one at a time on a dedicated worker thread
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QdrantExecutor:
+    """
+    Awaitable wrapper around a sync or async Qdrant client.
+
+    Usage:
+        qdrant = QdrantExecutor(client)
+        response = await qdrant.call("query_points", collection_name=..., query=...)
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._is_async = inspect.iscoroutinefunction(
+            getattr(client, "query_points", None)
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if not self._is_async:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="qdrant-local"
+            )
+
+    @property
+    def is_async(self) -> bool:
+        return self._is_async
+
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """Call `client.<method>(*args, **kwargs)` without blocking the loop"""
+        fn = getattr(self.client, method)
+        if self._is_async:
+            return await fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    async def close(self) -> None:
+        """Close the client and stop the worker thread"""
+        try:
+            if self._is_async:
+                await self.client.close()
+            else:
+                await self.call("close")
+        except Exception as e:
+            logger.debug(f"Qdrant client close failed: {e}")
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,128 @@
+"""
+Query Embedder - LRU cache and micro-batching in front of embed_query.
+
+A plan request embeds the same query several times (once per detected
+library, then for the general search), and concurrent users each embed
+their own query with a separate model call. QueryEmbeddingBatcher:
+
+- answers repeated queries from an in-memory LRU cache
+- joins concurrent requests for the same query onto one computation
+- gathers queries arriving within `max_wait` seconds into one batch
+  (up to `max_batch`) and encodes them in a single model call
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Encodes a batch of queries, in order
+QueryEncoder = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class QueryEmbeddingBatcher:
+    """
+    Cached, micro-batched query embedding.
+
+    Usage:
+        batcher = QueryEmbeddingBatcher(encode_queries, max_wait=0.005)
+        vector = await batcher.embed("how to read csv with dask")
+    """
+
+    def __init__(
+        self,
+        encode: QueryEncoder,
+        max_batch: int = 32,
+        max_wait: float = 0.005,
+        cache_size: int = 1024,
+    ):
+        self._encode = encode
+        self._max_batch = max(1, max_batch)
+        self._max_wait = max(0.0, max_wait)
+        self._cache_size = max(0, cache_size)
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        # Queries waiting for the next batch
+        self._waiting: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Running batches (the loop only keeps weak references to tasks)
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.batches = 0
+        self.encoded = 0
+
+    async def embed(self, query: str) -> List[float]:
+        """Embedding for one query"""
+        vector = self._cache.get(query)
+        if vector is not None:
+            self._cache.move_to_end(query)
+            self.hits += 1
+            return list(vector)
+
+        future = self._waiting.get(query)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._waiting[query] = future
+            if len(self._waiting) >= self._max_batch:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self._max_wait, self._dispatch)
+        # Shielded: one cancelled caller must not cancel the shared result
+        return list(await asyncio.shield(future))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "batches": self.batches,
+            "encoded": self.encoded,
+        }
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._waiting = self._waiting, {}
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: Dict[str, asyncio.Future]) -> None:
+        queries = list(batch)
+        try:
+            vectors = await self._encode(queries)
+        except asyncio.CancelledError:
+            # Waiters are shielded from the task, so fail them explicitly
+            self._fail(batch, RuntimeError("Query embedding batch was cancelled"))
+            raise
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        self.batches += 1
+        self.encoded += len(queries)
+        for query, vector in zip(queries, vectors):
+            self._remember(query, vector)
+            future = batch[query]
+            if not future.done():
+                future.set_result(vector)
+
+    @staticmethod
+    def _fail(batch: Dict[str, asyncio.Future], error: BaseException) -> None:
+        for future in batch.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def _remember(self, query: str, vector: List[float]) -> None:
+        if self._cache_size == 0:
+            return
+        self._cache[query] = vector
+        self._cache.move_to_end(query)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
@@ -2,7 +2,7 @@
 RAG Manager - Main orchestrator for the Local RAG system.
 
 Responsibilities:
-- Qdrant client lifecycle management
+- Vector store lifecycle management (Qdrant or in-process NumPy)
 - Collection creation and schema management
 - Document indexing orchestration
 - Search coordination
@@ -14,25 +14,38 @@ Design Patterns:
 - Graceful degradation (fallback to keyword search if RAG fails)
 """
 
+import asyncio
 import hashlib
 import logging
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+from hdsp_agent_core.llm.metrics import LATENCY_BUCKETS, timed
+from hdsp_agent_core.llm.token_counter import get_token_counter
+
+from agent_server.core.vector_store import QdrantVectorStore
 
 if TYPE_CHECKING:
     from hdsp_agent_core.models.rag import RAGConfig
 
+    from agent_server.core.index_manifest import IndexManifest
+    from agent_server.core.index_pipeline import IndexRunStats, PendingPoint
+    from agent_server.core.vector_store import VectorStore
+
 logger = logging.getLogger(__name__)
 
+# Namespace for content-addressed chunk point IDs
+_CHUNK_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "hdsp-agent/rag/chunk")
+
 
 class RAGManager:
     """
     Central manager for RAG operations.
 
     Coordinates all RAG components:
-    - Qdrant vector database
+    - Vector store (Qdrant or in-process NumPy)
     - Embedding service
     - Retriever (hybrid search)
     - Watchdog (file monitoring)
@@ -60,11 +73,16 @@ class RAGManager:
         from hdsp_agent_core.models.rag import get_default_rag_config
 
         self._config = config or get_default_rag_config()
-        self._client = None
+        self._store = None
         self._embedding_service = None
         self._retriever = None
         self._watchdog = None
+        self._manifest = None
+        self._lexical_index = None
         self._ready = False
+        # Serializes knowledge base scans and watchdog syncs
+        self._index_lock = asyncio.Lock()
+        self._sync_tasks: Set[asyncio.Task] = set()
         self._index_stats = {
             "total_documents": 0,
             "total_chunks": 0,
@@ -84,9 +102,9 @@ class RAGManager:
             return False
 
         try:
-            # 1. Initialize Qdrant client
-            self._client = self._create_qdrant_client()
-            logger.info("Qdrant client initialized")
+            # 1. Initialize vector store (Qdrant or in-process NumPy)
+            self._store = self._create_vector_store()
+            logger.info(f"Vector store initialized (backend={self._store.backend})")
 
             # 2. Initialize embedding service (local or vLLM backend)
             import os
@@ -95,6 +113,8 @@ class RAGManager:
             if embedding_backend == "vllm":
                 from agent_server.core.vllm_embedding_service import get_vllm_embedding_service
                 self._embedding_service = get_vllm_embedding_service(self._config.embedding)
+                # Ask the server for the model's dimension
+                await self._embedding_service.ensure_dimension()
                 logger.info(
                     f"vLLM Embedding service initialized (dim={self._embedding_service.dimension})"
                 )
@@ -110,15 +130,25 @@ class RAGManager:
             # 3. Ensure collection exists
             await self._ensure_collection()
 
-            # 4. Initialize retriever
+            # 4. Initialize retriever (BM25 index filled during indexing)
             from agent_server.core.retriever import Retriever
 
+            if self._config.hybrid.is_enabled():
+                from agent_server.core.lexical_index import LexicalIndex
+
+                self._lexical_index = LexicalIndex(
+                    k1=self._config.hybrid.bm25_k1, b=self._config.hybrid.bm25_b
+                )
+
             self._retriever = Retriever(
-                client=self._client,
+                store=self._store,
                 embedding_service=self._embedding_service,
                 config=self._config,
+                lexical_index=self._lexical_index,
+            )
+            logger.info(
+                f"Retriever initialized (hybrid={self._lexical_index is not None})"
             )
-            logger.info("Retriever initialized")
 
             # 5. Start watchdog (file monitoring)
             if self._config.watchdog.enabled:
@@ -147,14 +177,47 @@ class RAGManager:
             self._watchdog.stop()
             logger.info("Watchdog stopped")
 
-        # Qdrant client doesn't need explicit cleanup for local mode
         self._ready = False
+        if self._store is not None:
+            await self._store.close()
+            logger.info("Vector store closed")
         logger.info("RAG system shutdown complete")
 
+    def _create_vector_store(self) -> "VectorStore":
+        """Create the vector store for the configured backend."""
+        backend = self._config.vector_store.get_backend()
+        collection_name = self._config.qdrant.collection_name
+
+        if backend == "numpy":
+            from agent_server.core.numpy_vector_store import NumpyVectorStore
+
+            snapshot_dir = Path(self._config.vector_store.get_snapshot_dir())
+            logger.info(f"Using in-process NumPy vector store: {snapshot_dir}")
+            return NumpyVectorStore(snapshot_dir / collection_name)
+
+        elif backend == "qdrant":
+            cfg = self._config.qdrant
+            return QdrantVectorStore(
+                self._create_qdrant_client(),
+                collection_name,
+                quantization=cfg.get_quantization(),
+                oversampling=cfg.quantization_oversampling,
+                rescore=cfg.quantization_rescore,
+            )
+
+        else:
+            raise ValueError(f"Unknown vector store backend: {backend}")
+
     def _create_qdrant_client(self):
-        """Create Qdrant client based on configuration mode."""
+        """
+        Create Qdrant client based on configuration mode.
+
+        Server and cloud modes get an AsyncQdrantClient; the embedded local
+        client is synchronous and is driven through QdrantExecutor's
+        single worker thread.
+        """
         try:
-            from qdrant_client import QdrantClient
+            from qdrant_client import AsyncQdrantClient, QdrantClient
         except ImportError:
             raise ImportError(
                 "qdrant-client is required for RAG. "
@@ -175,40 +238,21 @@ class RAGManager:
             # Docker or external server
             url = cfg.get_url()  # Use get_url() for env override
             logger.info(f"Connecting to Qdrant server: {url}")
-            return QdrantClient(url=url)
+            return AsyncQdrantClient(url=url)
 
         elif mode == "cloud":
             # Qdrant Cloud
             url = cfg.get_url()  # Use get_url() for env override
             logger.info("Connecting to Qdrant Cloud")
-            return QdrantClient(url=url, api_key=cfg.api_key)
+            return AsyncQdrantClient(url=url, api_key=cfg.api_key)
 
         else:
             raise ValueError(f"Unknown Qdrant mode: {mode}")
 
     async def _ensure_collection(self) -> None:
         """Create collection if it doesn't exist."""
-        from qdrant_client.models import Distance, VectorParams
-
-        collection_name = self._config.qdrant.collection_name
-
         try:
-            collections = self._client.get_collections().collections
-            exists = any(c.name == collection_name for c in collections)
-
-            if not exists:
-                logger.info(f"Creating collection: {collection_name}")
-                self._client.create_collection(
-                    collection_name=collection_name,
-                    vectors_config=VectorParams(
-                        size=self._embedding_service.dimension, distance=Distance.COSINE
-                    ),
-                )
-                logger.info(
-                    f"Collection created with dimension {self._embedding_service.dimension}"
-                )
-            else:
-                logger.info(f"Collection exists: {collection_name}")
+            await self._store.ensure_collection(self._embedding_service.dimension)
         except Exception as e:
             logger.error(f"Failed to ensure collection: {e}")
             raise
@@ -224,12 +268,10 @@ class RAGManager:
                 return
 
             self._watchdog = WatchdogService(
-                watch_path=knowledge_path,
-                config=self._config.watchdog,
-                on_change_callback=self._on_file_change,
+                self._config.watchdog, on_change_callback=self._on_files_changed
             )
-            self._watchdog.start()
-            logger.info(f"Watchdog started monitoring: {knowledge_path}")
+            if self._watchdog.start(knowledge_path):
+                logger.info(f"Watchdog started monitoring: {knowledge_path}")
         except ImportError:
             logger.warning("Watchdog service not available")
         except Exception as e:
@@ -243,67 +285,266 @@ class RAGManager:
         # Default to built-in libraries directory
         return Path(__file__).parent.parent / "knowledge" / "libraries"
 
-    async def _index_knowledge_base(self) -> Dict[str, Any]:
-        """Index all documents in the knowledge base."""
-        from hdsp_agent_core.knowledge.chunking import DocumentChunker
+    async def _index_knowledge_base(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Index all documents in the knowledge base.
+
+        Change detection uses the local index manifest (see IndexManifest):
+        unchanged files are skipped after a stat() without touching the vector store.
+        The manifest is reconciled against the collection when it is missing
+        or its chunk total disagrees with the collection's point count.
+
+        Changed files go through the pipelined indexer (see IndexPipeline):
+        files are read and chunked in parallel, chunks are embedded in large
+        cross-file batches and written with batched upserts.
 
+        Args:
+            force: Re-index every file even if the manifest says unchanged
+        """
+        async with self._index_lock:
+            return await self._scan_knowledge_base(force)
+
+    async def _scan_knowledge_base(self, force: bool) -> Dict[str, Any]:
         knowledge_path = self._get_knowledge_path()
         if not knowledge_path.exists():
             logger.warning(f"Knowledge base path not found: {knowledge_path}")
             return {"indexed": 0, "skipped": 0, "errors": []}
 
-        chunker = DocumentChunker(self._config.chunking)
+        manifest = self._get_manifest()
+        if not manifest.loaded or (
+            await self._store.count() != manifest.total_chunks()
+        ):
+            await self._reconcile_manifest()
+        if self._lexical_index is not None and not len(self._lexical_index):
+            await self._load_lexical_index()
 
-        indexed = 0
-        skipped = 0
-        errors = []
+        files = self._list_knowledge_files(knowledge_path)
+        logger.info(f"Found {len(files)} files to index in {knowledge_path}")
 
-        # Get all files matching patterns
-        files = []
-        for pattern in self._config.watchdog.patterns:
-            files.extend(knowledge_path.glob(f"**/{pattern}"))
+        # Files deleted while the server was down
+        current = {str(f) for f in files}
+        vanished = [fp for fp in manifest.files() if fp not in current]
+        if vanished:
+            stale_ids = []
+            for fp in vanished:
+                stale_ids.extend(manifest.remove(fp).chunk_ids)
+            await self._delete_points(stale_ids)
+            logger.info(f"Removed {len(vanished)} deleted files from index")
+
+        with timed("hdsp_rag_index_duration_seconds", LATENCY_BUCKETS):
+            stats = await self._index_files(files, knowledge_path, force=force)
+
+        self._update_index_stats()
+        await self._store.flush()
+        await asyncio.to_thread(manifest.save)
+        result = stats.to_dict()
+        logger.info(
+            f"Indexing complete: {stats.indexed} indexed, {stats.skipped} skipped, "
+            f"{len(stats.errors)} errors ({stats.chunks} chunks embedded, "
+            f"{stats.reused} reused, {stats.embed_batches} embedding batches, "
+            f"{stats.elapsed:.1f}s)"
+        )
+        return result
 
-        # Filter out ignored patterns
-        files = [f for f in files if not self._should_ignore(f)]
+    async def _index_files(
+        self, files: List[Path], knowledge_path: Path, force: bool = False
+    ) -> "IndexRunStats":
+        """
+        Index changed files and commit them to the manifest.
 
-        logger.info(f"Found {len(files)} files to index in {knowledge_path}")
+        Point IDs are content-addressed (see _chunk_point_id), so a changed
+        file only embeds chunks that are new; chunks it still contains keep
+        their vectors and just get a payload refresh. New points are written
+        before vanished ones are deleted, so a failed file keeps its previous
+        version searchable and is retried on the next scan.
+        """
+        from hdsp_agent_core.knowledge.chunking import DocumentChunker
 
-        for file_path in files:
-            try:
-                # Check if file needs re-indexing
-                if self._is_file_indexed(file_path):
-                    skipped += 1
-                    continue
+        from agent_server.core.index_manifest import ManifestEntry
+        from agent_server.core.index_pipeline import IndexPipeline
 
-                # Read and chunk document
-                content = file_path.read_text(encoding="utf-8")
-                chunks = chunker.chunk_document(
-                    content=content,
-                    metadata={
-                        "source": str(file_path.relative_to(knowledge_path)),
-                        "source_type": self._infer_source_type(file_path),
-                        "file_path": str(file_path),
-                        "indexed_at": datetime.now().isoformat(),
-                    },
+        chunker = DocumentChunker(self._config.chunking)
+        manifest = self._get_manifest()
+        # Entries for files being indexed, committed once their points are written
+        pending: Dict[Path, ManifestEntry] = {}
+        # Payloads of chunks that survived an edit, by point ID
+        kept_payloads: Dict[Path, Dict[str, Dict[str, Any]]] = {}
+
+        async def load(file_path: Path) -> Optional[List[Dict[str, Any]]]:
+            key = str(file_path)
+            entry = manifest.get(key)
+            stat = file_path.stat()
+            if not force and entry is not None and entry.matches_stat(stat):
+                return None
+
+            raw = await asyncio.to_thread(file_path.read_bytes)
+            file_hash = self._hash_bytes(raw)
+            if not force and entry is not None and entry.content_hash == file_hash:
+                # Touched but not changed: remember the new stat
+                manifest.set(
+                    key,
+                    ManifestEntry(
+                        file_hash, stat.st_mtime_ns, stat.st_size, entry.chunk_ids
+                    ),
                 )
+                return None
 
-                if chunks:
-                    await self._index_chunks(chunks, file_path)
-                    indexed += 1
-                    self._index_stats["total_documents"] += 1
-                    self._index_stats["total_chunks"] += len(chunks)
+            chunks = await asyncio.to_thread(
+                self._load_file_chunks, chunker, file_path, knowledge_path, raw
+            )
+            pending[file_path] = ManifestEntry(
+                file_hash,
+                stat.st_mtime_ns,
+                stat.st_size,
+                [chunk["id"] for chunk in chunks],
+            )
+            if force or entry is None:
+                return chunks
+
+            existing = set(entry.chunk_ids)
+            kept_payloads[file_path] = {
+                c["id"]: c["payload"] for c in chunks if c["id"] in existing
+            }
+            return [c for c in chunks if c["id"] not in existing]
 
-            except Exception as e:
-                errors.append({"file": str(file_path), "error": str(e)})
-                logger.error(f"Failed to index {file_path}: {e}")
+        pipeline = IndexPipeline(
+            load=load,
+            embed=self._embedding_service.embed_texts,
+            upsert=self._upsert_points,
+            config=self._config.indexing,
+        )
+        stats = await pipeline.run(files)
+
+        stale_ids = []
+        payloads: Dict[str, Dict[str, Any]] = {}
+        for file_path, entry in pending.items():
+            old = manifest.get(str(file_path))
+            old_ids = set(old.chunk_ids) if old is not None else set()
+            if file_path in stats.failed_files:
+                # Drop the partial write; the old entry stays for a retry
+                stale_ids.extend(set(entry.chunk_ids) - old_ids)
+                continue
+            stale_ids.extend(old_ids - set(entry.chunk_ids))
+            payloads.update(kept_payloads.get(file_path, {}))
+            manifest.set(str(file_path), entry)
+        stats.reused = len(payloads)
+        await self._overwrite_payloads(payloads)
+        await self._delete_points(stale_ids)
+        return stats
+
+    def _get_manifest(self) -> "IndexManifest":
+        """Load the index manifest on first use."""
+        if self._manifest is None:
+            from agent_server.core.index_manifest import IndexManifest
+
+            collection_name = self._config.qdrant.collection_name
+            self._manifest = IndexManifest(
+                Path(self._config.indexing.get_manifest_path(collection_name))
+            )
+            self._manifest.load()
+        return self._manifest
 
+    def _update_index_stats(self) -> None:
+        manifest = self._get_manifest()
+        self._index_stats["total_documents"] = len(manifest)
+        self._index_stats["total_chunks"] = manifest.total_chunks()
         self._index_stats["last_updated"] = datetime.now().isoformat()
-        result = {"indexed": indexed, "skipped": skipped, "errors": errors}
+
+    async def _reconcile_manifest(self) -> None:
+        """
+        Rebuild the manifest from the collection with one paged scroll.
+
+        Entries that still match the collection keep their stat, so their
+        files stay on the no-read fast path. Other files get no stat and are
+        re-hashed (not re-embedded) on the next scan; a file whose points
+        carry mixed content hashes gets no hash and is re-indexed.
+        """
+        from agent_server.core.index_manifest import ManifestEntry
+
+        manifest = self._get_manifest()
+        indexed: Dict[str, Dict[str, Any]] = {}
+        async for points in self._store.scroll(fields=["file_path", "content_hash"]):
+            for point in points:
+                if not point.payload.get("file_path"):
+                    continue
+                info = indexed.setdefault(
+                    point.payload["file_path"], {"hashes": set(), "ids": []}
+                )
+                info["hashes"].add(point.payload.get("content_hash"))
+                info["ids"].append(point.id)
+
+        entries = {}
+        for file_path, info in indexed.items():
+            content_hash = (
+                next(iter(info["hashes"])) if len(info["hashes"]) == 1 else None
+            )
+            existing = manifest.get(file_path)
+            if (
+                existing is not None
+                and existing.content_hash == content_hash
+                and set(existing.chunk_ids) == set(info["ids"])
+            ):
+                entries[file_path] = existing
+            else:
+                entries[file_path] = ManifestEntry(content_hash, chunk_ids=info["ids"])
+        manifest.replace_all(entries)
         logger.info(
-            f"Indexing complete: {indexed} indexed, {skipped} skipped, {len(errors)} errors"
+            f"Index manifest reconciled: {len(entries)} files, "
+            f"{manifest.total_chunks()} chunks"
         )
+
+    async def _load_lexical_index(self) -> None:
+        """Fill the BM25 index from the collection with one paged scroll."""
+        async for points in self._store.scroll():
+            for point in points:
+                self._lexical_index.add(
+                    point.id, point.payload.get("content", ""), point.payload
+                )
+        logger.info(f"BM25 index loaded: {len(self._lexical_index)} chunks")
+
+    def _list_knowledge_files(self, knowledge_path: Path) -> List[Path]:
+        """Files matching the watchdog patterns, minus ignored ones."""
+        files = set()
+        for pattern in self._config.watchdog.patterns:
+            files.update(knowledge_path.glob(f"**/{pattern}"))
+        return sorted(f for f in files if not self._should_ignore(f))
+
+    def _load_file_chunks(
+        self, chunker, file_path: Path, knowledge_path: Path, raw: bytes
+    ) -> List[Dict[str, Any]]:
+        """Chunk one file's content (runs in a worker thread)."""
+        chunks = chunker.chunk_document(
+            content=raw.decode("utf-8"),
+            metadata={
+                "source": str(file_path.relative_to(knowledge_path)),
+                "source_type": self._infer_source_type(file_path),
+                "file_path": str(file_path),
+                "indexed_at": datetime.now().isoformat(),
+            },
+        )
+        file_hash = self._hash_bytes(raw)
+        occurrences: Dict[str, int] = {}
+        result = []
+        for chunk, payload in zip(chunks, self._chunk_payloads(chunks, file_hash)):
+            # Tell identical chunks within one file apart
+            n = occurrences.get(chunk["content"], 0)
+            occurrences[chunk["content"]] = n + 1
+            result.append(
+                {
+                    "id": self._chunk_point_id(str(file_path), chunk["content"], n),
+                    "content": chunk["content"],
+                    "payload": payload,
+                }
+            )
         return result
 
+    @staticmethod
+    def _chunk_point_id(file_path: str, content: str, occurrence: int = 0) -> str:
+        """Deterministic point ID from the chunk's source and content."""
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        name = f"{file_path}:{digest}:{occurrence}"
+        return str(uuid.uuid5(_CHUNK_ID_NAMESPACE, name))
+
     def _should_ignore(self, file_path: Path) -> bool:
         """Check if file should be ignored."""
         path_str = str(file_path)
@@ -316,32 +557,9 @@ class RAGManager:
                 return True
         return False
 
-    def _is_file_indexed(self, file_path: Path) -> bool:
-        """Check if file is already indexed with current content hash."""
-        file_hash = self._compute_file_hash(file_path)
-
-        try:
-            results = self._client.scroll(
-                collection_name=self._config.qdrant.collection_name,
-                scroll_filter={
-                    "must": [{"key": "file_path", "match": {"value": str(file_path)}}]
-                },
-                limit=1,
-                with_payload=True,
-            )
-
-            if results[0]:  # Has existing points
-                existing_hash = results[0][0].payload.get("content_hash")
-                return existing_hash == file_hash
-
-        except Exception as e:
-            logger.debug(f"Error checking indexed status: {e}")
-
-        return False
-
-    def _compute_file_hash(self, file_path: Path) -> str:
-        """Compute content hash for change detection."""
-        content = file_path.read_bytes()
+    @staticmethod
+    def _hash_bytes(content: bytes) -> str:
+        """Content hash for change detection."""
         return hashlib.sha256(content).hexdigest()[:16]
 
     def _infer_source_type(self, file_path: Path) -> str:
@@ -359,92 +577,97 @@ class RAGManager:
         else:
             return "general"
 
-    async def _index_chunks(self, chunks: List[Dict], file_path: Path) -> None:
-        """Index document chunks to Qdrant."""
-        from qdrant_client.models import PointStruct
-
-        # Generate embeddings
-        texts = [c["content"] for c in chunks]
-        embeddings = await self._embedding_service.embed_texts(texts)
-
-        # Add content hash to all chunks
-        file_hash = self._compute_file_hash(file_path)
-
-        # Create points
-        points = []
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            point_id = str(uuid.uuid4())
-            payload = {
+    def _chunk_payloads(self, chunks: List[Dict], file_hash: str) -> List[Dict]:
+        """Vector store payloads for a file's chunks."""
+        return [
+            {
                 **chunk["metadata"],
                 "content": chunk["content"],
                 "content_hash": file_hash,
                 "chunk_index": i,
             }
-            points.append(PointStruct(id=point_id, vector=embedding, payload=payload))
-
-        # Upsert to Qdrant
-        self._client.upsert(
-            collection_name=self._config.qdrant.collection_name, points=points
+            for i, chunk in enumerate(chunks)
+        ]
+
+    async def _upsert_points(self, points: List["PendingPoint"]) -> None:
+        """Write embedded pipeline points to the vector store in one upsert."""
+        for p in points:
+            p.point_id = p.point_id or str(uuid.uuid4())
+        await self._store.upsert(
+            [p.point_id for p in points],
+            [p.vector for p in points],
+            [p.payload for p in points],
         )
+        if self._lexical_index is not None:
+            for p in points:
+                self._lexical_index.add(p.point_id, p.content, p.payload)
 
-        logger.debug(f"Indexed {len(points)} chunks from {file_path.name}")
-
-    async def _on_file_change(self, event_type: str, file_path: Path) -> None:
-        """Handle file change events from watchdog."""
-        logger.info(f"File change detected: {event_type} - {file_path}")
-
-        if event_type == "deleted":
-            self._remove_file_from_index(file_path)
-        else:
-            # Modified or created - re-index
-            await self._reindex_file(file_path)
+    async def _overwrite_payloads(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        """Replace the payloads of existing points in one request."""
+        if not payloads:
+            return
+        await self._store.overwrite_payloads(payloads)
+        if self._lexical_index is not None:
+            for point_id, payload in payloads.items():
+                self._lexical_index.update_payload(point_id, payload)
+
+    async def _delete_points(self, point_ids: List[str]) -> None:
+        """Delete points by ID."""
+        if not point_ids:
+            return
+        await self._store.delete(point_ids)
+        if self._lexical_index is not None:
+            self._lexical_index.remove(point_ids)
+
+    def _on_files_changed(self, changes: Set[Path]) -> None:
+        """Handle debounced file changes from watchdog (on the event loop)."""
+        task = asyncio.get_running_loop().create_task(self._sync_files(changes))
+        self._sync_tasks.add(task)
+        task.add_done_callback(self._sync_tasks.discard)
+
+    async def _sync_files(self, changes: Set[Path]) -> None:
+        """Bring the vector store and BM25 index in line with changed files."""
+        async with self._index_lock:
+            for file_path in sorted(changes):
+                if self._should_ignore(file_path):
+                    continue
+                logger.info(f"File change detected: {file_path}")
+                # Created, modified or deleted
+                await self._reindex_file(file_path)
 
-    def _remove_file_from_index(self, file_path: Path) -> None:
+    async def _remove_file_from_index(self, file_path: Path) -> None:
         """Remove file's chunks from index."""
+        manifest = self._get_manifest()
         try:
-            self._client.delete(
-                collection_name=self._config.qdrant.collection_name,
-                points_selector={
-                    "filter": {
-                        "must": [
-                            {"key": "file_path", "match": {"value": str(file_path)}}
-                        ]
-                    }
-                },
-            )
+            entry = manifest.remove(str(file_path))
+            if entry is not None:
+                await self._delete_points(entry.chunk_ids)
+            else:
+                await self._store.delete_where({"file_path": str(file_path)})
+                if self._lexical_index is not None:
+                    self._lexical_index.remove_where("file_path", str(file_path))
+            await self._store.flush()
+            await asyncio.to_thread(manifest.save)
+            self._update_index_stats()
             logger.info(f"Removed from index: {file_path}")
         except Exception as e:
             logger.error(f"Failed to remove from index: {e}")
 
     async def _reindex_file(self, file_path: Path) -> None:
         """Re-index a single file."""
-        # Remove old chunks
-        self._remove_file_from_index(file_path)
-
         if not file_path.exists():
+            await self._remove_file_from_index(file_path)
             return
 
-        # Index new content
-        from hdsp_agent_core.knowledge.chunking import DocumentChunker
-
-        chunker = DocumentChunker(self._config.chunking)
-
         try:
-            content = file_path.read_text(encoding="utf-8")
-            knowledge_path = self._get_knowledge_path()
-
-            chunks = chunker.chunk_document(
-                content=content,
-                metadata={
-                    "source": str(file_path.relative_to(knowledge_path)),
-                    "source_type": self._infer_source_type(file_path),
-                    "file_path": str(file_path),
-                    "indexed_at": datetime.now().isoformat(),
-                },
-            )
-
-            if chunks:
-                await self._index_chunks(chunks, file_path)
+            stats = await self._index_files([file_path], self._get_knowledge_path())
+            self._update_index_stats()
+            await self._store.flush()
+            await asyncio.to_thread(self._get_manifest().save)
+            if stats.errors:
+                error = stats.errors[0]["error"]
+                logger.error(f"Failed to reindex {file_path}: {error}")
+            elif stats.indexed:
                 logger.info(f"Reindexed: {file_path}")
         except Exception as e:
             logger.error(f"Failed to reindex {file_path}: {e}")
@@ -469,9 +692,35 @@ class RAGManager:
             logger.warning("RAG system not ready, returning empty results")
             return []
 
-        return await self._retriever.search(
-            query=query, top_k=top_k or self._config.top_k, filters=filters
-        )
+        with timed("hdsp_rag_duration_seconds", operation="search"):
+            return await self._retriever.search(
+                query=query, top_k=top_k or self._config.top_k, filters=filters
+            )
+
+    async def search_many(
+        self,
+        query: str,
+        searches: List[Tuple[Optional[int], Optional[Dict]]],
+    ) -> List[List[Dict]]:
+        """
+        Run several filtered searches for one query.
+
+        The query is embedded once and all searches share one vector store
+        request.
+
+        Args:
+            query: Search query text
+            searches: (top_k, filters) per search
+
+        Returns:
+            One result list per search, in the order given
+        """
+        if not self._ready:
+            logger.warning("RAG system not ready, returning empty results")
+            return [[] for _ in searches]
+
+        with timed("hdsp_rag_duration_seconds", operation="search"):
+            return await self._retriever.search_batch(query, searches)
 
     async def get_context_for_query(
         self,
@@ -493,38 +742,52 @@ class RAGManager:
         if not self._ready:
             return ""
 
+        with timed("hdsp_rag_duration_seconds", operation="context"):
+            return await self._build_context(query, detected_libraries, max_tokens)
+
+    async def _build_context(
+        self,
+        query: str,
+        detected_libraries: Optional[List[str]],
+        max_tokens: Optional[int],
+    ) -> str:
+        """Search (library-filtered and general, batched) and pack the results"""
         effective_max_tokens = max_tokens or self._config.max_context_tokens
         results = []
 
         try:
-            # Strategy: If libraries detected, search with library filter first
-            # Then supplement with general search if needed
-            if detected_libraries:
-                # Search within detected library files first
-                for lib in detected_libraries:
-                    lib_filter = {"source": f"{lib}.md"}
-                    lib_results = await self.search(
-                        query=query,
-                        top_k=3,  # Get top 3 from each library
-                        filters=lib_filter,
-                    )
-                    results.extend(lib_results)
-                    logger.info(
-                        f"RAG library search [{lib}]: {len(lib_results)} results"
-                    )
-
-            # If not enough results, do general search
-            if len(results) < self._config.top_k:
-                remaining = self._config.top_k - len(results)
-                general_results = await self.search(query=query, top_k=remaining)
-                # Avoid duplicates
-                existing_ids = {r.get("id") for r in results if r.get("id")}
-                for r in general_results:
-                    if r.get("id") not in existing_ids:
+            # Strategy: top 3 from each detected library's file, then fill
+            # up to top_k from a general search. All searches share one
+            # query embedding and one vector store request.
+            libraries = detected_libraries or []
+            searches = [(3, {"source": f"{lib}.md"}) for lib in libraries]
+            searches.append((self._config.top_k, None))
+            *library_results, general_results = await self.search_many(
+                query, searches
+            )
+
+            seen_ids = set()
+            for lib, lib_results in zip(libraries, library_results):
+                logger.info(f"RAG library search [{lib}]: {len(lib_results)} results")
+                for r in lib_results:
+                    if r["id"] not in seen_ids:
+                        seen_ids.add(r["id"])
                         results.append(r)
 
-            # Sort by score
-            results.sort(key=lambda x: x.get("score", 0), reverse=True)
+            # If not enough results, supplement with general results
+            remaining = self._config.top_k - len(results)
+            for r in general_results:
+                if remaining <= 0:
+                    break
+                if r["id"] not in seen_ids:
+                    seen_ids.add(r["id"])
+                    results.append(r)
+                    remaining -= 1
+
+            # Sort by fused rank (hybrid) or score
+            results.sort(
+                key=lambda x: x.get("fused_score") or x.get("score", 0), reverse=True
+            )
 
         except Exception as e:
             logger.error(f"Failed to get RAG context: {e}")
@@ -533,26 +796,38 @@ class RAGManager:
         if not results:
             return ""
 
-        # Format results as context
+        return self._format_context(
+            [(r["metadata"], r["score"], r["content"]) for r in results],
+            effective_max_tokens,
+        )
+
+    def _format_context(self, chunks: List[tuple], max_tokens: int) -> str:
+        """
+        Pack (metadata, score, content) chunks into a prompt section.
+
+        Chunks are added in order until the next one would exceed
+        max_tokens, counted with the shared token counter (memoized per
+        chunk, so repeated queries over the same chunks are cheap).
+        """
+        counter = get_token_counter()
         context_parts = []
-        char_count = 0
-        char_limit = effective_max_tokens * 4  # Rough char-to-token ratio
+        token_count = 0
 
-        for result in results:
-            source = result["metadata"].get("source", "unknown")
-            section = result["metadata"].get("section", "")
-            score = result["score"]
+        for metadata, score, content in chunks:
+            source = metadata.get("source", "unknown")
+            section = metadata.get("section", "")
 
             # Format chunk with source info
             chunk_text = f"[Source: {source}"
             if section:
                 chunk_text += f" > {section}"
-            chunk_text += f" (relevance: {score:.2f})]\n{result['content']}\n"
+            chunk_text += f" (relevance: {score:.2f})]\n{content}\n"
 
-            if char_count + len(chunk_text) > char_limit:
+            chunk_tokens = counter.count(chunk_text)
+            if token_count + chunk_tokens > max_tokens:
                 break
             context_parts.append(chunk_text)
-            char_count += len(chunk_text)
+            token_count += chunk_tokens
 
         if not context_parts:
             return ""
@@ -570,6 +845,7 @@ class RAGManager:
             "total_chunks": self._index_stats["total_chunks"],
             "last_updated": self._index_stats["last_updated"],
             "knowledge_base_path": str(self._get_knowledge_path()),
+            "vector_store": self._config.vector_store.get_backend(),
             "qdrant_mode": self._config.qdrant.mode,
             "embedding_model": self._config.embedding.get_model_name(),
         }
@@ -671,6 +947,8 @@ class RAGManager:
                     "rank": chunk.rank,
                     "metadata": chunk.metadata,
                     "passed_threshold": chunk.passed_threshold,
+                    "bm25_score": chunk.bm25_score,
+                    "fused_score": chunk.fused_score,
                 }
             )
 
@@ -680,32 +958,10 @@ class RAGManager:
             passed_chunks = [c for c in debug_result.chunks if c.passed_threshold]
 
             if passed_chunks:
-                context_parts = []
-                char_count = 0
-                char_limit = (
-                    self._config.max_context_tokens * 4
-                )  # Rough char-to-token ratio
-
-                for chunk in passed_chunks:
-                    source = chunk.metadata.get("source", "unknown")
-                    section = chunk.metadata.get("section", "")
-                    score = chunk.score
-
-                    # Format chunk with source info
-                    chunk_text = f"[Source: {source}"
-                    if section:
-                        chunk_text += f" > {section}"
-                    chunk_text += f" (relevance: {score:.2f})]\n{chunk.content}\n"
-
-                    if char_count + len(chunk_text) > char_limit:
-                        break
-                    context_parts.append(chunk_text)
-                    char_count += len(chunk_text)
-
-                if context_parts:
-                    header = "## 📚 라이브러리 API 참조 (RAG Retrieved)\n\n"
-                    header += "아래 가이드의 API 사용법을 **반드시** 따르세요.\n\n"
-                    formatted_context = header + "\n---\n".join(context_parts)
+                formatted_context = self._format_context(
+                    [(c.metadata, c.score, c.content) for c in passed_chunks],
+                    self._config.max_context_tokens,
+                )
 
         return {
             "library_detection": library_detection_info,
@@ -716,9 +972,10 @@ class RAGManager:
                 1 for c in debug_result.chunks if c.passed_threshold
             ),
             "search_ms": debug_result.search_ms,
+            "timings": debug_result.timings,
             "formatted_context": formatted_context,
             "context_char_count": len(formatted_context),
-            "estimated_context_tokens": len(formatted_context) // 4,
+            "estimated_context_tokens": get_token_counter().count(formatted_context),
         }
 
 
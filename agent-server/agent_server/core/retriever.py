@@ -1,18 +1,30 @@
 """
-Retriever - Dense vector search implementation.
+Retriever - Dense and hybrid (dense + BM25) search implementation.
 
-Provides semantic similarity search via Qdrant vector database.
+Provides semantic similarity search over a VectorStore (Qdrant or the
+in-process NumPy backend). With a
+LexicalIndex attached, BM25 matches are fused with the dense results by
+reciprocal rank fusion, so exact API names the embedding misses are
+still retrieved.
 """
 
 import logging
 import time
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
+
+from agent_server.core.vector_store import (
+    QdrantVectorStore,
+    StoredPoint,
+    VectorQuery,
+    VectorStore,
+)
 
 if TYPE_CHECKING:
     from hdsp_agent_core.models.rag import RAGConfig
 
     from agent_server.core.embedding_service import EmbeddingService
+    from agent_server.core.lexical_index import LexicalHit, LexicalIndex
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +39,8 @@ class ChunkScoreDetails:
     rank: int
     metadata: Dict[str, Any]
     passed_threshold: bool
+    bm25_score: Optional[float] = None  # Lexical score (hybrid only)
+    fused_score: Optional[float] = None  # Reciprocal rank fusion score
 
 
 class DebugSearchResult(NamedTuple):
@@ -35,31 +49,58 @@ class DebugSearchResult(NamedTuple):
     chunks: List[ChunkScoreDetails]
     search_ms: float
     total_candidates: int
+    timings: Dict[str, float]  # Per-stage milliseconds
+
+
+@dataclass
+class _Candidate:
+    """A chunk found by the dense and/or lexical stage"""
+
+    chunk_id: str
+    content: str
+    payload: Dict[str, Any]
+    dense_score: Optional[float] = None
+    dense_rank: Optional[int] = None
+    bm25_score: Optional[float] = None
+    bm25_rank: Optional[int] = None
+    bm25_normalized: float = 0.0
+    fused_score: float = 0.0
 
 
 class Retriever:
     """
-    Dense vector retrieval using Qdrant.
+    Dense (and optionally hybrid) retrieval over a VectorStore.
 
     Features:
-    - Dense vector search via Qdrant
-    - Metadata filtering
+    - Dense vector search via the vector store
+    - BM25 lexical search fused by reciprocal rank (with a LexicalIndex)
+    - Metadata filtering (several filters batched into one store request)
     - Score thresholding
 
     Usage:
-        retriever = Retriever(client, embedding_service, config)
+        retriever = Retriever(store, embedding_service, config, lexical_index)
         results = await retriever.search("query", top_k=5)
     """
 
     def __init__(
         self,
-        client,  # Qdrant client
+        store,  # VectorStore (or a bare Qdrant client)
         embedding_service: "EmbeddingService",
         config: "RAGConfig",
+        lexical_index: Optional["LexicalIndex"] = None,
     ):
-        self._client = client
+        self._store: VectorStore = (
+            store
+            if isinstance(store, VectorStore)
+            else QdrantVectorStore(store, config.qdrant.collection_name)
+        )
         self._embedding_service = embedding_service
         self._config = config
+        self._lexical_index = lexical_index
+
+    @property
+    def is_hybrid(self) -> bool:
+        return self._lexical_index is not None and self._config.hybrid.is_enabled()
 
     async def search(
         self,
@@ -69,7 +110,7 @@ class Retriever:
         score_threshold: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
         """
-        Perform dense vector search.
+        Perform dense (or hybrid) search.
 
         Args:
             query: Search query
@@ -79,59 +120,74 @@ class Retriever:
 
         Returns:
             List of results with content, score, metadata
+            (hybrid results also carry bm25_score and fused_score)
         """
-        effective_top_k = top_k or self._config.top_k
+        results = await self.search_batch(query, [(top_k, filters)], score_threshold)
+        return results[0]
+
+    async def search_batch(
+        self,
+        query: str,
+        searches: List[Tuple[Optional[int], Optional[Dict[str, Any]]]],
+        score_threshold: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run several filtered searches for one query.
+
+        The query is embedded once and every dense search goes to Qdrant
+        in a single batch request, so N library filters cost one
+        embedding and one round trip instead of N of each.
+
+        Args:
+            query: Search query
+            searches: (top_k, filters) per search; top_k None = config default
+            score_threshold: Minimum score (default from config)
+
+        Returns:
+            One result list per search, in the order given
+        """
+        if not searches:
+            return []
         effective_threshold = score_threshold or self._config.score_threshold
+        top_ks = [top_k or self._config.top_k for top_k, _ in searches]
+        filters_list = [filters for _, filters in searches]
 
-        # Generate query embedding
+        # Generate query embedding (once for all searches)
         query_embedding = await self._embedding_service.embed_query(query)
 
-        # Build filter condition
-        qdrant_filter = self._build_filter(filters) if filters else None
+        if self.is_hybrid:
+            # Lower for initial retrieval; the threshold applies after fusion
+            fused_lists = await self._hybrid_candidates(
+                query, query_embedding, filters_list, effective_threshold * 0.5
+            )
+            results = []
+            for fused, top_k in zip(fused_lists, top_ks):
+                passed = [c for c in fused if self._passes(c, effective_threshold)]
+                results.append([self._format_candidate(c) for c in passed[:top_k]])
+            return results
 
         # Dense vector search
         try:
-            response = self._client.query_points(
-                collection_name=self._config.qdrant.collection_name,
-                query=query_embedding,
-                query_filter=qdrant_filter,
-                limit=effective_top_k,
-                score_threshold=effective_threshold * 0.5,  # Lower for initial retrieval
-                with_payload=True,
-                with_vectors=False,
+            point_lists = await self._dense_search_many(
+                query_embedding,
+                list(zip(top_ks, filters_list)),
+                effective_threshold * 0.5,  # Lower for initial retrieval
             )
-            results = response.points
         except Exception as e:
             logger.error(f"Search failed: {e}")
-            return []
+            return [[] for _ in searches]
 
-        if not results:
+        if not any(point_lists):
             logger.debug(f"No results for query: {query[:50]}...")
-            return []
-
-        return self._format_results(results, effective_threshold)
-
-    def _build_filter(self, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Convert filter dict to Qdrant filter format"""
-        if not filters:
-            return None
-
-        conditions = []
-        for key, value in filters.items():
-            if isinstance(value, list):
-                # Multiple values - any match
-                conditions.append(
-                    {"should": [{"key": key, "match": {"value": v}} for v in value]}
-                )
-            else:
-                conditions.append({"key": key, "match": {"value": value}})
 
-        return {"must": conditions} if conditions else None
+        return [
+            self._format_results(points, effective_threshold) for points in point_lists
+        ]
 
     def _format_results(
-        self, results: List, score_threshold: float
+        self, results: List[StoredPoint], score_threshold: float
     ) -> List[Dict[str, Any]]:
-        """Format Qdrant results to standard format"""
+        """Format store results to standard format"""
         formatted = []
         for r in results:
             if r.score < score_threshold:
@@ -139,6 +195,7 @@ class Retriever:
 
             formatted.append(
                 {
+                    "id": r.id,
                     "content": r.payload.get("content", ""),
                     "score": round(r.score, 4),
                     "metadata": {k: v for k, v in r.payload.items() if k != "content"},
@@ -146,6 +203,149 @@ class Retriever:
             )
         return formatted
 
+    async def _dense_search_many(
+        self,
+        query_embedding: List[float],
+        searches: List[Tuple[int, Optional[Dict[str, Any]]]],
+        score_threshold: float,
+    ) -> List[List[StoredPoint]]:
+        """Dense stage for (limit, filters) searches: points, best first"""
+        return await self._store.search(
+            query_embedding,
+            [
+                VectorQuery(
+                    limit=limit, filters=filters, score_threshold=score_threshold
+                )
+                for limit, filters in searches
+            ],
+        )
+
+    # ========== Hybrid Search ==========
+
+    async def _hybrid_candidates(
+        self,
+        query: str,
+        query_embedding: List[float],
+        filters_list: List[Optional[Dict[str, Any]]],
+        dense_threshold: float,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> List[List[_Candidate]]:
+        """
+        Dense and BM25 candidates fused by reciprocal rank, best first,
+        one list per filter set.
+
+        Lexical-only hits get their dense score from one follow-up query
+        (shared by all searches), so `score` stays a cosine similarity
+        for every result.
+        """
+        timings = timings if timings is not None else {}
+        limit = self._config.hybrid.candidates
+
+        started = time.perf_counter()
+        try:
+            dense_lists = await self._dense_search_many(
+                query_embedding, [(limit, f) for f in filters_list], dense_threshold
+            )
+        except Exception as e:
+            logger.error(f"Dense search failed: {e}")
+            dense_lists = [[] for _ in filters_list]
+        timings["dense_ms"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        lexical_lists = [
+            self._lexical_index.search(query, limit=limit, filters=f)
+            for f in filters_list
+        ]
+        timings["lexical_ms"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        fused_lists = [
+            self._fuse(dense, lexical)
+            for dense, lexical in zip(dense_lists, lexical_lists)
+        ]
+        timings["fusion_ms"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        await self._fill_dense_scores(
+            [c for fused in fused_lists for c in fused if c.dense_score is None],
+            query_embedding,
+        )
+        timings["rescore_ms"] = _elapsed_ms(started)
+        return fused_lists
+
+    def _fuse(
+        self, dense: List[StoredPoint], lexical: List["LexicalHit"]
+    ) -> List[_Candidate]:
+        """Reciprocal rank fusion of one dense and one BM25 ranking"""
+        candidates: Dict[str, _Candidate] = {}
+        for rank, point in enumerate(dense, start=1):
+            candidates[point.id] = _Candidate(
+                chunk_id=point.id,
+                content=point.payload.get("content", ""),
+                payload=point.payload,
+                dense_score=point.score,
+                dense_rank=rank,
+            )
+        for rank, hit in enumerate(lexical, start=1):
+            candidate = candidates.get(hit.doc_id)
+            if candidate is None:
+                candidate = candidates[hit.doc_id] = _Candidate(
+                    chunk_id=hit.doc_id, content=hit.content, payload=hit.payload
+                )
+            candidate.bm25_score = hit.score
+            candidate.bm25_rank = rank
+            candidate.bm25_normalized = hit.normalized_score
+
+        rrf_k = self._config.hybrid.rrf_k
+        for candidate in candidates.values():
+            for rank in (candidate.dense_rank, candidate.bm25_rank):
+                if rank is not None:
+                    candidate.fused_score += 1.0 / (rrf_k + rank)
+        return sorted(candidates.values(), key=lambda c: c.fused_score, reverse=True)
+
+    async def _fill_dense_scores(
+        self, candidates: List[_Candidate], query_embedding: List[float]
+    ) -> None:
+        """Dense scores for lexical-only hits, in one id-filtered query"""
+        if not candidates:
+            return
+
+        chunk_ids = list(dict.fromkeys(c.chunk_id for c in candidates))
+        try:
+            (points,) = await self._store.search(
+                query_embedding, [VectorQuery(limit=len(chunk_ids), ids=chunk_ids)]
+            )
+            scores = {p.id: p.score for p in points}
+        except Exception as e:
+            logger.debug(f"Dense rescoring of lexical hits failed: {e}")
+            scores = {}
+        for candidate in candidates:
+            candidate.dense_score = scores.get(candidate.chunk_id, 0.0)
+
+    def _passes(self, candidate: _Candidate, score_threshold: float) -> bool:
+        """Kept if the dense score clears the threshold or BM25 matches well"""
+        if (candidate.dense_score or 0.0) >= score_threshold:
+            return True
+        return (
+            candidate.bm25_rank is not None
+            and candidate.bm25_normalized >= self._config.hybrid.min_bm25_score
+        )
+
+    @staticmethod
+    def _format_candidate(candidate: _Candidate) -> Dict[str, Any]:
+        return {
+            "id": candidate.chunk_id,
+            "content": candidate.content,
+            "score": round(candidate.dense_score or 0.0, 4),
+            "bm25_score": (
+                round(candidate.bm25_score, 4)
+                if candidate.bm25_score is not None
+                else None
+            ),
+            "fused_score": round(candidate.fused_score, 6),
+            "metadata": {k: v for k, v in candidate.payload.items() if k != "content"},
+        }
+
     def search_sync(
         self,
         query: str,
@@ -155,8 +355,8 @@ class Retriever:
         """
         Synchronous search wrapper for non-async contexts.
 
-        Note: Qdrant client operations are synchronous,
-        so this is just a convenience method.
+        Note: runs its own event loop, so it blocks the calling thread;
+        async code should await search() instead.
         """
         import asyncio
 
@@ -190,44 +390,73 @@ class Retriever:
             DebugSearchResult with detailed scoring information
         """
         start_time = time.perf_counter()
+        timings: Dict[str, float] = {}
 
         effective_top_k = top_k or self._config.top_k
         effective_threshold = score_threshold or self._config.score_threshold
 
         # Generate query embedding
         query_embedding = await self._embedding_service.embed_query(query)
+        timings["embed_ms"] = _elapsed_ms(start_time)
 
-        # Build filter condition
-        qdrant_filter = self._build_filter(filters) if filters else None
+        if self.is_hybrid:
+            # 디버그용으로 더 많은 결과 (3배)를 낮은 threshold로 가져옴
+            candidate_lists = await self._hybrid_candidates(
+                query, query_embedding, [filters], effective_threshold * 0.3, timings
+            )
+            candidates = candidate_lists[0][: effective_top_k * 3]
+            chunks = [
+                ChunkScoreDetails(
+                    chunk_id=c.chunk_id,
+                    content=c.content,
+                    score=round(c.dense_score or 0.0, 4),
+                    rank=rank,
+                    metadata={k: v for k, v in c.payload.items() if k != "content"},
+                    passed_threshold=self._passes(c, effective_threshold),
+                    bm25_score=(
+                        round(c.bm25_score, 4) if c.bm25_score is not None else None
+                    ),
+                    fused_score=round(c.fused_score, 6),
+                )
+                for rank, c in enumerate(candidates, start=1)
+            ]
+            search_ms = _elapsed_ms(start_time)
+            timings["total_ms"] = search_ms
+            return DebugSearchResult(
+                chunks=chunks,
+                search_ms=search_ms,
+                total_candidates=len(candidates),
+                timings=timings,
+            )
 
         # Vector search with timing
+        dense_started = time.perf_counter()
         try:
             # 디버그용으로 더 많은 결과 (3배)를 낮은 threshold로 가져옴
-            response = self._client.query_points(
-                collection_name=self._config.qdrant.collection_name,
-                query=query_embedding,
-                query_filter=qdrant_filter,
-                limit=effective_top_k * 3,
-                score_threshold=effective_threshold * 0.3,
-                with_payload=True,
-                with_vectors=False,
+            (results,) = await self._dense_search_many(
+                query_embedding,
+                [(effective_top_k * 3, filters)],
+                effective_threshold * 0.3,
             )
-            results = response.points
         except Exception as e:
             logger.error(f"Search failed: {e}")
             return DebugSearchResult(
                 chunks=[],
                 search_ms=0.0,
                 total_candidates=0,
+                timings=timings,
             )
 
+        timings["dense_ms"] = _elapsed_ms(dense_started)
         search_ms = (time.perf_counter() - start_time) * 1000
+        timings["total_ms"] = round(search_ms, 2)
 
         if not results:
             return DebugSearchResult(
                 chunks=[],
                 search_ms=round(search_ms, 2),
                 total_candidates=0,
+                timings=timings,
             )
 
         # Build detailed results
@@ -235,7 +464,7 @@ class Retriever:
         for rank, result in enumerate(results, start=1):
             chunks.append(
                 ChunkScoreDetails(
-                    chunk_id=str(result.id),
+                    chunk_id=result.id,
                     content=result.payload.get("content", ""),
                     score=round(result.score, 4),
                     rank=rank,
@@ -250,4 +479,9 @@ class Retriever:
             chunks=chunks,
             search_ms=round(search_ms, 2),
             total_candidates=len(results),
+            timings=timings,
         )
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
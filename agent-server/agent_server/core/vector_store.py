@@ -0,0 +1,386 @@
+"""
+Vector Store - Storage and dense search backends for the RAG system.
+
+RAGManager and Retriever talk to a VectorStore instead of a Qdrant
+client, so the backend can be chosen per deployment:
+
+- QdrantVectorStore: Qdrant in local, server or cloud mode
+- NumpyVectorStore: exact in-process search over a float32 matrix, for
+  knowledge bases that fit in memory (see numpy_vector_store)
+
+Filters use the retriever's dict form: {"source": "dask.md"} matches one
+value, {"source": ["dask.md", "polars.md"]} matches any of them.
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+from agent_server.core.qdrant_executor import QdrantExecutor
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredPoint:
+    """A stored chunk, as returned by search and scroll"""
+
+    id: str
+    payload: Dict[str, Any]
+    score: float = 0.0
+
+
+@dataclass
+class VectorQuery:
+    """One dense search; VectorStore.search runs several per query vector"""
+
+    limit: int
+    filters: Optional[Dict[str, Any]] = None
+    score_threshold: Optional[float] = None
+    ids: Optional[List[str]] = None  # Only consider these point IDs
+
+
+def matches_filters(payload: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """Whether a payload passes a filter dict (list value = any of)"""
+    for key, value in filters.items():
+        if isinstance(value, list):
+            if payload.get(key) not in value:
+                return False
+        elif payload.get(key) != value:
+            return False
+    return True
+
+
+class VectorStore(ABC):
+    """
+    Point storage with cosine similarity search.
+
+    Point IDs are strings (the indexer's content-addressed UUIDs).
+    """
+
+    backend = "unknown"
+
+    @abstractmethod
+    async def ensure_collection(self, dimension: int) -> None:
+        """Create the collection if it does not exist"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of stored points"""
+
+    @abstractmethod
+    def scroll(
+        self, fields: Optional[List[str]] = None, page_size: int = 1024
+    ) -> AsyncIterator[List[StoredPoint]]:
+        """All points in pages, with the given payload fields (None = all)"""
+
+    @abstractmethod
+    async def upsert(
+        self,
+        ids: List[str],
+        vectors: List[List[float]],
+        payloads: List[Dict[str, Any]],
+    ) -> None:
+        """Insert or replace points"""
+
+    @abstractmethod
+    async def overwrite_payloads(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        """Replace the payloads of existing points, by ID"""
+
+    @abstractmethod
+    async def delete(self, ids: List[str]) -> None:
+        """Delete points by ID"""
+
+    @abstractmethod
+    async def delete_where(self, filters: Dict[str, Any]) -> None:
+        """Delete points whose payload matches filters"""
+
+    @abstractmethod
+    async def search(
+        self, vector: List[float], queries: List[VectorQuery]
+    ) -> List[List[StoredPoint]]:
+        """Best matches for each query, best first, in the order given"""
+
+    async def flush(self) -> None:
+        """Persist pending writes (no-op for stores that write through)"""
+
+    async def close(self) -> None:
+        """Release the backend"""
+
+
+class QdrantVectorStore(VectorStore):
+    """
+    VectorStore backed by a Qdrant collection.
+
+    With quantization="int8" the collection keeps int8 copies of the
+    vectors in RAM and the float32 originals on disk; searches scan the
+    int8 copies for `oversampling` x limit candidates and rescore them
+    with the originals. Local mode always searches exactly, so there the
+    setting is ignored.
+
+    Usage:
+        store = QdrantVectorStore(QdrantExecutor(client), "hdsp_knowledge")
+        hits = await store.search(vector, [VectorQuery(limit=5)])
+    """
+
+    backend = "qdrant"
+
+    def __init__(
+        self,
+        client: Union[QdrantExecutor, Any],
+        collection_name: str,
+        quantization: str = "none",
+        oversampling: float = 2.0,
+        rescore: bool = True,
+    ):
+        self._qdrant = (
+            client if isinstance(client, QdrantExecutor) else QdrantExecutor(client)
+        )
+        self._collection = collection_name
+        if quantization not in ("none", "int8"):
+            raise ValueError(f"Unknown quantization: {quantization}")
+        if quantization != "none" and not self._qdrant.is_async:
+            logger.info("Qdrant local mode searches exactly; quantization ignored")
+            quantization = "none"
+        self._quantization = quantization
+        self._oversampling = oversampling
+        self._rescore = rescore
+
+    @property
+    def client(self):
+        return self._qdrant.client
+
+    async def ensure_collection(self, dimension: int) -> None:
+        from qdrant_client.models import Distance, VectorParams
+
+        quantization_config = self._quantization_config()
+        response = await self._qdrant.call("get_collections")
+        if any(c.name == self._collection for c in response.collections):
+            logger.info(f"Collection exists: {self._collection}")
+            if await self._check_collection(dimension, quantization_config):
+                return
+            # The stored vectors cannot be searched with the new embeddings;
+            # the emptied collection makes the manifest reconcile and re-index
+            await self._qdrant.call(
+                "delete_collection", collection_name=self._collection
+            )
+
+        logger.info(f"Creating collection: {self._collection}")
+        await self._qdrant.call(
+            "create_collection",
+            collection_name=self._collection,
+            vectors_config=VectorParams(
+                size=dimension,
+                distance=Distance.COSINE,
+                # Quantized search reads originals only to rescore
+                on_disk=quantization_config is not None,
+            ),
+            quantization_config=quantization_config,
+        )
+        logger.info(
+            f"Collection created with dimension {dimension} "
+            f"(quantization={self._quantization})"
+        )
+
+    async def _check_collection(self, dimension: int, quantization_config) -> bool:
+        """
+        Whether an existing collection can be kept (False on a dimension
+        change); adds quantization to a kept collection.
+        """
+        info = await self._qdrant.call(
+            "get_collection", collection_name=self._collection
+        )
+        size = getattr(info.config.params.vectors, "size", dimension)
+        if size != dimension:
+            logger.warning(
+                f"Collection {self._collection} stores {size}-dim vectors but "
+                f"embeddings have {dimension} (model or truncate_dim changed); "
+                "recreating it and re-indexing the knowledge base"
+            )
+            return False
+        if quantization_config is not None and info.config.quantization_config is None:
+            logger.info(f"Enabling int8 quantization on {self._collection}")
+            await self._qdrant.call(
+                "update_collection",
+                collection_name=self._collection,
+                quantization_config=quantization_config,
+            )
+        return True
+
+    async def count(self) -> int:
+        response = await self._qdrant.call(
+            "count", collection_name=self._collection, exact=True
+        )
+        return response.count
+
+    async def scroll(
+        self, fields: Optional[List[str]] = None, page_size: int = 1024
+    ) -> AsyncIterator[List[StoredPoint]]:
+        offset = None
+        while True:
+            points, offset = await self._qdrant.call(
+                "scroll",
+                collection_name=self._collection,
+                limit=page_size,
+                offset=offset,
+                with_payload=fields if fields is not None else True,
+                with_vectors=False,
+            )
+            yield [StoredPoint(str(p.id), p.payload or {}) for p in points]
+            if offset is None:
+                break
+
+    async def upsert(
+        self,
+        ids: List[str],
+        vectors: List[List[float]],
+        payloads: List[Dict[str, Any]],
+    ) -> None:
+        from qdrant_client.models import PointStruct
+
+        await self._qdrant.call(
+            "upsert",
+            collection_name=self._collection,
+            points=[
+                PointStruct(id=point_id, vector=vector, payload=payload)
+                for point_id, vector, payload in zip(ids, vectors, payloads)
+            ],
+        )
+
+    async def overwrite_payloads(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        from qdrant_client.models import OverwritePayloadOperation, SetPayload
+
+        if not payloads:
+            return
+        await self._qdrant.call(
+            "batch_update_points",
+            collection_name=self._collection,
+            update_operations=[
+                OverwritePayloadOperation(
+                    overwrite_payload=SetPayload(payload=payload, points=[point_id])
+                )
+                for point_id, payload in payloads.items()
+            ],
+        )
+
+    async def delete(self, ids: List[str]) -> None:
+        from qdrant_client.models import PointIdsList
+
+        if not ids:
+            return
+        await self._qdrant.call(
+            "delete",
+            collection_name=self._collection,
+            points_selector=PointIdsList(points=list(ids)),
+        )
+
+    async def delete_where(self, filters: Dict[str, Any]) -> None:
+        from qdrant_client.models import FilterSelector
+
+        await self._qdrant.call(
+            "delete",
+            collection_name=self._collection,
+            points_selector=FilterSelector(filter=build_qdrant_filter(filters)),
+        )
+
+    async def search(
+        self, vector: List[float], queries: List[VectorQuery]
+    ) -> List[List[StoredPoint]]:
+        if not queries:
+            return []
+        if len(queries) == 1:
+            query = queries[0]
+            response = await self._qdrant.call(
+                "query_points",
+                collection_name=self._collection,
+                query=vector,
+                query_filter=build_qdrant_filter(query.filters, query.ids),
+                search_params=self._search_params(),
+                limit=query.limit,
+                score_threshold=query.score_threshold,
+                with_payload=True,
+                with_vectors=False,
+            )
+            return [self._points(response.points)]
+
+        from qdrant_client.models import QueryRequest
+
+        params = self._search_params()
+        # One round trip for all queries
+        responses = await self._qdrant.call(
+            "query_batch_points",
+            collection_name=self._collection,
+            requests=[
+                QueryRequest(
+                    query=vector,
+                    filter=build_qdrant_filter(query.filters, query.ids),
+                    params=params,
+                    limit=query.limit,
+                    score_threshold=query.score_threshold,
+                    with_payload=True,
+                    with_vector=False,
+                )
+                for query in queries
+            ],
+        )
+        return [self._points(response.points) for response in responses]
+
+    async def close(self) -> None:
+        await self._qdrant.close()
+
+    def _quantization_config(self):
+        if self._quantization != "int8":
+            return None
+        from qdrant_client.models import (
+            ScalarQuantization,
+            ScalarQuantizationConfig,
+            ScalarType,
+        )
+
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8, quantile=0.99, always_ram=True
+            )
+        )
+
+    def _search_params(self):
+        if self._quantization == "none":
+            return None
+        from qdrant_client.models import QuantizationSearchParams, SearchParams
+
+        return SearchParams(
+            quantization=QuantizationSearchParams(
+                rescore=self._rescore, oversampling=self._oversampling
+            )
+        )
+
+    @staticmethod
+    def _points(points: List) -> List[StoredPoint]:
+        return [StoredPoint(str(p.id), p.payload or {}, p.score) for p in points]
+
+
+def build_qdrant_filter(
+    filters: Optional[Dict[str, Any]], ids: Optional[List[str]] = None
+):
+    """Convert a filter dict (and optional ID list) to a Qdrant Filter"""
+    from qdrant_client.models import (
+        FieldCondition,
+        Filter,
+        HasIdCondition,
+        MatchAny,
+        MatchValue,
+    )
+
+    conditions = []
+    for key, value in (filters or {}).items():
+        if isinstance(value, list):
+            # Multiple values - any match
+            match = MatchAny(any=value)
+        else:
+            match = MatchValue(value=value)
+        conditions.append(FieldCondition(key=key, match=match))
+    if ids is not None:
+        conditions.append(HasIdCondition(has_id=list(ids)))
+
+    return Filter(must=conditions) if conditions else None
@@ -4,26 +4,46 @@ vLLM Embedding Service - Remote embedding generation using vLLM server.
 Features:
 - GPU-accelerated embeddings via vLLM server
 - OpenAI-compatible API interface
-- Retry logic for reliability
+- Size- and token-bounded request batches, sent concurrently under a
+  semaphore, retried with jittered exponential backoff
+- Embedding dimension detected from the server's first response
 - Support for large models (qwen3-embedding-8b, gte-Qwen2-7B, etc.)
+- Persistent embedding cache (see EmbeddingCache), so unchanged texts are
+  not sent to the server again after a restart
+- Query LRU cache and micro-batching (see QueryEmbeddingBatcher)
+- Optional Matryoshka truncation (EmbeddingConfig.truncate_dim), e.g.
+  qwen3-embedding-8b's 8192 dimensions down to 1024
 
 Prerequisites:
 - vLLM embedding server running (e.g., http://10.222.52.31:8000)
 - Model loaded on vLLM server
 """
 
+import asyncio
 import logging
 import os
-from typing import TYPE_CHECKING, List, Optional
+import random
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 import httpx
-import time
+
+from agent_server.core.embedding_cache import embed_with_cache, get_embedding_cache
+from agent_server.core.matryoshka import truncate_embeddings, truncated_dimension
+from agent_server.core.query_embedder import QueryEmbeddingBatcher
 
 if TYPE_CHECKING:
     from hdsp_agent_core.models.rag import EmbeddingConfig
 
 logger = logging.getLogger(__name__)
 
+# Worth retrying: rate limiting, overload and transient server errors
+_RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count; UTF-8 bytes / 3 errs high for English, fits Korean"""
+    return len(text.encode("utf-8")) // 3 + 1
+
 
 class VLLMEmbeddingService:
     """
@@ -31,7 +51,7 @@ class VLLMEmbeddingService:
 
     Design Principles:
     - Stateless client (vLLM server holds the model)
-    - Retry logic for network resilience
+    - Bounded, concurrent requests with backoff for shared servers
     - OpenAI-compatible API interface
 
     Usage:
@@ -60,39 +80,150 @@ class VLLMEmbeddingService:
         # vLLM configuration from environment variables
         self._endpoint = os.environ.get("HDSP_VLLM_ENDPOINT", "http://localhost:8000")
         self._model = os.environ.get("HDSP_VLLM_MODEL", "qwen3-embedding-8b")
-        self._dimension = int(os.environ.get("HDSP_VLLM_DIMENSION", "8192"))
-
-        # HTTP client with retry
+        # Only a fallback: the served model's dimension is detected
+        self._dimension_hint = os.environ.get("HDSP_VLLM_DIMENSION")
+        self._dimension = int(self._dimension_hint or "8192")
+        self._dimension_detected = False
+
+        # One pooled connection per concurrent request
+        self._concurrency = self._config.get_vllm_concurrency()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
         self._client = httpx.AsyncClient(
             base_url=self._endpoint,
-            timeout=httpx.Timeout(30.0),
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
+            timeout=httpx.Timeout(self._config.vllm_timeout),
+            limits=httpx.Limits(
+                max_keepalive_connections=self._concurrency,
+                max_connections=self._concurrency,
+            )
+        )
+        self._query_batcher = QueryEmbeddingBatcher(
+            self._encode_queries,
+            max_batch=self._config.query_batch_size,
+            max_wait=self._config.query_batch_wait_ms / 1000,
+            cache_size=self._config.query_cache_size,
         )
 
         logger.info(
             f"vLLM Embedding Service initialized: "
-            f"endpoint={self._endpoint}, model={self._model}, dim={self._dimension}"
+            f"endpoint={self._endpoint}, model={self._model}, dim={self.dimension}"
         )
 
     @property
     def dimension(self) -> int:
-        """Get embedding dimension"""
-        return self._dimension
+        """Get embedding dimension (after truncation)"""
+        return truncated_dimension(self._dimension, self._config.get_truncate_dim())
+
+    def _get_cache(self):
+        """Embedding cache for the served model (None if disabled)"""
+        namespace = f"vllm|{self._model}|none"
+        truncate_dim = self._config.get_truncate_dim()
+        if truncate_dim:
+            namespace += f"|dim={truncate_dim}"
+        return get_embedding_cache(namespace, self._config)
+
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Call vLLM for cache misses, truncating if configured"""
+        embeddings = await self._call_vllm_api(texts)
+        return truncate_embeddings(embeddings, self._config.get_truncate_dim())
+
+    async def ensure_dimension(self) -> int:
+        """Detect the served model's dimension with a probe request (once)"""
+        if not self._dimension_detected:
+            try:
+                await self._call_vllm_api(["dimension probe"], max_retries=1)
+            except Exception as e:
+                logger.warning(
+                    f"Could not detect vLLM embedding dimension, "
+                    f"using {self._dimension}: {e}"
+                )
+        return self.dimension
 
-    async def _call_vllm_api(self, texts: List[str], max_retries: int = 3) -> List[List[float]]:
+    def _detect_dimension(self, dimension: int) -> None:
+        if self._dimension_detected:
+            return
+        self._dimension_detected = True
+        if self._dimension_hint and dimension != self._dimension:
+            logger.warning(
+                f"vLLM returned {dimension}-dim embeddings but "
+                f"HDSP_VLLM_DIMENSION={self._dimension_hint}; using {dimension}"
+            )
+        self._dimension = dimension
+        logger.info(f"vLLM embedding dimension detected: {dimension}")
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Request semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _split_batches(
+        self, texts: List[str], batch_size: Optional[int] = None
+    ) -> List[Tuple[int, int]]:
         """
-        Call vLLM embedding API with retry logic.
+        Split texts into [start, end) ranges bounded by count and tokens.
+
+        A text over the token budget gets a request of its own.
+        """
+        max_texts = max(1, batch_size or self._config.get_vllm_batch_size())
+        max_tokens = self._config.vllm_batch_tokens
+        batches = []
+        start, tokens = 0, 0
+        for i, text in enumerate(texts):
+            cost = _estimate_tokens(text)
+            if i > start and (i - start >= max_texts or tokens + cost > max_tokens):
+                batches.append((start, i))
+                start, tokens = i, 0
+            tokens += cost
+        if start < len(texts):
+            batches.append((start, len(texts)))
+        return batches
+
+    async def _call_vllm_api(
+        self,
+        texts: List[str],
+        max_retries: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> List[List[float]]:
+        """
+        Call vLLM embedding API in concurrent, bounded batches.
 
         Args:
             texts: List of text strings to embed
-            max_retries: Maximum number of retry attempts
+            max_retries: Attempts per request (default: config.vllm_max_retries)
+            batch_size: Max texts per request (default: config.vllm_batch_size)
 
         Returns:
-            List of embedding vectors
+            List of embedding vectors, in input order
 
         Raises:
-            Exception if all retries fail
+            Exception if a request fails after all retries
         """
+        if not texts:
+            return []
+        attempts = max(1, max_retries or self._config.vllm_max_retries)
+        tasks = [
+            asyncio.ensure_future(self._post_embeddings(texts[start:end], attempts))
+            for start, end in self._split_batches(texts, batch_size)
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # Don't leave sibling requests running against the server
+            for task in tasks:
+                task.cancel()
+            raise
+
+        embeddings = [vector for batch in results for vector in batch]
+        self._detect_dimension(len(embeddings[0]))
+        return embeddings
+
+    async def _post_embeddings(
+        self, texts: List[str], max_retries: int
+    ) -> List[List[float]]:
+        """One embedding request, retried with jittered exponential backoff"""
         payload = {
             "model": self._model,
             "input": texts,
@@ -100,33 +231,53 @@ class VLLMEmbeddingService:
 
         last_error = None
         for attempt in range(max_retries):
+            retry_after = None
             try:
-                response = await self._client.post("/v1/embeddings", json=payload)
+                # Hold a slot only while the request is in flight
+                async with self._get_semaphore():
+                    response = await self._client.post("/v1/embeddings", json=payload)
                 response.raise_for_status()
 
                 data = response.json()
                 # Sort by index to ensure correct order
                 sorted_items = sorted(data["data"], key=lambda x: x["index"])
-                embeddings = [item["embedding"] for item in sorted_items]
-                return embeddings
+                return [item["embedding"] for item in sorted_items]
 
             except httpx.HTTPStatusError as e:
                 last_error = e
+                status = e.response.status_code
                 logger.warning(
                     f"vLLM API HTTP error (attempt {attempt + 1}/{max_retries}): "
-                    f"{e.response.status_code} - {e.response.text}"
+                    f"{status} - {e.response.text}"
                 )
+                if status not in _RETRY_STATUS:
+                    break
+                retry_after = e.response.headers.get("Retry-After")
             except httpx.RequestError as e:
                 last_error = e
                 logger.warning(
-                    f"vLLM API connection error (attempt {attempt + 1}/{max_retries}): {e}"
+                    f"vLLM API connection error (attempt {attempt + 1}/{max_retries}): {e!r}"
                 )
             except Exception as e:
                 last_error = e
                 logger.error(f"Unexpected error calling vLLM API: {e}")
                 break
 
-        raise Exception(f"Failed to connect to vLLM after {max_retries} attempts: {last_error}")
+            if attempt + 1 < max_retries:
+                await asyncio.sleep(self._backoff_delay(attempt, retry_after))
+
+        raise Exception(f"vLLM embedding request failed after {attempt + 1} attempts: {last_error}")
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Exponential delay with jitter, so clients don't retry in lockstep"""
+        cap = min(self._config.vllm_backoff_max, self._config.vllm_backoff_base * 2**attempt)
+        delay = cap / 2 + random.uniform(0, cap / 2)
+        try:
+            # Honor the server's Retry-After (seconds form) when it asks for longer
+            delay = max(delay, min(float(retry_after), self._config.vllm_backoff_max))
+        except (TypeError, ValueError):
+            pass
+        return delay
 
     async def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
@@ -142,7 +293,7 @@ class VLLMEmbeddingService:
             return []
 
         try:
-            return await self._call_vllm_api(texts)
+            return await embed_with_cache(self._get_cache(), texts, self._embed_uncached)
         except Exception as e:
             logger.error(f"Failed to generate embeddings via vLLM: {e}")
             raise
@@ -161,12 +312,15 @@ class VLLMEmbeddingService:
             raise ValueError("Query cannot be empty")
 
         try:
-            embeddings = await self._call_vllm_api([query])
-            return embeddings[0]
+            return await self._query_batcher.embed(query)
         except Exception as e:
             logger.error(f"Failed to generate query embedding via vLLM: {e}")
             raise
 
+    async def _encode_queries(self, queries: List[str]) -> List[List[float]]:
+        """Batch of queries not in the LRU cache"""
+        return await embed_with_cache(self._get_cache(), queries, self._embed_uncached)
+
     async def embed_batch(
         self, texts: List[str], batch_size: Optional[int] = None
     ) -> List[List[float]]:
@@ -175,7 +329,7 @@ class VLLMEmbeddingService:
 
         Args:
             texts: List of text strings to embed
-            batch_size: Override default batch size (for vLLM, can handle large batches)
+            batch_size: Override texts per request (default: config.vllm_batch_size)
 
         Returns:
             List of embedding vectors
@@ -183,16 +337,12 @@ class VLLMEmbeddingService:
         if not texts:
             return []
 
-        # vLLM can handle large batches efficiently
-        effective_batch_size = batch_size or 100
-        all_embeddings = []
-
-        for i in range(0, len(texts), effective_batch_size):
-            batch = texts[i : i + effective_batch_size]
-            embeddings = await self._call_vllm_api(batch)
-            all_embeddings.extend(embeddings)
+        async def compute(missing: List[str]) -> List[List[float]]:
+            # _call_vllm_api splits and parallelizes the requests
+            embeddings = await self._call_vllm_api(missing, batch_size=batch_size)
+            return truncate_embeddings(embeddings, self._config.get_truncate_dim())
 
-        return all_embeddings
+        return await embed_with_cache(self._get_cache(), texts, compute)
 
     def get_model_info(self) -> dict:
         """Get information about the vLLM embedding service"""
@@ -200,7 +350,11 @@ class VLLMEmbeddingService:
             "backend": "vllm",
             "endpoint": self._endpoint,
             "model_name": self._model,
-            "dimension": self._dimension,
+            "dimension": self.dimension,
+            "truncate_dim": self._config.get_truncate_dim(),
+            "dimension_detected": self._dimension_detected,
+            "batch_size": self._config.get_vllm_batch_size(),
+            "concurrency": self._concurrency,
         }
 
     async def close(self):
@@ -14,7 +14,15 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from agent_server.routers import agent, chat, config, file_resolver, health, rag
+from agent_server.routers import (
+    agent,
+    chat,
+    config,
+    file_resolver,
+    health,
+    metrics,
+    rag,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -118,6 +126,13 @@ async def _legacy_shutdown():
     except Exception as e:
         logger.warning(f"Error during legacy RAG shutdown: {e}")
 
+    try:
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+
+        await close_http_pool()
+    except Exception as e:
+        logger.warning(f"Error closing LLM HTTP sessions: {e}")
+
 
 app = FastAPI(
     title="HDSP Agent Server",
@@ -137,6 +152,7 @@ app.add_middleware(
 
 # Register routers
 app.include_router(health.router, tags=["Health"])
+app.include_router(metrics.router, tags=["Metrics"])
 app.include_router(config.router, prefix="/config", tags=["Configuration"])
 app.include_router(agent.router, prefix="/agent", tags=["Agent"])
 app.include_router(chat.router, prefix="/chat", tags=["Chat"])
@@ -4,6 +4,6 @@ Agent Server Routers
 FastAPI routers for the HDSP Agent Server.
 """
 
-from . import agent, chat, config, health, rag
+from . import agent, chat, config, health, metrics, rag
 
-__all__ = ["agent", "chat", "config", "health", "rag"]
+__all__ = ["agent", "chat", "config", "health", "metrics", "rag"]
@@ -1,15 +1,17 @@
 """
 Agent Router - Core agent functionality endpoints
 
-Handles plan generation, refinement, replanning, and state verification.
+Handles plan generation (blocking and streaming), refinement, replanning,
+and state verification.
 """
 
 import json
 import logging
 import re
-from typing import Any, Dict, List
+from typing import Any, AsyncGenerator, Dict, List
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from hdsp_agent_core.knowledge.loader import get_knowledge_base, get_library_detector
 from hdsp_agent_core.managers.config_manager import ConfigManager
 from hdsp_agent_core.models.agent import (
@@ -37,6 +39,7 @@ from hdsp_agent_core.prompts.auto_agent_prompts import (
 from agent_server.core.code_validator import CodeValidator
 from agent_server.core.error_classifier import get_error_classifier
 from agent_server.core.llm_service import LLMService
+from agent_server.core.plan_stream_parser import IncrementalPlanParser
 from agent_server.core.rag_manager import get_rag_manager
 from agent_server.core.state_verifier import get_state_verifier
 
@@ -69,6 +72,11 @@ def _build_llm_config(llm_config) -> Dict[str, Any]:
             "apiKey": llm_config.gemini.apiKey,
             "model": llm_config.gemini.model,
         }
+        # Request-supplied backup keys are the only ones hedging may use
+        if llm_config.gemini.apiKeys:
+            config["gemini"]["apiKeys"] = llm_config.gemini.apiKeys
+        if llm_config.gemini.hedge is not None:
+            config["gemini"]["hedge"] = llm_config.gemini.hedge
 
     if llm_config.openai:
         config["openai"] = {
@@ -86,11 +94,16 @@ def _build_llm_config(llm_config) -> Dict[str, Any]:
     return config
 
 
-async def _call_llm(prompt: str, llm_config=None) -> str:
-    """Call LLM with prompt using client-provided config"""
+async def _call_llm(
+    prompt: str, llm_config=None, cache: bool = False, cache_if=None
+) -> str:
+    """Call LLM with prompt using client-provided config
+
+    cache_if: with cache=True, only responses it accepts are stored
+    """
     config = _build_llm_config(llm_config)
     llm_service = LLMService(config)
-    return await llm_service.generate_response(prompt)
+    return await llm_service.generate_response(prompt, cache=cache, cache_if=cache_if)
 
 
 def _parse_json_response(response: str) -> Dict[str, Any]:
@@ -119,6 +132,32 @@ def _parse_json_response(response: str) -> Dict[str, Any]:
     return {}
 
 
+def _is_plan_response(response: str) -> bool:
+    """Whether a plan response parses (only those are cached)"""
+    return "plan" in _parse_json_response(response)
+
+
+def _parse_refine_response(response: str) -> Dict[str, Any]:
+    """Refine result from JSON, else from a bare code block ({} if neither)"""
+    refine_data = _parse_json_response(response)
+    if refine_data and "toolCalls" in refine_data:
+        return refine_data
+
+    # Try extracting code directly
+    code_match = re.search(r"```(?:python)?\s*([\s\S]*?)\s*```", response)
+    if code_match:
+        return {
+            "toolCalls": [
+                {
+                    "tool": "jupyter_cell",
+                    "parameters": {"code": code_match.group(1).strip()},
+                }
+            ],
+            "reasoning": "",
+        }
+    return {}
+
+
 def _sanitize_tool_calls(data: Dict[str, Any]) -> Dict[str, Any]:
     """Remove markdown code blocks from tool call code parameters"""
 
@@ -191,6 +230,43 @@ def _get_installed_packages() -> List[str]:
         return []
 
 
+async def _build_plan_prompt(request: PlanRequest) -> str:
+    """Build the plan prompt with detected libraries and RAG context"""
+    # Deterministic library detection
+    imported_libs = request.notebookContext.importedLibraries
+    detected_libraries = _detect_required_libraries(request.request, imported_libs)
+    logger.info(f"Detected libraries: {detected_libraries}")
+
+    # Get RAG context if available (with library prioritization)
+    rag_context = None
+    try:
+        rag_manager = get_rag_manager()
+        if rag_manager.is_ready:
+            # Pass detected_libraries to prioritize relevant API guides
+            rag_context = await rag_manager.get_context_for_query(
+                query=request.request, detected_libraries=detected_libraries
+            )
+            if rag_context:
+                logger.info(
+                    f"RAG context injected: {len(rag_context)} chars (libs: {detected_libraries})"
+                )
+    except Exception as e:
+        logger.warning(f"RAG context retrieval failed: {e}")
+        # Continue without RAG context
+
+    # Build prompt
+    return format_plan_prompt(
+        request=request.request,
+        cell_count=request.notebookContext.cellCount,
+        imported_libraries=imported_libs,
+        defined_variables=request.notebookContext.definedVariables,
+        recent_cells=request.notebookContext.recentCells,
+        available_libraries=_get_installed_packages(),
+        detected_libraries=detected_libraries,
+        rag_context=rag_context,
+    )
+
+
 # ============ Endpoints ============
 
 
@@ -210,42 +286,12 @@ async def generate_plan(request: PlanRequest) -> Dict[str, Any]:
         raise HTTPException(status_code=400, detail="request is required")
 
     try:
-        # Deterministic library detection
-        imported_libs = request.notebookContext.importedLibraries
-        detected_libraries = _detect_required_libraries(request.request, imported_libs)
-        logger.info(f"Detected libraries: {detected_libraries}")
-
-        # Get RAG context if available (with library prioritization)
-        rag_context = None
-        try:
-            rag_manager = get_rag_manager()
-            if rag_manager.is_ready:
-                # Pass detected_libraries to prioritize relevant API guides
-                rag_context = await rag_manager.get_context_for_query(
-                    query=request.request, detected_libraries=detected_libraries
-                )
-                if rag_context:
-                    logger.info(
-                        f"RAG context injected: {len(rag_context)} chars (libs: {detected_libraries})"
-                    )
-        except Exception as e:
-            logger.warning(f"RAG context retrieval failed: {e}")
-            # Continue without RAG context
-
-        # Build prompt
-        prompt = format_plan_prompt(
-            request=request.request,
-            cell_count=request.notebookContext.cellCount,
-            imported_libraries=imported_libs,
-            defined_variables=request.notebookContext.definedVariables,
-            recent_cells=request.notebookContext.recentCells,
-            available_libraries=_get_installed_packages(),
-            detected_libraries=detected_libraries,
-            rag_context=rag_context,
-        )
+        prompt = await _build_plan_prompt(request)
 
         # Call LLM with client-provided config
-        response = await _call_llm(prompt, request.llmConfig)
+        response = await _call_llm(
+            prompt, request.llmConfig, cache=True, cache_if=_is_plan_response
+        )
         logger.info(f"LLM response length: {len(response)}")
 
         # Parse response
@@ -276,6 +322,81 @@ async def generate_plan(request: PlanRequest) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/plan/stream")
+async def generate_plan_stream(request: PlanRequest) -> StreamingResponse:
+    """
+    Stream an execution plan as Server-Sent Events.
+
+    Each plan step is emitted as soon as the LLM has finished writing it:
+        data: {"plan": {"steps": [...so far]}, "step": {...}, "stepIndex": i}
+    followed by the complete, sanitized plan:
+        data: {"plan": {...}, "reasoning": "...", "done": true}
+    Errors are sent as data: {"error": "..."}.
+    """
+    logger.info(f"Plan stream request received: {request.request[:100]}...")
+
+    if not request.request:
+        raise HTTPException(status_code=400, detail="request is required")
+
+    async def generate() -> AsyncGenerator[str, None]:
+        try:
+            prompt = await _build_plan_prompt(request)
+            llm_service = LLMService(_build_llm_config(request.llmConfig))
+
+            parser = IncrementalPlanParser()
+            chunks: List[str] = []
+            steps: List[Dict[str, Any]] = []
+
+            async for chunk in llm_service.generate_response_stream(prompt):
+                chunks.append(chunk)
+                for step in parser.feed(chunk):
+                    # Sanitizes the step's tool calls in place
+                    _sanitize_tool_calls({"plan": {"steps": [step]}})
+                    steps.append(step)
+                    event = {
+                        "plan": {"steps": steps},
+                        "step": step,
+                        "stepIndex": len(steps) - 1,
+                    }
+                    yield f"data: {json.dumps(event)}\n\n"
+
+            response = "".join(chunks)
+            logger.info(
+                f"LLM stream length: {len(response)} ({parser.steps_emitted} steps streamed)"
+            )
+
+            plan_data = _parse_json_response(response)
+            if not plan_data or "plan" not in plan_data:
+                error = f"Failed to parse plan from LLM response: {response[:200]}"
+                yield f"data: {json.dumps({'error': error})}\n\n"
+                return
+
+            plan_data = _sanitize_tool_calls(plan_data)
+            if "goal" not in plan_data["plan"]:
+                plan_data["plan"]["goal"] = request.request
+
+            final = {
+                "plan": plan_data["plan"],
+                "reasoning": plan_data.get("reasoning", ""),
+                "done": True,
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+
+        except Exception as e:
+            logger.error(f"Plan stream failed: {e}", exc_info=True)
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",  # Disable nginx buffering
+        },
+    )
+
+
 @router.post("/refine", response_model=RefineResponse)
 async def refine_code(request: RefineRequest) -> Dict[str, Any]:
     """
@@ -318,28 +439,20 @@ async def refine_code(request: RefineRequest) -> Dict[str, Any]:
         )
 
         # Call LLM with client-provided config
-        response = await _call_llm(prompt, request.llmConfig)
+        response = await _call_llm(
+            prompt,
+            request.llmConfig,
+            cache=True,
+            cache_if=lambda r: bool(_parse_refine_response(r)),
+        )
 
         # Parse response
-        refine_data = _parse_json_response(response)
-
-        if not refine_data or "toolCalls" not in refine_data:
-            # Try extracting code directly
-            code_match = re.search(r"```(?:python)?\s*([\s\S]*?)\s*```", response)
-            if code_match:
-                refine_data = {
-                    "toolCalls": [
-                        {
-                            "tool": "jupyter_cell",
-                            "parameters": {"code": code_match.group(1).strip()},
-                        }
-                    ],
-                    "reasoning": "",
-                }
-            else:
-                raise HTTPException(
-                    status_code=500, detail="Failed to generate refined code"
-                )
+        refine_data = _parse_refine_response(response)
+
+        if not refine_data:
+            raise HTTPException(
+                status_code=500, detail="Failed to generate refined code"
+            )
 
         # Sanitize code blocks
         refine_data = _sanitize_tool_calls(refine_data)
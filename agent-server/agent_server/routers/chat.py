@@ -40,6 +40,11 @@ def _build_llm_config(llm_config) -> Dict[str, Any]:
             "apiKey": llm_config.gemini.apiKey,
             "model": llm_config.gemini.model,
         }
+        # Request-supplied backup keys are the only ones hedging may use
+        if llm_config.gemini.apiKeys:
+            config["gemini"]["apiKeys"] = llm_config.gemini.apiKeys
+        if llm_config.gemini.hedge is not None:
+            config["gemini"]["hedge"] = llm_config.gemini.hedge
 
     if llm_config.openai:
         config["openai"] = {
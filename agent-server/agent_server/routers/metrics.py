@@ -0,0 +1,20 @@
+"""
+Metrics Router - Prometheus scrape endpoint
+
+Serves LLM call histograms (latency, TTFT, tokens, retries, per-key 429s)
+plus RAG search and code validation timings.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from hdsp_agent_core.llm.metrics import CONTENT_TYPE, get_metrics_registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of all registered metrics"""
+    return PlainTextResponse(
+        get_metrics_registry().render_prometheus(), media_type=CONTENT_TYPE
+    )
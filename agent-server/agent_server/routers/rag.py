@@ -106,7 +106,7 @@ async def reindex(request: ReindexRequest) -> ReindexResponse:
 
     try:
         # Trigger actual reindexing
-        result = await rag_manager._index_knowledge_base()
+        result = await rag_manager._index_knowledge_base(force=request.force)
         return ReindexResponse(
             success=True,
             indexed=result["indexed"],
@@ -158,6 +158,7 @@ async def debug_search(request: DebugSearchRequest) -> DebugSearchResponse:
             total_candidates=result["total_candidates"],
             total_passed_threshold=result["total_passed_threshold"],
             search_ms=result["search_ms"],
+            timings=result.get("timings", {}),
             formatted_context=result["formatted_context"],
             context_char_count=result["context_char_count"],
             estimated_context_tokens=result["estimated_context_tokens"],
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Agent server load-test harness.
+
+Drives /agent/plan, /agent/refine, /agent/validate, /chat/stream and
+/rag/search at a target concurrency and reports p50/p95/p99 latency and
+throughput per endpoint. Use with the "fake" LLM provider to measure the
+server itself offline (see hdsp_agent_core.llm.fake_provider for
+HDSP_LLM_FAKE_* timing settings).
+
+Each request uses a distinct prompt so single-flight and the response cache
+do not collapse the load; pass --same-payload to measure the cached path.
+
+사용 예시:
+    python -m scripts.load_test --concurrency 32 --requests 500
+    python -m scripts.load_test --in-process --scenarios plan chat_stream
+    python -m scripts.load_test --base-url http://host:8000 \\
+        --llm-config '{"provider": "vllm", "vllm": {"endpoint": "http://vllm:8000"}}'
+    python -m scripts.load_test --max-p95 2.0 --min-rps 20 --json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+QUERIES = [
+    "titanic.csv 파일을 로드하고 생존율을 분석해줘",
+    "pandas로 결측치를 처리하고 요약 통계를 보여줘",
+    "matplotlib으로 나이 분포 히스토그램을 그려줘",
+    "dask로 대용량 CSV를 읽고 그룹별 평균을 구해줘",
+]
+
+VALIDATE_CODE = """import pandas as pd
+import numpy as np
+
+df = pd.DataFrame({"a": np.arange(10), "b": np.arange(10) ** 2})
+summary = df.describe()
+print(summary)
+"""
+
+
+@dataclass
+class Scenario:
+    """One endpoint under load"""
+
+    name: str
+    path: str
+    payload: Callable[[int, Dict[str, Any], bool], Dict[str, Any]]
+    stream: bool = False
+
+
+def _query(index: int, unique: bool) -> str:
+    query = QUERIES[index % len(QUERIES)]
+    return f"{query} (#{index})" if unique else query
+
+
+def _plan_payload(index: int, llm_config: Dict[str, Any], unique: bool = True):
+    return {
+        "request": _query(index, unique),
+        "notebookContext": {"cellCount": 0},
+        "llmConfig": llm_config,
+    }
+
+
+def _refine_payload(index: int, llm_config: Dict[str, Any], unique: bool = True):
+    suffix = f" (#{index})" if unique else ""
+    return {
+        "step": {"stepNumber": 1, "description": "Load data"},
+        "error": {
+            "type": "runtime",
+            "message": f"name 'pd' is not defined{suffix}",
+            "traceback": ["NameError: name 'pd' is not defined"],
+        },
+        "previousCode": "df = pd.read_csv('titanic.csv')",
+        "attempt": 1,
+        "llmConfig": llm_config,
+    }
+
+
+def _validate_payload(index: int, llm_config: Dict[str, Any], unique: bool = True):
+    code = f"{VALIDATE_CODE}value_{index} = {index}\n" if unique else VALIDATE_CODE
+    return {"code": code, "notebookContext": {"importedLibraries": ["pandas"]}}
+
+
+def _chat_payload(index: int, llm_config: Dict[str, Any], unique: bool = True):
+    return {"message": _query(index, unique), "llmConfig": llm_config}
+
+
+def _search_payload(index: int, llm_config: Dict[str, Any], unique: bool = True):
+    return {"query": _query(index, unique), "top_k": 5}
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "plan": Scenario("plan", "/agent/plan", _plan_payload),
+    "refine": Scenario("refine", "/agent/refine", _refine_payload),
+    "validate": Scenario("validate", "/agent/validate", _validate_payload),
+    "chat_stream": Scenario("chat_stream", "/chat/stream", _chat_payload, True),
+    "rag_search": Scenario("rag_search", "/rag/search", _search_payload),
+}
+
+
+@dataclass
+class ScenarioResult:
+    """Latency samples and error counts for one scenario"""
+
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    first_byte: List[float] = field(default_factory=list)
+    errors: int = 0
+    status_counts: Dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def record(self, status: str, latency: float, ok: bool) -> None:
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        if ok:
+            self.latencies.append(latency)
+        else:
+            self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Percentiles (seconds) and throughput (successful requests/second)"""
+        completed = len(self.latencies)
+        result = {
+            "scenario": self.name,
+            "requests": completed + self.errors,
+            "errors": self.errors,
+            "status": dict(sorted(self.status_counts.items())),
+            "elapsed": round(self.elapsed, 3),
+            "throughput": round(completed / self.elapsed, 2) if self.elapsed else 0.0,
+        }
+        for p in (50, 95, 99):
+            result[f"p{p}"] = _round(percentile(self.latencies, p))
+        if self.first_byte:
+            result["ttfb_p50"] = _round(percentile(self.first_byte, 50))
+            result["ttfb_p95"] = _round(percentile(self.first_byte, 95))
+        return result
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 4)
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile (None for no samples)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def _send(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    payload: Dict[str, Any],
+    result: ScenarioResult,
+) -> None:
+    started = time.perf_counter()
+    try:
+        if not scenario.stream:
+            response = await client.post(scenario.path, json=payload)
+            result.record(
+                str(response.status_code),
+                time.perf_counter() - started,
+                response.status_code == 200,
+            )
+            return
+
+        # SSE: errors are reported in-band as {"error": ...} events
+        ok, first_byte = True, None
+        async with client.stream("POST", scenario.path, json=payload) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                try:
+                    event = json.loads(line[5:])
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(event, dict) and "error" in event:
+                    ok = False
+            status = str(response.status_code)
+            ok = ok and response.status_code == 200
+        if ok and first_byte is not None:
+            result.first_byte.append(first_byte)
+        result.record(
+            status if ok else f"{status}/error", time.perf_counter() - started, ok
+        )
+    except httpx.HTTPError as e:
+        result.record(type(e).__name__, time.perf_counter() - started, False)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    total: int,
+    concurrency: int,
+    llm_config: Dict[str, Any],
+    unique: bool = True,
+) -> ScenarioResult:
+    """Send `total` requests with `concurrency` in flight"""
+    result = ScenarioResult(scenario.name)
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        for index in counter:
+            payload = scenario.payload(index, llm_config, unique)
+            await _send(client, scenario, payload, result)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(max(1, min(concurrency, total)))])
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def run_load_test(
+    client: httpx.AsyncClient,
+    scenarios: List[str],
+    total: int,
+    concurrency: int,
+    llm_config: Dict[str, Any],
+    unique: bool = True,
+    warmup: int = 0,
+) -> List[Dict[str, Any]]:
+    """Run scenarios one after another; returns one summary per scenario"""
+    summaries = []
+    for name in scenarios:
+        scenario = SCENARIOS[name]
+        if warmup:
+            await run_scenario(
+                client, scenario, warmup, concurrency, llm_config, unique
+            )
+        result = await run_scenario(
+            client, scenario, total, concurrency, llm_config, unique
+        )
+        summaries.append(result.summary())
+    return summaries
+
+
+def check_thresholds(
+    summaries: List[Dict[str, Any]],
+    max_p95: Optional[float] = None,
+    min_rps: Optional[float] = None,
+    max_error_rate: float = 0.0,
+) -> List[str]:
+    """Return threshold violations (empty = pass)"""
+    violations = []
+    for summary in summaries:
+        name = summary["scenario"]
+        if summary["requests"]:
+            error_rate = summary["errors"] / summary["requests"]
+            if error_rate > max_error_rate:
+                violations.append(f"{name}: error rate {error_rate:.1%}")
+        p95 = summary["p95"]
+        if max_p95 is not None and p95 is not None and p95 > max_p95:
+            violations.append(f"{name}: p95 {p95:.3f}s > {max_p95:.3f}s")
+        if min_rps is not None and summary["throughput"] < min_rps:
+            violations.append(
+                f"{name}: throughput {summary['throughput']:.2f}/s < {min_rps:.2f}/s"
+            )
+    return violations
+
+
+def print_report(summaries: List[Dict[str, Any]], concurrency: int) -> None:
+    """Print a summary table"""
+    width = 96
+    print("=" * width)
+    print(f" LOAD TEST RESULTS (concurrency={concurrency})")
+    print("=" * width)
+    print(
+        f"{'scenario':<12} {'reqs':>6} {'errors':>6} {'req/s':>9} "
+        f"{'p50':>9} {'p95':>9} {'p99':>9} {'ttfb p50':>9}  status"
+    )
+    print("-" * width)
+
+    def ms(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value * 1000:.1f}ms"
+
+    for s in summaries:
+        status = ", ".join(f"{k}:{v}" for k, v in s["status"].items())
+        print(
+            f"{s['scenario']:<12} {s['requests']:>6} {s['errors']:>6} "
+            f"{s['throughput']:>9.2f} {ms(s['p50']):>9} {ms(s['p95']):>9} "
+            f"{ms(s['p99']):>9} {ms(s.get('ttfb_p50')):>9}  {status}"
+        )
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    llm_config: Dict[str, Any] = (
+        json.loads(args.llm_config) if args.llm_config else {"provider": args.provider}
+    )
+    limits = httpx.Limits(max_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.in_process:
+        # ASGI transport buffers responses: stream TTFB equals total latency
+        from agent_server.main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://load-test", timeout=timeout
+            ) as client:
+                summaries = await run_load_test(
+                    client,
+                    args.scenarios,
+                    args.requests,
+                    args.concurrency,
+                    llm_config,
+                    unique=not args.same_payload,
+                    warmup=args.warmup,
+                )
+    else:
+        async with httpx.AsyncClient(
+            base_url=args.base_url, limits=limits, timeout=timeout
+        ) as client:
+            summaries = await run_load_test(
+                client,
+                args.scenarios,
+                args.requests,
+                args.concurrency,
+                llm_config,
+                unique=not args.same_payload,
+                warmup=args.warmup,
+            )
+
+    violations = check_thresholds(
+        summaries, args.max_p95, args.min_rps, args.max_error_rate
+    )
+    if args.json:
+        print(
+            json.dumps(
+                {"results": summaries, "violations": violations},
+                indent=2,
+                ensure_ascii=False,
+            )
+        )
+    else:
+        print_report(summaries, args.concurrency)
+        for violation in violations:
+            print(f"FAIL {violation}")
+    return 1 if violations else 0
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Agent server load test - latency percentiles and throughput",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  HDSP_LLM_FAKE_TTFT=0.3 python -m scripts.load_test --in-process
+  python -m scripts.load_test --concurrency 64 --requests 1000 --scenarios plan
+  python -m scripts.load_test --max-p95 1.5 --min-rps 30  # exits 1 on regression
+        """,
+    )
+    parser.add_argument(
+        "--base-url", default="http://localhost:8000", help="Server to load"
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run against agent_server.main:app in this process (no server needed)",
+    )
+    parser.add_argument(
+        "--scenarios",
+        "-s",
+        nargs="+",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+        help="Endpoints to drive (default: all)",
+    )
+    parser.add_argument(
+        "--concurrency", "-c", type=int, default=16, help="Requests in flight"
+    )
+    parser.add_argument(
+        "--requests", "-n", type=int, default=200, help="Requests per scenario"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=0, help="Unmeasured requests per scenario"
+    )
+    parser.add_argument(
+        "--provider", default="fake", help="llmConfig provider (default: fake)"
+    )
+    parser.add_argument(
+        "--llm-config",
+        default=None,
+        metavar="JSON",
+        help="Full llmConfig for real providers (overrides --provider)",
+    )
+    parser.add_argument(
+        "--same-payload",
+        action="store_true",
+        help="Repeat one payload (exercises single-flight and response cache)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=120.0, help="Request timeout in seconds"
+    )
+    parser.add_argument("--max-p95", type=float, default=None, help="p95 limit (s)")
+    parser.add_argument(
+        "--min-rps", type=float, default=None, help="Throughput floor (req/s)"
+    )
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        default=0.0,
+        help="Allowed error fraction before failing (default: 0)",
+    )
+    parser.add_argument("--json", "-j", action="store_true", help="Output as JSON")
+
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
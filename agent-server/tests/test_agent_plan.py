@@ -155,6 +155,17 @@ class TestPlanGenerationUnit:
         assert "steps" in plan
         assert plan["totalSteps"] == len(plan["steps"])
 
+    @patch("agent_server.routers.agent._call_llm")
+    def test_plan_caches_only_parsable_responses(self, mock_llm, client, mock_llm_plan_response, plan_request_payload):
+        """Truncated plan responses must not be stored in the response cache"""
+        mock_llm.return_value = mock_llm_plan_response
+
+        client.post("/agent/plan", json=plan_request_payload)
+
+        cache_if = mock_llm.call_args.kwargs["cache_if"]
+        assert cache_if(mock_llm_plan_response)
+        assert not cache_if('{"reasoning": "...", "plan": {"steps": [')
+
     @patch("agent_server.routers.agent._call_llm")
     def test_plan_goal_field_auto_filled(self, mock_llm, client, plan_request_payload):
         """TC-001-04: Goal field should be auto-filled from request if missing in LLM response"""
@@ -51,3 +51,29 @@ class TestConfigEndpoints:
         assert response.status_code == 200
         data = response.json()
         assert "provider" in data
+
+
+class TestMetricsEndpoint:
+    """Test the Prometheus metrics endpoint"""
+
+    @pytest.fixture
+    def client(self):
+        """Create a test client for the FastAPI app"""
+        from agent_server.main import app
+
+        return TestClient(app)
+
+    def test_metrics_exposition(self, client):
+        """Test GET /metrics returns Prometheus text with timing histograms"""
+        from hdsp_agent_core.llm.metrics import timed
+
+        with timed("hdsp_validation_duration_seconds", operation="full"):
+            pass
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE hdsp_llm_request_duration_seconds histogram" in response.text
+        assert (
+            'hdsp_validation_duration_seconds_count{operation="full"}' in response.text
+        )
@@ -77,7 +77,6 @@ class TestTokenEstimation:
 
     def test_estimate_tokens_short(self, condenser):
         """Short text estimation is reasonable."""
-        # "Hello world" = 2 words * 1.3 = 2.6 → 2 tokens
         tokens = condenser.estimate_tokens("Hello world")
         assert tokens >= 2
         assert tokens <= 5
@@ -86,8 +85,14 @@ class TestTokenEstimation:
         """Long text scales appropriately."""
         text = " ".join(["word"] * 100)  # 100 words
         tokens = condenser.estimate_tokens(text)
-        # 100 words * 1.3 = 130 tokens
-        assert tokens == 130
+        # Common English words are one token each
+        assert tokens == 100
+
+    def test_estimate_tokens_korean(self, condenser):
+        """Korean text is counted per syllable, not per word."""
+        text = "결측치를 평균값으로 채워주세요"
+        tokens = condenser.estimate_tokens(text)
+        assert tokens >= len(text.replace(" ", ""))
 
 
 class TestCondenseUnderLimit:
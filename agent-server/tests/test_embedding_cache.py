@@ -0,0 +1,115 @@
+"""
+Tests for the persistent embedding cache and its use by embedding services.
+"""
+
+import pytest
+
+from agent_server.core.embedding_cache import (
+    EmbeddingCache,
+    embed_with_cache,
+    get_embedding_cache,
+    reset_embedding_caches,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    reset_embedding_caches()
+    yield
+    reset_embedding_caches()
+
+
+class TestEmbeddingCache:
+    """Tests for storage, keys and eviction"""
+
+    def test_round_trip_across_instances(self, tmp_path):
+        """Test vectors survive a restart and keys ignore NFC/edge whitespace"""
+        cache = EmbeddingCache(tmp_path, "local|m|passage")
+        cache.put_many(["alpha", "beta"], [[0.5, 0.25], [1.0, -1.0]])
+
+        reopened = EmbeddingCache(tmp_path, "local|m|passage")
+        assert reopened.dimension == 2
+        assert reopened.get_many(["beta", "  alpha\n", "gamma"]) == [
+            [1.0, -1.0],
+            [0.5, 0.25],
+            None,
+        ]
+        assert reopened.stats() == {"entries": 2, "hits": 2, "misses": 1}
+        assert EmbeddingCache(tmp_path, "local|m|query").get_many(["alpha"]) == [None]
+
+    def test_lru_eviction_is_bounded(self, tmp_path):
+        """Test the least recently used row is reused once full"""
+        cache = EmbeddingCache(tmp_path, "ns", max_entries=2, dtype="float32")
+        cache.put_many(["a", "b"], [[1.0], [2.0]])
+        cache.get_many(["a"])
+        cache.put_many(["c"], [[3.0]])
+
+        assert len(cache) == 2
+        assert cache.get_many(["a", "b", "c"]) == [[1.0], None, [3.0]]
+        reopened = EmbeddingCache(tmp_path, "ns", max_entries=2, dtype="float32")
+        assert reopened.get_many(["b", "c"]) == [None, [3.0]]
+
+    def test_dimension_change_clears(self, tmp_path):
+        """Test a model with a new dimension does not read old vectors"""
+        cache = EmbeddingCache(tmp_path, "ns")
+        cache.put_many(["a"], [[1.0, 2.0]])
+        cache.put_many(["b"], [[1.0, 2.0, 3.0]])
+        assert cache.get_many(["a", "b"]) == [None, [1.0, 2.0, 3.0]]
+
+    async def test_embed_with_cache_computes_misses_once(self, tmp_path):
+        """Test only missing, de-duplicated texts reach the model"""
+        cache = EmbeddingCache(tmp_path, "ns")
+        cache.put_many(["hit"], [[1.0]])
+        calls = []
+
+        async def compute(texts):
+            calls.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+        vectors = await embed_with_cache(cache, ["hit", "xy", "xy", "abc"], compute)
+        assert vectors == [[1.0], [2.0], [2.0], [3.0]]
+        assert calls == [["xy", "abc"]]
+
+    def test_disabled_by_env(self, tmp_path, monkeypatch):
+        """Test HDSP_EMBEDDING_CACHE=0 turns the cache off"""
+        from hdsp_agent_core.models.rag import EmbeddingConfig
+
+        config = EmbeddingConfig(cache_dir=str(tmp_path))
+        assert get_embedding_cache("ns", config) is get_embedding_cache("ns", config)
+        monkeypatch.setenv("HDSP_EMBEDDING_CACHE", "0")
+        assert get_embedding_cache("ns", config) is None
+
+
+class TestServiceCaching:
+    """Tests for the vLLM service consulting the cache"""
+
+    async def test_restart_skips_server_calls(self, tmp_path):
+        """Test a second service instance embeds from disk"""
+        from hdsp_agent_core.models.rag import EmbeddingConfig
+
+        from agent_server.core.vllm_embedding_service import (
+            VLLMEmbeddingService,
+            reset_vllm_embedding_service,
+        )
+
+        config = EmbeddingConfig(cache_dir=str(tmp_path))
+        calls = []
+
+        async def fake_api(texts, max_retries=3):
+            calls.append(list(texts))
+            return [[float(len(t)), 1.0] for t in texts]
+
+        for _ in range(2):
+            reset_vllm_embedding_service()
+            reset_embedding_caches()
+            service = VLLMEmbeddingService(config)
+            service._call_vllm_api = fake_api
+            assert await service.embed_texts(["doc one", "doc two"]) == [
+                [7.0, 1.0],
+                [7.0, 1.0],
+            ]
+            assert await service.embed_query("doc one") == [7.0, 1.0]
+            await service.close()
+        reset_vllm_embedding_service()
+
+        assert calls == [["doc one", "doc two"]]
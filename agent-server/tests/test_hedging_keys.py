@@ -0,0 +1,63 @@
+"""
+Tests for where the agent server's LLMService takes hedging backup keys.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from agent_server.core import llm_service as llm_service_module
+from agent_server.core.llm_service import LLMService
+
+
+@pytest.fixture
+def server_key_manager(monkeypatch):
+    key_manager = MagicMock()
+    key_manager.get_alternate_key = AsyncMock(return_value=("server-key", "id"))
+    monkeypatch.setattr(
+        "agent_server.core.api_key_manager.get_key_manager",
+        lambda *args, **kwargs: key_manager,
+    )
+    monkeypatch.setattr(llm_service_module, "_warned_no_backup_key", True)
+    return key_manager
+
+
+def _service(**gemini):
+    return LLMService(
+        {"provider": "gemini", "gemini": {"apiKey": "client-key", **gemini}}
+    )
+
+
+class TestBackupKeys:
+    """Tests for keeping client-keyed requests on client keys"""
+
+    async def test_server_keys_not_used_by_default(
+        self, server_key_manager, monkeypatch
+    ):
+        """Test a single-key request is not hedged onto a server key"""
+        monkeypatch.delenv("HDSP_LLM_HEDGE_SERVER_KEYS", raising=False)
+
+        assert await _service()._get_backup_gemini_key("client-key") is None
+        server_key_manager.get_alternate_key.assert_not_awaited()
+
+    async def test_request_keys_preferred(self, server_key_manager, monkeypatch):
+        """Test the request's own apiKeys are used, even with server keys allowed"""
+        monkeypatch.setenv("HDSP_LLM_HEDGE_SERVER_KEYS", "true")
+        service = _service(apiKeys=["client-key", "client-key-2"])
+
+        assert await service._get_backup_gemini_key("client-key") == "client-key-2"
+        server_key_manager.get_alternate_key.assert_not_awaited()
+
+    async def test_server_keys_opt_in(self, server_key_manager, monkeypatch):
+        """Test HDSP_LLM_HEDGE_SERVER_KEYS allows the server's key manager"""
+        monkeypatch.setenv("HDSP_LLM_HEDGE_SERVER_KEYS", "true")
+
+        assert await _service()._get_backup_gemini_key("client-key") == "server-key"
+
+    def test_backup_keys_not_in_cache_key(self):
+        """Test apiKeys and hedge do not split the response cache"""
+        plain = _service()._cache_key("prompt")
+        assert (
+            _service(apiKeys=["client-key", "other"], hedge=True)._cache_key("prompt")
+            == plain
+        )
@@ -0,0 +1,257 @@
+"""
+Tests for BM25 lexical search, rank fusion and watchdog-driven sync.
+
+Retrieval runs against an in-memory Qdrant client; embeddings are
+deterministic fakes, so the dense stage alone cannot find API names.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from agent_server.core.lexical_index import LexicalIndex, tokenize
+
+
+class TestLexicalIndex:
+    """Tests for tokenization and incremental BM25"""
+
+    def test_tokenize_api_names(self):
+        """Test dotted and snake_case names are indexed whole and in parts"""
+        tokens = tokenize("Use dd.read_csv(path)")
+        assert {"dd.read_csv", "dd", "read_csv", "read", "csv", "path"} <= set(tokens)
+
+    def test_stopwords_do_not_match(self):
+        """Test filler words are dropped and partial matches score low"""
+        assert tokenize("what is the weather in the city") == ["weather", "city"]
+        index = LexicalIndex()
+        index.add("1", "What is the DataFrame in the dask module?", {})
+        index.add("2", "The weather in the city", {})
+
+        assert index.search("what is in the module") != []
+        assert index.search("what is it") == []
+        (hit,) = index.search("weather forecast")
+        assert hit.doc_id == "2"
+        assert (
+            0 < hit.normalized_score < index.search("weather city")[0].normalized_score
+        )
+
+    def test_incremental_add_remove(self):
+        """Test exact names rank first and removed chunks disappear"""
+        index = LexicalIndex()
+        index.add("1", "dd.read_csv loads many CSV files lazily", {"source": "dask.md"})
+        index.add("2", "pd.read_csv loads one CSV file", {"source": "pandas.md"})
+        index.add("3", "np.array creates arrays", {"source": "numpy.md"})
+
+        hits = index.search("dd.read_csv")
+        assert [h.doc_id for h in hits] == ["1", "2"]
+        assert (
+            index.search("read_csv", filters={"source": ["pandas.md"]})[0].doc_id == "2"
+        )
+
+        index.remove(["1"])
+        assert [h.doc_id for h in index.search("dd.read_csv")] == ["2"]
+        index.remove_where("source", "pandas.md")
+        assert index.search("csv") == []
+        assert len(index) == 1
+
+
+def _embed(text: str):
+    # Same vector for every text: dense ranking carries no signal
+    return [1.0, 0.0, 0.0, 0.0]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, VectorParams
+
+    from agent_server.core.vector_store import QdrantVectorStore
+    from agent_server.core.rag_manager import RAGManager, reset_rag_manager
+    from agent_server.core.retriever import Retriever
+    from hdsp_agent_core.models.rag import (
+        IndexingConfig,
+        QdrantConfig,
+        RAGConfig,
+    )
+
+    reset_rag_manager()
+    knowledge = tmp_path / "libraries"
+    knowledge.mkdir()
+    (knowledge / "dask.md").write_text(
+        "# dask\n\nUse dd.read_csv to load many CSV files as one DataFrame.\n"
+    )
+    (knowledge / "polars.md").write_text(
+        "# polars\n\nUse pl.scan_parquet for lazy parquet reads.\n"
+    )
+
+    config = RAGConfig(
+        knowledge_base_path=str(knowledge),
+        score_threshold=0.99,
+        qdrant=QdrantConfig(collection_name="test"),
+        indexing=IndexingConfig(manifest_path=str(tmp_path / "manifest.json")),
+    )
+    config.chunking.min_chunk_size = 10
+    manager = RAGManager(config)
+    manager.client = QdrantClient(":memory:")
+    manager.client.create_collection(
+        "test", vectors_config=VectorParams(size=4, distance=Distance.COSINE)
+    )
+    manager._store = QdrantVectorStore(manager.client, "test")
+    embedding = MagicMock()
+
+    async def embed_texts(texts):
+        return [_embed(t) for t in texts]
+
+    embedding.embed_texts = embed_texts
+    embedding.embed_query = AsyncMock(return_value=[0.0, 1.0, 0.0, 0.0])
+    manager._embedding_service = embedding
+    manager._lexical_index = LexicalIndex()
+    manager._retriever = Retriever(
+        manager._store, embedding, config, lexical_index=manager._lexical_index
+    )
+    manager.knowledge = knowledge
+    yield manager
+    reset_rag_manager()
+
+
+class TestHybridRetrieval:
+    """Tests for fused dense + BM25 search"""
+
+    async def test_exact_api_name_found_below_dense_threshold(self, manager):
+        """Test a BM25 hit is returned although its dense score is too low"""
+        await manager._index_knowledge_base()
+
+        results = await manager._retriever.search("pl.scan_parquet")
+        assert results
+        top = results[0]
+        assert top["metadata"]["source"] == "polars.md"
+        assert top["bm25_score"] > 0
+        assert top["fused_score"] > 0
+        assert top["score"] == 0.0  # orthogonal query vector
+
+    async def test_weak_lexical_matches_filtered(self, manager):
+        """Test a question sharing only filler or one word with the KB finds nothing"""
+        await manager._index_knowledge_base()
+
+        assert await manager._retriever.search("what is the weather in the city") == []
+        assert await manager._retriever.search("weather forecast for a dataframe") == []
+
+        result = await manager._retriever.search_with_debug(
+            "weather forecast for a dataframe"
+        )
+        assert result.chunks
+        assert not any(c.passed_threshold for c in result.chunks)
+
+    async def test_dense_only_when_disabled(self, manager, monkeypatch):
+        """Test HDSP_RAG_HYBRID=0 falls back to thresholded dense search"""
+        await manager._index_knowledge_base()
+        monkeypatch.setenv("HDSP_RAG_HYBRID", "0")
+        assert await manager._retriever.search("pl.scan_parquet") == []
+
+    async def test_debug_reports_stage_timings(self, manager):
+        """Test search_with_debug reports BM25/fused scores and per-stage times"""
+        await manager._index_knowledge_base()
+
+        result = await manager._retriever.search_with_debug("dd.read_csv")
+        assert {"embed_ms", "dense_ms", "lexical_ms", "fusion_ms", "total_ms"} <= set(
+            result.timings
+        )
+        first = result.chunks[0]
+        assert first.metadata["source"] == "dask.md"
+        assert first.bm25_score > 0
+        assert first.passed_threshold
+
+    async def test_dimension_change_reindexes(self, manager):
+        """Test new-size embeddings rebuild the collection and manifest"""
+        await manager._index_knowledge_base()
+
+        async def embed_texts(texts):
+            return [[1.0, 0.0] for _ in texts]
+
+        manager._embedding_service.embed_texts = embed_texts
+        manager._embedding_service.embed_query = AsyncMock(return_value=[0.0, 1.0])
+        manager._embedding_service.dimension = 2
+        await manager._ensure_collection()
+
+        result = await manager._index_knowledge_base()
+        assert result["indexed"] == 2
+        assert await manager._store.count() == manager._get_manifest().total_chunks()
+        results = await manager._retriever.search("pl.scan_parquet")
+        assert results[0]["metadata"]["source"] == "polars.md"
+
+
+class TestWatchdogSync:
+    """Tests for keeping Qdrant and BM25 in sync with file changes"""
+
+    async def test_changes_reach_both_indexes(self, manager):
+        """Test created, edited and deleted files update vector and BM25 indexes"""
+        await manager._index_knowledge_base()
+
+        (manager.knowledge / "pandas.md").write_text(
+            "# pandas\n\nUse pd.read_parquet to read a parquet file.\n"
+        )
+        (manager.knowledge / "polars.md").unlink()
+        manager._on_files_changed(
+            {manager.knowledge / "pandas.md", manager.knowledge / "polars.md"}
+        )
+        await asyncio.gather(*manager._sync_tasks)
+
+        sources = {
+            h.payload["source"] for h in manager._lexical_index.search("parquet")
+        }
+        assert sources == {"pandas.md"}
+        assert manager.client.count("test").count == len(manager._lexical_index)
+
+    async def test_start_watchdog_wiring(self, manager):
+        """Test the watchdog is built with its real signature and started"""
+        from hdsp_agent_core.models.rag import WatchdogConfig
+
+        manager._config.watchdog = WatchdogConfig(debounce_seconds=0.05)
+        await manager._start_watchdog()
+        try:
+            assert manager._watchdog is not None
+            assert manager._watchdog.is_running
+        finally:
+            manager._watchdog.stop()
+
+
+class TestBatchedContext:
+    """Tests for library-filtered and general searches sharing one request"""
+
+    async def test_one_embedding_one_round_trip(self, manager):
+        """Test detected libraries cost one embed_query and one batch query"""
+        await manager._index_knowledge_base()
+        manager._ready = True
+        batch = MagicMock(wraps=manager.client.query_batch_points)
+        manager.client.query_batch_points = batch
+
+        context = await manager.get_context_for_query(
+            "dd.read_csv pl.scan_parquet", detected_libraries=["dask", "polars"]
+        )
+
+        assert manager._embedding_service.embed_query.await_count == 1
+        assert batch.call_count == 1
+        assert len(batch.call_args.kwargs["requests"]) == 3
+        assert "dask.md" in context and "polars.md" in context
+        # Library and general searches overlap; each chunk appears once
+        assert context.count("[Source: dask.md") == 1
+
+    async def test_dense_filters_on_local_qdrant(self, manager, monkeypatch):
+        """Test metadata filters are valid Qdrant filters in every search"""
+        await manager._index_knowledge_base()
+        monkeypatch.setenv("HDSP_RAG_HYBRID", "0")
+        manager._embedding_service.embed_query.return_value = [1.0, 0.0, 0.0, 0.0]
+
+        dask, either, general = await manager._retriever.search_batch(
+            "csv",
+            [
+                (5, {"source": "dask.md"}),
+                (5, {"source": ["dask.md", "polars.md"]}),
+                (5, None),
+            ],
+        )
+
+        assert {r["metadata"]["source"] for r in dask} == {"dask.md"}
+        assert {r["metadata"]["source"] for r in either} == {"dask.md", "polars.md"}
+        assert len(general) == len(either)
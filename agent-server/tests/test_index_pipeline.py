@@ -0,0 +1,300 @@
+"""
+Tests for the pipelined knowledge base indexer.
+
+Pipeline stages are tested with in-memory callables; the RAGManager
+integration uses an in-memory Qdrant client and a fake embedding service.
+"""
+
+import asyncio
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from agent_server.core.index_pipeline import IndexPipeline
+from hdsp_agent_core.models.rag import IndexingConfig
+
+
+def _chunks(file_path: Path, count: int):
+    return [
+        {"content": f"{file_path.name}-{i}", "payload": {"file": file_path.name}}
+        for i in range(count)
+    ]
+
+
+class TestIndexPipeline:
+    """Tests for batching, skipping and failure handling"""
+
+    async def test_batches_span_files(self):
+        """Test small files are pooled into full embedding batches"""
+        embed_sizes = []
+        upserted = []
+
+        async def load(file_path):
+            return _chunks(file_path, 3)
+
+        async def embed(texts):
+            embed_sizes.append(len(texts))
+            return [[float(len(t))] for t in texts]
+
+        async def upsert(points):
+            upserted.extend(points)
+
+        files = [Path(f"f{i}.md") for i in range(10)]
+        config = IndexingConfig(read_workers=3, embed_batch_size=8, upsert_batch_size=5)
+        stats = await IndexPipeline(load, embed, upsert, config).run(files)
+
+        assert stats.indexed == 10
+        assert stats.chunks == 30
+        assert sum(embed_sizes) == 30
+        assert max(embed_sizes) == 8
+        assert len(embed_sizes) <= 5
+        assert all(p.vector is not None for p in upserted)
+        assert {p.payload["file"] for p in upserted} == {f.name for f in files}
+
+    async def test_skipped_and_failed_files(self):
+        """Test skipped files, load errors and embedding errors are reported"""
+
+        async def load(file_path):
+            if file_path.name == "skip.md":
+                return None
+            if file_path.name == "broken.md":
+                raise UnicodeDecodeError("utf-8", b"", 0, 1, "bad")
+            return _chunks(file_path, 2)
+
+        async def embed(texts):
+            if any(t.startswith("poison") for t in texts):
+                raise RuntimeError("embedding failed")
+            return [[0.0] for _ in texts]
+
+        written = []
+
+        async def upsert(points):
+            written.extend(points)
+
+        files = [Path(n) for n in ("ok.md", "skip.md", "broken.md", "poison.md")]
+        config = IndexingConfig(read_workers=1, embed_batch_size=2)
+        stats = await IndexPipeline(load, embed, upsert, config).run(files)
+
+        assert stats.skipped == 1
+        assert stats.indexed == 1
+        assert {e["file"] for e in stats.errors} == {"broken.md", "poison.md"}
+        assert stats.failed_files == {Path("broken.md"), Path("poison.md")}
+        assert {p.file_path.name for p in written} == {"ok.md"}
+
+    async def test_stages_overlap(self):
+        """Test upserts run while the next batch is being embedded"""
+        events = []
+
+        async def load(file_path):
+            return _chunks(file_path, 2)
+
+        async def embed(texts):
+            events.append("embed-start")
+            await asyncio.sleep(0.02)
+            events.append("embed-end")
+            return [[0.0] for _ in texts]
+
+        async def upsert(points):
+            events.append("upsert-start")
+            await asyncio.sleep(0.03)
+            events.append("upsert-end")
+
+        files = [Path(f"f{i}.md") for i in range(3)]
+        config = IndexingConfig(embed_batch_size=2, upsert_batch_size=2)
+        await IndexPipeline(load, embed, upsert, config).run(files)
+
+        first_upsert = events.index("upsert-start")
+        assert "embed-start" in events[first_upsert + 1 : events.index("upsert-end")]
+
+
+class TestRAGManagerIndexing:
+    """Tests for RAGManager._index_knowledge_base with local Qdrant"""
+
+    @pytest.fixture
+    def manager(self, tmp_path):
+        from qdrant_client import QdrantClient
+        from qdrant_client.models import Distance, VectorParams
+
+        from agent_server.core.vector_store import QdrantVectorStore
+        from agent_server.core.rag_manager import RAGManager, reset_rag_manager
+        from hdsp_agent_core.models.rag import IndexingConfig, QdrantConfig, RAGConfig
+
+        reset_rag_manager()
+        knowledge = tmp_path / "libraries"
+        knowledge.mkdir()
+        for name in ("pandas", "numpy", "dask"):
+            (knowledge / f"{name}.md").write_text(
+                f"# {name}\n\n" + f"{name} usage guide paragraph. " * 20
+            )
+
+        config = RAGConfig(
+            knowledge_base_path=str(knowledge),
+            qdrant=QdrantConfig(collection_name="test"),
+            indexing=IndexingConfig(manifest_path=str(tmp_path / "manifest.json")),
+        )
+        manager = RAGManager(config)
+        manager.client = QdrantClient(":memory:")
+        manager.client.create_collection(
+            "test", vectors_config=VectorParams(size=4, distance=Distance.COSINE)
+        )
+        manager._store = QdrantVectorStore(manager.client, "test")
+
+        embedding = MagicMock()
+        embed_calls = []
+
+        async def embed_texts(texts):
+            embed_calls.append(len(texts))
+            return [[1.0, float(len(t) % 7), 0.5, 0.25] for t in texts]
+
+        embedding.embed_texts = embed_texts
+        manager._embedding_service = embedding
+        manager.embed_calls = embed_calls
+        manager.knowledge = knowledge
+        yield manager
+        reset_rag_manager()
+
+    async def test_index_and_skip_unchanged(self, manager):
+        """Test all files land in one embedding batch and re-scans skip them"""
+        result = await manager._index_knowledge_base()
+        assert result["indexed"] == 3
+        assert result["errors"] == []
+        assert manager.embed_calls == [result["chunks"]]
+
+        count = manager.client.count("test").count
+        assert count == result["chunks"]
+        assert manager.get_status()["total_documents"] == 3
+
+        again = await manager._index_knowledge_base()
+        assert again["indexed"] == 0
+        assert again["skipped"] == 3
+        assert manager.client.count("test").count == count
+
+    async def test_unchanged_scan_stays_local(self, manager):
+        """Test a re-scan reads nothing and issues no per-file Qdrant queries"""
+        await manager._index_knowledge_base()
+        manager.client.scroll = MagicMock(side_effect=AssertionError("scroll"))
+        manager._load_file_chunks = MagicMock(side_effect=AssertionError("read"))
+
+        again = await manager._index_knowledge_base()
+        assert again["skipped"] == 3
+
+    async def test_changed_and_deleted_files(self, manager):
+        """Test edits replace a file's points and deletions remove them"""
+        first = await manager._index_knowledge_base()
+        (manager.knowledge / "pandas.md").write_text(
+            "# pandas\n\n" + "rewritten pandas guide. " * 8
+        )
+        (manager.knowledge / "dask.md").unlink()
+
+        result = await manager._index_knowledge_base()
+        assert result["indexed"] == 1
+        assert result["skipped"] == 1
+
+        manifest = manager._get_manifest()
+        assert len(manifest) == 2
+        assert manager.client.count("test").count == manifest.total_chunks()
+        assert manifest.total_chunks() < first["chunks"]
+        assert manager.get_status()["total_documents"] == 2
+
+    async def test_edit_embeds_only_changed_chunks(self, manager):
+        """Test content-addressed IDs: one edited section costs one embedding"""
+        from agent_server.core.vector_store import build_qdrant_filter
+
+        guide = manager.knowledge / "guide.md"
+        sections = [
+            f"## Section {i}\n\n" + f"Section {i} explains one API. " * 12
+            for i in range(8)
+        ]
+        guide.write_text("# Guide\n\n" + "\n\n".join(sections))
+        await manager._index_knowledge_base()
+        before = set(manager._get_manifest().get(str(guide)).chunk_ids)
+        total = manager.client.count("test").count
+
+        sections[3] = "## Section 3\n\n" + "Rewritten section three. " * 12
+        guide.write_text("# Guide\n\n" + "\n\n".join(sections))
+        manager.embed_calls.clear()
+        result = await manager._index_knowledge_base()
+
+        after = set(manager._get_manifest().get(str(guide)).chunk_ids)
+        assert manager.embed_calls == [1]
+        assert result["reused"] == len(before) - 1
+        assert len(after - before) == 1 and len(before - after) == 1
+        assert manager.client.count("test").count == total
+
+        # Surviving chunks carry the new file hash
+        points, _ = manager.client.scroll(
+            "test",
+            scroll_filter=build_qdrant_filter({"file_path": str(guide)}),
+            limit=100,
+        )
+        assert len({p.payload["content_hash"] for p in points}) == 1
+
+    def test_chunk_point_ids_are_deterministic(self, manager):
+        """Test IDs depend on source, content and repeat count only"""
+        first = manager._chunk_point_id("/kb/a.md", "text")
+        assert first == manager._chunk_point_id("/kb/a.md", "text")
+        assert first != manager._chunk_point_id("/kb/b.md", "text")
+        assert first != manager._chunk_point_id("/kb/a.md", "text", 1)
+
+    async def test_touched_file_is_rehashed_not_reembedded(self, manager):
+        """Test an mtime-only change costs a hash, not an embedding"""
+        import os
+
+        await manager._index_knowledge_base()
+        path = manager.knowledge / "numpy.md"
+        os.utime(path, ns=(0, 0))
+        manager.embed_calls.clear()
+
+        result = await manager._index_knowledge_base()
+        assert result["skipped"] == 3
+        assert manager.embed_calls == []
+        assert manager._get_manifest().get(str(path)).mtime_ns == 0
+
+    async def test_reconcile_after_lost_manifest(self, manager):
+        """Test a lost manifest is rebuilt from the collection without re-embedding"""
+        await manager._index_knowledge_base()
+        count = manager.client.count("test").count
+        manager._get_manifest().path.unlink()
+        manager._manifest = None
+        manager.embed_calls.clear()
+
+        result = await manager._index_knowledge_base()
+        assert result["skipped"] == 3
+        assert manager.embed_calls == []
+        assert manager._get_manifest().total_chunks() == count
+        assert manager._get_manifest().path.exists()
+
+    async def test_force_reindex_replaces_points(self, manager):
+        """Test force re-embeds every file without leaving duplicates"""
+        first = await manager._index_knowledge_base()
+        result = await manager._index_knowledge_base(force=True)
+        assert result["indexed"] == 3
+        assert manager.client.count("test").count == first["chunks"]
+
+
+class TestIndexManifest:
+    """Tests for the manifest file itself"""
+
+    def test_round_trip_and_stat_match(self, tmp_path):
+        """Test entries survive save/load and match the file's stat"""
+        from agent_server.core.index_manifest import IndexManifest, ManifestEntry
+
+        doc = tmp_path / "doc.md"
+        doc.write_text("text")
+        stat = doc.stat()
+        manifest = IndexManifest(tmp_path / "m" / "manifest.json")
+        assert manifest.load() is False
+        manifest.set(
+            str(doc), ManifestEntry("abc", stat.st_mtime_ns, stat.st_size, ["1", "2"])
+        )
+        manifest.save()
+
+        reloaded = IndexManifest(manifest.path)
+        assert reloaded.load() is True
+        assert reloaded.get(str(doc)).matches_stat(stat)
+        assert reloaded.total_chunks() == 2
+
+        manifest.path.write_text("{not json")
+        assert reloaded.load() is False
+        assert len(reloaded) == 0
@@ -0,0 +1,72 @@
+"""
+Tests for the load-test harness (scripts/load_test.py) with the fake provider
+"""
+
+import httpx
+import pytest
+
+from scripts.load_test import check_thresholds, percentile, run_load_test
+
+
+@pytest.fixture
+def fast_fake_llm(monkeypatch):
+    """Fake provider without modelled delays"""
+    monkeypatch.setenv("HDSP_LLM_FAKE_LATENCY", "0")
+    monkeypatch.setenv("HDSP_LLM_FAKE_TTFT", "0")
+    monkeypatch.setenv("HDSP_LLM_FAKE_TOKENS_PER_SECOND", "0")
+
+
+class TestLoadTestHarness:
+    """Test the harness against the app in-process"""
+
+    async def test_scenarios_against_fake_provider(self, fast_fake_llm):
+        """Test plan, refine, validate and chat stream succeed and are summarised"""
+        from hdsp_agent_core.llm.response_cache import reset_response_cache
+
+        from agent_server.main import app
+
+        reset_response_cache()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load-test"
+        ) as client:
+            summaries = await run_load_test(
+                client,
+                ["plan", "refine", "validate", "chat_stream"],
+                total=6,
+                concurrency=3,
+                llm_config={"provider": "fake"},
+            )
+        reset_response_cache()
+
+        assert [s["scenario"] for s in summaries] == [
+            "plan",
+            "refine",
+            "validate",
+            "chat_stream",
+        ]
+        for summary in summaries:
+            assert summary["requests"] == 6
+            assert summary["errors"] == 0, summary
+            assert summary["p50"] <= summary["p95"] <= summary["p99"]
+            assert summary["throughput"] > 0
+        assert "ttfb_p50" in summaries[-1]
+        assert check_thresholds(summaries) == []
+
+    def test_percentile_and_thresholds(self):
+        """Test nearest-rank percentiles and regression gates"""
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([], 50) is None
+
+        summary = {
+            "scenario": "plan",
+            "requests": 10,
+            "errors": 1,
+            "throughput": 5.0,
+            "p95": 2.5,
+        }
+        violations = check_thresholds([summary], max_p95=2.0, min_rps=10)
+        assert len(violations) == 3
+        assert check_thresholds([summary], max_error_rate=0.2) == []
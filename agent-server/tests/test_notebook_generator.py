@@ -0,0 +1,143 @@
+"""
+NotebookGenerator Unit Tests
+
+Concurrent cell generation: order, concurrency cap, progress and batching.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from agent_server.core.notebook_generator import NotebookGenerator
+
+
+class FakeLLMService:
+    """Answers cell prompts after a delay, tracking peak concurrency"""
+
+    def __init__(self, delay: float = 0.01, batch_response=None):
+        self.delay = delay
+        self.batch_response = batch_response
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def generate_response(
+        self, prompt: str, cache: bool = False, cache_if=None
+    ) -> str:
+        self.calls.append(prompt)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if "JSON 형식으로 응답하세요" in prompt and self.batch_response is not None:
+            return json.dumps(self.batch_response)
+        purpose = prompt.split("목적: ")[1].split("\n")[0]
+        if "마크다운 셀을" in prompt:
+            return f"# {purpose}"
+        return f"```python\nprint('{purpose}')\n```"
+
+
+class RecordingTaskManager:
+    """Records update_progress calls"""
+
+    def __init__(self):
+        self.updates = []
+
+    def update_progress(self, task_id: str, progress: int, message: str):
+        self.updates.append((progress, message))
+
+
+def _plan(count: int):
+    cells = [{"type": "markdown", "purpose": "cell-0", "content_hint": ""}]
+    cells += [
+        {"type": "code", "purpose": f"cell-{i}", "content_hint": ""}
+        for i in range(1, count)
+    ]
+    return {"cells": cells}
+
+
+class TestConcurrentCells:
+    """Concurrent per-cell generation"""
+
+    @pytest.mark.asyncio
+    async def test_order_preserved_and_capped(self):
+        """Cells come back in plan order with at most max_concurrency calls"""
+        llm = FakeLLMService()
+        generator = NotebookGenerator(llm, RecordingTaskManager(), max_concurrency=3)
+
+        cells = await generator._generate_cells("t", _plan(8))
+
+        assert [c["cell_type"] for c in cells] == ["markdown"] + ["code"] * 7
+        assert cells[0]["source"] == ["# cell-0"]
+        assert [c["source"] for c in cells[1:]] == [
+            [f"print('cell-{i}')"] for i in range(1, 8)
+        ]
+        assert cells[1]["outputs"] == [] and cells[1]["execution_count"] is None
+        assert llm.peak == 3
+
+    @pytest.mark.asyncio
+    async def test_progress_per_cell(self):
+        """Progress is reported once per finished cell and ends at 80%"""
+        tasks = RecordingTaskManager()
+        generator = NotebookGenerator(FakeLLMService(), tasks, max_concurrency=4)
+
+        await generator._generate_cells("t", _plan(5))
+
+        progresses = [p for p, _ in tasks.updates]
+        assert len(progresses) == 5
+        assert progresses == sorted(progresses)
+        assert tasks.updates[-1] == (80, "셀 생성 중... (5/5)")
+
+    @pytest.mark.asyncio
+    async def test_failure_propagates(self):
+        """A failed cell fails the whole generation"""
+
+        class FailingLLM(FakeLLMService):
+            async def generate_response(self, prompt, cache=False, cache_if=None):
+                if "cell-2" in prompt:
+                    raise RuntimeError("boom")
+                return await super().generate_response(prompt, cache, cache_if)
+
+        generator = NotebookGenerator(FailingLLM(), RecordingTaskManager())
+        with pytest.raises(RuntimeError):
+            await generator._generate_cells("t", _plan(4))
+
+
+class TestBatchedCells:
+    """Batched mode: several cells per structured call"""
+
+    @pytest.mark.asyncio
+    async def test_batch_single_call(self):
+        """One call covers a whole batch"""
+        llm = FakeLLMService(
+            batch_response={
+                "cells": [
+                    {"index": 0, "content": "# 제목"},
+                    {"index": 1, "content": "```python\nimport pandas as pd\n```"},
+                ]
+            }
+        )
+        generator = NotebookGenerator(llm, RecordingTaskManager(), batch_size=2)
+
+        cells = await generator._generate_cells("t", _plan(2))
+
+        assert len(llm.calls) == 1
+        assert cells[0]["source"] == ["# 제목"]
+        assert cells[1]["source"] == ["import pandas as pd"]
+
+    @pytest.mark.asyncio
+    async def test_missing_batch_cells_fall_back(self):
+        """Cells missing from a batch response are generated individually"""
+        llm = FakeLLMService(batch_response={"cells": [{"index": 0, "content": "# t"}]})
+        tasks = RecordingTaskManager()
+        generator = NotebookGenerator(llm, tasks, batch_size=3)
+
+        cells = await generator._generate_cells("t", _plan(3))
+
+        assert len(llm.calls) == 3  # 1 batch + 2 fallbacks
+        assert cells[0]["source"] == ["# t"]
+        assert cells[2]["source"] == ["print('cell-2')"]
+        assert tasks.updates[-1][0] == 80
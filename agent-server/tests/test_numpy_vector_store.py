@@ -0,0 +1,223 @@
+"""
+Tests for the in-process NumPy vector store backend.
+"""
+
+import numpy as np
+import pytest
+
+from agent_server.core.numpy_vector_store import NumpyVectorStore
+from agent_server.core.vector_store import QdrantVectorStore, VectorQuery
+
+SOURCES = ["pandas.md", "dask.md", "polars.md"]
+
+
+def _points(n: int = 60, dim: int = 8, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    ids = [f"00000000-0000-0000-0000-{i:012d}" for i in range(n)]
+    vectors = rng.normal(size=(n, dim)).astype(np.float32).tolist()
+    payloads = [
+        {"content": f"chunk {i}", "source": SOURCES[i % 3], "file_path": f"/kb/{i % 3}"}
+        for i in range(n)
+    ]
+    return ids, vectors, payloads
+
+
+@pytest.fixture
+async def store():
+    store = NumpyVectorStore()
+    await store.ensure_collection(8)
+    await store.upsert(*_points())
+    return store
+
+
+class TestNumpyVectorStore:
+    """Tests for exact search, masks and snapshots"""
+
+    async def test_matches_qdrant(self, store):
+        """Test top-k, filters, ID restriction and thresholds agree with Qdrant"""
+        from qdrant_client import QdrantClient
+
+        qdrant = QdrantVectorStore(QdrantClient(":memory:"), "test")
+        await qdrant.ensure_collection(8)
+        await qdrant.upsert(*_points())
+
+        ids = _points()[0]
+        queries = [
+            VectorQuery(limit=5),
+            VectorQuery(limit=4, filters={"source": "dask.md"}),
+            VectorQuery(limit=6, filters={"source": ["dask.md", "polars.md"]}),
+            VectorQuery(limit=10, score_threshold=0.3),
+            VectorQuery(limit=10, ids=ids[:7]),
+        ]
+        vector = np.random.default_rng(1).normal(size=8).tolist()
+
+        expected = await qdrant.search(vector, queries)
+        actual = await store.search(vector, queries)
+
+        for want, got in zip(expected, actual):
+            assert [p.id for p in got] == [p.id for p in want]
+            assert [p.score for p in got] == pytest.approx([p.score for p in want])
+        assert {p.payload["source"] for p in actual[1]} == {"dask.md"}
+        assert len(actual[4]) == 7
+
+    async def test_writes_keep_rows_consistent(self, store):
+        """Test replace, delete and delete_where keep IDs, rows and masks aligned"""
+        ids, vectors, _ = _points()
+
+        await store.upsert([ids[0]], [vectors[0]], [{"source": "numpy.md"}])
+        await store.delete(ids[1:4])
+        await store.delete_where({"source": "polars.md"})
+        await store.overwrite_payloads({ids[4]: {"source": "numpy.md"}})
+
+        assert await store.count() == 60 - 3 - 19
+        (hits,) = await store.search(
+            vectors[0], [VectorQuery(limit=10, filters={"source": "numpy.md"})]
+        )
+        assert [p.id for p in hits][:1] == [ids[0]]
+        assert {p.id for p in hits} == {ids[0], ids[4]}
+        assert hits[0].score == pytest.approx(1.0)
+
+        scrolled = [p async for page in store.scroll(page_size=7) for p in page]
+        assert len(scrolled) == await store.count()
+        assert all(p.payload["source"] != "polars.md" for p in scrolled)
+
+    async def test_snapshot_round_trip(self, tmp_path):
+        """Test flush writes a snapshot that reloads memory-mapped"""
+        store = NumpyVectorStore(tmp_path)
+        await store.ensure_collection(8)
+        await store.upsert(*_points())
+        await store.flush()
+
+        vector = _points()[1][5]
+        reloaded = NumpyVectorStore(tmp_path)
+        await reloaded.ensure_collection(8)
+        assert isinstance(reloaded._vectors, np.memmap)
+        assert await reloaded.count() == 60
+        (want,) = await store.search(vector, [VectorQuery(limit=3)])
+        (got,) = await reloaded.search(vector, [VectorQuery(limit=3)])
+        assert [p.id for p in got] == [p.id for p in want]
+
+        # The first write copies the matrix into memory
+        await reloaded.delete([want[0].id])
+        assert not isinstance(reloaded._vectors, np.memmap)
+
+        # A different embedding dimension discards the snapshot
+        resized = NumpyVectorStore(tmp_path)
+        await resized.ensure_collection(16)
+        assert await resized.count() == 0
+
+    async def test_snapshot_swaps_one_pointer(self, tmp_path):
+        """Test each save lands in a new directory named by CURRENT"""
+        store = NumpyVectorStore(tmp_path)
+        await store.ensure_collection(8)
+        ids, vectors, payloads = _points()
+        await store.upsert(ids[:10], vectors[:10], payloads[:10])
+        await store.flush()
+        first = (tmp_path / "CURRENT").read_text()
+
+        await store.upsert(ids[10:], vectors[10:], payloads[10:])
+        await store.flush()
+        current = (tmp_path / "CURRENT").read_text()
+        assert current != first
+        assert [p.name for p in tmp_path.glob("snapshot-*")] == [current]
+
+        # A save that crashed before the pointer swap is never loaded
+        partial = tmp_path / "snapshot-partial"
+        partial.mkdir()
+        (partial / "points.json").write_text("{")
+        reloaded = NumpyVectorStore(tmp_path)
+        await reloaded.ensure_collection(8)
+        assert await reloaded.count() == 60
+
+    async def test_failed_save_stays_dirty(self, tmp_path, monkeypatch):
+        """Test _dirty is cleared only by a save that wrote the latest state"""
+        store = NumpyVectorStore(tmp_path)
+        await store.ensure_collection(8)
+        await store.upsert(*_points())
+
+        def failing_save(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(np, "save", failing_save)
+        with pytest.raises(OSError):
+            await store.flush()
+        assert store._dirty
+        assert not (tmp_path / "CURRENT").exists()
+        monkeypatch.undo()
+
+        # A write racing the save keeps the store dirty for the next flush
+        real_save = np.save
+
+        def racing_save(*args, **kwargs):
+            with store._lock:
+                store._changed()
+            real_save(*args, **kwargs)
+
+        monkeypatch.setattr(np, "save", racing_save)
+        await store.flush()
+        assert store._dirty
+        monkeypatch.undo()
+        await store.flush()
+        assert not store._dirty
+
+
+class TestRAGManagerNumpyBackend:
+    """Tests for indexing and search through the NumPy backend"""
+
+    async def test_index_search_and_restart(self, tmp_path, monkeypatch):
+        """Test a restart reloads the snapshot and re-embeds nothing"""
+        from unittest.mock import MagicMock
+
+        from agent_server.core.rag_manager import RAGManager, reset_rag_manager
+        from agent_server.core.retriever import Retriever
+        from hdsp_agent_core.models.rag import IndexingConfig, QdrantConfig, RAGConfig
+
+        monkeypatch.setenv("HDSP_VECTOR_STORE", "numpy")
+        monkeypatch.setenv("HDSP_VECTOR_STORE_DIR", str(tmp_path / "vectors"))
+        knowledge = tmp_path / "libraries"
+        knowledge.mkdir()
+        for name in ("pandas", "dask"):
+            (knowledge / f"{name}.md").write_text(
+                f"# {name}\n\n" + f"{name} usage guide paragraph. " * 20
+            )
+        config = RAGConfig(
+            knowledge_base_path=str(knowledge),
+            score_threshold=0.1,
+            qdrant=QdrantConfig(collection_name="test"),
+            indexing=IndexingConfig(manifest_path=str(tmp_path / "manifest.json")),
+        )
+
+        async def start():
+            reset_rag_manager()
+            manager = RAGManager(config)
+            embedding = MagicMock(dimension=4)
+            embedding.calls = 0
+
+            async def embed_texts(texts):
+                embedding.calls += len(texts)
+                return [[1.0, float("dask" in t), 0.5, 0.0] for t in texts]
+
+            async def embed_query(query):
+                return [1.0, 1.0, 0.5, 0.0]
+
+            embedding.embed_texts = embed_texts
+            embedding.embed_query = embed_query
+            manager._embedding_service = embedding
+            manager._store = manager._create_vector_store()
+            await manager._ensure_collection()
+            manager._retriever = Retriever(manager._store, embedding, config)
+            await manager._index_knowledge_base()
+            manager._ready = True
+            return manager
+
+        first = await start()
+        assert first._store.backend == "numpy"
+        assert first._embedding_service.calls > 0
+        results = await first.search("dask", filters={"source": "dask.md"})
+        assert results and {r["metadata"]["source"] for r in results} == {"dask.md"}
+        await first.shutdown()
+
+        second = await start()
+        assert second._embedding_service.calls == 0
+        assert await second._store.count() == second._get_manifest().total_chunks()
+        reset_rag_manager()
@@ -0,0 +1,164 @@
+"""
+Tests for streaming plan generation
+
+- IncrementalPlanParser: plan.steps[i] emitted as soon as each step closes
+- /agent/plan/stream: SSE events compatible with the frontend
+  ({plan, done, reasoning, error})
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+PLAN_RESPONSE = """```json
+{
+  "reasoning": "데이터 로드 후 요약",
+  "plan": {
+    "goal": "EDA",
+    "totalSteps": 2,
+    "steps": [
+      {
+        "stepNumber": 1,
+        "description": "데이터 로드 {braces} and \\"quotes\\"",
+        "toolCalls": [{"tool": "jupyter_cell", "parameters": {"code": "```python\\nimport pandas as pd\\n```"}}],
+        "dependencies": []
+      },
+      {
+        "stepNumber": 2,
+        "description": "요약",
+        "toolCalls": [{"tool": "final_answer", "parameters": {"answer": "완료"}}],
+        "dependencies": [1]
+      }
+    ]
+  }
+}
+```"""
+
+
+def _chunks(text, size):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+class TestIncrementalPlanParser:
+    """Unit tests for the incremental step parser"""
+
+    @pytest.mark.parametrize("size", [1, 7, 64, 10000])
+    def test_emits_all_steps_for_any_chunking(self, size):
+        """Steps are extracted regardless of chunk boundaries"""
+        from agent_server.core.plan_stream_parser import IncrementalPlanParser
+
+        parser = IncrementalPlanParser()
+        steps = []
+        for chunk in _chunks(PLAN_RESPONSE, size):
+            steps.extend(parser.feed(chunk))
+
+        assert [s["stepNumber"] for s in steps] == [1, 2]
+        assert steps[0]["description"] == '데이터 로드 {braces} and "quotes"'
+        assert parser.done
+
+    def test_step_emitted_before_stream_ends(self):
+        """Step 1 is returned as soon as its closing brace arrives"""
+        from agent_server.core.plan_stream_parser import IncrementalPlanParser
+
+        parser = IncrementalPlanParser()
+        cut = PLAN_RESPONSE.index('"stepNumber": 2')
+        first = parser.feed(PLAN_RESPONSE[:cut])
+        assert [s["stepNumber"] for s in first] == [1]
+        rest = parser.feed(PLAN_RESPONSE[cut:])
+        assert [s["stepNumber"] for s in rest] == [2]
+
+    def test_ignores_nested_objects_outside_steps(self):
+        """Objects that are not plan.steps elements are not emitted"""
+        from agent_server.core.plan_stream_parser import IncrementalPlanParser
+
+        parser = IncrementalPlanParser()
+        text = '{"meta": {"steps": [{"x": 1}]}, "plan": {"steps": [{"y": 2}]}}'
+        assert parser.feed(text) == [{"y": 2}]
+
+
+class TestPlanStreamEndpoint:
+    """Tests for /agent/plan/stream"""
+
+    @pytest.fixture
+    def client(self):
+        """Create a test client for the FastAPI app"""
+        from agent_server.main import app
+
+        return TestClient(app)
+
+    @pytest.fixture
+    def payload(self):
+        return {
+            "request": "titanic.csv EDA",
+            "notebookContext": {"cellCount": 0},
+            "llmConfig": {
+                "provider": "gemini",
+                "gemini": {"apiKey": "test-api-key", "model": "gemini-2.5-flash"},
+            },
+        }
+
+    @staticmethod
+    def _events(response):
+        return [
+            json.loads(line[6:])
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+
+    def _mock_stream(self, text):
+        async def stream(self, prompt, context=None):
+            for chunk in _chunks(text, 16):
+                yield chunk
+
+        return stream
+
+    def test_streams_steps_then_final_plan(self, client, payload):
+        """Step events precede the final done event"""
+        with patch(
+            "agent_server.routers.agent.LLMService.generate_response_stream",
+            self._mock_stream(PLAN_RESPONSE),
+        ):
+            response = client.post("/agent/plan/stream", json=payload)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = self._events(response)
+
+        step_events = [e for e in events if "step" in e]
+        assert [e["stepIndex"] for e in step_events] == [0, 1]
+        assert len(step_events[1]["plan"]["steps"]) == 2
+        # Code fences are stripped from streamed steps
+        code = step_events[0]["step"]["toolCalls"][0]["parameters"]["code"]
+        assert code == "import pandas as pd"
+
+        final = events[-1]
+        assert final["done"] is True
+        assert final["plan"]["totalSteps"] == 2
+        assert final["reasoning"] == "데이터 로드 후 요약"
+
+    def test_goal_filled_in_final_event(self, client, payload):
+        """Missing goal is filled from the request"""
+        text = '{"plan": {"totalSteps": 1, "steps": [{"stepNumber": 1}]}}'
+        with patch(
+            "agent_server.routers.agent.LLMService.generate_response_stream",
+            self._mock_stream(text),
+        ):
+            events = self._events(client.post("/agent/plan/stream", json=payload))
+        assert events[-1]["plan"]["goal"] == payload["request"]
+
+    def test_unparsable_response_sends_error(self, client, payload):
+        """Unparsable LLM output produces an error event"""
+        with patch(
+            "agent_server.routers.agent.LLMService.generate_response_stream",
+            self._mock_stream("not json at all"),
+        ):
+            events = self._events(client.post("/agent/plan/stream", json=payload))
+        assert "error" in events[-1]
+
+    def test_empty_request_rejected(self, client, payload):
+        """Empty request returns 400"""
+        payload["request"] = ""
+        response = client.post("/agent/plan/stream", json=payload)
+        assert response.status_code == 400
@@ -0,0 +1,129 @@
+"""
+Tests for non-blocking Qdrant access from async code.
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from agent_server.core.qdrant_executor import QdrantExecutor
+
+
+@pytest.fixture
+def slow_local_client():
+    """In-memory local client whose queries block for 50ms, like a large scan"""
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, PointStruct, VectorParams
+
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        "test", vectors_config=VectorParams(size=4, distance=Distance.COSINE)
+    )
+    client.upsert(
+        "test",
+        points=[
+            PointStruct(
+                id=i, vector=[1.0, float(i), 0.0, 0.0], payload={"content": f"c{i}"}
+            )
+            for i in range(10)
+        ],
+    )
+    query_points = client.query_points
+    client.in_flight = 0
+    client.max_in_flight = 0
+    client.threads = set()
+
+    def slow_query_points(*args, **kwargs):
+        client.in_flight += 1
+        client.max_in_flight = max(client.max_in_flight, client.in_flight)
+        client.threads.add(threading.current_thread().name)
+        try:
+            time.sleep(0.05)
+            return query_points(*args, **kwargs)
+        finally:
+            client.in_flight -= 1
+
+    client.query_points = slow_query_points
+    return client
+
+
+async def _max_loop_lag(work) -> float:
+    """Largest delay of a 5ms ticker while `work` runs"""
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - started - 0.005)
+
+    task = asyncio.create_task(ticker())
+    try:
+        await work
+    finally:
+        done = True
+        await task
+    return lag
+
+
+class TestQdrantExecutor:
+    """Tests for the local worker thread and async client dispatch"""
+
+    async def test_search_load_keeps_event_loop_responsive(self, slow_local_client):
+        """Test concurrent searches do not stall the event loop"""
+        from agent_server.core.retriever import Retriever
+        from hdsp_agent_core.models.rag import QdrantConfig, RAGConfig
+
+        embedding = MagicMock()
+        embedding.embed_query = AsyncMock(return_value=[1.0, 0.5, 0.0, 0.0])
+        config = RAGConfig(
+            score_threshold=0.1, qdrant=QdrantConfig(collection_name="test")
+        )
+        retriever = Retriever(QdrantExecutor(slow_local_client), embedding, config)
+
+        searches = asyncio.gather(*(retriever.search(f"q{i}") for i in range(12)))
+        lag = await _max_loop_lag(searches)
+
+        results = searches.result()
+        assert all(results)
+        # 12 x 50ms of blocking Qdrant work; the loop must keep ticking
+        assert lag < 0.04
+        # Local mode: one call at a time, on the dedicated worker thread
+        assert slow_local_client.max_in_flight == 1
+        assert len(slow_local_client.threads) == 1
+        assert next(iter(slow_local_client.threads)).startswith("qdrant-local")
+
+    async def test_async_client_awaited_directly(self):
+        """Test an AsyncQdrantClient is awaited on the loop, without a thread"""
+        client = MagicMock()
+        client.query_points = AsyncMock(return_value="points")
+        client.close = AsyncMock()
+        qdrant = QdrantExecutor(client)
+
+        assert qdrant.is_async
+        assert await qdrant.call("query_points", collection_name="c") == "points"
+        client.query_points.assert_awaited_once_with(collection_name="c")
+        await qdrant.close()
+        client.close.assert_awaited_once()
+
+    @pytest.mark.filterwarnings("ignore:Failed to obtain server version")
+    def test_server_mode_uses_async_client(self):
+        """Test server mode creates an AsyncQdrantClient"""
+        from qdrant_client import AsyncQdrantClient
+
+        from agent_server.core.rag_manager import RAGManager, reset_rag_manager
+        from hdsp_agent_core.models.rag import QdrantConfig, RAGConfig
+
+        reset_rag_manager()
+        manager = RAGManager(
+            RAGConfig(qdrant=QdrantConfig(mode="server", url="http://127.0.0.1:1"))
+        )
+        try:
+            assert isinstance(manager._create_qdrant_client(), AsyncQdrantClient)
+        finally:
+            reset_rag_manager()
@@ -0,0 +1,157 @@
+"""
+Tests for the query embedding LRU cache and micro-batching queue.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from agent_server.core.query_embedder import QueryEmbeddingBatcher
+
+
+class RecordingEncoder:
+    """Encoder that records each batch it is given"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.batches = []
+        self._delay = delay
+        self._fail = fail
+
+    async def __call__(self, queries):
+        self.batches.append(list(queries))
+        await asyncio.sleep(self._delay)
+        if self._fail:
+            raise RuntimeError("encoder down")
+        return [[float(len(q)), 1.0] for q in queries]
+
+
+class TestQueryEmbeddingBatcher:
+    """Tests for caching, de-duplication and batching"""
+
+    async def test_concurrent_queries_share_one_batch(self):
+        """Test queries arriving together are encoded in one call"""
+        encoder = RecordingEncoder()
+        batcher = QueryEmbeddingBatcher(encoder, max_wait=0.01)
+
+        vectors = await asyncio.gather(
+            batcher.embed("a"), batcher.embed("bb"), batcher.embed("a")
+        )
+
+        assert vectors == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+        assert encoder.batches == [["a", "bb"]]
+
+    async def test_repeated_query_is_cached(self):
+        """Test the LRU answers repeats without encoding"""
+        encoder = RecordingEncoder()
+        batcher = QueryEmbeddingBatcher(encoder, max_wait=0, cache_size=2)
+
+        for query in ["a", "a", "b", "c", "a"]:
+            await batcher.embed(query)
+
+        # "a" was evicted by "b" and "c"
+        assert encoder.batches == [["a"], ["b"], ["c"], ["a"]]
+        assert batcher.stats()["hits"] == 1
+        assert batcher.stats()["cached"] == 2
+
+    async def test_full_batch_dispatches_immediately(self):
+        """Test reaching max_batch does not wait for the timer"""
+        encoder = RecordingEncoder()
+        batcher = QueryEmbeddingBatcher(encoder, max_batch=2, max_wait=10)
+
+        await asyncio.wait_for(
+            asyncio.gather(batcher.embed("x"), batcher.embed("y")), timeout=1
+        )
+        assert encoder.batches == [["x", "y"]]
+
+    async def test_errors_reach_every_waiter(self):
+        """Test a failed batch raises for all callers and is not cached"""
+        encoder = RecordingEncoder(fail=True)
+        batcher = QueryEmbeddingBatcher(encoder, max_wait=0.01)
+
+        results = await asyncio.gather(
+            batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert batcher.stats()["cached"] == 0
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """Test a cancelled waiter leaves the shared computation running"""
+        encoder = RecordingEncoder(delay=0.05)
+        batcher = QueryEmbeddingBatcher(encoder, max_wait=0)
+
+        first = asyncio.create_task(batcher.embed("q"))
+        second = asyncio.create_task(batcher.embed("q"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == [1.0, 1.0]
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    async def test_batch_tasks_referenced_until_done(self):
+        """Test running batches are held by the batcher and released after"""
+        encoder = RecordingEncoder(delay=0.05)
+        batcher = QueryEmbeddingBatcher(encoder, max_wait=0)
+
+        waiter = asyncio.create_task(batcher.embed("q"))
+        await asyncio.sleep(0.01)
+        assert len(batcher._tasks) == 1
+
+        assert await waiter == [1.0, 1.0]
+        await asyncio.sleep(0)
+        assert not batcher._tasks
+
+    async def test_cancelled_batch_fails_waiters(self):
+        """Test cancelling a running batch fails its waiters instead of hanging"""
+        encoder = RecordingEncoder(delay=10)
+        batcher = QueryEmbeddingBatcher(encoder, max_wait=0)
+
+        waiter = asyncio.create_task(batcher.embed("q"))
+        await asyncio.sleep(0.01)
+        (task,) = batcher._tasks
+        task.cancel()
+
+        with pytest.raises(RuntimeError, match="cancelled"):
+            await asyncio.wait_for(waiter, timeout=1)
+
+
+class TestEmbeddingServiceQueries:
+    """Tests for EmbeddingService.embed_query going through the batcher"""
+
+    async def test_concurrent_queries_one_encode(self):
+        """Test concurrent embed_query calls reach model.encode once"""
+        from hdsp_agent_core.models.rag import EmbeddingConfig
+
+        from agent_server.core.embedding_service import (
+            EmbeddingService,
+            reset_embedding_service,
+        )
+
+        class FakeModel:
+            def __init__(self):
+                self.calls = []
+
+            def encode(self, texts, **kwargs):
+                self.calls.append(list(texts))
+                return np.array([[float(len(t)), 0.0] for t in texts])
+
+        reset_embedding_service()
+        service = EmbeddingService(
+            EmbeddingConfig(
+                model_name="intfloat/multilingual-e5-small", cache_enabled=False
+            )
+        )
+        service._model = FakeModel()
+        service._is_e5_model = True
+
+        vectors = await asyncio.gather(
+            service.embed_query("read csv"),
+            service.embed_query("groupby"),
+            service.embed_query("read csv"),
+        )
+        await service.embed_query("groupby")
+
+        assert vectors[0] == vectors[2]
+        assert service._model.calls == [["query: read csv", "query: groupby"]]
+        reset_embedding_service()
@@ -341,26 +341,22 @@ class TestRetriever:
         assert len(results) == 1
         assert results[0]["content"] == "High score"
 
-    def test_build_filter(self, mock_qdrant_client, mock_embedding_service):
+    def test_build_filter(self):
         """Filter building should handle various formats."""
-        from agent_server.core.retriever import Retriever
-        from hdsp_agent_core.models.rag import QdrantConfig, RAGConfig
-
-        config = RAGConfig(qdrant=QdrantConfig(collection_name="test"))
-        retriever = Retriever(mock_qdrant_client, mock_embedding_service, config)
+        from agent_server.core.vector_store import build_qdrant_filter
 
         # Single value filter
-        single_filter = retriever._build_filter({"source_type": "library"})
+        single_filter = build_qdrant_filter({"source_type": "library"})
         assert single_filter is not None
 
         # Multiple values filter
-        multi_filter = retriever._build_filter(
+        multi_filter = build_qdrant_filter(
             {"source_type": ["library", "documentation"]}
         )
         assert multi_filter is not None
 
         # Empty filter
-        empty_filter = retriever._build_filter({})
+        empty_filter = build_qdrant_filter({})
         assert empty_filter is None
 
 
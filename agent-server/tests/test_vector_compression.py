@@ -0,0 +1,163 @@
+"""
+Tests for Matryoshka truncation and int8-quantized Qdrant collections.
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from agent_server.core.matryoshka import truncate_embeddings
+from agent_server.core.vector_store import QdrantVectorStore, VectorQuery
+
+
+class TestTruncation:
+    """Tests for truncating and re-normalizing embeddings"""
+
+    def test_truncate_embeddings(self):
+        """Test leading dimensions are kept and re-normalized"""
+        vectors = [[3.0, 4.0, 12.0], [0.0, 0.0, 1.0]]
+
+        truncated = truncate_embeddings(vectors, 2)
+        assert truncated[0] == pytest.approx([0.6, 0.8])
+        # A zero prefix stays zero instead of dividing by zero
+        assert truncated[1] == [0.0, 0.0]
+        assert truncate_embeddings(vectors, None) is vectors
+        assert truncate_embeddings(vectors, 3) is vectors
+
+    async def test_vllm_service_truncates(self, monkeypatch):
+        """Test vLLM embeddings, dimension and cache namespace follow truncate_dim"""
+        from agent_server.core.vllm_embedding_service import (
+            VLLMEmbeddingService,
+            reset_vllm_embedding_service,
+        )
+        from hdsp_agent_core.models.rag import EmbeddingConfig
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            inputs = json.loads(request.content)["input"]
+            data = [{"index": i, "embedding": [1.0] * 8} for i in range(len(inputs))]
+            return httpx.Response(200, json={"data": data})
+
+        monkeypatch.setenv("HDSP_VLLM_DIMENSION", "8")
+        monkeypatch.setenv("HDSP_EMBEDDING_TRUNCATE_DIM", "4")
+        reset_vllm_embedding_service()
+        service = VLLMEmbeddingService(EmbeddingConfig(cache_enabled=False))
+        service._client = httpx.AsyncClient(
+            base_url="http://vllm", transport=httpx.MockTransport(handler)
+        )
+        try:
+            (vector,) = await service.embed_texts(["text"])
+            assert service.dimension == 4
+            assert vector == pytest.approx([0.5] * 4)
+            assert len(await service.embed_query("query")) == 4
+        finally:
+            reset_vllm_embedding_service()
+
+
+def _async_client(quantization_config=None, size=1024):
+    client = MagicMock()
+    for method in (
+        "get_collections",
+        "get_collection",
+        "create_collection",
+        "update_collection",
+        "query_points",
+        "query_batch_points",
+    ):
+        setattr(client, method, AsyncMock())
+    client.get_collections.return_value = SimpleNamespace(collections=[])
+    client.get_collection.return_value = SimpleNamespace(
+        config=SimpleNamespace(
+            params=SimpleNamespace(vectors=SimpleNamespace(size=size)),
+            quantization_config=quantization_config,
+        )
+    )
+    client.query_points.return_value = SimpleNamespace(points=[])
+    client.query_batch_points.return_value = [
+        SimpleNamespace(points=[]),
+        SimpleNamespace(points=[]),
+    ]
+    return client
+
+
+class TestQuantizedCollection:
+    """Tests for int8 scalar quantization with oversampling and rescoring"""
+
+    async def test_create_quantized_collection(self):
+        """Test int8 keeps originals on disk and searches rescore oversampled hits"""
+        client = _async_client()
+        store = QdrantVectorStore(client, "kb", quantization="int8", oversampling=3.0)
+
+        await store.ensure_collection(1024)
+        kwargs = client.create_collection.call_args.kwargs
+        assert kwargs["vectors_config"].size == 1024
+        assert kwargs["vectors_config"].on_disk is True
+        assert kwargs["quantization_config"].scalar.type == "int8"
+        assert kwargs["quantization_config"].scalar.always_ram is True
+
+        await store.search([0.1] * 1024, [VectorQuery(limit=5)])
+        params = client.query_points.call_args.kwargs["search_params"]
+        assert params.quantization.rescore is True
+        assert params.quantization.oversampling == 3.0
+
+        await store.search([0.1] * 1024, [VectorQuery(limit=5), VectorQuery(limit=3)])
+        requests = client.query_batch_points.call_args.kwargs["requests"]
+        assert all(r.params.quantization.oversampling == 3.0 for r in requests)
+
+    async def test_existing_collection_gets_quantization(self):
+        """Test an unquantized collection is updated in place"""
+        client = _async_client()
+        client.get_collections.return_value = SimpleNamespace(
+            collections=[SimpleNamespace(name="kb")]
+        )
+        store = QdrantVectorStore(client, "kb", quantization="int8")
+
+        await store.ensure_collection(1024)
+        client.create_collection.assert_not_awaited()
+        kwargs = client.update_collection.call_args.kwargs
+        assert kwargs["quantization_config"].scalar.type == "int8"
+
+    async def test_unquantized_search_has_no_params(self):
+        """Test the default keeps plain exact-vector search"""
+        client = _async_client()
+        store = QdrantVectorStore(client, "kb")
+
+        await store.ensure_collection(384)
+        assert client.create_collection.call_args.kwargs["quantization_config"] is None
+        await store.search([0.1] * 384, [VectorQuery(limit=5)])
+        assert client.query_points.call_args.kwargs["search_params"] is None
+
+    @pytest.mark.filterwarnings("error:Local mode performs exact")
+    async def test_local_mode_ignores_quantization(self):
+        """Test local Qdrant (always exact) gets no quantization settings"""
+        from qdrant_client import QdrantClient
+
+        store = QdrantVectorStore(QdrantClient(":memory:"), "kb", quantization="int8")
+        await store.ensure_collection(4)
+        await store.upsert(
+            ["00000000-0000-0000-0000-000000000001"], [[1, 0, 0, 0]], [{}]
+        )
+
+        (hits,) = await store.search([1.0, 0.0, 0.0, 0.0], [VectorQuery(limit=1)])
+        assert hits[0].score == pytest.approx(1.0)
+
+    async def test_dimension_change_recreates_collection(self):
+        """Test a collection of another size is replaced, not kept half-usable"""
+        from qdrant_client import QdrantClient
+
+        client = QdrantClient(":memory:")
+        store = QdrantVectorStore(client, "kb")
+        await store.ensure_collection(4)
+        await store.upsert(
+            ["00000000-0000-0000-0000-000000000001"], [[1, 0, 0, 0]], [{}]
+        )
+
+        # e.g. truncate_dim turned on
+        await store.ensure_collection(2)
+        assert client.get_collection("kb").config.params.vectors.size == 2
+        assert await store.count() == 0
+        await store.upsert(["00000000-0000-0000-0000-000000000002"], [[0, 1]], [{}])
+        (hits,) = await store.search([0.0, 1.0], [VectorQuery(limit=1)])
+        assert hits[0].score == pytest.approx(1.0)
@@ -0,0 +1,140 @@
+"""
+Tests for the vLLM embedding client's batching, concurrency and retries.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from agent_server.core.vllm_embedding_service import (
+    VLLMEmbeddingService,
+    reset_vllm_embedding_service,
+)
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    from hdsp_agent_core.models.rag import EmbeddingConfig
+
+    monkeypatch.delenv("HDSP_VLLM_DIMENSION", raising=False)
+    monkeypatch.delenv("HDSP_VLLM_BATCH_SIZE", raising=False)
+    monkeypatch.delenv("HDSP_VLLM_CONCURRENCY", raising=False)
+
+    def make(handler, **config):
+        reset_vllm_embedding_service()
+        config.setdefault("vllm_backoff_base", 0.001)
+        service = VLLMEmbeddingService(EmbeddingConfig(cache_enabled=False, **config))
+        service._client = httpx.AsyncClient(
+            base_url="http://vllm", transport=httpx.MockTransport(handler)
+        )
+        return service
+
+    yield make
+    reset_vllm_embedding_service()
+
+
+def _response(inputs, dim=6):
+    # Encode each text's length so results can be matched to inputs
+    data = [
+        {"index": i, "embedding": [float(len(text))] + [0.0] * (dim - 1)}
+        for i, text in reversed(list(enumerate(inputs)))
+    ]
+    return httpx.Response(200, json={"data": data})
+
+
+class TestBatching:
+    """Tests for bounded, concurrent requests"""
+
+    def test_split_batches(self, make_service):
+        """Test batches respect text count and token budget"""
+        service = make_service(None, vllm_batch_size=3, vllm_batch_tokens=100)
+
+        assert service._split_batches(["a"] * 7) == [(0, 3), (3, 6), (6, 7)]
+        # ~34 tokens each: two fit, the oversized text is sent alone
+        texts = ["x" * 100, "x" * 100, "x" * 100, "x" * 1000, "x"]
+        assert service._split_batches(texts) == [(0, 2), (2, 3), (3, 4), (4, 5)]
+        assert service._split_batches(["a"] * 4, batch_size=2) == [(0, 2), (2, 4)]
+
+    async def test_concurrent_batches_keep_order(self, make_service):
+        """Test requests overlap up to the limit and results stay in input order"""
+        in_flight = []
+        peak = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.02)
+            in_flight.pop()
+            return _response(json.loads(request.content)["input"])
+
+        service = make_service(handler, vllm_batch_size=2, vllm_concurrency=3)
+        texts = ["t" * n for n in range(1, 20)]
+
+        embeddings = await service.embed_texts(texts)
+        assert [e[0] for e in embeddings] == [float(len(t)) for t in texts]
+        assert len(peak) == 10
+        assert max(peak) == 3
+
+        # The served model's dimension replaces the 8192 default
+        assert service.dimension == 6
+
+    async def test_ensure_dimension_probes_once(self, make_service, monkeypatch):
+        """Test the probe overrides HDSP_VLLM_DIMENSION and is not repeated"""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            return _response(json.loads(request.content)["input"], dim=4096)
+
+        monkeypatch.setenv("HDSP_VLLM_DIMENSION", "8192")
+        service = make_service(handler)
+
+        assert await service.ensure_dimension() == 4096
+        assert await service.ensure_dimension() == 4096
+        assert len(calls) == 1
+
+
+class TestRetries:
+    """Tests for backoff on transient errors"""
+
+    async def test_retries_transient_errors(self, make_service):
+        """Test 503 and connection errors are retried until success"""
+        attempts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(request)
+            if len(attempts) == 1:
+                raise httpx.ConnectError("refused", request=request)
+            if len(attempts) == 2:
+                return httpx.Response(503, headers={"Retry-After": "0"})
+            return _response(json.loads(request.content)["input"])
+
+        service = make_service(handler)
+        assert await service.embed_texts(["doc"]) == [[3.0, 0, 0, 0, 0, 0]]
+        assert len(attempts) == 3
+
+    async def test_client_errors_are_not_retried(self, make_service):
+        """Test a 400 fails at once"""
+        attempts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(request)
+            return httpx.Response(400, text="input too long")
+
+        service = make_service(handler)
+        with pytest.raises(Exception, match="after 1 attempts"):
+            await service.embed_texts(["doc"])
+        assert len(attempts) == 1
+
+    def test_backoff_delay(self, make_service):
+        """Test delays grow, stay jittered within the cap and honor Retry-After"""
+        service = make_service(None, vllm_backoff_base=1.0, vllm_backoff_max=5.0)
+
+        for attempt, cap in [(0, 1.0), (2, 4.0), (6, 5.0)]:
+            delay = service._backoff_delay(attempt)
+            assert cap / 2 <= delay <= cap
+        assert service._backoff_delay(0, retry_after="3") == 3.0
+        assert service._backoff_delay(0, retry_after="600") == 5.0
+        assert service._backoff_delay(0, retry_after="Wed, 21 Oct") <= 1.0
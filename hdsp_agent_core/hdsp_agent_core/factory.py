@@ -189,6 +189,11 @@ class ServiceFactory:
         if self._rag_service and hasattr(self._rag_service, "shutdown"):
             await self._rag_service.shutdown()
 
+        # Close pooled LLM HTTP sessions owned by this loop
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+
+        await close_http_pool()
+
         # Reset service instances
         self._agent_service = None
         self._chat_service = None
@@ -4,10 +4,101 @@ HDSP Agent Core - LLM Service
 Multi-provider LLM interaction abstraction layer.
 """
 
+from .circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    get_circuit_breaker,
+    get_retry_budget,
+    reset_circuit_breakers,
+)
+from .concurrency import (
+    AdaptiveLimiter,
+    LimiterRegistry,
+    get_limiter_registry,
+    reset_limiter_registry,
+)
+from .fake_provider import FakeLLMConfig, FakeLLMProvider, reset_fake_recordings
+from .hedging import HedgePolicy, get_hedge_policy, reset_hedge_policies
+from .http_pool import HTTPSessionPool, close_http_pool, get_http_pool
+from .metrics import (
+    MetricsRegistry,
+    get_metrics_registry,
+    reset_metrics_registry,
+    track_llm_call,
+)
+from .prompt_cache import (
+    GeminiContextCache,
+    get_context_cache,
+    register_static_prefix,
+    reset_context_cache,
+    split_static_prefix,
+)
+from .response_cache import (
+    LLMResponseCache,
+    get_response_cache,
+    make_cache_key,
+    reset_response_cache,
+)
+from .routing import LatencyRouter, get_llm_router, reset_llm_router
 from .service import LLMService, call_llm, call_llm_stream
+from .single_flight import SingleFlight, get_single_flight, reset_single_flight
+from .sse import SSEDecoder, iter_sse_json
+from .token_counter import (
+    TokenCounter,
+    count_tokens,
+    get_token_counter,
+    register_token_counter,
+    reset_token_counters,
+)
 
 __all__ = [
     "LLMService",
     "call_llm",
     "call_llm_stream",
+    "HTTPSessionPool",
+    "get_http_pool",
+    "close_http_pool",
+    "LLMResponseCache",
+    "get_response_cache",
+    "reset_response_cache",
+    "make_cache_key",
+    "SingleFlight",
+    "get_single_flight",
+    "reset_single_flight",
+    "AdaptiveLimiter",
+    "LimiterRegistry",
+    "get_limiter_registry",
+    "reset_limiter_registry",
+    "HedgePolicy",
+    "get_hedge_policy",
+    "reset_hedge_policies",
+    "LatencyRouter",
+    "get_llm_router",
+    "reset_llm_router",
+    "GeminiContextCache",
+    "get_context_cache",
+    "reset_context_cache",
+    "register_static_prefix",
+    "split_static_prefix",
+    "TokenCounter",
+    "get_token_counter",
+    "register_token_counter",
+    "reset_token_counters",
+    "count_tokens",
+    "MetricsRegistry",
+    "get_metrics_registry",
+    "reset_metrics_registry",
+    "track_llm_call",
+    "SSEDecoder",
+    "iter_sse_json",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "RetryBudget",
+    "get_circuit_breaker",
+    "get_retry_budget",
+    "reset_circuit_breakers",
+    "FakeLLMConfig",
+    "FakeLLMProvider",
+    "reset_fake_recordings",
 ]
@@ -0,0 +1,280 @@
+"""
+Circuit Breaker - Fail fast on down providers and cap retry amplification
+
+Two process-wide guards for upstream LLM calls:
+
+- CircuitBreaker per provider endpoint (closed -> open -> half-open):
+  after `failure_threshold` consecutive failures (5xx, timeouts, network
+  errors) the circuit opens and calls fail immediately with
+  CircuitOpenError. After `open_seconds` one probe is let through
+  (half-open); its outcome closes or re-opens the circuit.
+  429 is per-key rate limiting, not an outage, and does not count.
+
+- RetryBudget shared by all providers: retries may not exceed
+  `ratio` x requests over a sliding window (plus a small floor so low
+  traffic can still retry). During an outage concurrent requests fail
+  instead of each sleeping through its whole retry schedule.
+
+In routing mode CircuitOpenError makes the router fail over to the next
+backend without waiting.
+
+Environment Variables:
+    HDSP_LLM_BREAKER_FAILURE_THRESHOLD: Consecutive failures that open (default: 5)
+    HDSP_LLM_BREAKER_OPEN_SECONDS: Open time before a half-open probe (default: 30)
+    HDSP_LLM_RETRY_BUDGET_RATIO: Retries allowed per request (default: 0.2)
+    HDSP_LLM_RETRY_BUDGET_MIN: Retries always allowed per window (default: 10)
+    HDSP_LLM_RETRY_BUDGET_WINDOW: Sliding window in seconds (default: 10)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(
+            f"Circuit open for {name}: provider unavailable, retry in {retry_in:.0f}s"
+        )
+        self.name = name
+        self.retry_in = retry_in
+
+
+@dataclass
+class BreakerConfig:
+    """Circuit breaker and retry budget settings"""
+
+    failure_threshold: int = 5
+    open_seconds: float = 30.0
+    retry_ratio: float = 0.2
+    retry_min: int = 10
+    retry_window: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "BreakerConfig":
+        """Build config from environment variables"""
+        return cls(
+            failure_threshold=int(
+                os.environ.get(
+                    "HDSP_LLM_BREAKER_FAILURE_THRESHOLD", cls.failure_threshold
+                )
+            ),
+            open_seconds=float(
+                os.environ.get("HDSP_LLM_BREAKER_OPEN_SECONDS", cls.open_seconds)
+            ),
+            retry_ratio=float(
+                os.environ.get("HDSP_LLM_RETRY_BUDGET_RATIO", cls.retry_ratio)
+            ),
+            retry_min=int(os.environ.get("HDSP_LLM_RETRY_BUDGET_MIN", cls.retry_min)),
+            retry_window=float(
+                os.environ.get("HDSP_LLM_RETRY_BUDGET_WINDOW", cls.retry_window)
+            ),
+        )
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker for one provider endpoint.
+
+    Usage:
+        breaker = get_circuit_breaker("gemini:gemini-2.5-flash")
+        breaker.check()                 # raises CircuitOpenError when open
+        try:
+            response = await call()
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            breaker.record_failure()
+            raise
+        if response.status >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    """
+
+    def __init__(self, name: str, config: Optional[BreakerConfig] = None):
+        self.name = name
+        self._config = config or BreakerConfig.from_env()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        """State with the open -> half-open timeout applied (caller holds the lock)"""
+        if (
+            self._state == STATE_OPEN
+            and now - self._opened_at >= self._config.open_seconds
+        ):
+            self._state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def check(self) -> None:
+        """Admit a call or raise CircuitOpenError (half-open admits one probe)"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == STATE_CLOSED:
+                return
+            # A probe that never reported back (e.g. cancelled) expires
+            if state == STATE_HALF_OPEN and (
+                not self._probe_in_flight
+                or now - self._probe_started >= self._config.open_seconds
+            ):
+                self._probe_in_flight = True
+                self._probe_started = now
+                return
+            self._stats["rejected"] += 1
+            retry_in = max(0.0, self._opened_at + self._config.open_seconds - now)
+        raise CircuitOpenError(self.name, retry_in)
+
+    def record_success(self) -> None:
+        """Provider answered (any non-5xx response): close the circuit"""
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """5xx, timeout or network error; may open the circuit"""
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == STATE_HALF_OPEN
+                or self._failures >= self._config.failure_threshold
+            ):
+                if self._state != STATE_OPEN:
+                    self._stats["opened"] += 1
+                self._state = STATE_OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def release(self) -> None:
+        """Outcome says nothing about provider health (e.g. 429): free the probe"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get state and counters"""
+        with self._lock:
+            return {
+                **self._stats,
+                "state": self._current_state(time.monotonic()),
+                "consecutive_failures": self._failures,
+            }
+
+
+class RetryBudget:
+    """
+    Global cap on retries as a fraction of requests over a sliding window.
+
+    Usage:
+        budget = get_retry_budget()
+        budget.record_request()
+        ...
+        if attempt < max_retries - 1 and budget.try_spend():
+            continue  # retry
+        raise
+    """
+
+    def __init__(self, config: Optional[BreakerConfig] = None):
+        self._config = config or BreakerConfig.from_env()
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self._stats = {"denied": 0}
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - self._config.retry_window
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self) -> None:
+        """Count a first attempt"""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget; False means fail instead of retrying"""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            allowed = max(
+                self._config.retry_min,
+                int(len(self._requests) * self._config.retry_ratio),
+            )
+            if len(self._retries) >= allowed:
+                self._stats["denied"] += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get window counts"""
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                **self._stats,
+                "requests": len(self._requests),
+                "retries": len(self._retries),
+            }
+
+
+# ============ Singleton Accessor ============
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_retry_budget: Optional[RetryBudget] = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Get the shared breaker for a provider endpoint (e.g. "vllm:http://host")"""
+    with _breaker_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            _breakers[name] = breaker
+        return breaker
+
+
+def get_retry_budget() -> RetryBudget:
+    """Get the singleton RetryBudget instance"""
+    global _retry_budget
+    with _breaker_lock:
+        if _retry_budget is None:
+            _retry_budget = RetryBudget()
+        return _retry_budget
+
+
+def get_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Get state of every breaker"""
+    with _breaker_lock:
+        breakers = dict(_breakers)
+    return {name: b.get_stats() for name, b in breakers.items()}
+
+
+def reset_circuit_breakers() -> None:
+    """Reset all breakers and the retry budget (for testing purposes)"""
+    global _retry_budget
+    with _breaker_lock:
+        _breakers.clear()
+        _retry_budget = None
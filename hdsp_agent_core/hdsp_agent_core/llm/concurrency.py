@@ -0,0 +1,250 @@
+"""
+Adaptive Concurrency - AIMD limiter per LLM provider and API key
+
+Requests wait in a local FIFO queue for a slot instead of all hitting the
+provider at once. The window follows AIMD:
+
+    success          -> limit += 1 / limit   (about +1 per full window)
+    429 / 503        -> limit *= backoff     (at most once per window)
+
+so throughput settles near the provider's real limit instead of swinging
+between overload and idle.
+
+Limiters are process-wide and may be used from several event loops (the
+embedded agent server runs its own loop), so waiters are woken through
+their own loop.
+
+Environment Variables:
+    HDSP_LLM_ADAPTIVE_CONCURRENCY: Enable limiting (default: true)
+    HDSP_LLM_CONCURRENCY_INITIAL: Starting window (default: 8)
+    HDSP_LLM_CONCURRENCY_MIN: Minimum window (default: 1)
+    HDSP_LLM_CONCURRENCY_MAX: Maximum window (default: 64)
+    HDSP_LLM_CONCURRENCY_BACKOFF: Multiplicative decrease (default: 0.5)
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional
+
+
+@dataclass
+class LimiterConfig:
+    """AIMD window settings"""
+
+    enabled: bool = True
+    initial_limit: float = 8.0
+    min_limit: float = 1.0
+    max_limit: float = 64.0
+    backoff_ratio: float = 0.5
+
+    @classmethod
+    def from_env(cls) -> "LimiterConfig":
+        """Build config from HDSP_LLM_CONCURRENCY_* environment variables"""
+        return cls(
+            enabled=os.environ.get("HDSP_LLM_ADAPTIVE_CONCURRENCY", "true").lower()
+            == "true",
+            initial_limit=float(
+                os.environ.get("HDSP_LLM_CONCURRENCY_INITIAL", cls.initial_limit)
+            ),
+            min_limit=float(os.environ.get("HDSP_LLM_CONCURRENCY_MIN", cls.min_limit)),
+            max_limit=float(os.environ.get("HDSP_LLM_CONCURRENCY_MAX", cls.max_limit)),
+            backoff_ratio=float(
+                os.environ.get("HDSP_LLM_CONCURRENCY_BACKOFF", cls.backoff_ratio)
+            ),
+        )
+
+
+class LimiterSlot:
+    """
+    One acquired concurrency slot.
+
+    Released on context exit: success grows the window, an exception leaves
+    it unchanged. Call mark_overload() on 429/503 - it releases the slot
+    right away so it is not held while the caller backs off.
+    """
+
+    def __init__(self, limiter: "AdaptiveLimiter", started_at: float):
+        self._limiter = limiter
+        self._started_at = started_at
+        self._released = False
+
+    def mark_overload(self) -> None:
+        """Report a 429/503 and release the slot"""
+        if not self._released:
+            self._released = True
+            self._limiter._release(self._started_at, "overload")
+
+    async def __aenter__(self) -> "LimiterSlot":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if not self._released:
+            self._released = True
+            outcome = "success" if exc_type is None else "dropped"
+            self._limiter._release(self._started_at, outcome)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency window with a FIFO wait queue"""
+
+    def __init__(self, name: str, config: Optional[LimiterConfig] = None):
+        self.name = name
+        self._config = config or LimiterConfig.from_env()
+        self._limit = min(
+            max(self._config.initial_limit, self._config.min_limit),
+            self._config.max_limit,
+        )
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._lock = threading.Lock()
+        # Requests started before the last decrease don't trigger another one
+        self._last_decrease = 0.0
+        self._stats = {"successes": 0, "overloads": 0, "decreases": 0}
+
+    @property
+    def limit(self) -> int:
+        """Current window size (whole requests)"""
+        return max(int(self._limit), 1)
+
+    async def acquire(self) -> LimiterSlot:
+        """Wait for a free slot and return it"""
+        if not self._config.enabled:
+            return LimiterSlot(self, time.monotonic())
+
+        with self._lock:
+            if not self._waiters and self._in_flight < self.limit:
+                self._in_flight += 1
+                return LimiterSlot(self, time.monotonic())
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+
+        try:
+            await fut
+        except asyncio.CancelledError:
+            with self._lock:
+                if fut in self._waiters:
+                    self._waiters.remove(fut)
+                    raise
+            # Slot was handed over just as we were cancelled: pass it on
+            self._release(time.monotonic(), "dropped")
+            raise
+        return LimiterSlot(self, time.monotonic())
+
+    def slot(self) -> "_SlotContext":
+        """async with limiter.slot() as slot: ..."""
+        return _SlotContext(self)
+
+    def _release(self, started_at: float, outcome: str) -> None:
+        """Return a slot, adjust the window and wake queued requests"""
+        if not self._config.enabled:
+            return
+
+        with self._lock:
+            self._in_flight -= 1
+            if outcome == "success":
+                self._stats["successes"] += 1
+                self._limit = min(
+                    self._limit + 1.0 / self._limit, self._config.max_limit
+                )
+            elif outcome == "overload":
+                self._stats["overloads"] += 1
+                if started_at >= self._last_decrease:
+                    self._limit = max(
+                        self._limit * self._config.backoff_ratio,
+                        self._config.min_limit,
+                    )
+                    self._last_decrease = time.monotonic()
+                    self._stats["decreases"] += 1
+
+            while self._waiters and self._in_flight < self.limit:
+                # Hand the slot over; a waiter cancelled meanwhile gives it back
+                fut = self._waiters.popleft()
+                self._in_flight += 1
+                fut.get_loop().call_soon_threadsafe(_wake, fut)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get current window, in-flight count and queue depth"""
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                **self._stats,
+            }
+
+
+def _wake(fut: asyncio.Future) -> None:
+    """Resolve a waiter on its own loop"""
+    if not fut.done():
+        fut.set_result(None)
+
+
+class _SlotContext:
+    """Acquire-on-enter wrapper so call sites can use a single async with"""
+
+    def __init__(self, limiter: AdaptiveLimiter):
+        self._limiter = limiter
+        self._slot: Optional[LimiterSlot] = None
+
+    async def __aenter__(self) -> LimiterSlot:
+        self._slot = await self._limiter.acquire()
+        return self._slot
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self._slot.__aexit__(exc_type, exc, tb)
+
+
+class LimiterRegistry:
+    """Limiters keyed by provider and (hashed) API key or endpoint"""
+
+    def __init__(self, config: Optional[LimiterConfig] = None):
+        self._config = config or LimiterConfig.from_env()
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_id(secret: Optional[str]) -> str:
+        """Short, non-reversible identifier for an API key or endpoint"""
+        if not secret:
+            return "default"
+        return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:8]
+
+    def get(self, provider: str, secret: Optional[str] = None) -> AdaptiveLimiter:
+        """Get (or create) the limiter for provider + key"""
+        name = f"{provider}:{self.key_id(secret)}"
+        with self._lock:
+            limiter = self._limiters.get(name)
+            if limiter is None:
+                limiter = AdaptiveLimiter(name, self._config)
+                self._limiters[name] = limiter
+            return limiter
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get stats for every limiter"""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.name: limiter.get_stats() for limiter in limiters}
+
+
+# ============ Singleton Accessor ============
+
+_limiter_registry: Optional[LimiterRegistry] = None
+
+
+def get_limiter_registry() -> LimiterRegistry:
+    """Get the singleton LimiterRegistry instance"""
+    global _limiter_registry
+    if _limiter_registry is None:
+        _limiter_registry = LimiterRegistry()
+    return _limiter_registry
+
+
+def reset_limiter_registry() -> None:
+    """Reset the singleton instance (for testing purposes)"""
+    global _limiter_registry
+    _limiter_registry = None
@@ -0,0 +1,367 @@
+"""
+Fake LLM Provider - Deterministic offline provider for load and latency tests
+
+provider "fake" answers without any network call, so the agent server can
+be load-tested offline. Responses come from, in order:
+
+1. Recorded interactions (VCR cassettes from agent-server/tests/cassettes,
+   or a JSON file of {"prompt", "response"} / {"match", "response"} entries):
+   an exact prompt match wins, otherwise the recording sharing the longest
+   prompt prefix (agent prompts start with a static prefix per prompt type,
+   so a plan prompt replays a recorded plan).
+2. A response template ($prompt_hash and $prompt_tokens are substituted).
+   The default template parses as both a plan and a refine result.
+
+Timing is modelled as latency (network round trip) + TTFT (prefill) +
+response tokens / token rate. Streams yield chunks of `chunk_tokens` tokens
+at the token rate. Calls are recorded in the LLM metrics like real providers.
+
+Reading .yaml cassettes uses PyYAML when installed (optional).
+
+Environment Variables (overridden by the "fake" section of the LLM config):
+    HDSP_LLM_FAKE_LATENCY: Round-trip latency in seconds (default: 0.05)
+    HDSP_LLM_FAKE_TTFT: Time to first token in seconds (default: 0.2)
+    HDSP_LLM_FAKE_TOKENS_PER_SECOND: Generation rate, 0 = instant (default: 50)
+    HDSP_LLM_FAKE_CHUNK_TOKENS: Tokens per streamed chunk (default: 4)
+    HDSP_LLM_FAKE_RESPONSES: Cassette file/directory or JSON recordings file
+    HDSP_LLM_FAKE_RESPONSE: Response template (default: minimal plan JSON)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from string import Template
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from hdsp_agent_core.llm.metrics import track_llm_call
+
+logger = logging.getLogger(__name__)
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - depends on environment
+    yaml = None
+
+FAKE_MODEL = "fake-llm"
+
+DEFAULT_FAKE_RESPONSE = json.dumps(
+    {
+        "reasoning": "fake provider response $prompt_hash",
+        "plan": {
+            "goal": "fake plan",
+            "totalSteps": 1,
+            "steps": [
+                {
+                    "stepNumber": 1,
+                    "description": "Run generated code",
+                    "toolCalls": [
+                        {
+                            "tool": "jupyter_cell",
+                            "parameters": {"code": "print('fake $prompt_hash')"},
+                        }
+                    ],
+                }
+            ],
+        },
+        "toolCalls": [
+            {
+                "tool": "jupyter_cell",
+                "parameters": {"code": "print('fake $prompt_hash')"},
+            }
+        ],
+    },
+    ensure_ascii=False,
+)
+
+# Word-ish tokens with their leading whitespace, so chunks re-join exactly
+_TOKEN_PATTERN = re.compile(r"\s*\S+|\s+$")
+
+
+@dataclass
+class FakeLLMConfig:
+    """Fake provider timing and response settings"""
+
+    latency: float = 0.05
+    ttft: float = 0.2
+    tokens_per_second: float = 50.0
+    chunk_tokens: int = 4
+    responses_path: Optional[str] = None
+    response_template: str = DEFAULT_FAKE_RESPONSE
+    model: str = FAKE_MODEL
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMConfig":
+        """Build config from environment variables"""
+        return cls(
+            latency=float(os.environ.get("HDSP_LLM_FAKE_LATENCY", cls.latency)),
+            ttft=float(os.environ.get("HDSP_LLM_FAKE_TTFT", cls.ttft)),
+            tokens_per_second=float(
+                os.environ.get("HDSP_LLM_FAKE_TOKENS_PER_SECOND", cls.tokens_per_second)
+            ),
+            chunk_tokens=int(
+                os.environ.get("HDSP_LLM_FAKE_CHUNK_TOKENS", cls.chunk_tokens)
+            ),
+            responses_path=os.environ.get("HDSP_LLM_FAKE_RESPONSES") or None,
+            response_template=os.environ.get(
+                "HDSP_LLM_FAKE_RESPONSE", cls.response_template
+            ),
+        )
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]]) -> "FakeLLMConfig":
+        """Environment defaults overridden by an LLM config "fake" section"""
+        config = cls.from_env()
+        cfg = cfg or {}
+        if "latency" in cfg:
+            config.latency = float(cfg["latency"])
+        if "ttft" in cfg:
+            config.ttft = float(cfg["ttft"])
+        if "tokensPerSecond" in cfg:
+            config.tokens_per_second = float(cfg["tokensPerSecond"])
+        if "chunkTokens" in cfg:
+            config.chunk_tokens = int(cfg["chunkTokens"])
+        if cfg.get("responses"):
+            config.responses_path = cfg["responses"]
+        if cfg.get("response"):
+            config.response_template = cfg["response"]
+        if cfg.get("model"):
+            config.model = cfg["model"]
+        return config
+
+
+# ============ Recorded Responses ============
+
+
+class RecordedResponses:
+    """Prompt -> response recordings with exact and longest-prefix lookup"""
+
+    def __init__(self):
+        self._exact: Dict[str, str] = {}
+        self._prompts: List[Tuple[str, str]] = []
+        self._rules: List[Tuple[str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._prompts) + len(self._rules)
+
+    def add(self, prompt: str, response: str) -> None:
+        """Add a recorded prompt/response pair"""
+        key = _prompt_hash(prompt)
+        if key not in self._exact:
+            self._exact[key] = response
+            self._prompts.append((prompt, response))
+
+    def add_rule(self, match: str, response: str) -> None:
+        """Answer prompts containing `match` with `response`"""
+        self._rules.append((match, response))
+
+    def lookup(self, prompt: str) -> Optional[str]:
+        """Exact match, then substring rules, then longest shared prefix"""
+        response = self._exact.get(_prompt_hash(prompt))
+        if response is not None:
+            return response
+        for match, response in self._rules:
+            if match in prompt:
+                return response
+
+        best, best_len = None, 0
+        for recorded, response in self._prompts:
+            shared = len(os.path.commonprefix([recorded, prompt]))
+            if shared > best_len:
+                best, best_len = response, shared
+        return best
+
+
+def _prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def _load_body(body: Any) -> Any:
+    """Cassette bodies are decoded dicts, raw strings or {"string": ...}"""
+    if isinstance(body, dict) and set(body) == {"string"}:
+        body = body["string"]
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    if isinstance(body, str):
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError:
+            return None
+    return body
+
+
+def _request_prompt(body: Dict[str, Any]) -> Optional[str]:
+    """Prompt text of a Gemini or OpenAI-compatible request body"""
+    if "contents" in body:
+        parts = [
+            part.get("text", "")
+            for content in body["contents"]
+            for part in content.get("parts", [])
+        ]
+        return "".join(parts)
+    if "messages" in body:
+        return "\n\n".join(
+            str(message.get("content", ""))
+            for message in body["messages"]
+            if message.get("role") != "system"
+        )
+    return None
+
+
+def _response_text(body: Dict[str, Any]) -> Optional[str]:
+    """Response text of a Gemini or OpenAI-compatible response body"""
+    candidates = body.get("candidates")
+    if candidates:
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+    choices = body.get("choices")
+    if choices:
+        return choices[0].get("message", {}).get("content")
+    return None
+
+
+def _load_cassette(path: Path, recordings: RecordedResponses) -> None:
+    if yaml is None:
+        logger.warning(f"PyYAML not installed, skipping cassette {path}")
+        return
+    with open(path, encoding="utf-8") as f:
+        cassette = yaml.safe_load(f) or {}
+    for interaction in cassette.get("interactions", []):
+        response = interaction.get("response", {})
+        if response.get("status", {}).get("code") != 200:
+            continue
+        request_body = _load_body(interaction.get("request", {}).get("body"))
+        response_body = _load_body(response.get("body"))
+        if not isinstance(request_body, dict) or not isinstance(response_body, dict):
+            continue
+        prompt = _request_prompt(request_body)
+        text = _response_text(response_body)
+        if prompt and text:
+            recordings.add(prompt, text)
+
+
+def _load_json(path: Path, recordings: RecordedResponses) -> None:
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    for entry in entries:
+        if "prompt" in entry:
+            recordings.add(entry["prompt"], entry["response"])
+        elif "match" in entry:
+            recordings.add_rule(entry["match"], entry["response"])
+
+
+def load_recorded_responses(path: str) -> RecordedResponses:
+    """Load (and cache) recordings from a cassette file/directory or JSON file"""
+    with _recordings_lock:
+        recordings = _recordings.get(path)
+        if recordings is not None:
+            return recordings
+
+        recordings = RecordedResponses()
+        root = Path(path)
+        files = sorted(root.rglob("*")) if root.is_dir() else [root]
+        for file in files:
+            try:
+                if file.suffix in (".yaml", ".yml"):
+                    _load_cassette(file, recordings)
+                elif file.suffix == ".json":
+                    _load_json(file, recordings)
+            except Exception as e:
+                logger.warning(f"Failed to load fake LLM recordings {file}: {e}")
+        logger.info(f"Loaded {len(recordings)} fake LLM recordings from {path}")
+        _recordings[path] = recordings
+        return recordings
+
+
+# ============ Provider ============
+
+
+class FakeLLMProvider:
+    """
+    Offline provider with deterministic responses and modelled timing.
+
+    Usage:
+        provider = FakeLLMProvider(FakeLLMConfig.from_config(config.get("fake")))
+        text = await provider.generate(prompt)
+        async for chunk in provider.stream(prompt):
+            ...
+    """
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None):
+        self._config = config or FakeLLMConfig.from_env()
+
+    def response_for(self, prompt: str) -> str:
+        """Deterministic response text for a prompt"""
+        if self._config.responses_path:
+            recorded = load_recorded_responses(self._config.responses_path).lookup(
+                prompt
+            )
+            if recorded is not None:
+                return recorded
+        return Template(self._config.response_template).safe_substitute(
+            prompt_hash=_prompt_hash(prompt)[:8],
+            prompt_tokens=len(_TOKEN_PATTERN.findall(prompt)),
+        )
+
+    def _token_delay(self, tokens: int) -> float:
+        rate = self._config.tokens_per_second
+        return tokens / rate if rate > 0 else 0.0
+
+    def _chunks(self, text: str) -> List[str]:
+        tokens = _TOKEN_PATTERN.findall(text)
+        size = max(1, self._config.chunk_tokens)
+        return ["".join(tokens[i : i + size]) for i in range(0, len(tokens), size)]
+
+    async def generate(self, prompt: str) -> str:
+        """Whole response after latency + TTFT + generation time"""
+        response = self.response_for(prompt)
+        with track_llm_call("fake", self._config.model, "generate", prompt) as call:
+            tokens = len(_TOKEN_PATTERN.findall(response))
+            await asyncio.sleep(
+                self._config.latency + self._config.ttft + self._token_delay(tokens)
+            )
+            call.set_status(200)
+            call.add_output(response)
+        return response
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Response chunks paced at the token rate after latency + TTFT"""
+        response = self.response_for(prompt)
+        with track_llm_call(
+            "fake", self._config.model, "stream", prompt, stream=True
+        ) as call:
+            started = time.monotonic()
+            await asyncio.sleep(self._config.latency + self._config.ttft)
+            call.set_status(200)
+            emitted = 0
+            for chunk in self._chunks(response):
+                # Pace against the start time so sleep overhead does not drift
+                emitted += len(_TOKEN_PATTERN.findall(chunk))
+                due = (
+                    self._config.latency
+                    + self._config.ttft
+                    + self._token_delay(emitted)
+                )
+                delay = started + due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                call.add_output(chunk)
+                yield chunk
+
+
+# ============ Singleton Accessor ============
+
+_recordings: Dict[str, RecordedResponses] = {}
+_recordings_lock = threading.Lock()
+
+
+def reset_fake_recordings() -> None:
+    """Drop cached recordings (for testing purposes)"""
+    with _recordings_lock:
+        _recordings.clear()
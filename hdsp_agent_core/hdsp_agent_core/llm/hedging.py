@@ -0,0 +1,208 @@
+"""
+Request Hedging - Duplicate slow LLM calls to cut tail latency
+
+If the primary attempt has not produced its first byte within a delay taken
+from a percentile of recent time-to-first-byte samples, a second attempt is
+started (e.g. on another Gemini key). Whichever finishes first wins and the
+other attempt is cancelled.
+
+Hedging is opt-in: it doubles the cost of the slowest requests.
+
+Backup keys come with the request: the other entries of `gemini.apiKeys`
+(or an injected `key_manager`). Requests are signed with the client's key,
+so the agent server only hedges onto keys from its own GeminiKeyManager
+when HDSP_LLM_HEDGE_SERVER_KEYS is set. Without a backup key, requests are
+not hedged and a warning is logged once. The web frontend does not send
+`apiKeys`, so its requests can only be hedged with (opted-in) server keys.
+
+Environment Variables:
+    HDSP_LLM_HEDGE_ENABLED: Enable hedging for Gemini calls (default: false)
+    HDSP_LLM_HEDGE_PERCENTILE: TTFB percentile used as delay (default: 95)
+    HDSP_LLM_HEDGE_DEFAULT_DELAY: Delay before enough samples exist (default: 10)
+    HDSP_LLM_HEDGE_MIN_DELAY: Lower bound for the delay (default: 1)
+    HDSP_LLM_HEDGE_MAX_DELAY: Upper bound for the delay (default: 30)
+    HDSP_LLM_HEDGE_SERVER_KEYS: Agent server may hedge with its own keys (default: false)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HedgeConfig:
+    """Hedging settings"""
+
+    enabled: bool = False
+    percentile: float = 95.0
+    default_delay: float = 10.0
+    min_delay: float = 1.0
+    max_delay: float = 30.0
+    min_samples: int = 20
+    window: int = 200
+
+    @classmethod
+    def from_env(cls) -> "HedgeConfig":
+        """Build config from HDSP_LLM_HEDGE_* environment variables"""
+        return cls(
+            enabled=os.environ.get("HDSP_LLM_HEDGE_ENABLED", "false").lower() == "true",
+            percentile=float(
+                os.environ.get("HDSP_LLM_HEDGE_PERCENTILE", cls.percentile)
+            ),
+            default_delay=float(
+                os.environ.get("HDSP_LLM_HEDGE_DEFAULT_DELAY", cls.default_delay)
+            ),
+            min_delay=float(os.environ.get("HDSP_LLM_HEDGE_MIN_DELAY", cls.min_delay)),
+            max_delay=float(os.environ.get("HDSP_LLM_HEDGE_MAX_DELAY", cls.max_delay)),
+        )
+
+
+class HedgePolicy:
+    """
+    Percentile-based hedging for one provider/model.
+
+    Usage:
+        policy = get_hedge_policy("gemini:gemini-2.5-flash")
+
+        async def primary(first_byte: asyncio.Event):
+            ...  # first_byte.set() once response headers arrive
+
+        async def backup(first_byte: asyncio.Event):
+            ...  # same request on another key
+
+        result = await policy.run(primary, backup)
+    """
+
+    def __init__(self, name: str, config: Optional[HedgeConfig] = None):
+        self.name = name
+        self._config = config or HedgeConfig.from_env()
+        self._samples: Deque[float] = deque(maxlen=self._config.window)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "hedged": 0, "hedge_wins": 0}
+
+    def record(self, ttfb: float) -> None:
+        """Add a time-to-first-byte sample (seconds)"""
+        with self._lock:
+            self._samples.append(ttfb)
+
+    def delay(self) -> float:
+        """Current hedge delay: TTFB percentile clamped to [min, max]"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self._config.min_samples:
+            value = self._config.default_delay
+        else:
+            index = int(round(self._config.percentile / 100 * (len(samples) - 1)))
+            value = samples[index]
+        return min(max(value, self._config.min_delay), self._config.max_delay)
+
+    def _start(
+        self, attempt: Callable[[asyncio.Event], Awaitable[Any]]
+    ) -> "tuple[asyncio.Future, asyncio.Event, asyncio.Future]":
+        """Start an attempt plus a watcher that records its TTFB"""
+        first_byte = asyncio.Event()
+        started = time.monotonic()
+
+        async def watch():
+            await first_byte.wait()
+            self.record(time.monotonic() - started)
+
+        return (
+            asyncio.ensure_future(attempt(first_byte)),
+            first_byte,
+            asyncio.ensure_future(watch()),
+        )
+
+    async def run(
+        self,
+        primary: Callable[[asyncio.Event], Awaitable[Any]],
+        backup: Optional[Callable[[asyncio.Event], Awaitable[Any]]] = None,
+    ) -> Any:
+        """Run primary, hedging with backup if it is slow to respond"""
+        self._stats["requests"] += 1
+        primary_task, primary_first_byte, primary_watch = self._start(primary)
+        tasks = [primary_task]
+        watchers = [primary_watch]
+        try:
+            # Wait for the first byte (or completion) up to the hedge delay
+            first_byte_wait = asyncio.ensure_future(primary_first_byte.wait())
+            try:
+                await asyncio.wait(
+                    {primary_task, first_byte_wait},
+                    timeout=self.delay(),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                first_byte_wait.cancel()
+
+            if backup is None or primary_task.done() or primary_first_byte.is_set():
+                return await primary_task
+
+            logger.info(f"Hedging slow {self.name} request")
+            self._stats["hedged"] += 1
+            backup_task, _, backup_watch = self._start(backup)
+            tasks.append(backup_task)
+            watchers.append(backup_watch)
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup_task:
+                            self._stats["hedge_wins"] += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks + watchers:
+                if not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedge counters and the current delay"""
+        with self._lock:
+            samples = len(self._samples)
+        return {**self._stats, "samples": samples, "delay": self.delay()}
+
+
+# ============ Singleton Accessor ============
+
+_hedge_policies: Dict[str, HedgePolicy] = {}
+_hedge_lock = threading.Lock()
+
+
+def get_hedge_policy(name: str) -> HedgePolicy:
+    """Get the shared HedgePolicy for a provider/model name"""
+    with _hedge_lock:
+        policy = _hedge_policies.get(name)
+        if policy is None:
+            policy = HedgePolicy(name)
+            _hedge_policies[name] = policy
+        return policy
+
+
+def is_hedging_enabled() -> bool:
+    """Check the HDSP_LLM_HEDGE_ENABLED switch"""
+    return HedgeConfig.from_env().enabled
+
+
+def is_server_key_hedging_enabled() -> bool:
+    """Check the HDSP_LLM_HEDGE_SERVER_KEYS switch (server-owned backup keys)"""
+    return os.environ.get("HDSP_LLM_HEDGE_SERVER_KEYS", "false").lower() == "true"
+
+
+def reset_hedge_policies() -> None:
+    """Reset all policies (for testing purposes)"""
+    with _hedge_lock:
+        _hedge_policies.clear()
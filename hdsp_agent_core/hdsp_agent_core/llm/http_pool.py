@@ -0,0 +1,166 @@
+"""
+HTTP Session Pool - Long-lived aiohttp sessions for LLM provider calls
+
+Keeps one ClientSession (and its TCPConnector) per event loop and endpoint
+origin, so keep-alive connections, the DNS cache and TLS sessions are reused
+across plan/refine/chat calls instead of being re-established per request.
+
+Sessions are bound to the event loop that created them. The embedded agent
+server runs uvicorn on its own loop next to the Jupyter server loop, so the
+pool keeps a separate session map per loop.
+
+Environment Variables:
+    HDSP_LLM_POOL_LIMIT: Max open connections per session (default: 100)
+    HDSP_LLM_POOL_LIMIT_PER_HOST: Max open connections per host (default: 20)
+    HDSP_LLM_KEEPALIVE_TIMEOUT: Idle keep-alive time in seconds (default: 60)
+    HDSP_LLM_DNS_CACHE_TTL: DNS cache TTL in seconds (default: 300)
+"""
+
+import asyncio
+import logging
+import os
+import ssl
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+import certifi
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolConfig:
+    """Connection pool limits shared by all provider sessions"""
+
+    limit: int = 100
+    limit_per_host: int = 20
+    keepalive_timeout: float = 60.0
+    dns_cache_ttl: int = 300
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        """Build config from HDSP_LLM_* environment variables"""
+        return cls(
+            limit=int(os.environ.get("HDSP_LLM_POOL_LIMIT", cls.limit)),
+            limit_per_host=int(
+                os.environ.get("HDSP_LLM_POOL_LIMIT_PER_HOST", cls.limit_per_host)
+            ),
+            keepalive_timeout=float(
+                os.environ.get("HDSP_LLM_KEEPALIVE_TIMEOUT", cls.keepalive_timeout)
+            ),
+            dns_cache_ttl=int(
+                os.environ.get("HDSP_LLM_DNS_CACHE_TTL", cls.dns_cache_ttl)
+            ),
+        )
+
+
+class HTTPSessionPool:
+    """
+    Process-wide pool of aiohttp sessions keyed by (event loop, origin).
+
+    Usage:
+        pool = get_http_pool()
+        session = pool.get_session(url)
+        async with session.post(url, json=payload, timeout=timeout) as resp:
+            ...
+        await close_http_pool()  # on shutdown
+    """
+
+    def __init__(self, config: Optional[PoolConfig] = None):
+        self._config = config or PoolConfig.from_env()
+        self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+        # event loop -> origin -> session
+        self._sessions: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @property
+    def config(self) -> PoolConfig:
+        """Get pool configuration"""
+        return self._config
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        """Reduce a URL to scheme://host[:port] for session keying"""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Create a session with a keep-alive, DNS-caching connector"""
+        connector = aiohttp.TCPConnector(
+            ssl=self._ssl_context,
+            limit=self._config.limit,
+            limit_per_host=self._config.limit_per_host,
+            keepalive_timeout=self._config.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self._config.dns_cache_ttl,
+        )
+        # Per-request timeouts are passed on each call
+        return aiohttp.ClientSession(
+            connector=connector, timeout=aiohttp.ClientTimeout(total=None)
+        )
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        """
+        Get the pooled session for the URL's origin on the running loop.
+
+        Must be called from inside a coroutine.
+        """
+        loop = asyncio.get_running_loop()
+        sessions = self._sessions.get(loop)
+        if sessions is None:
+            sessions = {}
+            self._sessions[loop] = sessions
+
+        origin = self._origin(url)
+        session = sessions.get(origin)
+        if session is None or session.closed:
+            session = self._create_session()
+            sessions[origin] = session
+            logger.debug(f"Created pooled HTTP session for {origin}")
+        return session
+
+    async def close(self) -> None:
+        """Close all sessions owned by the running event loop"""
+        loop = asyncio.get_running_loop()
+        sessions = self._sessions.pop(loop, None) or {}
+        for origin, session in sessions.items():
+            if not session.closed:
+                await session.close()
+            logger.debug(f"Closed pooled HTTP session for {origin}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get open session counts for the running loop (for diagnostics)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return {"sessions": 0, "origins": []}
+        sessions = self._sessions.get(loop) or {}
+        open_origins = [o for o, s in sessions.items() if not s.closed]
+        return {"sessions": len(open_origins), "origins": open_origins}
+
+
+# ============ Singleton Accessor ============
+
+_http_pool: Optional[HTTPSessionPool] = None
+
+
+def get_http_pool() -> HTTPSessionPool:
+    """Get the singleton HTTPSessionPool instance"""
+    global _http_pool
+    if _http_pool is None:
+        _http_pool = HTTPSessionPool()
+    return _http_pool
+
+
+async def close_http_pool() -> None:
+    """Close pooled sessions of the running loop (call on app shutdown)"""
+    if _http_pool is not None:
+        await _http_pool.close()
+
+
+def reset_http_pool() -> None:
+    """Reset the singleton instance (for testing purposes)"""
+    global _http_pool
+    _http_pool = None
@@ -0,0 +1,513 @@
+"""
+Metrics - LLM call instrumentation and histogram aggregation
+
+Every upstream LLM HTTP attempt is recorded as an LLMCallRecord (provider,
+model, endpoint, attempt, TTFT, duration, prompt/response tokens, outcome)
+and aggregated into Prometheus-style histograms and counters. RAG search
+and code validation timings go through the same registry via timed().
+
+The registry renders the Prometheus text exposition format itself, so no
+client library is needed; the agent server serves it at /metrics.
+
+Metrics:
+    hdsp_llm_request_duration_seconds{provider,model,endpoint,outcome}
+    hdsp_llm_ttft_seconds{provider,model,endpoint}         (streams only)
+    hdsp_llm_prompt_tokens{provider,model}
+    hdsp_llm_response_tokens{provider,model}
+    hdsp_llm_retries_total{provider,model,endpoint}
+    hdsp_llm_rate_limited_total{provider,key}              (key = hash prefix)
+    hdsp_rag_duration_seconds{operation}
+    hdsp_rag_index_duration_seconds                        (full index runs)
+    hdsp_validation_duration_seconds{operation}
+
+Token counts come from the provider's usage fields when the response has
+them, otherwise from the shared token counter.
+
+Environment Variables:
+    HDSP_LLM_METRICS_HISTORY: Recent call records kept for debugging (default: 256)
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from hdsp_agent_core.llm.token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+# RAG search and validation run in milliseconds
+FAST_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in values
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: [bucket counts..., sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self, **labels: Any) -> Dict[str, Any]:
+        """Bucket counts, sum and count for one label set"""
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = list(self._series.get(key) or [0] * (len(self.buckets) + 2))
+        return {
+            "buckets": dict(zip(self.buckets, series[:-2])),
+            "sum": series[-2],
+            "count": series[-1],
+        }
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, values in series:
+            for bound, count in zip(self.buckets, values[:-2]):
+                labels = _format_labels(
+                    self.labelnames, key, f'le="{_format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{labels} {values[-1]}")
+        return lines
+
+
+@dataclass
+class LLMCallRecord:
+    """One upstream LLM HTTP attempt"""
+
+    provider: str
+    model: str
+    endpoint: str
+    attempt: int
+    outcome: str
+    duration: float
+    ttft: Optional[float]
+    status: Optional[int]
+    prompt_chars: int
+    prompt_tokens: int
+    response_chars: int
+    response_tokens: int
+
+
+class LLMCallTracker:
+    """
+    Context manager timing one LLM HTTP attempt.
+
+    Usage:
+        with track_llm_call("vllm", model, "chat/completions", prompt) as call:
+            call.set_status(response.status)
+            async for chunk in ...:
+                call.add_output(chunk)   # first chunk marks TTFT
+    """
+
+    def __init__(
+        self,
+        registry: "MetricsRegistry",
+        provider: str,
+        model: str,
+        endpoint: str,
+        prompt: str = "",
+        attempt: int = 1,
+        api_key: Optional[str] = None,
+        stream: bool = False,
+    ):
+        self._registry = registry
+        self.provider = provider.lower()
+        self.model = model or ""
+        self.endpoint = endpoint
+        self.attempt = attempt
+        self._prompt = prompt
+        self._api_key = api_key
+        self._stream = stream
+        self._started = 0.0
+        self._ttft: Optional[float] = None
+        self._status: Optional[int] = None
+        self._output: List[str] = []
+        self._prompt_tokens: Optional[int] = None
+        self._response_tokens: Optional[int] = None
+
+    def set_status(self, status: int) -> None:
+        self._status = status
+        if status == 429:
+            self._registry.record_rate_limit(self.provider, self._api_key)
+
+    def add_output(self, text: str) -> None:
+        """Append response text; the first streamed chunk marks TTFT"""
+        if self._ttft is None and self._stream:
+            self._ttft = time.monotonic() - self._started
+        self._output.append(text)
+
+    def set_usage(
+        self, prompt_tokens: Optional[int] = None, response_tokens: Optional[int] = None
+    ) -> None:
+        """Provider-reported token usage (overrides local estimates)"""
+        if prompt_tokens is not None:
+            self._prompt_tokens = int(prompt_tokens)
+        if response_tokens is not None:
+            self._response_tokens = int(response_tokens)
+
+    def _outcome(self, exc: Optional[BaseException]) -> str:
+        if self._status == 429:
+            return "rate_limited"
+        if self._status == 503:
+            return "overloaded"
+        if self._status is not None and self._status != 200:
+            return "error"
+        if exc is None:
+            return "success"
+        if isinstance(exc, (asyncio.CancelledError, GeneratorExit)):
+            return "cancelled"
+        if isinstance(exc, asyncio.TimeoutError):
+            return "timeout"
+        return "error"
+
+    def __enter__(self) -> "LLMCallTracker":
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        response = "".join(self._output)
+        record = LLMCallRecord(
+            provider=self.provider,
+            model=self.model,
+            endpoint=self.endpoint,
+            attempt=self.attempt,
+            outcome=self._outcome(exc),
+            duration=time.monotonic() - self._started,
+            ttft=self._ttft,
+            status=self._status,
+            prompt_chars=len(self._prompt),
+            prompt_tokens=(
+                self._prompt_tokens
+                if self._prompt_tokens is not None
+                else count_tokens(self._prompt, self.provider)
+            ),
+            response_chars=len(response),
+            response_tokens=(
+                self._response_tokens
+                if self._response_tokens is not None
+                else count_tokens(response, self.provider)
+            ),
+        )
+        self._registry.record_llm_call(record)
+
+    async def __aenter__(self) -> "LLMCallTracker":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+
+class MetricsRegistry:
+    """
+    Process-wide metric registry.
+
+    Usage:
+        registry = get_metrics_registry()
+        with registry.timed("hdsp_rag_duration_seconds", operation="search"):
+            ...
+        text = registry.render_prometheus()
+    """
+
+    def __init__(self, history: Optional[int] = None):
+        if history is None:
+            history = int(os.environ.get("HDSP_LLM_METRICS_HISTORY", 256))
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._recent: Deque[LLMCallRecord] = deque(maxlen=history)
+
+        self.llm_duration = self.histogram(
+            "hdsp_llm_request_duration_seconds",
+            "LLM HTTP attempt duration",
+            ("provider", "model", "endpoint", "outcome"),
+        )
+        self.llm_ttft = self.histogram(
+            "hdsp_llm_ttft_seconds",
+            "Time to first streamed chunk",
+            ("provider", "model", "endpoint"),
+        )
+        self.llm_prompt_tokens = self.histogram(
+            "hdsp_llm_prompt_tokens",
+            "Prompt size in tokens",
+            ("provider", "model"),
+            TOKEN_BUCKETS,
+        )
+        self.llm_response_tokens = self.histogram(
+            "hdsp_llm_response_tokens",
+            "Response size in tokens",
+            ("provider", "model"),
+            TOKEN_BUCKETS,
+        )
+        self.llm_retries = self.counter(
+            "hdsp_llm_retries_total",
+            "LLM HTTP attempts after the first",
+            ("provider", "model", "endpoint"),
+        )
+        self.llm_rate_limited = self.counter(
+            "hdsp_llm_rate_limited_total",
+            "429 responses per API key (hash prefix)",
+            ("provider", "key"),
+        )
+        self.histogram(
+            "hdsp_rag_duration_seconds",
+            "RAG search and context assembly duration",
+            ("operation",),
+            FAST_LATENCY_BUCKETS,
+        )
+        # Index runs take seconds to minutes, past the fast buckets
+        self.histogram(
+            "hdsp_rag_index_duration_seconds",
+            "Knowledge base indexing run duration",
+            (),
+            LATENCY_BUCKETS,
+        )
+        self.histogram(
+            "hdsp_validation_duration_seconds",
+            "Code validation duration",
+            ("operation",),
+            FAST_LATENCY_BUCKETS,
+        )
+
+    def _get_or_create(self, cls, name: str, *args) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram"""
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets)
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str]) -> Counter:
+        """Get or create a counter"""
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    # ========== LLM Calls ==========
+
+    def track_llm_call(
+        self,
+        provider: str,
+        model: str,
+        endpoint: str,
+        prompt: str = "",
+        attempt: int = 1,
+        api_key: Optional[str] = None,
+        stream: bool = False,
+    ) -> LLMCallTracker:
+        """Tracker for one upstream attempt (use as a context manager)"""
+        return LLMCallTracker(
+            self, provider, model, endpoint, prompt, attempt, api_key, stream
+        )
+
+    def record_llm_call(self, record: LLMCallRecord) -> None:
+        """Aggregate a finished call into the histograms"""
+        self.llm_duration.observe(
+            record.duration,
+            provider=record.provider,
+            model=record.model,
+            endpoint=record.endpoint,
+            outcome=record.outcome,
+        )
+        if record.ttft is not None:
+            self.llm_ttft.observe(
+                record.ttft,
+                provider=record.provider,
+                model=record.model,
+                endpoint=record.endpoint,
+            )
+        if record.outcome == "success":
+            self.llm_prompt_tokens.observe(
+                record.prompt_tokens, provider=record.provider, model=record.model
+            )
+            self.llm_response_tokens.observe(
+                record.response_tokens, provider=record.provider, model=record.model
+            )
+        if record.attempt > 1:
+            self.llm_retries.inc(
+                provider=record.provider, model=record.model, endpoint=record.endpoint
+            )
+        with self._lock:
+            self._recent.append(record)
+        logger.debug("llm_call %s", asdict(record))
+
+    def record_rate_limit(self, provider: str, api_key: Optional[str]) -> None:
+        """Count a 429; keys are identified by a hash prefix, never in clear"""
+        key_id = (
+            hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8] if api_key else ""
+        )
+        self.llm_rate_limited.inc(provider=provider.lower(), key=key_id)
+
+    def recent_llm_calls(self, limit: Optional[int] = None) -> List[LLMCallRecord]:
+        """Most recent call records, oldest first"""
+        with self._lock:
+            records = list(self._recent)
+        return records[-limit:] if limit else records
+
+    # ========== Timings ==========
+
+    @contextmanager
+    def timed(
+        self,
+        name: str,
+        buckets: Sequence[float] = FAST_LATENCY_BUCKETS,
+        **labels: str,
+    ) -> Iterator[None]:
+        """Observe the duration of the block into histogram `name`"""
+        histogram = self.histogram(name, name, tuple(sorted(labels)), buckets)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            histogram.observe(time.monotonic() - started, **labels)
+
+    # ========== Exposition ==========
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for name, metric in metrics:
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ============ Singleton Accessor ============
+
+_metrics_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the singleton MetricsRegistry instance"""
+    global _metrics_registry
+    if _metrics_registry is None:
+        with _registry_lock:
+            if _metrics_registry is None:
+                _metrics_registry = MetricsRegistry()
+    return _metrics_registry
+
+
+def reset_metrics_registry() -> None:
+    """Reset the singleton instance (for testing purposes)"""
+    global _metrics_registry
+    _metrics_registry = None
+
+
+def track_llm_call(
+    provider: str,
+    model: str,
+    endpoint: str,
+    prompt: str = "",
+    attempt: int = 1,
+    api_key: Optional[str] = None,
+    stream: bool = False,
+) -> LLMCallTracker:
+    """Tracker for one upstream LLM attempt on the shared registry"""
+    return get_metrics_registry().track_llm_call(
+        provider, model, endpoint, prompt, attempt, api_key, stream
+    )
+
+
+def timed(name: str, buckets: Sequence[float] = FAST_LATENCY_BUCKETS, **labels: str):
+    """Time a block into histogram `name` on the shared registry"""
+    return get_metrics_registry().timed(name, buckets, **labels)
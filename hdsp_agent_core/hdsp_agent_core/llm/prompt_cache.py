@@ -0,0 +1,194 @@
+"""
+Prompt Prefix Cache - Reuse static prompt prefixes across LLM calls
+
+Agent prompts (plan, structured plan, replan, reflection, error analysis)
+are laid out as a static prefix (instructions, rules, output format)
+followed by a per-request suffix. Prompt modules register their rendered
+prefixes here so LLMService can recognise them.
+
+- vLLM / OpenAI: identical prefixes are cached server-side (vLLM automatic
+  prefix caching, OpenAI prompt caching); the layout alone is enough.
+- Gemini: with context caching enabled, the prefix is registered once per
+  (API key, model) via the cachedContents API and requests send only the
+  suffix plus the cache handle.
+
+Environment Variables:
+    HDSP_LLM_GEMINI_CONTEXT_CACHE: Use Gemini cachedContents (default: false)
+    HDSP_LLM_CONTEXT_CACHE_TTL: Handle lifetime in seconds (default: 3600)
+    HDSP_LLM_CONTEXT_CACHE_MIN_TOKENS: Smallest prefix worth caching (default: 1024)
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from hdsp_agent_core.llm.single_flight import get_single_flight
+from hdsp_agent_core.llm.token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ContextCacheConfig:
+    """Gemini context cache settings"""
+
+    enabled: bool = False
+    ttl_seconds: float = 3600.0
+    min_tokens: int = 1024
+    # Re-create handles this long before they expire server-side
+    refresh_margin: float = 60.0
+    # Back off from a prefix the API refused (too small, quota, ...)
+    failure_backoff: float = 300.0
+
+    @classmethod
+    def from_env(cls) -> "ContextCacheConfig":
+        """Build config from environment variables"""
+        return cls(
+            enabled=os.environ.get("HDSP_LLM_GEMINI_CONTEXT_CACHE", "false").lower()
+            == "true",
+            ttl_seconds=float(
+                os.environ.get("HDSP_LLM_CONTEXT_CACHE_TTL", cls.ttl_seconds)
+            ),
+            min_tokens=int(
+                os.environ.get("HDSP_LLM_CONTEXT_CACHE_MIN_TOKENS", cls.min_tokens)
+            ),
+        )
+
+
+# ============ Static Prefix Registry ============
+
+_static_prefixes: List[str] = []
+_prefix_lock = threading.Lock()
+
+
+def register_static_prefix(prefix: str) -> None:
+    """Register a rendered static prompt prefix"""
+    if not prefix:
+        return
+    with _prefix_lock:
+        if prefix not in _static_prefixes:
+            _static_prefixes.append(prefix)
+            # Longest first, so split_static_prefix finds the longest match
+            _static_prefixes.sort(key=len, reverse=True)
+
+
+def split_static_prefix(prompt: str) -> Tuple[Optional[str], str]:
+    """Split a prompt into (registered static prefix, suffix)"""
+    with _prefix_lock:
+        prefixes = list(_static_prefixes)
+    for prefix in prefixes:
+        if prompt.startswith(prefix):
+            return prefix, prompt[len(prefix) :]
+    return None, prompt
+
+
+class GeminiContextCache:
+    """
+    cachedContents handles per (API key, model, prefix).
+
+    Usage:
+        cache = get_context_cache()
+        name = await cache.get_or_create(api_key, model, prefix, create)
+        if name:
+            payload["cachedContent"] = name
+    """
+
+    def __init__(self, config: Optional[ContextCacheConfig] = None):
+        self._config = config or ContextCacheConfig.from_env()
+        self._handles: Dict[str, Tuple[str, float]] = {}
+        self._failed_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "creates": 0,
+            "failures": 0,
+            "invalidations": 0,
+            "skipped": 0,
+        }
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._config.ttl_seconds
+
+    @staticmethod
+    def _key(api_key: str, model: str, prefix: str) -> str:
+        key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+        prefix_id = hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+        return f"{key_id}:{model}:{prefix_id}"
+
+    async def get_or_create(
+        self,
+        api_key: str,
+        model: str,
+        prefix: str,
+        create: Callable[[], Awaitable[str]],
+    ) -> Optional[str]:
+        """Return a live handle for prefix, creating it if needed (None = don't use)"""
+        if count_tokens(prefix, "gemini") < self._config.min_tokens:
+            self._stats["skipped"] += 1
+            return None
+
+        key = self._key(api_key, model, prefix)
+        now = time.time()
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None and handle[1] - self._config.refresh_margin > now:
+                self._stats["hits"] += 1
+                return handle[0]
+            if self._failed_until.get(key, 0) > now:
+                return None
+
+        # Concurrent first requests share one create call
+        try:
+            name = await get_single_flight().do(f"gemini-context-cache:{key}", create)
+        except Exception as e:
+            logger.warning(f"Gemini context cache create failed: {e}")
+            with self._lock:
+                self._stats["failures"] += 1
+                self._failed_until[key] = time.time() + self._config.failure_backoff
+            return None
+
+        with self._lock:
+            if self._handles.get(key, (None,))[0] != name:
+                self._stats["creates"] += 1
+            self._handles[key] = (name, time.time() + self._config.ttl_seconds)
+        return name
+
+    def invalidate(self, api_key: str, model: str, prefix: str) -> None:
+        """Drop a handle the API rejected (expired or deleted)"""
+        with self._lock:
+            if self._handles.pop(self._key(api_key, model, prefix), None):
+                self._stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/create counters and live handle count"""
+        with self._lock:
+            return {**self._stats, "handles": len(self._handles)}
+
+
+def is_context_cache_enabled() -> bool:
+    """Check the HDSP_LLM_GEMINI_CONTEXT_CACHE switch"""
+    return ContextCacheConfig.from_env().enabled
+
+
+# ============ Singleton Accessor ============
+
+_context_cache: Optional[GeminiContextCache] = None
+
+
+def get_context_cache() -> GeminiContextCache:
+    """Get the singleton GeminiContextCache instance"""
+    global _context_cache
+    if _context_cache is None:
+        _context_cache = GeminiContextCache()
+    return _context_cache
+
+
+def reset_context_cache() -> None:
+    """Reset the singleton instance (for testing purposes)"""
+    global _context_cache
+    _context_cache = None
@@ -0,0 +1,269 @@
+"""
+LLM Response Cache - Prompt-keyed cache for non-streaming LLM responses
+
+Identical plan/refine/analysis prompts are often sent repeatedly (users
+re-running the same request, retrying a refine with the same error). This
+cache stores completed responses keyed by a hash of
+(provider, model, prompt, context, generation params).
+
+Tiers:
+    - Memory: LRU with TTL (always on)
+    - Disk: optional SQLite file, shared across restarts
+
+Caching is opt-in per call site: LLMService.generate_response(..., cache=True).
+
+Environment Variables:
+    HDSP_LLM_CACHE_ENABLED: Global switch (default: true)
+    HDSP_LLM_CACHE_MAX_ENTRIES: Memory tier capacity (default: 256)
+    HDSP_LLM_CACHE_TTL: Entry lifetime in seconds (default: 3600)
+    HDSP_LLM_CACHE_PATH: SQLite file for the disk tier (default: disabled)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResponseCacheConfig:
+    """Response cache settings"""
+
+    enabled: bool = True
+    max_entries: int = 256
+    ttl_seconds: float = 3600.0
+    disk_path: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "ResponseCacheConfig":
+        """Build config from HDSP_LLM_CACHE_* environment variables"""
+        return cls(
+            enabled=os.environ.get("HDSP_LLM_CACHE_ENABLED", "true").lower() == "true",
+            max_entries=int(
+                os.environ.get("HDSP_LLM_CACHE_MAX_ENTRIES", cls.max_entries)
+            ),
+            ttl_seconds=float(os.environ.get("HDSP_LLM_CACHE_TTL", cls.ttl_seconds)),
+            disk_path=os.environ.get("HDSP_LLM_CACHE_PATH") or None,
+        )
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    prompt: str,
+    context: Optional[str] = None,
+    params: Optional[Dict[str, Any]] = None,
+    credential: Optional[str] = None,
+) -> str:
+    """Hash the inputs that determine an LLM response into a cache key
+
+    `credential` (API key / auth token) scopes the key to one caller, so
+    users never share a call billed to, or rate-limited on, another's key.
+    It is hashed on its own and never stored.
+    """
+    credential_hash = hashlib.sha256((credential or "").encode("utf-8")).hexdigest()
+    material = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "prompt": prompt,
+            "context": context or "",
+            "params": params or {},
+            "credential": credential_hash,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class _DiskTier:
+    """SQLite-backed key/value store with expiry timestamps"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Accessed under LLMResponseCache._lock, possibly from several loops
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        return row[0], row[1]
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) "
+            "VALUES (?, ?, ?)",
+            (key, value, expires_at),
+        )
+        self._conn.commit()
+
+    def purge_expired(self, now: float) -> None:
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        self._conn.commit()
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM llm_cache")
+        self._conn.commit()
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class LLMResponseCache:
+    """
+    Two-tier (memory LRU + optional SQLite) cache for LLM responses.
+
+    Usage:
+        cache = get_response_cache()
+        key = make_cache_key(provider, model, prompt, context, params)
+        cached = cache.get(key)
+        if cached is None:
+            cached = await call_provider(...)
+            cache.set(key, cached)
+    """
+
+    def __init__(self, config: Optional[ResponseCacheConfig] = None):
+        self._config = config or ResponseCacheConfig.from_env()
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[_DiskTier] = None
+        self._stats = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0}
+
+        if self._config.enabled and self._config.disk_path:
+            try:
+                self._disk = _DiskTier(self._config.disk_path)
+                self._disk.purge_expired(time.time())
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache disk tier disabled: {e}")
+                self._disk = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._config.enabled
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response, or None on miss/expiry"""
+        if not self._config.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._disk is not None:
+                try:
+                    disk_entry = self._disk.get(key, now)
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM cache disk read failed: {e}")
+                    disk_entry = None
+                if disk_entry is not None:
+                    self._put_memory(key, disk_entry[0], disk_entry[1])
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                    return disk_entry[0]
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response in all enabled tiers"""
+        if not self._config.enabled or not value:
+            return
+
+        expires_at = time.time() + self._config.ttl_seconds
+        with self._lock:
+            self._put_memory(key, value, expires_at)
+            if self._disk is not None:
+                try:
+                    self._disk.set(key, value, expires_at)
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM cache disk write failed: {e}")
+
+    def _put_memory(self, key: str, value: str, expires_at: float) -> None:
+        """Insert into the LRU tier (caller holds the lock)"""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._config.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """Drop all entries from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.clear()
+
+    def close(self) -> None:
+        """Close the disk tier connection"""
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk.count() if self._disk else 0,
+                "enabled": self._config.enabled,
+            }
+
+
+# ============ Singleton Accessor ============
+
+_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_response_cache() -> LLMResponseCache:
+    """Get the singleton LLMResponseCache instance"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = LLMResponseCache()
+    return _response_cache
+
+
+def reset_response_cache() -> None:
+    """Reset the singleton instance (for testing purposes)"""
+    global _response_cache
+    if _response_cache is not None:
+        _response_cache.close()
+    _response_cache = None
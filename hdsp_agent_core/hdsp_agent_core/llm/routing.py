@@ -0,0 +1,226 @@
+"""
+Latency-Aware Router - EWMA scoring and failover across LLM backends
+
+Keeps exponentially weighted moving averages of latency, time-to-first-token
+and error rate per backend (provider:model). In routing mode each request
+goes to the best-scoring healthy backend and fails over to the next one on
+error, so traffic shifts to e.g. a local vLLM when Gemini degrades. Rate
+limits and configuration errors are not failed over; they reach the caller.
+
+Score (lower is better):
+
+    (ewma latency or ewma TTFT) * (1 + 4 * error rate)
+
+Full calls are ranked by latency and streams by TTFT; the two are never
+mixed. Backends without samples for the metric score 0 so they get probed. A backend is unhealthy
+for a cooldown period after its error rate crosses the threshold; unhealthy
+backends are only tried after all healthy ones.
+
+Environment Variables:
+    HDSP_LLM_ROUTING: "latency" enables routing mode (default: off)
+    HDSP_LLM_ROUTER_ALPHA: EWMA smoothing factor (default: 0.3)
+    HDSP_LLM_ROUTER_ERROR_THRESHOLD: Error rate marking unhealthy (default: 0.5)
+    HDSP_LLM_ROUTER_COOLDOWN: Seconds a backend stays unhealthy (default: 30)
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+ROUTING_MODE_LATENCY = "latency"
+
+# Ranking metrics: full-call latency (generate) and time-to-first-token (stream)
+METRIC_LATENCY = "latency"
+METRIC_TTFT = "ttft"
+
+
+@dataclass
+class RouterConfig:
+    """Router smoothing and health settings"""
+
+    alpha: float = 0.3
+    error_threshold: float = 0.5
+    cooldown_seconds: float = 30.0
+    error_penalty: float = 4.0
+
+    @classmethod
+    def from_env(cls) -> "RouterConfig":
+        """Build config from HDSP_LLM_ROUTER_* environment variables"""
+        return cls(
+            alpha=float(os.environ.get("HDSP_LLM_ROUTER_ALPHA", cls.alpha)),
+            error_threshold=float(
+                os.environ.get("HDSP_LLM_ROUTER_ERROR_THRESHOLD", cls.error_threshold)
+            ),
+            cooldown_seconds=float(
+                os.environ.get("HDSP_LLM_ROUTER_COOLDOWN", cls.cooldown_seconds)
+            ),
+        )
+
+
+@dataclass
+class BackendStats:
+    """EWMA statistics for one backend"""
+
+    latency: Optional[float] = None
+    ttft: Optional[float] = None
+    error_rate: float = 0.0
+    requests: int = 0
+    failures: int = 0
+    unhealthy_until: float = 0.0
+    last_error: Optional[str] = field(default=None, repr=False)
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "latency": self.latency,
+            "ttft": self.ttft,
+            "error_rate": round(self.error_rate, 4),
+            "requests": self.requests,
+            "failures": self.failures,
+            "healthy": self.is_healthy(now),
+            "last_error": self.last_error,
+        }
+
+
+def _ewma(current: Optional[float], sample: float, alpha: float) -> float:
+    if current is None:
+        return sample
+    return alpha * sample + (1 - alpha) * current
+
+
+class LatencyRouter:
+    """
+    Ranks LLM backends by EWMA latency and error rate.
+
+    Usage:
+        router = get_llm_router()
+        for backend in router.rank(["gemini:gemini-2.5-flash", "vllm:qwen"]):
+            try:
+                result = await call(backend)
+                router.record_success(backend, latency)
+                break
+            except Exception as e:
+                if not is_failover_error(e):
+                    raise
+                router.record_failure(backend, str(e))
+    """
+
+    def __init__(self, config: Optional[RouterConfig] = None):
+        self._config = config or RouterConfig.from_env()
+        self._backends: Dict[str, BackendStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, backend: str) -> BackendStats:
+        """Get or create stats (caller holds the lock)"""
+        stats = self._backends.get(backend)
+        if stats is None:
+            stats = BackendStats()
+            self._backends[backend] = stats
+        return stats
+
+    def record_success(
+        self,
+        backend: str,
+        latency: Optional[float] = None,
+        ttft: Optional[float] = None,
+    ) -> None:
+        """Record a successful call (latency/TTFT in seconds)"""
+        alpha = self._config.alpha
+        with self._lock:
+            stats = self._stats(backend)
+            stats.requests += 1
+            if latency is not None:
+                stats.latency = _ewma(stats.latency, latency, alpha)
+            if ttft is not None:
+                stats.ttft = _ewma(stats.ttft, ttft, alpha)
+            stats.error_rate = _ewma(stats.error_rate, 0.0, alpha)
+
+    def record_failure(self, backend: str, error: Optional[str] = None) -> None:
+        """Record a failed call; may mark the backend unhealthy"""
+        with self._lock:
+            stats = self._stats(backend)
+            stats.requests += 1
+            stats.failures += 1
+            stats.last_error = (error or "")[:200] or None
+            # First failure counts fully: one bad probe is enough to step aside
+            alpha = 1.0 if stats.requests == 1 else self._config.alpha
+            stats.error_rate = _ewma(stats.error_rate, 1.0, alpha)
+            if stats.error_rate >= self._config.error_threshold:
+                stats.unhealthy_until = time.monotonic() + self._config.cooldown_seconds
+
+    def score(self, backend: str, metric: str = METRIC_LATENCY) -> float:
+        """Routing score for a backend by latency or TTFT (lower is better)"""
+        with self._lock:
+            stats = self._backends.get(backend)
+            if stats is None:
+                return 0.0
+            base = stats.ttft if metric == METRIC_TTFT else stats.latency
+            if base is None:
+                # Never succeeded: probe only if it has not failed either
+                return 0.0 if stats.error_rate == 0 else float("inf")
+            return base * (1 + self._config.error_penalty * stats.error_rate)
+
+    def rank(self, backends: List[str], metric: str = METRIC_LATENCY) -> List[str]:
+        """Order backends: healthy by score, then unhealthy by score"""
+        now = time.monotonic()
+        with self._lock:
+            healthy = {
+                b: self._backends[b].is_healthy(now) if b in self._backends else True
+                for b in backends
+            }
+        # sorted() is stable, so ties keep the caller's preference order
+        ordered = sorted(backends, key=lambda b: self.score(b, metric))
+        return [b for b in ordered if healthy[b]] + [
+            b for b in ordered if not healthy[b]
+        ]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-backend statistics"""
+        now = time.monotonic()
+        with self._lock:
+            return {name: s.to_dict(now) for name, s in self._backends.items()}
+
+
+def is_failover_error(error: Exception) -> bool:
+    """
+    Whether another backend could succeed where this one failed.
+
+    Rate limits reach the caller (the client rotates keys on
+    RATE_LIMIT_EXCEEDED), and so do configuration errors (ValueError).
+    Malformed responses (JSON/Unicode decode errors) still fail over.
+    """
+    if "RATE_LIMIT_EXCEEDED" in str(error):
+        return False
+    if isinstance(error, (json.JSONDecodeError, UnicodeError)):
+        return True
+    return not isinstance(error, ValueError)
+
+
+def is_routing_enabled(config: Dict[str, Any]) -> bool:
+    """Routing mode: config["routing"], else HDSP_LLM_ROUTING"""
+    mode = config.get("routing") or os.environ.get("HDSP_LLM_ROUTING", "")
+    return str(mode).lower() == ROUTING_MODE_LATENCY
+
+
+# ============ Singleton Accessor ============
+
+_llm_router: Optional[LatencyRouter] = None
+
+
+def get_llm_router() -> LatencyRouter:
+    """Get the singleton LatencyRouter instance"""
+    global _llm_router
+    if _llm_router is None:
+        _llm_router = LatencyRouter()
+    return _llm_router
+
+
+def reset_llm_router() -> None:
+    """Reset the singleton instance (for testing purposes)"""
+    global _llm_router
+    _llm_router = None
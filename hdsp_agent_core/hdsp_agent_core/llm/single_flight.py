@@ -0,0 +1,211 @@
+"""
+Single-Flight - Coalesce identical in-flight LLM requests
+
+When several tabs or the auto-agent retry loop send the same request at the
+same time, only the first caller (the leader) hits the provider. Concurrent
+callers with the same key await the leader's result. For streams, every
+subscriber receives all chunks from the start, including chunks emitted
+before it joined.
+
+In-flight calls are tracked per event loop because futures are loop-bound.
+The upstream call is cancelled once every waiter or subscriber has gone away.
+
+Environment Variables:
+    HDSP_LLM_SINGLE_FLIGHT: Enable coalescing (default: true)
+"""
+
+import asyncio
+import logging
+import os
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """In-flight non-streaming call shared by all waiters"""
+
+    def __init__(self, task: "asyncio.Future[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class _StreamCall:
+    """In-flight stream whose chunks are replayed to every subscriber"""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.cond = asyncio.Condition()
+        self.subscribers = 0
+        self.task: Optional["asyncio.Future[None]"] = None
+
+
+def _consume_exception(task: "asyncio.Future[Any]") -> None:
+    """Mark a task's exception retrieved (all waiters may have left)"""
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls that share a key.
+
+    Usage:
+        flight = get_single_flight()
+        text = await flight.do(key, lambda: call_provider(prompt))
+        async for chunk in flight.stream(key, lambda: stream_provider(prompt)):
+            ...
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.environ.get("HDSP_LLM_SINGLE_FLIGHT", "true").lower() == "true"
+        self.enabled = enabled
+        # event loop -> key -> in-flight call
+        self._calls: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._streams: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._stats = {"leaders": 0, "coalesced": 0}
+
+    @staticmethod
+    def _for_loop(table: weakref.WeakKeyDictionary) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        entries = table.get(loop)
+        if entries is None:
+            entries = {}
+            table[loop] = entries
+        return entries
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once for all concurrent callers with the same key"""
+        if not self.enabled:
+            return await fn()
+
+        calls = self._for_loop(self._calls)
+        call = calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            calls[key] = call
+            self._stats["leaders"] += 1
+
+            def _cleanup(task, key=key, call=call):
+                if calls.get(key) is call:
+                    del calls[key]
+                _consume_exception(task)
+
+            call.task.add_done_callback(_cleanup)
+        else:
+            self._stats["coalesced"] += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            # Last waiter leaving: nobody needs the upstream result anymore
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    async def stream(
+        self, key: str, fn: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """Fan out one upstream stream to all concurrent subscribers"""
+        if not self.enabled:
+            async for chunk in fn():
+                yield chunk
+            return
+
+        streams = self._for_loop(self._streams)
+        call = streams.get(key)
+        if call is None:
+            call = _StreamCall()
+            streams[key] = call
+            call.task = asyncio.ensure_future(self._pump(key, call, fn, streams))
+            self._stats["leaders"] += 1
+        else:
+            self._stats["coalesced"] += 1
+
+        call.subscribers += 1
+        index = 0
+        try:
+            while True:
+                async with call.cond:
+                    await call.cond.wait_for(
+                        lambda: index < len(call.chunks) or call.done
+                    )
+                    pending = call.chunks[index:]
+                    finished = call.done
+                for chunk in pending:
+                    yield chunk
+                index += len(pending)
+                if finished and index >= len(call.chunks):
+                    if call.error is not None:
+                        raise call.error
+                    return
+        finally:
+            call.subscribers -= 1
+            if call.subscribers == 0 and call.task is not None and not call.task.done():
+                call.task.cancel()
+
+    @staticmethod
+    async def _pump(
+        key: str,
+        call: _StreamCall,
+        fn: Callable[[], AsyncIterator[str]],
+        streams: Dict[str, _StreamCall],
+    ) -> None:
+        """Read the upstream stream and publish chunks to subscribers"""
+        try:
+            async for chunk in fn():
+                async with call.cond:
+                    call.chunks.append(chunk)
+                    call.cond.notify_all()
+        except asyncio.CancelledError:
+            call.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            call.error = e
+        finally:
+            if streams.get(key) is call:
+                del streams[key]
+            call.done = True
+            async with call.cond:
+                call.cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get leader/coalesced counters and in-flight counts for this loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        calls = self._calls.get(loop, {}) if loop else {}
+        streams = self._streams.get(loop, {}) if loop else {}
+        return {
+            **self._stats,
+            "in_flight": len(calls),
+            "in_flight_streams": len(streams),
+            "enabled": self.enabled,
+        }
+
+
+# ============ Singleton Accessor ============
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the singleton SingleFlight instance"""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
+
+
+def reset_single_flight() -> None:
+    """Reset the singleton instance (for testing purposes)"""
+    global _single_flight
+    _single_flight = None
@@ -0,0 +1,132 @@
+"""
+SSE Decoder - Incremental Server-Sent Events parsing for provider streams
+
+Network reads do not line up with SSE lines: a read can end in the middle
+of a `data:` line or inside a multi-byte UTF-8 character. SSEDecoder buffers
+raw bytes across reads, splits complete lines, joins multi-line `data:`
+fields per event (dispatched on a blank line, per the SSE spec) and decodes
+each event payload as JSON once. A "[DONE]" payload ends the stream.
+
+Used by Gemini, OpenAI and vLLM streaming in LLMService.
+
+JSON decoding uses orjson when installed (optional), else the json module.
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, List
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _JSONDecodeError = (orjson.JSONDecodeError, ValueError)
+except ImportError:  # pragma: no cover - depends on environment
+    _loads = json.loads
+    _JSONDecodeError = (json.JSONDecodeError, ValueError)
+
+DONE_SENTINEL = b"[DONE]"
+
+
+class SSEDecoder:
+    """
+    Incremental decoder: raw byte chunks in, decoded JSON event payloads out.
+
+    Usage:
+        decoder = SSEDecoder()
+        async for chunk in response.content.iter_any():
+            for data in decoder.feed(chunk):
+                ...
+        for data in decoder.close():
+            ...
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._data_lines: List[bytes] = []
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add a network read; return payloads of events completed by it"""
+        if not chunk or self.done:
+            return []
+        buffer = self._buffer
+        # Only the unscanned tail can contain the next newline
+        scan_from = len(buffer)
+        buffer += chunk
+        events: List[Any] = []
+
+        start = 0
+        while True:
+            end = buffer.find(b"\n", scan_from)
+            if end == -1:
+                break
+            line = bytes(buffer[start:end])
+            start = scan_from = end + 1
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            self._process_line(line, events)
+            if self.done:
+                break
+
+        del buffer[:start]
+        return events
+
+    def close(self) -> List[Any]:
+        """End of stream: dispatch a trailing event without a blank line"""
+        events: List[Any] = []
+        if self._buffer and not self.done:
+            self._process_line(bytes(self._buffer).rstrip(b"\r"), events)
+        self._buffer = bytearray()
+        self._dispatch(events)
+        return events
+
+    def _process_line(self, line: bytes, events: List[Any]) -> None:
+        if not line:
+            # Blank line ends the event
+            self._dispatch(events)
+            return
+        if line.startswith(b"data:"):
+            value = line[5:]
+            if value.startswith(b" "):
+                value = value[1:]
+            if value == DONE_SENTINEL:
+                self._dispatch(events)
+                self.done = True
+                return
+            if self._data_lines:
+                # No blank line since the previous data line (non-compliant
+                # servers): emit it now if it is already complete JSON
+                self._dispatch(events, wait_if_incomplete=True)
+            self._data_lines.append(value)
+        # Comments (":") and event/id/retry fields carry no payload here
+
+    def _dispatch(self, events: List[Any], wait_if_incomplete: bool = False) -> None:
+        lines = self._data_lines
+        if not lines:
+            return
+        payload = lines[0] if len(lines) == 1 else b"\n".join(lines)
+        try:
+            data = _loads(payload)
+        except _JSONDecodeError:
+            if wait_if_incomplete:
+                return
+            logger.debug(f"Skipping undecodable SSE data: {payload[:100]!r}")
+            data = None
+        self._data_lines = []
+        if data is not None:
+            events.append(data)
+
+
+async def iter_sse_json(content) -> AsyncIterator[Any]:
+    """Yield decoded JSON payloads from an aiohttp StreamReader"""
+    decoder = SSEDecoder()
+    async for chunk in content.iter_any():
+        for data in decoder.feed(chunk):
+            yield data
+        if decoder.done:
+            return
+    for data in decoder.close():
+        yield data
@@ -0,0 +1,259 @@
+"""
+Token Counter - Tokenizer-backed token counting for context budgeting
+
+Context budgets (condenser, RAG context packing, prompt sections) were
+estimated from word or character counts, which undercounts Korean text
+(one "word" is several tokens) and overcounts/undercounts code depending on
+punctuation density. This module gives every budget the same counter.
+
+Counters:
+    - HeuristicTokenCounter: script-aware local estimate (no dependencies)
+    - TiktokenCounter: OpenAI BPE via tiktoken (optional)
+    - HFTokenizerCounter: tokenizer.json via `tokenizers` (optional, vLLM)
+
+Gemini has no local tokenizer (only the countTokens API), so it uses the
+heuristic. Every counter is wrapped in CachedTokenCounter, which memoizes
+counts by content hash so re-counting the same message or RAG chunk across
+turns is a dict lookup.
+
+Environment Variables:
+    HDSP_LLM_TOKENIZER_PATH: tokenizer.json for vLLM-served models (default: none)
+    HDSP_LLM_TOKEN_CACHE_SIZE: Memoized counts per counter (default: 4096)
+"""
+
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Hangul (jamo, compatibility jamo, syllables), kana and CJK ideographs
+_CJK = "\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u4e00-\u9fff\uac00-\ud7af"
+_TOKEN_PATTERN = re.compile(
+    rf"(?P<cjk>[{_CJK}]+)"
+    r"|(?P<word>[A-Za-z]+)"
+    r"|(?P<num>\d+)"
+    r"|(?P<space>\s+)"
+    rf"|(?P<other>[^\sA-Za-z\d{_CJK}])"
+)
+
+
+class TokenCounter:
+    """Base class: count tokens in a string"""
+
+    name = "base"
+
+    def count(self, text: str) -> int:
+        raise NotImplementedError
+
+    def count_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """Sum of content tokens over chat messages"""
+        return sum(self.count(m.get("content") or "") for m in messages)
+
+    def truncate(self, text: str, max_tokens: int, suffix: str = "") -> str:
+        """Longest prefix of text within max_tokens (suffix appended if cut)"""
+        if not text or self.count(text) <= max_tokens:
+            return text
+        budget = max_tokens - self.count(suffix) if suffix else max_tokens
+        if budget <= 0:
+            return ""
+        # Binary search on prefix length; counts are monotonic in practice
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count(text[:mid]) <= budget:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low] + suffix
+
+
+class HeuristicTokenCounter(TokenCounter):
+    """
+    Script-aware estimate calibrated against BPE/SentencePiece tokenizers.
+
+    - Hangul/kana/CJK: one token per character
+    - Latin words: one token per 6 letters (common words are one token)
+    - Digits: one token per 3 digits
+    - Whitespace: a single space is free, newlines/indentation cost one
+    - Punctuation and other symbols: one token each (dense in code)
+    """
+
+    name = "heuristic"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        tokens = 0
+        for match in _TOKEN_PATTERN.finditer(text):
+            kind = match.lastgroup
+            length = match.end() - match.start()
+            if kind == "cjk" or kind == "other":
+                tokens += length
+            elif kind == "word":
+                tokens += math.ceil(length / 6)
+            elif kind == "num":
+                tokens += math.ceil(length / 3)
+            elif length > 1 or match.group() != " ":
+                tokens += 1
+        return max(tokens, 1)
+
+
+class TiktokenCounter(TokenCounter):
+    """Exact counts for OpenAI models via tiktoken"""
+
+    name = "tiktoken"
+
+    def __init__(self, model: Optional[str] = None):
+        import tiktoken
+
+        try:
+            self._encoding = tiktoken.encoding_for_model(model or "")
+        except KeyError:
+            self._encoding = tiktoken.get_encoding("o200k_base")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+class HFTokenizerCounter(TokenCounter):
+    """Exact counts from a HuggingFace tokenizer.json (vLLM-served models)"""
+
+    name = "hf-tokenizer"
+
+    def __init__(self, path: str):
+        from tokenizers import Tokenizer
+
+        self._tokenizer = Tokenizer.from_file(path)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+class CachedTokenCounter(TokenCounter):
+    """
+    LRU memoization of another counter's results, keyed by content hash.
+
+    Usage:
+        counter = get_token_counter("gemini")
+        tokens = counter.count(message["content"])
+    """
+
+    def __init__(self, counter: TokenCounter, max_entries: int = 4096):
+        self._counter = counter
+        self._max_entries = max_entries
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        self.name = counter.name
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                return cached
+            self._stats["misses"] += 1
+
+        tokens = self._counter.count(text)
+        with self._lock:
+            self._cache[key] = tokens
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def truncate(self, text: str, max_tokens: int, suffix: str = "") -> str:
+        # Full text is memoized; the search prefixes would only churn the LRU
+        if not text or self.count(text) <= max_tokens:
+            return text
+        return self._counter.truncate(text, max_tokens, suffix)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and cache size"""
+        with self._lock:
+            return {**self._stats, "entries": len(self._cache), "counter": self.name}
+
+
+def _openai_counter(model: Optional[str]) -> TokenCounter:
+    try:
+        return TiktokenCounter(model)
+    except ImportError:
+        logger.info("tiktoken not installed, using heuristic token counts")
+        return HeuristicTokenCounter()
+
+
+def _vllm_counter(model: Optional[str]) -> TokenCounter:
+    path = os.environ.get("HDSP_LLM_TOKENIZER_PATH")
+    if path:
+        try:
+            return HFTokenizerCounter(path)
+        except ImportError:
+            logger.info("tokenizers not installed, using heuristic token counts")
+        except Exception as e:
+            logger.warning(f"Failed to load tokenizer from {path}: {e}")
+    return HeuristicTokenCounter()
+
+
+_counter_factories: Dict[str, Callable[[Optional[str]], TokenCounter]] = {
+    "openai": _openai_counter,
+    "vllm": _vllm_counter,
+}
+
+
+# ============ Singleton Accessor ============
+
+_token_counters: Dict[Tuple[str, Optional[str]], CachedTokenCounter] = {}
+_counter_lock = threading.Lock()
+
+
+def get_token_counter(
+    provider: Optional[str] = None, model: Optional[str] = None
+) -> CachedTokenCounter:
+    """Get the shared memoizing counter for a provider/model"""
+    key = ((provider or "default").lower(), model)
+    with _counter_lock:
+        counter = _token_counters.get(key)
+        if counter is None:
+            factory = _counter_factories.get(key[0])
+            base = factory(model) if factory else HeuristicTokenCounter()
+            counter = CachedTokenCounter(
+                base, int(os.environ.get("HDSP_LLM_TOKEN_CACHE_SIZE", 4096))
+            )
+            _token_counters[key] = counter
+        return counter
+
+
+def register_token_counter(
+    provider: str, factory: Callable[[Optional[str]], TokenCounter]
+) -> None:
+    """Register a counter factory (called with the model name) for a provider"""
+    with _counter_lock:
+        _counter_factories[provider.lower()] = factory
+        for key in [k for k in _token_counters if k[0] == provider.lower()]:
+            del _token_counters[key]
+
+
+def count_tokens(
+    text: str, provider: Optional[str] = None, model: Optional[str] = None
+) -> int:
+    """Count tokens in text with the provider's shared counter"""
+    return get_token_counter(provider, model).count(text)
+
+
+def reset_token_counters() -> None:
+    """Reset all counters (for testing purposes)"""
+    with _counter_lock:
+        _token_counters.clear()
@@ -48,6 +48,8 @@ from .chat import (
 from .rag import (
     ChunkingConfig,
     EmbeddingConfig,
+    HybridSearchConfig,
+    IndexingConfig,
     IndexStatusResponse,
     QdrantConfig,
     RAGConfig,
@@ -56,6 +58,7 @@ from .rag import (
     SearchRequest,
     SearchResponse,
     SearchResult,
+    VectorStoreConfig,
     WatchdogConfig,
     get_default_rag_config,
 )
@@ -102,6 +105,8 @@ __all__ = [
     # RAG
     "ChunkingConfig",
     "EmbeddingConfig",
+    "HybridSearchConfig",
+    "IndexingConfig",
     "IndexStatusResponse",
     "QdrantConfig",
     "RAGConfig",
@@ -110,6 +115,7 @@ __all__ = [
     "SearchRequest",
     "SearchResponse",
     "SearchResult",
+    "VectorStoreConfig",
     "WatchdogConfig",
     "get_default_rag_config",
 ]
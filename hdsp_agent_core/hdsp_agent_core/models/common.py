@@ -64,6 +64,10 @@ class GeminiConfig(BaseModel):
         description="Multiple API keys for rate limit rotation (max 10)"
     )
     model: str = Field(default="gemini-2.5-flash", description="Model name")
+    hedge: Optional[bool] = Field(
+        default=None,
+        description="Hedge slow calls onto another of apiKeys (None: HDSP_LLM_HEDGE_ENABLED)"
+    )
 
 
 class OpenAIConfig(BaseModel):
@@ -88,7 +92,7 @@ class LLMConfig(BaseModel):
     """
 
     provider: str = Field(
-        default="gemini", description="LLM provider (gemini, openai, vllm)"
+        default="gemini", description="LLM provider (gemini, openai, vllm, fake)"
     )
     gemini: Optional[GeminiConfig] = Field(default=None, description="Gemini config")
     openai: Optional[OpenAIConfig] = Field(default=None, description="OpenAI config")
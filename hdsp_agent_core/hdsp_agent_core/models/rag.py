@@ -3,9 +3,11 @@ RAG Configuration and API Pydantic Models
 
 Defines configuration schemas for the Local RAG system including:
 - Qdrant vector database settings
+- Vector store backend selection
 - Embedding model settings
 - Document chunking settings
 - File watchdog settings
+- Indexing pipeline settings
 - Search API request/response models
 """
 
@@ -40,6 +42,19 @@ class QdrantConfig(BaseModel):
         default="hdsp_knowledge",
         description="Vector collection name"
     )
+    # Quantization (server/cloud mode; local mode always searches exactly)
+    quantization: Literal["none", "int8"] = Field(
+        default="none",
+        description="Scalar quantization of stored vectors: int8 keeps a 4x smaller copy in RAM"
+    )
+    quantization_oversampling: float = Field(
+        default=2.0,
+        description="Candidates per result taken from quantized vectors before rescoring"
+    )
+    quantization_rescore: bool = Field(
+        default=True,
+        description="Rescore oversampled candidates with the original vectors"
+    )
 
     def get_mode(self) -> str:
         """Get mode with environment variable override"""
@@ -66,6 +81,44 @@ class QdrantConfig(BaseModel):
         # Default path
         return os.path.expanduser("~/.hdsp_agent/qdrant")
 
+    def get_quantization(self) -> str:
+        """Get quantization with environment variable override"""
+        env_quantization = os.environ.get("HDSP_QDRANT_QUANTIZATION", "").lower()
+        if env_quantization:
+            return env_quantization
+        return self.quantization
+
+
+class VectorStoreConfig(BaseModel):
+    """Vector store backend selection"""
+
+    backend: Literal["qdrant", "numpy"] = Field(
+        default="qdrant",
+        description="qdrant (see QdrantConfig) or numpy (in-process exact search)"
+    )
+    snapshot_dir: Optional[str] = Field(
+        default=None,
+        description="NumPy backend snapshot directory. Defaults to ~/.hdsp_agent/vector_store"
+    )
+
+    def get_backend(self) -> str:
+        """Get backend with environment variable override"""
+        env_backend = os.environ.get("HDSP_VECTOR_STORE", "").lower()
+        if env_backend:
+            return env_backend
+        return self.backend
+
+    def get_snapshot_dir(self) -> str:
+        """Get resolved snapshot directory with environment variable support"""
+        if self.snapshot_dir:
+            return os.path.expanduser(self.snapshot_dir)
+        # Check environment variable
+        env_path = os.environ.get("HDSP_VECTOR_STORE_DIR")
+        if env_path:
+            return os.path.expanduser(env_path)
+        # Default path
+        return os.path.expanduser("~/.hdsp_agent/vector_store")
+
 
 class EmbeddingConfig(BaseModel):
     """Embedding model configuration"""
@@ -91,6 +144,69 @@ class EmbeddingConfig(BaseModel):
         default=True,
         description="Normalize embeddings for cosine similarity"
     )
+    truncate_dim: Optional[int] = Field(
+        default=None,
+        description="Matryoshka truncation: keep the first N dimensions (re-normalized)"
+    )
+    # Persistent embedding cache
+    cache_enabled: bool = Field(
+        default=True,
+        description="Reuse embeddings across restarts from an on-disk cache"
+    )
+    cache_dir: Optional[str] = Field(
+        default=None,
+        description="Embedding cache directory. Defaults to ~/.hdsp_agent/embedding_cache"
+    )
+    cache_max_entries: int = Field(
+        default=200_000,
+        description="Vectors kept per model before the oldest are evicted"
+    )
+    cache_dtype: Literal["float16", "float32"] = Field(
+        default="float16",
+        description="On-disk vector precision"
+    )
+    # Query embedding
+    query_cache_size: int = Field(
+        default=1024,
+        description="Query embeddings kept in the in-memory LRU cache"
+    )
+    query_batch_size: int = Field(
+        default=32,
+        description="Concurrent queries encoded in one model call"
+    )
+    query_batch_wait_ms: float = Field(
+        default=5.0,
+        description="How long a query waits for others to join its batch"
+    )
+    # vLLM client (HDSP_EMBEDDING_BACKEND=vllm)
+    vllm_batch_size: int = Field(
+        default=64,
+        description="Max texts per vLLM embedding request"
+    )
+    vllm_batch_tokens: int = Field(
+        default=16384,
+        description="Approximate token budget per vLLM embedding request"
+    )
+    vllm_concurrency: int = Field(
+        default=4,
+        description="Concurrent requests (and pooled connections) to the vLLM server"
+    )
+    vllm_timeout: float = Field(
+        default=60.0,
+        description="Timeout in seconds for one vLLM request"
+    )
+    vllm_max_retries: int = Field(
+        default=5,
+        description="Attempts per request on connection errors, 429 and 5xx"
+    )
+    vllm_backoff_base: float = Field(
+        default=0.5,
+        description="First retry delay in seconds; doubles per attempt, with jitter"
+    )
+    vllm_backoff_max: float = Field(
+        default=30.0,
+        description="Upper bound on one retry delay in seconds"
+    )
 
     def get_model_name(self) -> str:
         """Get model name with environment variable override"""
@@ -100,6 +216,39 @@ class EmbeddingConfig(BaseModel):
         """Get device with environment variable override"""
         return os.environ.get("HDSP_EMBEDDING_DEVICE", self.device)
 
+    def get_truncate_dim(self) -> Optional[int]:
+        """Get truncation dimension with environment variable override"""
+        env_dim = os.environ.get("HDSP_EMBEDDING_TRUNCATE_DIM")
+        if env_dim:
+            return int(env_dim) or None
+        return self.truncate_dim
+
+    def get_vllm_batch_size(self) -> int:
+        """Get vLLM request size with environment variable override"""
+        return max(1, int(os.environ.get("HDSP_VLLM_BATCH_SIZE", self.vllm_batch_size)))
+
+    def get_vllm_concurrency(self) -> int:
+        """Get vLLM request concurrency with environment variable override"""
+        return max(1, int(os.environ.get("HDSP_VLLM_CONCURRENCY", self.vllm_concurrency)))
+
+    def is_cache_enabled(self) -> bool:
+        """Check if the embedding cache is enabled (env override)"""
+        env_enabled = os.environ.get("HDSP_EMBEDDING_CACHE", "").lower()
+        if env_enabled in ("false", "0", "no"):
+            return False
+        if env_enabled in ("true", "1", "yes"):
+            return True
+        return self.cache_enabled
+
+    def get_cache_dir(self) -> str:
+        """Get resolved cache directory with environment variable support"""
+        if self.cache_dir:
+            return os.path.expanduser(self.cache_dir)
+        env_dir = os.environ.get("HDSP_EMBEDDING_CACHE_DIR")
+        if env_dir:
+            return os.path.expanduser(env_dir)
+        return os.path.expanduser("~/.hdsp_agent/embedding_cache")
+
 
 class ChunkingConfig(BaseModel):
     """Document chunking configuration"""
@@ -147,6 +296,80 @@ class WatchdogConfig(BaseModel):
     )
 
 
+class IndexingConfig(BaseModel):
+    """Knowledge base indexing pipeline configuration"""
+
+    read_workers: int = Field(
+        default=4,
+        description="Files read and chunked in parallel"
+    )
+    embed_batch_size: int = Field(
+        default=256,
+        description="Chunks per embedding call (pooled across files)"
+    )
+    upsert_batch_size: int = Field(
+        default=512,
+        description="Points per vector store upsert"
+    )
+    queue_size: int = Field(
+        default=4,
+        description="Batches buffered between pipeline stages"
+    )
+    manifest_path: Optional[str] = Field(
+        default=None,
+        description="Local index manifest file. Defaults to ~/.hdsp_agent/index_manifest_<collection>.json"
+    )
+
+    def get_manifest_path(self, collection_name: str) -> str:
+        """Get resolved manifest path with environment variable support"""
+        if self.manifest_path:
+            return os.path.expanduser(self.manifest_path)
+        # Check environment variable
+        env_path = os.environ.get("HDSP_RAG_MANIFEST_PATH")
+        if env_path:
+            return os.path.expanduser(env_path)
+        # Default path (one manifest per collection)
+        return os.path.expanduser(f"~/.hdsp_agent/index_manifest_{collection_name}.json")
+
+
+class HybridSearchConfig(BaseModel):
+    """Dense + BM25 hybrid retrieval configuration"""
+
+    enabled: bool = Field(
+        default=True,
+        description="Fuse BM25 lexical matches with dense results"
+    )
+    candidates: int = Field(
+        default=20,
+        description="Candidates taken from each retriever before fusion"
+    )
+    rrf_k: int = Field(
+        default=60,
+        description="Reciprocal rank fusion constant"
+    )
+    bm25_k1: float = Field(
+        default=1.5,
+        description="BM25 term frequency saturation"
+    )
+    bm25_b: float = Field(
+        default=0.75,
+        description="BM25 document length normalization"
+    )
+    min_bm25_score: float = Field(
+        default=0.3,
+        description="Normalized BM25 score a match below the dense threshold needs"
+    )
+
+    def is_enabled(self) -> bool:
+        """Check if hybrid search is enabled (env override)"""
+        env_enabled = os.environ.get("HDSP_RAG_HYBRID", "").lower()
+        if env_enabled in ("false", "0", "no"):
+            return False
+        if env_enabled in ("true", "1", "yes"):
+            return True
+        return self.enabled
+
+
 class RAGConfig(BaseModel):
     """Main RAG system configuration"""
 
@@ -159,9 +382,12 @@ class RAGConfig(BaseModel):
         description="Path to knowledge base. Defaults to built-in libraries/"
     )
     qdrant: QdrantConfig = Field(default_factory=QdrantConfig)
+    vector_store: VectorStoreConfig = Field(default_factory=VectorStoreConfig)
     embedding: EmbeddingConfig = Field(default_factory=EmbeddingConfig)
     chunking: ChunkingConfig = Field(default_factory=ChunkingConfig)
     watchdog: WatchdogConfig = Field(default_factory=WatchdogConfig)
+    indexing: IndexingConfig = Field(default_factory=IndexingConfig)
+    hybrid: HybridSearchConfig = Field(default_factory=HybridSearchConfig)
 
     # Retrieval settings
     top_k: int = Field(
@@ -315,6 +541,8 @@ class ChunkDebugInfo(BaseModel):
     rank: int  # Ranking
     metadata: Dict[str, Any]  # source, section etc.
     passed_threshold: bool  # Whether threshold passed
+    bm25_score: Optional[float] = None  # Lexical score (hybrid search only)
+    fused_score: Optional[float] = None  # Reciprocal rank fusion score
 
 
 class LibraryDetectionDebug(BaseModel):
@@ -359,7 +587,8 @@ class DebugSearchResponse(BaseModel):
     chunks: List[ChunkDebugInfo]
     total_candidates: int
     total_passed_threshold: int
-    search_ms: float  # Vector search time in milliseconds
+    search_ms: float  # Total search time in milliseconds
+    timings: Dict[str, float] = {}  # Per-stage milliseconds (embed, dense, ...)
     formatted_context: str
     context_char_count: int
     estimated_context_tokens: int
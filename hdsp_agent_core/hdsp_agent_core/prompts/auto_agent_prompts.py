@@ -11,10 +11,19 @@ Tool Calling 구조:
 - list_files: 디렉토리 조회
 - execute_command: 셸 명령 실행 (위험 명령만 승인)
 - search_files: 파일 내용 검색
+
+프롬프트 레이아웃:
+- 계획/구조화 계획/재계획/Reflection/에러 분석 프롬프트는 *_PREFIX(정적 지시,
+  규칙, 출력 형식) + *_SUFFIX(요청별 컨텍스트)로 구성
+- 렌더링된 정적 prefix(*_STATIC)는 llm.prompt_cache에 등록되어 provider
+  prefix 캐싱(Gemini cachedContents, vLLM/OpenAI 자동 캐싱)에 사용됨
 """
 
 import os
 
+from hdsp_agent_core.llm.prompt_cache import register_static_prefix
+from hdsp_agent_core.llm.token_counter import get_token_counter
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Nexus URL 설정 (보안을 위해 외부 파일에서 읽기)
 # ═══════════════════════════════════════════════════════════════════════════
@@ -49,7 +58,8 @@ PIP_INDEX_OPTION = _get_pip_index_option()
 # 실행 계획 생성 프롬프트
 # ═══════════════════════════════════════════════════════════════════════════
 
-PLAN_GENERATION_PROMPT = """Jupyter 노트북 Python 전문가. 단계별 실행 계획을 JSON으로 생성.
+# 정적 prefix (지시/규칙/출력 형식)
+PLAN_GENERATION_PREFIX = """Jupyter 노트북 Python 전문가. 단계별 실행 계획을 JSON으로 생성.
 
 ## 도구
 ### 기본 도구 (셀 작업)
@@ -69,15 +79,6 @@ PLAN_GENERATION_PROMPT = """Jupyter 노트북 Python 전문가. 단계별 실행
 2. ⛔ **기존 변수(df 등)에 의존 금지! 새 셀은 독립적으로 실행 가능해야 함**
 3. ✅ **데이터 로딩/정의를 포함한 완전한 코드 작성** (기존 코드는 참고용)
 
-## 노트북 현황 (참고용 - 기존 변수 사용 금지!)
-- 셀: {cell_count}개 | 라이브러리: {imported_libraries} | 변수: {defined_variables}
-- 최근 셀 (참고용):
-{recent_cells}
-
-## 환경: {available_libraries}
-
-## 요청: {request}
-
 ## 규칙
 1. 최대 10단계, 마지막은 final_answer
 2. 한글 설명, 한자 금지
@@ -96,8 +97,24 @@ plt.rcParams['axes.unicode_minus'] = False
 ```json
 {{"reasoning":"이유","plan":{{"totalSteps":N,"steps":[{{"stepNumber":1,"description":"설명","toolCalls":[{{"tool":"jupyter_cell","parameters":{{"code":"코드"}}}}],"dependencies":[]}}]}}}}
 ```
+JSON만 출력.
+
+"""
+
+# 가변 suffix (요청별 컨텍스트)
+PLAN_GENERATION_SUFFIX = """## 노트북 현황 (참고용 - 기존 변수 사용 금지!)
+- 셀: {cell_count}개 | 라이브러리: {imported_libraries} | 변수: {defined_variables}
+- 최근 셀 (참고용):
+{recent_cells}
+
+## 환경: {available_libraries}
+
+## 요청: {request}
+
 JSON만 출력."""
 
+PLAN_GENERATION_PROMPT = PLAN_GENERATION_PREFIX + PLAN_GENERATION_SUFFIX
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 코드 생성 프롬프트 (단일 셀)
@@ -229,43 +246,8 @@ JSON만 출력하세요."""
 # Adaptive Replanning 프롬프트 (계획 수정)
 # ═══════════════════════════════════════════════════════════════════════════
 
-ADAPTIVE_REPLAN_PROMPT = """에러가 발생했습니다. 출력과 에러를 분석하여 계획을 수정하거나 새로운 접근법을 제시하세요.
-
-## 원래 요청
-
-{original_request}
-
-## 현재까지 실행된 단계
-
-{executed_steps}
-
-## 실패한 단계
-
-- 단계 번호: {failed_step_number}
-- 설명: {failed_step_description}
-- 실행된 코드:
-```python
-{failed_code}
-```
-
-## 에러 정보
-
-- 오류 유형: {error_type}
-- 오류 메시지: {error_message}
-- 트레이스백:
-```
-{traceback}
-```
-
-## 실행 출력 (stdout/stderr)
-
-```
-{execution_output}
-```
-
-## 현재 환경 정보
-
-- **설치된 패키지**: {available_libraries}
+# 정적 prefix (지시/규칙/출력 형식)
+ADAPTIVE_REPLAN_PREFIX = """에러가 발생했습니다. 출력과 에러를 분석하여 계획을 수정하거나 새로운 접근법을 제시하세요.
 
 ## ⚠️ 필수 규칙 (MANDATORY RULES - 반드시 따를 것!)
 
@@ -339,7 +321,7 @@ ADAPTIVE_REPLAN_PROMPT = """에러가 발생했습니다. 출력과 에러를 
 1. **근본 원인 분석**: 단순 코드 버그인가, 접근법 자체의 문제인가?
 2. **필요한 선행 작업**: 누락된 import, 데이터 변환, 환경 설정이 있는가?
 3. **대안적 접근법**: 다른 라이브러리나 방법을 사용해야 하는가?
-4. **⚠️ 이전 실행된 코드 참고**: 위의 "현재까지 실행된 단계"에 표시된 코드를 반드시 확인하세요!
+4. **⚠️ 이전 실행된 코드 참고**: 아래 "현재까지 실행된 단계"에 표시된 코드를 반드시 확인하세요!
    - 예: 이전 단계에서 데이터프레임 컬럼명을 소문자로 변환했다면, 현재 단계에서도 소문자로 접근해야 합니다
    - 예: 이전 단계에서 특정 변수를 정의했다면, 그 변수명을 그대로 사용해야 합니다
    - 데이터 전처리, 변수 변환 등 이전 컨텍스트를 유지하세요
@@ -545,14 +527,58 @@ cross_tab = pd.crosstab(sample['Sex'], sample['Survived'])
 }}
 ```
 
-위 형식으로만 응답하세요. 다른 텍스트는 절대 포함하지 마세요!"""
+위 형식으로만 응답하세요. 다른 텍스트는 절대 포함하지 마세요!
+
+"""
+
+# 가변 suffix (요청별 컨텍스트)
+ADAPTIVE_REPLAN_SUFFIX = """## 원래 요청
+
+{original_request}
+
+## 현재까지 실행된 단계
+
+{executed_steps}
+
+## 실패한 단계
+
+- 단계 번호: {failed_step_number}
+- 설명: {failed_step_description}
+- 실행된 코드:
+```python
+{failed_code}
+```
+
+## 에러 정보
+
+- 오류 유형: {error_type}
+- 오류 메시지: {error_message}
+- 트레이스백:
+```
+{traceback}
+```
+
+## 실행 출력 (stdout/stderr)
+
+```
+{execution_output}
+```
+
+## 현재 환경 정보
+
+- **설치된 패키지**: {available_libraries}
+
+위 출력 형식의 JSON만 출력하세요."""
+
+ADAPTIVE_REPLAN_PROMPT = ADAPTIVE_REPLAN_PREFIX + ADAPTIVE_REPLAN_SUFFIX
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 구조화된 계획 생성 프롬프트 (Enhanced Planning with Checkpoints)
 # ═══════════════════════════════════════════════════════════════════════════
 
-STRUCTURED_PLAN_PROMPT = """당신은 Jupyter 노트북을 위한 Python 코드 전문가입니다.
+# 정적 prefix (지시/규칙/출력 형식)
+STRUCTURED_PLAN_PREFIX = """당신은 Jupyter 노트북을 위한 Python 코드 전문가입니다.
 사용자의 요청을 체계적으로 분석하고, 검증 가능한 단계별 실행 계획을 생성하세요.
 
 ## 분석 프레임워크
@@ -616,20 +642,6 @@ STRUCTURED_PLAN_PROMPT = """당신은 Jupyter 노트북을 위한 Python 코드
 - 실행 순서가 명확해짐
 - 롤백이 쉬움 (불필요한 셀만 삭제하면 됨)
 
-## 노트북 컨텍스트 (참고용 - 기존 코드를 수정하지 마세요!)
-
-- 셀 개수: {cell_count}
-- 임포트된 라이브러리: {imported_libraries}
-- 정의된 변수: {defined_variables}
-- 최근 셀 내용 (참고용):
-{recent_cells}
-
-**참고**: 위 기존 셀들은 수정하지 않습니다. 필요한 코드는 새 셀로 추가하세요.
-
-## 사용자 요청
-
-{request}
-
 ## ⚠️ 초기 설정 (첫 번째 코드 셀에 포함)
 
 **먼저 "설치된 패키지" 목록을 확인하세요!**
@@ -751,44 +763,36 @@ else:
 }}
 ```
 
-JSON만 출력하세요. 다른 텍스트 없이."""
+JSON만 출력하세요. 다른 텍스트 없이.
 
+"""
 
-# ═══════════════════════════════════════════════════════════════════════════
-# Reflection 프롬프트 (실행 결과 분석 및 적응적 조정)
-# ═══════════════════════════════════════════════════════════════════════════
+# 가변 suffix (요청별 컨텍스트)
+STRUCTURED_PLAN_SUFFIX = """## 노트북 컨텍스트 (참고용 - 기존 코드를 수정하지 마세요!)
 
-REFLECTION_PROMPT = """실행 결과를 분석하고 다음 단계에 대한 조정을 제안하세요.
+- 셀 개수: {cell_count}
+- 임포트된 라이브러리: {imported_libraries}
+- 정의된 변수: {defined_variables}
+- 최근 셀 내용 (참고용):
+{recent_cells}
 
-## 실행된 단계
+**참고**: 위 기존 셀들은 수정하지 않습니다. 필요한 코드는 새 셀로 추가하세요.
 
-- 단계 번호: {step_number}
-- 설명: {step_description}
-- 실행된 코드:
-```python
-{executed_code}
-```
+## 사용자 요청
 
-## 실행 결과
+{request}
 
-- 상태: {execution_status}
-- 출력:
-```
-{execution_output}
-```
-- 오류 (있는 경우):
-```
-{error_message}
-```
+JSON만 출력하세요. 다른 텍스트 없이."""
 
-## 체크포인트 기준
+STRUCTURED_PLAN_PROMPT = STRUCTURED_PLAN_PREFIX + STRUCTURED_PLAN_SUFFIX
 
-- 예상 결과: {expected_outcome}
-- 검증 기준: {validation_criteria}
 
-## 남은 단계
+# ═══════════════════════════════════════════════════════════════════════════
+# Reflection 프롬프트 (실행 결과 분석 및 적응적 조정)
+# ═══════════════════════════════════════════════════════════════════════════
 
-{remaining_steps}
+# 정적 prefix (지시/규칙/출력 형식)
+REFLECTION_PREFIX = """실행 결과를 분석하고 다음 단계에 대한 조정을 제안하세요.
 
 ## 분석 요청
 
@@ -831,8 +835,45 @@ REFLECTION_PROMPT = """실행 결과를 분석하고 다음 단계에 대한 조
 }}
 ```
 
+JSON만 출력하세요.
+
+"""
+
+# 가변 suffix (요청별 컨텍스트)
+REFLECTION_SUFFIX = """## 실행된 단계
+
+- 단계 번호: {step_number}
+- 설명: {step_description}
+- 실행된 코드:
+```python
+{executed_code}
+```
+
+## 실행 결과
+
+- 상태: {execution_status}
+- 출력:
+```
+{execution_output}
+```
+- 오류 (있는 경우):
+```
+{error_message}
+```
+
+## 체크포인트 기준
+
+- 예상 결과: {expected_outcome}
+- 검증 기준: {validation_criteria}
+
+## 남은 단계
+
+{remaining_steps}
+
 JSON만 출력하세요."""
 
+REFLECTION_PROMPT = REFLECTION_PREFIX + REFLECTION_SUFFIX
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 최종 답변 생성 프롬프트
@@ -870,6 +911,18 @@ FINAL_ANSWER_PROMPT = """작업이 완료되었습니다. 결과를 요약해주
 # ═══════════════════════════════════════════════════════════════════════════
 
 
+# 프롬프트 섹션별 토큰 예산 (문자 수 대신 토큰 카운터 기준)
+LIBRARY_KNOWLEDGE_MAX_TOKENS = 600
+ERROR_MESSAGE_MAX_TOKENS = 150
+TRACEBACK_MAX_TOKENS = 400
+PREVIOUS_CODE_MAX_TOKENS = 200
+
+
+def _fit_tokens(text: str, max_tokens: int, suffix: str = "") -> str:
+    """토큰 예산에 맞게 텍스트 앞부분만 유지"""
+    return get_token_counter().truncate(text, max_tokens, suffix)
+
+
 def format_plan_prompt(
     request: str,
     cell_count: int,
@@ -899,8 +952,8 @@ def format_plan_prompt(
             else f"\n[셀 {cell_index}]: {source}\n"
         )
 
-    # 기본 프롬프트 생성
-    base_prompt = PLAN_GENERATION_PROMPT.format(
+    # 요청별 suffix 생성 (정적 prefix 뒤에 붙음)
+    suffix = PLAN_GENERATION_SUFFIX.format(
         request=request,
         cell_count=cell_count,
         imported_libraries=", ".join(imported_libraries)
@@ -914,12 +967,12 @@ def format_plan_prompt(
     )
 
     # 지식 주입: RAG primary, KnowledgeBase fallback
+    # prefix 캐싱을 위해 정적 prefix와 suffix 사이에 삽입
+    knowledge = ""
     if rag_context:
         # RAG 결과가 있으면 RAG 사용 (시맨틱 검색 기반)
         print(f"[RAG] 컨텍스트 주입됨: {len(rag_context)} chars")
-        base_prompt = base_prompt.replace(
-            "## JSON 출력", f"{rag_context}\n\n## JSON 출력"
-        )
+        knowledge = rag_context
     elif detected_libraries:
         # RAG가 없으면 KnowledgeBase fallback (전체 API 가이드)
         from hdsp_agent_core.knowledge.loader import get_knowledge_loader
@@ -930,14 +983,13 @@ def format_plan_prompt(
         )
 
         if library_knowledge:
-            if len(library_knowledge) > 2000:
-                library_knowledge = library_knowledge[:2000] + "\n... (생략)"
+            library_knowledge = _fit_tokens(
+                library_knowledge, LIBRARY_KNOWLEDGE_MAX_TOKENS, "\n... (생략)"
+            )
             print(
                 f"[KnowledgeBase Fallback] 라이브러리 지식 주입됨: {detected_libraries} ({len(library_knowledge)} chars)"
             )
-            base_prompt = base_prompt.replace(
-                "## JSON 출력", f"{library_knowledge}\n\n## JSON 출력"
-            )
+            knowledge = library_knowledge
         else:
             print(
                 f"[KnowledgeBase] 주입할 라이브러리 지식 없음. detected={detected_libraries}"
@@ -945,7 +997,9 @@ def format_plan_prompt(
     else:
         print("[Knowledge] RAG 컨텍스트 없음, 감지된 라이브러리 없음")
 
-    return base_prompt
+    if knowledge:
+        return f"{PLAN_GENERATION_STATIC}{knowledge}\n\n{suffix}"
+    return PLAN_GENERATION_STATIC + suffix
 
 
 def format_refine_prompt(
@@ -1057,7 +1111,7 @@ def format_replan_prompt(
         failed_code=failed_code,
         error_type=error_type,  # Python 예외 이름 (ModuleNotFoundError 등)
         error_message=error_info.get("message", "Unknown error"),
-        traceback=traceback_str,
+        traceback=_fit_tokens(traceback_str, TRACEBACK_MAX_TOKENS, "\n... (생략)"),
         execution_output=execution_output if execution_output else "없음",
         available_libraries=", ".join(available_libraries)
         if available_libraries
@@ -1140,21 +1194,8 @@ def format_reflection_prompt(
 # LLM Fallback 에러 분석 프롬프트 (패턴 매칭 실패 시 사용)
 # ═══════════════════════════════════════════════════════════════════════════
 
-ERROR_ANALYSIS_PROMPT = """에러를 분석하고 복구 전략을 결정하세요.
-
-## 에러 정보
-
-- 오류 유형: {error_type}
-- 오류 메시지: {error_message}
-- 트레이스백:
-```
-{traceback}
-```
-
-## 이전 시도 횟수: {previous_attempts}
-
-## 이전 코드 (있는 경우)
-{previous_codes}
+# 정적 prefix (지시/규칙/출력 형식)
+ERROR_ANALYSIS_PREFIX = """에러를 분석하고 복구 전략을 결정하세요.
 
 ## 복구 전략 선택지
 
@@ -1217,8 +1258,29 @@ ERROR_ANALYSIS_PROMPT = """에러를 분석하고 복구 전략을 결정하세
 }}
 ```
 
+JSON만 출력하세요.
+
+"""
+
+# 가변 suffix (요청별 컨텍스트)
+ERROR_ANALYSIS_SUFFIX = """## 에러 정보
+
+- 오류 유형: {error_type}
+- 오류 메시지: {error_message}
+- 트레이스백:
+```
+{traceback}
+```
+
+## 이전 시도 횟수: {previous_attempts}
+
+## 이전 코드 (있는 경우)
+{previous_codes}
+
 JSON만 출력하세요."""
 
+ERROR_ANALYSIS_PROMPT = ERROR_ANALYSIS_PREFIX + ERROR_ANALYSIS_SUFFIX
+
 
 def format_error_analysis_prompt(
     error_type: str,
@@ -1232,14 +1294,17 @@ def format_error_analysis_prompt(
     codes_text = ""
     if previous_codes:
         for i, code in enumerate(previous_codes[-3:], 1):  # 최근 3개만
-            codes_text += f"\n### 시도 {i}:\n```python\n{code[:500]}\n```\n"
+            code = _fit_tokens(code, PREVIOUS_CODE_MAX_TOKENS)
+            codes_text += f"\n### 시도 {i}:\n```python\n{code}\n```\n"
     else:
         codes_text = "없음"
 
     return ERROR_ANALYSIS_PROMPT.format(
         error_type=error_type,
-        error_message=error_message[:500] if error_message else "없음",
-        traceback=traceback[:1000] if traceback else "없음",
+        error_message=_fit_tokens(error_message, ERROR_MESSAGE_MAX_TOKENS)
+        if error_message
+        else "없음",
+        traceback=_fit_tokens(traceback, TRACEBACK_MAX_TOKENS) if traceback else "없음",
         previous_attempts=previous_attempts,
         previous_codes=codes_text,
     )
@@ -1252,9 +1317,37 @@ def format_error_analysis_prompt(
 # 모든 프롬프트에서 {PIP_INDEX_OPTION}을 실제 값으로 치환
 # - 로컬 환경: 빈 문자열 → `!pip install --timeout 180 패키지명`
 # - 내부망: "--index-url <url>" → `!pip install --index-url <url> --timeout 180 패키지명`
-PLAN_GENERATION_PROMPT = PLAN_GENERATION_PROMPT.replace(
+PLAN_GENERATION_PREFIX = PLAN_GENERATION_PREFIX.replace(
     "{PIP_INDEX_OPTION}", PIP_INDEX_OPTION
 )
-ADAPTIVE_REPLAN_PROMPT = ADAPTIVE_REPLAN_PROMPT.replace(
+STRUCTURED_PLAN_PREFIX = STRUCTURED_PLAN_PREFIX.replace(
     "{PIP_INDEX_OPTION}", PIP_INDEX_OPTION
 )
+ADAPTIVE_REPLAN_PREFIX = ADAPTIVE_REPLAN_PREFIX.replace(
+    "{PIP_INDEX_OPTION}", PIP_INDEX_OPTION
+)
+PLAN_GENERATION_PROMPT = PLAN_GENERATION_PREFIX + PLAN_GENERATION_SUFFIX
+STRUCTURED_PLAN_PROMPT = STRUCTURED_PLAN_PREFIX + STRUCTURED_PLAN_SUFFIX
+ADAPTIVE_REPLAN_PROMPT = ADAPTIVE_REPLAN_PREFIX + ADAPTIVE_REPLAN_SUFFIX
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 정적 prefix 등록: 포맷된 프롬프트는 항상 렌더링된 prefix로 시작
+# - Gemini: LLMService가 prefix를 cachedContents로 등록하고 핸들 재사용
+# - vLLM/OpenAI: 동일 prefix → 서버측 자동 prefix 캐싱
+# ═══════════════════════════════════════════════════════════════════════════
+
+PLAN_GENERATION_STATIC = PLAN_GENERATION_PREFIX.format()
+STRUCTURED_PLAN_STATIC = STRUCTURED_PLAN_PREFIX.format()
+ADAPTIVE_REPLAN_STATIC = ADAPTIVE_REPLAN_PREFIX.format()
+REFLECTION_STATIC = REFLECTION_PREFIX.format()
+ERROR_ANALYSIS_STATIC = ERROR_ANALYSIS_PREFIX.format()
+
+for _static in (
+    PLAN_GENERATION_STATIC,
+    STRUCTURED_PLAN_STATIC,
+    ADAPTIVE_REPLAN_STATIC,
+    REFLECTION_STATIC,
+    ERROR_ANALYSIS_STATIC,
+):
+    register_static_prefix(_static)
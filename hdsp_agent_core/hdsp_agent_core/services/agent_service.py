@@ -57,6 +57,11 @@ class EmbeddedAgentService(IAgentService):
                 "apiKey": llm_config.gemini.apiKey,
                 "model": llm_config.gemini.model,
             }
+            # Request-supplied backup keys are the only ones hedging may use
+            if llm_config.gemini.apiKeys:
+                config["gemini"]["apiKeys"] = llm_config.gemini.apiKeys
+            if llm_config.gemini.hedge is not None:
+                config["gemini"]["hedge"] = llm_config.gemini.hedge
 
         if llm_config.openai:
             config["openai"] = {
@@ -73,11 +78,13 @@ class EmbeddedAgentService(IAgentService):
 
         return config
 
-    async def _call_llm(self, prompt: str, llm_config=None) -> str:
-        """Call LLM with prompt"""
+    async def _call_llm(
+        self, prompt: str, llm_config=None, cache: bool = False, cache_if=None
+    ) -> str:
+        """Call LLM with prompt (with cache=True, only responses cache_if accepts are stored)"""
         config = self._build_llm_config(llm_config)
         llm_service = LLMService(config)
-        return await llm_service.generate_response(prompt)
+        return await llm_service.generate_response(prompt, cache=cache, cache_if=cache_if)
 
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """Extract JSON from LLM response"""
@@ -102,6 +109,30 @@ class EmbeddedAgentService(IAgentService):
 
         return {}
 
+    def _is_plan_response(self, response: str) -> bool:
+        """Whether a plan response parses (only those are cached)"""
+        return "plan" in self._parse_json_response(response)
+
+    def _parse_refine_response(self, response: str) -> Dict[str, Any]:
+        """Refine result from JSON, else from a bare code block ({} if neither)"""
+        refine_data = self._parse_json_response(response)
+        if refine_data and "toolCalls" in refine_data:
+            return refine_data
+
+        # Try extracting code directly
+        code_match = re.search(r"```(?:python)?\s*([\s\S]*?)\s*```", response)
+        if code_match:
+            return {
+                "toolCalls": [
+                    {
+                        "tool": "jupyter_cell",
+                        "parameters": {"code": code_match.group(1).strip()},
+                    }
+                ],
+                "reasoning": "",
+            }
+        return {}
+
     def _sanitize_tool_calls(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Remove markdown code blocks from tool call code parameters"""
 
@@ -201,7 +232,9 @@ class EmbeddedAgentService(IAgentService):
         )
 
         # Call LLM
-        response = await self._call_llm(prompt, request.llmConfig)
+        response = await self._call_llm(
+            prompt, request.llmConfig, cache=True, cache_if=self._is_plan_response
+        )
         logger.info(f"LLM response length: {len(response)}")
 
         # Parse response
@@ -253,26 +286,18 @@ class EmbeddedAgentService(IAgentService):
         )
 
         # Call LLM
-        response = await self._call_llm(prompt, request.llmConfig)
+        response = await self._call_llm(
+            prompt,
+            request.llmConfig,
+            cache=True,
+            cache_if=lambda r: bool(self._parse_refine_response(r)),
+        )
 
         # Parse response
-        refine_data = self._parse_json_response(response)
+        refine_data = self._parse_refine_response(response)
 
-        if not refine_data or "toolCalls" not in refine_data:
-            # Try extracting code directly
-            code_match = re.search(r"```(?:python)?\s*([\s\S]*?)\s*```", response)
-            if code_match:
-                refine_data = {
-                    "toolCalls": [
-                        {
-                            "tool": "jupyter_cell",
-                            "parameters": {"code": code_match.group(1).strip()},
-                        }
-                    ],
-                    "reasoning": "",
-                }
-            else:
-                raise ValueError("Failed to generate refined code")
+        if not refine_data:
+            raise ValueError("Failed to generate refined code")
 
         refine_data = self._sanitize_tool_calls(refine_data)
 
@@ -100,3 +100,118 @@ def sample_search_request():
         query="pandas dataframe operations",
         top_k=5,
     )
+
+
+@pytest.fixture
+async def llm_stub_server():
+    """
+    Local OpenAI-compatible stub server for LLM HTTP tests.
+
+    Yields a dict with the endpoint URL, received requests and the
+    client (host, port) pairs seen, so tests can assert connection reuse.
+    Set state["delay"] to slow responses down and state["status"] to return
+    an error status; requests with "stream": true get an SSE response of
+    state["stream_chunks"].
+
+    Gemini generateContent/streamGenerateContent and cachedContents are
+    served under state["gemini_base"]; requests land in
+    state["gemini_requests"] and created caches in state["cached_contents"].
+    Unknown cachedContent names get a 404.
+    """
+    import asyncio
+    import json
+
+    from aiohttp import web
+
+    from hdsp_agent_core.llm.circuit_breaker import reset_circuit_breakers
+
+    # Breaker state is per endpoint/model; start each stub from closed
+    reset_circuit_breakers()
+
+    state = {
+        "requests": [],
+        "peers": set(),
+        "delay": 0.0,
+        "status": 200,
+        "stream_chunks": ["stub ", "response"],
+        "gemini_requests": [],
+        "cached_contents": {},
+    }
+
+    async def chat_completions(request):
+        body = await request.json()
+        state["requests"].append(body)
+        state["peers"].add(request.transport.get_extra_info("peername"))
+        if state["delay"]:
+            await asyncio.sleep(state["delay"])
+        if state["status"] != 200:
+            return web.Response(status=state["status"], text="stub error")
+        if body.get("stream"):
+            response = web.StreamResponse(
+                headers={"Content-Type": "text/event-stream"}
+            )
+            await response.prepare(request)
+            for chunk in state["stream_chunks"]:
+                data = {"choices": [{"delta": {"content": chunk}}]}
+                await response.write(f"data: {json.dumps(data)}\n\n".encode())
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+            return response
+        return web.json_response(
+            {
+                "choices": [{"message": {"content": "stub response"}}],
+                "usage": {"prompt_tokens": 7, "completion_tokens": 2},
+            }
+        )
+
+    async def gemini_cached_contents(request):
+        body = await request.json()
+        name = f"cachedContents/stub-{len(state['cached_contents']) + 1}"
+        state["cached_contents"][name] = body
+        return web.json_response({"name": name, "model": body.get("model")})
+
+    async def gemini_generate(request):
+        body = await request.json()
+        state["gemini_requests"].append(body)
+        cached = body.get("cachedContent")
+        if cached and cached not in state["cached_contents"]:
+            return web.Response(status=404, text="cached content not found")
+        if state["status"] != 200:
+            return web.Response(status=state["status"], text="stub error")
+        if request.match_info["action"].endswith(":streamGenerateContent"):
+            response = web.StreamResponse(
+                headers={"Content-Type": "text/event-stream"}
+            )
+            await response.prepare(request)
+            for chunk in state["stream_chunks"]:
+                data = {"candidates": [{"content": {"parts": [{"text": chunk}]}}]}
+                await response.write(f"data: {json.dumps(data)}\n\n".encode())
+            await response.write_eof()
+            return response
+        return web.json_response(
+            {
+                "candidates": [
+                    {
+                        "content": {"parts": [{"text": "stub response"}]},
+                        "finishReason": "STOP",
+                    }
+                ]
+            }
+        )
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/v1beta/cachedContents", gemini_cached_contents)
+    app.router.add_post("/v1beta/models/{action}", gemini_generate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    state["endpoint"] = f"http://127.0.0.1:{port}"
+    state["gemini_base"] = f"{state['endpoint']}/v1beta"
+    try:
+        yield state
+    finally:
+        await runner.cleanup()
+        reset_circuit_breakers()
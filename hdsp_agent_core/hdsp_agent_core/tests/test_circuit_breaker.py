@@ -0,0 +1,159 @@
+"""
+HDSP Agent Core - Circuit Breaker Tests
+
+Tests for breaker state transitions, the retry budget and LLMService
+fail-fast behaviour.
+"""
+
+import time
+
+import pytest
+
+from hdsp_agent_core.llm.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    BreakerConfig,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    get_circuit_breaker,
+    get_retry_budget,
+)
+
+
+def _breaker(**kwargs):
+    settings = {"failure_threshold": 2, "open_seconds": 0.05}
+    settings.update(kwargs)
+    return CircuitBreaker("test", BreakerConfig(**settings))
+
+
+class TestCircuitBreaker:
+    """Tests for closed/open/half-open transitions"""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the circuit opens at the threshold and rejects calls"""
+        breaker = _breaker()
+        breaker.record_failure()
+        breaker.check()
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+
+    def test_success_resets_count(self):
+        """Test a success between failures keeps the circuit closed"""
+        breaker = _breaker()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == STATE_CLOSED
+
+    def test_half_open_single_probe(self):
+        """Test one probe after the open period; its success closes"""
+        breaker = _breaker(failure_threshold=1)
+        breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.state == STATE_HALF_OPEN
+        breaker.check()
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+        breaker.record_success()
+        assert breaker.state == STATE_CLOSED
+
+    def test_failed_probe_reopens(self):
+        """Test a failed probe re-opens immediately"""
+        breaker = _breaker(failure_threshold=3)
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.06)
+        breaker.check()
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+
+    def test_release_frees_probe(self):
+        """Test a neutral outcome (429) lets the next probe through"""
+        breaker = _breaker(failure_threshold=1)
+        breaker.record_failure()
+        time.sleep(0.06)
+        breaker.check()
+        breaker.release()
+        breaker.check()
+
+
+class TestRetryBudget:
+    """Tests for the global retry budget"""
+
+    def test_floor_then_ratio(self):
+        """Test min retries are always allowed, then ratio x requests"""
+        budget = RetryBudget(BreakerConfig(retry_ratio=0.5, retry_min=1))
+        assert budget.try_spend()
+        assert not budget.try_spend()
+        for _ in range(4):
+            budget.record_request()
+        assert budget.try_spend()  # 2 allowed for 4 requests
+        assert not budget.try_spend()
+        assert budget.get_stats()["denied"] == 2
+
+    def test_window_expiry(self):
+        """Test spent retries leave the window"""
+        budget = RetryBudget(BreakerConfig(retry_min=1, retry_window=0.05))
+        assert budget.try_spend()
+        time.sleep(0.06)
+        assert budget.try_spend()
+
+
+class TestLLMServiceBreaker:
+    """Tests for LLMService against the local stub server"""
+
+    async def test_open_circuit_fails_fast(self, monkeypatch, llm_stub_server):
+        """Test calls stop reaching a failing endpoint once the circuit opens"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.service import LLMService
+
+        monkeypatch.setenv("HDSP_LLM_BREAKER_FAILURE_THRESHOLD", "2")
+        llm_stub_server["status"] = 500
+        service = LLMService(
+            {"provider": "vllm", "vllm": {"endpoint": llm_stub_server["endpoint"]}}
+        )
+        for prompt in ("a", "b"):
+            with pytest.raises(Exception, match="API error"):
+                await service.generate_response(prompt)
+        with pytest.raises(CircuitOpenError):
+            await service.generate_response("c")
+        assert len(llm_stub_server["requests"]) == 2
+
+        # Recovery: after the open period one probe closes the circuit
+        breaker = get_circuit_breaker(
+            f"vllm:{llm_stub_server['endpoint']}/v1/chat/completions"
+        )
+        breaker._opened_at -= breaker._config.open_seconds
+        llm_stub_server["status"] = 200
+        assert await service.generate_response("d") == "stub response"
+        assert breaker.state == STATE_CLOSED
+        await close_http_pool()
+
+    async def test_exhausted_budget_skips_retry(self, monkeypatch, llm_stub_server):
+        """Test a 503 is not retried when the retry budget is spent"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.service import LLMService
+
+        monkeypatch.setenv("HDSP_LLM_RETRY_BUDGET_MIN", "0")
+        llm_stub_server["status"] = 503
+        service = LLMService(
+            {
+                "provider": "gemini",
+                "gemini": {
+                    "apiKey": "test-key",
+                    "model": "gemini-2.0-flash",
+                    "baseUrl": llm_stub_server["gemini_base"],
+                },
+            }
+        )
+        started = time.monotonic()
+        with pytest.raises(Exception, match="Server overloaded"):
+            await service.generate_response("overloaded")
+        assert time.monotonic() - started < 1  # no 5s backoff sleep
+        assert len(llm_stub_server["gemini_requests"]) == 1
+        assert get_retry_budget().get_stats()["denied"] >= 1
+        await close_http_pool()
@@ -0,0 +1,200 @@
+"""
+HDSP Agent Core - Adaptive Concurrency Tests
+
+Tests for the AIMD limiter and its LLMService integration.
+"""
+
+import asyncio
+
+import pytest
+
+from hdsp_agent_core.llm.concurrency import (
+    AdaptiveLimiter,
+    LimiterConfig,
+    LimiterRegistry,
+    reset_limiter_registry,
+)
+
+
+@pytest.fixture
+def reset_registry():
+    """Reset LimiterRegistry singleton around each test"""
+    reset_limiter_registry()
+    yield
+    reset_limiter_registry()
+
+
+def _limiter(initial=2, min_limit=1, max_limit=8):
+    return AdaptiveLimiter(
+        "test",
+        LimiterConfig(
+            initial_limit=initial, min_limit=min_limit, max_limit=max_limit
+        ),
+    )
+
+
+class TestAdaptiveLimiter:
+    """Tests for AIMD window and queueing"""
+
+    async def test_queues_beyond_limit(self):
+        """Test requests beyond the window wait in the queue"""
+        limiter = _limiter(initial=2)
+        peak = 0
+        active = 0
+
+        async def work():
+            nonlocal peak, active
+            async with limiter.slot():
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.02)
+                active -= 1
+
+        tasks = [asyncio.ensure_future(work()) for _ in range(6)]
+        await asyncio.sleep(0.005)
+        assert limiter.get_stats()["queue_depth"] == 4
+        await asyncio.gather(*tasks)
+        assert peak <= 3  # window grows additively while draining
+        assert limiter.get_stats()["in_flight"] == 0
+
+    async def test_additive_increase(self):
+        """Test successes grow the window by about one per window"""
+        limiter = _limiter(initial=2)
+        for _ in range(4):
+            async with limiter.slot():
+                pass
+        assert limiter.limit == 3
+
+    async def test_multiplicative_decrease(self):
+        """Test overload halves the window, bounded by min_limit"""
+        limiter = _limiter(initial=8)
+        async with limiter.slot() as slot:
+            slot.mark_overload()
+        assert limiter.limit == 4
+        stats = limiter.get_stats()
+        assert stats["overloads"] == 1
+        assert stats["decreases"] == 1
+
+    async def test_one_decrease_per_burst(self):
+        """Test concurrent overloads from one burst decrease only once"""
+        limiter = _limiter(initial=8)
+        slots = [await limiter.acquire() for _ in range(4)]
+        for slot in slots:
+            slot.mark_overload()
+        assert limiter.limit == 4
+        assert limiter.get_stats()["decreases"] == 1
+
+    async def test_exception_leaves_window(self):
+        """Test a failed request releases its slot without resizing"""
+        limiter = _limiter(initial=2)
+        with pytest.raises(RuntimeError):
+            async with limiter.slot():
+                raise RuntimeError("network")
+        stats = limiter.get_stats()
+        assert stats["limit"] == 2
+        assert stats["in_flight"] == 0
+
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test a cancelled waiter does not leak a slot"""
+        limiter = _limiter(initial=1)
+        held = await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await held.__aexit__(None, None, None)
+        stats = limiter.get_stats()
+        assert stats["in_flight"] == 0
+        assert stats["queue_depth"] == 0
+
+    async def test_disabled(self):
+        """Test disabled limiter never queues"""
+        limiter = AdaptiveLimiter("off", LimiterConfig(enabled=False))
+        slots = [await limiter.acquire() for _ in range(20)]
+        assert len(slots) == 20
+        assert limiter.get_stats()["queue_depth"] == 0
+
+
+class TestLimiterRegistry:
+    """Tests for per-provider/per-key limiters"""
+
+    def test_separate_limiters_per_key(self):
+        """Test provider + key select distinct limiters"""
+        registry = LimiterRegistry(LimiterConfig())
+        a = registry.get("gemini", "key-a")
+        assert registry.get("gemini", "key-a") is a
+        assert registry.get("gemini", "key-b") is not a
+        assert registry.get("openai", "key-a") is not a
+
+    def test_stats_do_not_expose_keys(self):
+        """Test limiter names use hashed key ids"""
+        registry = LimiterRegistry(LimiterConfig())
+        registry.get("gemini", "secret-api-key")
+        names = list(registry.get_stats())
+        assert names and all("secret-api-key" not in n for n in names)
+
+
+class TestLLMServiceLimiter:
+    """Tests for LLMService feedback into the limiter"""
+
+    async def test_429_shrinks_window(self, reset_registry, llm_stub_server):
+        """Test a 429 from the provider decreases the window"""
+        from hdsp_agent_core.llm.concurrency import get_limiter_registry
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.service import LLMService
+
+        llm_stub_server["status"] = 429
+        service = LLMService(
+            {"provider": "vllm", "vllm": {"endpoint": llm_stub_server["endpoint"]}}
+        )
+        with pytest.raises(Exception, match="API error"):
+            await service.generate_response("hi")
+
+        stats = next(iter(get_limiter_registry().get_stats().values()))
+        assert stats["overloads"] == 1
+        assert stats["limit"] < LimiterConfig().initial_limit
+        assert stats["in_flight"] == 0
+        await close_http_pool()
+
+    async def test_503_backoff_outside_attempt(
+        self, reset_registry, monkeypatch, llm_stub_server
+    ):
+        """Test a Gemini 503 attempt is finished before the backoff sleep"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.metrics import (
+            get_metrics_registry,
+            reset_metrics_registry,
+        )
+        from hdsp_agent_core.llm.service import LLMService
+
+        reset_metrics_registry()
+        real_sleep = asyncio.sleep
+        finished_before_sleep = []
+
+        async def fake_sleep(delay, *args, **kwargs):
+            if delay >= 5:  # the 503 backoff
+                calls = get_metrics_registry().recent_llm_calls()
+                finished_before_sleep.append([c.outcome for c in calls])
+                llm_stub_server["status"] = 200
+                delay = 0
+            await real_sleep(delay, *args, **kwargs)
+
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        llm_stub_server["status"] = 503
+        service = LLMService(
+            {
+                "provider": "gemini",
+                "gemini": {
+                    "apiKey": "test-key",
+                    "model": "gemini-2.0-flash",
+                    "baseUrl": llm_stub_server["gemini_base"],
+                },
+            }
+        )
+        assert await service.generate_response("hi") == "stub response"
+        # The first attempt's slot and tracker were closed before sleeping
+        assert finished_before_sleep == [["overloaded"]]
+        assert len(llm_stub_server["gemini_requests"]) == 2
+        await close_http_pool()
+        reset_metrics_registry()
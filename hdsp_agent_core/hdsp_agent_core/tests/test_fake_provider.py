@@ -0,0 +1,165 @@
+"""
+HDSP Agent Core - Fake LLM Provider Tests
+
+Tests for the offline "fake" provider used by the load-test harness.
+"""
+
+import json
+import time
+
+import pytest
+
+from hdsp_agent_core.llm.fake_provider import (
+    FakeLLMConfig,
+    FakeLLMProvider,
+    load_recorded_responses,
+    reset_fake_recordings,
+)
+
+CASSETTE = """interactions:
+- request:
+    body:
+      contents:
+      - parts:
+        - text: "PLAN PREFIX\\nrequest: titanic"
+    method: POST
+    uri: https://generativelanguage.googleapis.com/v1beta/models/m:generateContent
+  response:
+    body:
+      string: '{"candidates": [{"content": {"parts": [{"text": "recorded plan"}]}}]}'
+    status:
+      code: 200
+      message: OK
+- request:
+    body: '{"messages": [{"role": "user", "content": "ERROR PREFIX boom"}]}'
+    method: POST
+    uri: http://vllm/v1/chat/completions
+  response:
+    body:
+      string: '{"choices": [{"message": {"content": "recorded fix"}}]}'
+    status:
+      code: 200
+      message: OK
+"""
+
+
+@pytest.fixture(autouse=True)
+def clean_recordings():
+    reset_fake_recordings()
+    yield
+    reset_fake_recordings()
+
+
+def _provider(**kwargs):
+    settings = {"latency": 0.0, "ttft": 0.0, "tokens_per_second": 0.0}
+    settings.update(kwargs)
+    return FakeLLMProvider(FakeLLMConfig(**settings))
+
+
+class TestFakeResponses:
+    """Tests for templated and recorded responses"""
+
+    def test_default_template_is_deterministic_plan(self):
+        """Test the default response parses as a plan and depends on the prompt"""
+        provider = _provider()
+        first = provider.response_for("a")
+        assert first == provider.response_for("a")
+        assert first != provider.response_for("b")
+        data = json.loads(first)
+        assert data["plan"]["steps"][0]["toolCalls"][0]["tool"] == "jupyter_cell"
+        assert data["toolCalls"]
+
+    def test_custom_template(self):
+        """Test $prompt_tokens substitution"""
+        provider = _provider(response_template="tokens=$prompt_tokens")
+        assert provider.response_for("one two three") == "tokens=3"
+
+    def test_cassette_replay(self, tmp_path):
+        """Test exact and longest-prefix matches against VCR cassettes"""
+        (tmp_path / "case.yaml").write_text(CASSETTE, encoding="utf-8")
+        provider = _provider(responses_path=str(tmp_path))
+        exact = provider.response_for("PLAN PREFIX\nrequest: titanic")
+        assert exact == "recorded plan"
+        assert provider.response_for("PLAN PREFIX\nrequest: other") == exact
+        assert provider.response_for("ERROR PREFIX other") == "recorded fix"
+        assert len(load_recorded_responses(str(tmp_path))) == 2
+
+    def test_json_rules_and_fallback(self, tmp_path):
+        """Test substring rules; unmatched prompts fall back to the template"""
+        path = tmp_path / "rules.json"
+        path.write_text(json.dumps([{"match": "hello", "response": "hi"}]))
+        provider = _provider(responses_path=str(path), response_template="default")
+        assert provider.response_for("say hello") == "hi"
+        assert provider.response_for("xyz") == "default"
+
+    def test_config_section_overrides_env(self, monkeypatch):
+        """Test LLM config "fake" keys override HDSP_LLM_FAKE_* values"""
+        monkeypatch.setenv("HDSP_LLM_FAKE_TTFT", "1.5")
+        monkeypatch.setenv("HDSP_LLM_FAKE_LATENCY", "0.3")
+        config = FakeLLMConfig.from_config({"latency": 0, "tokensPerSecond": 10})
+        assert config.ttft == 1.5
+        assert config.latency == 0.0
+        assert config.tokens_per_second == 10.0
+
+
+class TestFakeTiming:
+    """Tests for modelled latency, TTFT and token rate"""
+
+    async def test_generate_waits_for_full_response(self):
+        """Test latency + ttft + tokens / rate"""
+        provider = _provider(
+            latency=0.02, ttft=0.03, tokens_per_second=200, response_template="a " * 10
+        )
+        started = time.monotonic()
+        await provider.generate("p")
+        assert time.monotonic() - started >= 0.1
+
+    async def test_stream_ttft_and_chunks(self):
+        """Test the first chunk arrives after TTFT and chunks re-join exactly"""
+        text = "one two  three\nfour five "
+        provider = _provider(
+            ttft=0.05, tokens_per_second=1000, chunk_tokens=2, response_template=text
+        )
+        started = time.monotonic()
+        chunks = []
+        first_at = None
+        async for chunk in provider.stream("p"):
+            if first_at is None:
+                first_at = time.monotonic() - started
+            chunks.append(chunk)
+        assert first_at >= 0.05
+        assert "".join(chunks) == text
+        assert len(chunks) == 3
+
+
+class TestLLMServiceFakeProvider:
+    """Tests for provider "fake" in LLMService"""
+
+    async def test_generate_and_stream(self):
+        """Test both call paths and metrics recording"""
+        from hdsp_agent_core.llm.metrics import (
+            get_metrics_registry,
+            reset_metrics_registry,
+        )
+        from hdsp_agent_core.llm.service import LLMService
+
+        reset_metrics_registry()
+        service = LLMService(
+            {
+                "provider": "fake",
+                "fake": {
+                    "latency": 0,
+                    "ttft": 0,
+                    "tokensPerSecond": 0,
+                    "response": "fake answer",
+                },
+            }
+        )
+        assert await service.generate_response("q") == "fake answer"
+        chunks = [c async for c in service.generate_response_stream("q2")]
+        assert "".join(chunks) == "fake answer"
+
+        calls = get_metrics_registry().recent_llm_calls()
+        assert [c.provider for c in calls] == ["fake", "fake"]
+        assert all(c.outcome == "success" for c in calls)
+        reset_metrics_registry()
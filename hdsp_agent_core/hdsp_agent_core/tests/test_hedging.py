@@ -0,0 +1,255 @@
+"""
+HDSP Agent Core - Request Hedging Tests
+
+Tests for percentile-based hedging and the Gemini hedged call path.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from hdsp_agent_core.llm.hedging import HedgeConfig, HedgePolicy
+
+
+def _policy(delay=0.02, **kwargs):
+    settings = {"enabled": True, "default_delay": delay, "min_delay": 0.0}
+    settings.update(kwargs)
+    return HedgePolicy("test", HedgeConfig(**settings))
+
+
+class TestHedgeDelay:
+    """Tests for the percentile delay"""
+
+    def test_default_until_enough_samples(self):
+        """Test default delay is used before min_samples"""
+        policy = _policy(delay=3.0, min_samples=5)
+        policy.record(0.1)
+        assert policy.delay() == 3.0
+
+    def test_percentile_of_samples(self):
+        """Test delay follows the configured percentile"""
+        policy = _policy(min_samples=5, percentile=90)
+        for value in range(1, 11):
+            policy.record(float(value))
+        assert policy.delay() == 9.0
+
+    def test_clamped(self):
+        """Test delay is clamped to max_delay"""
+        policy = HedgePolicy(
+            "test", HedgeConfig(min_samples=1, max_delay=2.0, min_delay=0.5)
+        )
+        policy.record(100.0)
+        assert policy.delay() == 2.0
+
+
+class TestHedgeRun:
+    """Tests for hedged execution"""
+
+    async def test_fast_primary_not_hedged(self):
+        """Test no backup is started when the first byte arrives in time"""
+        policy = _policy(delay=0.5)
+        backup = AsyncMock(return_value="backup")
+
+        async def primary(first_byte):
+            first_byte.set()
+            await asyncio.sleep(0.01)
+            return "primary"
+
+        assert await policy.run(primary, backup) == "primary"
+        backup.assert_not_called()
+        assert policy.get_stats()["hedged"] == 0
+        assert policy.get_stats()["samples"] == 1
+
+    async def test_slow_primary_hedged_and_cancelled(self):
+        """Test backup wins over a stuck primary, which is cancelled"""
+        policy = _policy(delay=0.02)
+        cancelled = asyncio.Event()
+
+        async def primary(first_byte):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def backup(first_byte):
+            first_byte.set()
+            return "backup"
+
+        assert await policy.run(primary, backup) == "backup"
+        await asyncio.wait_for(cancelled.wait(), 1)
+        stats = policy.get_stats()
+        assert stats["hedged"] == 1
+        assert stats["hedge_wins"] == 1
+
+    async def test_backup_failure_falls_back_to_primary(self):
+        """Test a failing backup does not fail the request"""
+        policy = _policy(delay=0.01)
+
+        async def primary(first_byte):
+            await asyncio.sleep(0.05)
+            return "primary"
+
+        async def backup(first_byte):
+            raise RuntimeError("backup failed")
+
+        assert await policy.run(primary, backup) == "primary"
+
+    async def test_both_fail(self):
+        """Test an error is raised when both attempts fail"""
+        policy = _policy(delay=0.01)
+
+        async def primary(first_byte):
+            await asyncio.sleep(0.03)
+            raise RuntimeError("primary failed")
+
+        async def backup(first_byte):
+            raise RuntimeError("backup failed")
+
+        with pytest.raises(RuntimeError):
+            await policy.run(primary, backup)
+
+    async def test_no_backup_waits_for_primary(self):
+        """Test without a backup the primary result is returned"""
+        policy = _policy(delay=0.01)
+
+        async def primary(first_byte):
+            await asyncio.sleep(0.03)
+            return "primary"
+
+        assert await policy.run(primary, None) == "primary"
+
+
+class TestLLMServiceHedging:
+    """Tests for LLMService Gemini hedging"""
+
+    async def test_hedged_call_uses_alternate_key(self):
+        """Test the backup attempt runs on the key manager's alternate key"""
+        from hdsp_agent_core.llm.hedging import reset_hedge_policies
+        from hdsp_agent_core.llm.service import LLMService
+
+        reset_hedge_policies()
+        key_manager = MagicMock()
+        key_manager.get_alternate_key = AsyncMock(return_value=("key-b", "id-b"))
+        service = LLMService(
+            {
+                "provider": "gemini",
+                "gemini": {"apiKey": "key-a", "model": "m", "hedge": True},
+            },
+            key_manager=key_manager,
+        )
+        used_keys = []
+
+        async def fake_call(prompt, context=None, api_key=None, first_byte=None):
+            used_keys.append(api_key)
+            if api_key is None:
+                await asyncio.sleep(10)
+            return f"answer from {api_key}"
+
+        service._call_gemini = fake_call
+        policy_config = HedgeConfig(enabled=True, default_delay=0.01, min_delay=0.0)
+        from hdsp_agent_core.llm import hedging
+
+        hedging._hedge_policies["gemini:m"] = HedgePolicy("gemini:m", policy_config)
+
+        assert await service.generate_response("plan") == "answer from key-b"
+        assert used_keys == [None, "key-b"]
+        key_manager.get_alternate_key.assert_awaited_once_with("key-a")
+        reset_hedge_policies()
+
+    def test_hedging_off_by_default(self, monkeypatch):
+        """Test hedging requires explicit opt-in"""
+        from hdsp_agent_core.llm.service import LLMService
+
+        monkeypatch.delenv("HDSP_LLM_HEDGE_ENABLED", raising=False)
+        service = LLMService({"provider": "gemini", "gemini": {"apiKey": "k"}})
+        assert service._hedging_enabled() is False
+
+    async def test_backup_key_from_config(self):
+        """Test the embedded service falls back to the other gemini.apiKeys"""
+        from hdsp_agent_core.llm.service import LLMService
+
+        service = LLMService(
+            {
+                "provider": "gemini",
+                "gemini": {"apiKey": "key-a", "apiKeys": ["key-a", "", "key-b"]},
+            }
+        )
+        assert await service._get_backup_gemini_key("key-a") == "key-b"
+        assert await service._get_backup_gemini_key("key-b") == "key-a"
+
+    def test_warns_once_without_backup_key(self, monkeypatch, caplog):
+        """Test enabling hedging with no backup key source logs one warning"""
+        from hdsp_agent_core.llm import service as service_module
+
+        monkeypatch.setattr(service_module, "_warned_no_backup_key", False)
+        config = {"provider": "gemini", "gemini": {"apiKey": "k", "hedge": True}}
+        with caplog.at_level("WARNING", logger=service_module.__name__):
+            service_module.LLMService(config)
+            service_module.LLMService(config)
+        warnings = [r for r in caplog.records if "no backup key" in r.message]
+        assert len(warnings) == 1
+
+        caplog.clear()
+        monkeypatch.setattr(service_module, "_warned_no_backup_key", False)
+        config["gemini"]["apiKeys"] = ["k", "k2"]
+        with caplog.at_level("WARNING", logger=service_module.__name__):
+            service_module.LLMService(config)
+        assert not caplog.records
+
+    async def test_embedded_agent_hedges_with_request_keys(self, monkeypatch):
+        """Test EmbeddedAgentService passes apiKeys and hedge through to LLMService"""
+        from hdsp_agent_core.llm import hedging
+        from hdsp_agent_core.llm.hedging import reset_hedge_policies
+        from hdsp_agent_core.llm.service import LLMService
+        from hdsp_agent_core.models.common import GeminiConfig, LLMConfig
+        from hdsp_agent_core.services.agent_service import EmbeddedAgentService
+
+        reset_hedge_policies()
+        used_keys = []
+
+        async def fake_call(self, prompt, context=None, api_key=None, first_byte=None):
+            used_keys.append(api_key)
+            if api_key is None:
+                await asyncio.sleep(10)
+            return f"answer from {api_key}"
+
+        monkeypatch.setattr(LLMService, "_call_gemini", fake_call)
+        policy_config = HedgeConfig(enabled=True, default_delay=0.01, min_delay=0.0)
+        hedging._hedge_policies["gemini:m"] = HedgePolicy("gemini:m", policy_config)
+        llm_config = LLMConfig(
+            provider="gemini",
+            gemini=GeminiConfig(
+                apiKey="key-a", apiKeys=["key-a", "key-b"], model="m", hedge=True
+            ),
+        )
+
+        service = EmbeddedAgentService()
+        assert await service._call_llm("plan", llm_config) == "answer from key-b"
+        assert used_keys == [None, "key-b"]
+        reset_hedge_policies()
+
+    async def test_embedded_agent_without_backup_key_warns(self, monkeypatch, caplog):
+        """Test hedging a single-key request sends one call and says why"""
+        from hdsp_agent_core.llm import service as service_module
+        from hdsp_agent_core.models.common import GeminiConfig, LLMConfig
+        from hdsp_agent_core.services.agent_service import EmbeddedAgentService
+
+        monkeypatch.setattr(service_module, "_warned_no_backup_key", False)
+        used_keys = []
+
+        async def fake_call(self, prompt, context=None, api_key=None, first_byte=None):
+            used_keys.append(api_key)
+            return "answer"
+
+        monkeypatch.setattr(service_module.LLMService, "_call_gemini", fake_call)
+        llm_config = LLMConfig(
+            provider="gemini",
+            gemini=GeminiConfig(apiKey="key-a", model="m", hedge=True),
+        )
+
+        with caplog.at_level("WARNING", logger=service_module.__name__):
+            await EmbeddedAgentService()._call_llm("plan", llm_config)
+        assert used_keys == [None]
+        assert any("no backup key" in r.message for r in caplog.records)
@@ -0,0 +1,102 @@
+"""
+HDSP Agent Core - HTTP Session Pool Tests
+
+Tests for pooled keep-alive sessions used by LLMService provider calls.
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from hdsp_agent_core.llm.http_pool import (
+    HTTPSessionPool,
+    PoolConfig,
+    close_http_pool,
+    get_http_pool,
+    reset_http_pool,
+)
+
+
+@pytest.fixture
+def reset_pool():
+    """Reset HTTPSessionPool singleton around each test"""
+    reset_http_pool()
+    yield
+    reset_http_pool()
+
+
+class TestPoolConfig:
+    """Tests for PoolConfig env overrides"""
+
+    def test_defaults(self):
+        """Test default limits"""
+        config = PoolConfig()
+        assert config.limit == 100
+        assert config.limit_per_host == 20
+
+    def test_from_env(self):
+        """Test HDSP_LLM_* variables override defaults"""
+        env = {
+            "HDSP_LLM_POOL_LIMIT": "7",
+            "HDSP_LLM_POOL_LIMIT_PER_HOST": "3",
+            "HDSP_LLM_KEEPALIVE_TIMEOUT": "5",
+        }
+        with patch.dict(os.environ, env, clear=False):
+            config = PoolConfig.from_env()
+        assert config.limit == 7
+        assert config.limit_per_host == 3
+        assert config.keepalive_timeout == 5.0
+
+
+class TestHTTPSessionPool:
+    """Tests for session reuse and lifecycle"""
+
+    async def test_same_origin_reuses_session(self, reset_pool):
+        """Test URLs with the same origin share one session"""
+        pool = HTTPSessionPool()
+        s1 = pool.get_session("https://api.example.com/v1/a")
+        s2 = pool.get_session("https://api.example.com/v1/b?x=1")
+        s3 = pool.get_session("https://other.example.com/v1/a")
+        assert s1 is s2
+        assert s1 is not s3
+        assert pool.get_stats()["sessions"] == 2
+        await pool.close()
+        assert s1.closed and s3.closed
+
+    async def test_closed_session_is_recreated(self, reset_pool):
+        """Test a closed session is replaced on next use"""
+        pool = HTTPSessionPool()
+        s1 = pool.get_session("http://localhost:8000/x")
+        await s1.close()
+        s2 = pool.get_session("http://localhost:8000/x")
+        assert s2 is not s1
+        assert not s2.closed
+        await pool.close()
+
+    async def test_singleton(self, reset_pool):
+        """Test get_http_pool returns a shared instance"""
+        assert get_http_pool() is get_http_pool()
+        get_http_pool().get_session("http://localhost:1/")
+        await close_http_pool()
+        assert get_http_pool().get_stats()["sessions"] == 0
+
+
+class TestLLMServiceConnectionReuse:
+    """Tests that LLMService calls ride one keep-alive connection"""
+
+    async def test_sequential_calls_reuse_connection(
+        self, reset_pool, llm_stub_server
+    ):
+        """Test repeated vLLM calls share a single TCP connection"""
+        from hdsp_agent_core.llm.service import LLMService
+
+        service = LLMService(
+            {"provider": "vllm", "vllm": {"endpoint": llm_stub_server["endpoint"]}}
+        )
+        for _ in range(3):
+            assert await service.generate_response("hi") == "stub response"
+
+        assert len(llm_stub_server["requests"]) == 3
+        assert len(llm_stub_server["peers"]) == 1
+        await close_http_pool()
@@ -0,0 +1,205 @@
+"""
+HDSP Agent Core - Metrics Tests
+
+Tests for histogram aggregation, LLM call tracking and Prometheus output.
+"""
+
+import asyncio
+
+import pytest
+
+from hdsp_agent_core.llm.metrics import (
+    Histogram,
+    MetricsRegistry,
+    get_metrics_registry,
+    reset_metrics_registry,
+)
+
+
+@pytest.fixture
+def registry():
+    """Fresh shared registry around each test"""
+    reset_metrics_registry()
+    yield get_metrics_registry()
+    reset_metrics_registry()
+
+
+class TestHistogram:
+    """Tests for Histogram aggregation"""
+
+    def test_cumulative_buckets(self):
+        """Test observations land in every bucket at or above them"""
+        histogram = Histogram("h", "help", ("op",), buckets=(1, 5))
+        for value in (0.5, 3, 10):
+            histogram.observe(value, op="a")
+        snap = histogram.snapshot(op="a")
+        assert snap["buckets"] == {1: 1, 5: 2, float("inf"): 3}
+        assert snap["sum"] == 13.5
+        assert snap["count"] == 3
+
+    def test_render_prometheus(self):
+        """Test exposition lines and label escaping"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("h_seconds", "Help", ("op",), (1,))
+        histogram.observe(0.5, op='say "hi"')
+        text = registry.render_prometheus()
+        assert "# TYPE h_seconds histogram" in text
+        assert 'h_seconds_bucket{op="say \\"hi\\"",le="1"} 1' in text
+        assert 'h_seconds_bucket{op="say \\"hi\\"",le="+Inf"} 1' in text
+        assert 'h_seconds_count{op="say \\"hi\\""} 1' in text
+
+    def test_kind_conflict(self):
+        """Test a name can't be reused for another metric type"""
+        registry = MetricsRegistry()
+        registry.counter("c_total", "Help", ())
+        with pytest.raises(ValueError):
+            registry.histogram("c_total", "Help", ())
+
+
+class TestLLMCallTracker:
+    """Tests for per-attempt call records"""
+
+    def test_success_record(self, registry):
+        """Test a successful stream records TTFT, sizes and outcome"""
+        with registry.track_llm_call(
+            "vLLM", "m", "chat/completions", "hello world", stream=True
+        ) as call:
+            call.set_status(200)
+            call.add_output("hi ")
+            call.add_output("there")
+        record = registry.recent_llm_calls()[-1]
+        assert record.provider == "vllm"
+        assert record.outcome == "success"
+        assert record.ttft is not None and record.ttft <= record.duration
+        assert record.prompt_chars == len("hello world")
+        assert record.response_chars == len("hi there")
+        assert record.prompt_tokens > 0 and record.response_tokens > 0
+
+    def test_outcomes(self, registry):
+        """Test status and exception mapping"""
+        with registry.track_llm_call("gemini", "m", "generateContent") as call:
+            call.set_status(503)
+        with pytest.raises(asyncio.TimeoutError):
+            with registry.track_llm_call("gemini", "m", "generateContent", attempt=2):
+                raise asyncio.TimeoutError()
+        outcomes = [r.outcome for r in registry.recent_llm_calls()]
+        assert outcomes == ["overloaded", "timeout"]
+        assert (
+            registry.llm_retries.value(
+                provider="gemini", model="m", endpoint="generateContent"
+            )
+            == 1
+        )
+
+    def test_rate_limit_per_key(self, registry):
+        """Test 429s are counted per key without exposing the key"""
+        with registry.track_llm_call("gemini", "m", "e", api_key="secret") as call:
+            call.set_status(429)
+        text = registry.render_prometheus()
+        assert "hdsp_llm_rate_limited_total" in text
+        assert "secret" not in text
+        assert registry.recent_llm_calls()[-1].outcome == "rate_limited"
+
+    def test_timed(self, registry):
+        """Test timed() feeds the pre-registered RAG histogram"""
+        with registry.timed("hdsp_rag_duration_seconds", operation="search"):
+            pass
+        snap = registry.histogram(
+            "hdsp_rag_duration_seconds", "", ("operation",)
+        ).snapshot(operation="search")
+        assert snap["count"] == 1
+
+    def test_index_runs_use_slow_buckets(self, registry):
+        """Test a minute-long index run lands in a finite bucket"""
+        histogram = registry.histogram("hdsp_rag_index_duration_seconds", "", ())
+        histogram.observe(75.0)
+        assert histogram.snapshot()["buckets"][120] == 1
+
+        with registry.timed("custom_seconds", buckets=(60, 600)):
+            pass
+        assert registry.histogram("custom_seconds", "", ()).buckets[:2] == (60, 600)
+
+
+class TestLLMServiceInstrumentation:
+    """Tests for LLMService against the local stub server"""
+
+    async def test_vllm_call_recorded(self, registry, llm_stub_server):
+        """Test a vLLM call records provider-reported usage"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.service import LLMService
+
+        service = LLMService(
+            {
+                "provider": "vllm",
+                "vllm": {"endpoint": llm_stub_server["endpoint"], "model": "stub"},
+            }
+        )
+        assert await service.generate_response("metrics call") == "stub response"
+        record = registry.recent_llm_calls()[-1]
+        assert (record.provider, record.model, record.endpoint) == (
+            "vllm",
+            "stub",
+            "chat/completions",
+        )
+        assert record.status == 200
+        assert (record.prompt_tokens, record.response_tokens) == (7, 2)
+        assert (
+            'hdsp_llm_request_duration_seconds_count{provider="vllm",model="stub",'
+            'endpoint="chat/completions",outcome="success"} 1'
+        ) in registry.render_prometheus()
+        await close_http_pool()
+
+    async def test_gemini_stream_and_rate_limit(self, registry, llm_stub_server):
+        """Test Gemini streams record TTFT and 429s are counted"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.service import LLMService
+
+        service = LLMService(
+            {
+                "provider": "gemini",
+                "gemini": {
+                    "apiKey": "test-key",
+                    "model": "gemini-2.0-flash",
+                    "baseUrl": llm_stub_server["gemini_base"],
+                },
+            }
+        )
+        chunks = [c async for c in service.generate_response_stream("stream me")]
+        assert "".join(chunks) == "stub response"
+        record = registry.recent_llm_calls()[-1]
+        assert record.endpoint == "streamGenerateContent"
+        assert record.ttft is not None
+
+        llm_stub_server["status"] = 429
+        with pytest.raises(Exception, match="RATE_LIMIT_EXCEEDED"):
+            await service.generate_response("limited")
+        assert registry.recent_llm_calls()[-1].outcome == "rate_limited"
+        assert 'hdsp_llm_rate_limited_total{provider="gemini"' in (
+            registry.render_prometheus()
+        )
+        await close_http_pool()
+
+    async def test_limiter_queueing_not_timed(
+        self, registry, monkeypatch, llm_stub_server
+    ):
+        """Test a call queued behind the concurrency limit times only its request"""
+        from hdsp_agent_core.llm.concurrency import reset_limiter_registry
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.service import LLMService
+
+        monkeypatch.setenv("HDSP_LLM_CONCURRENCY_INITIAL", "1")
+        monkeypatch.setenv("HDSP_LLM_CONCURRENCY_MAX", "1")
+        reset_limiter_registry()
+        llm_stub_server["delay"] = 0.1
+        service = LLMService(
+            {"provider": "vllm", "vllm": {"endpoint": llm_stub_server["endpoint"]}}
+        )
+        await asyncio.gather(
+            service.generate_response("first"), service.generate_response("second")
+        )
+        durations = [r.duration for r in registry.recent_llm_calls()]
+        assert len(durations) == 2
+        # The second call waited ~0.1s for the slot; that is not its latency
+        assert max(durations) < 0.18
+        reset_limiter_registry()
+        await close_http_pool()
@@ -0,0 +1,253 @@
+"""
+HDSP Agent Core - Prompt Prefix Cache Tests
+
+Tests for the static-prefix prompt layout and Gemini context caching.
+"""
+
+import asyncio
+
+import pytest
+
+from hdsp_agent_core.llm.prompt_cache import (
+    ContextCacheConfig,
+    GeminiContextCache,
+    register_static_prefix,
+    reset_context_cache,
+    split_static_prefix,
+)
+from hdsp_agent_core.prompts import auto_agent_prompts as prompts
+
+
+@pytest.fixture
+def reset_cache(monkeypatch):
+    """Enable context caching for small prefixes and reset the singleton"""
+    monkeypatch.setenv("HDSP_LLM_CONTEXT_CACHE_MIN_TOKENS", "0")
+    reset_context_cache()
+    yield
+    reset_context_cache()
+
+
+def _cache(**kwargs):
+    settings = {"enabled": True, "min_tokens": 0}
+    settings.update(kwargs)
+    return GeminiContextCache(ContextCacheConfig(**settings))
+
+
+class TestPromptLayout:
+    """Tests for static prefix + variable suffix formatting"""
+
+    def test_plan_prompt_starts_with_static_prefix(self):
+        """Test per-request fields only appear after the static prefix"""
+        prompt = prompts.format_plan_prompt(
+            request="타이타닉 데이터 분석",
+            cell_count=0,
+            imported_libraries=[],
+            defined_variables=[],
+            recent_cells=[],
+        )
+        prefix, suffix = split_static_prefix(prompt)
+        assert prefix == prompts.PLAN_GENERATION_STATIC
+        assert "타이타닉 데이터 분석" in suffix
+        # Rendered: escaped braces resolved, PIP option substituted
+        assert "{{" not in prefix and "{PIP_INDEX_OPTION}" not in prefix
+
+    def test_plan_knowledge_goes_after_prefix(self):
+        """Test RAG context is placed in the variable part"""
+        prompt = prompts.format_plan_prompt(
+            request="r",
+            cell_count=0,
+            imported_libraries=[],
+            defined_variables=[],
+            recent_cells=[],
+            rag_context="## RAG CONTEXT",
+        )
+        prefix, suffix = split_static_prefix(prompt)
+        assert prefix == prompts.PLAN_GENERATION_STATIC
+        assert suffix.startswith("## RAG CONTEXT")
+
+    def test_other_prompts_share_prefix(self):
+        """Test structured plan, replan, reflection and error analysis layouts"""
+        structured = prompts.format_structured_plan_prompt("r", 0, [], [], [])
+        replan = prompts.format_replan_prompt(
+            "r", [], {"stepNumber": 1}, {"message": "boom", "type": "runtime"}
+        )
+        reflection = prompts.format_reflection_prompt(
+            1, "d", "code", "ok", "out", "", "", [], []
+        )
+        analysis = prompts.format_error_analysis_prompt("E", "m", "tb")
+        assert split_static_prefix(structured)[0] == prompts.STRUCTURED_PLAN_STATIC
+        assert split_static_prefix(replan)[0] == prompts.ADAPTIVE_REPLAN_STATIC
+        assert split_static_prefix(reflection)[0] == prompts.REFLECTION_STATIC
+        assert split_static_prefix(analysis)[0] == prompts.ERROR_ANALYSIS_STATIC
+
+    def test_longest_prefix_wins(self):
+        """Test overlapping registrations resolve to the longest prefix"""
+        register_static_prefix("shared-")
+        register_static_prefix("shared-longer-")
+        assert split_static_prefix("shared-longer-x") == ("shared-longer-", "x")
+        assert split_static_prefix("unrelated") == (None, "unrelated")
+
+
+class TestGeminiContextCache:
+    """Tests for cache handle lifecycle"""
+
+    async def test_create_once_and_reuse(self):
+        """Test concurrent callers share one create call"""
+        cache = _cache()
+        calls = 0
+
+        async def create():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "cachedContents/1"
+
+        names = await asyncio.gather(
+            *[cache.get_or_create("k", "m", "prefix", create) for _ in range(3)]
+        )
+        assert names == ["cachedContents/1"] * 3
+        assert await cache.get_or_create("k", "m", "prefix", create) is not None
+        assert calls == 1
+        assert cache.get_stats()["hits"] == 1
+
+    async def test_small_prefix_skipped(self):
+        """Test prefixes below min_tokens are not cached"""
+        cache = _cache(min_tokens=1000)
+
+        async def create():
+            raise AssertionError("should not be called")
+
+        assert await cache.get_or_create("k", "m", "short", create) is None
+        assert cache.get_stats()["skipped"] == 1
+
+    async def test_failure_backoff(self):
+        """Test a refused prefix is not retried during the backoff"""
+        cache = _cache()
+        calls = 0
+
+        async def create():
+            nonlocal calls
+            calls += 1
+            raise Exception("too small")
+
+        assert await cache.get_or_create("k", "m", "p", create) is None
+        assert await cache.get_or_create("k", "m", "p", create) is None
+        assert calls == 1
+
+    async def test_invalidate_and_key_scoping(self):
+        """Test handles are per API key and can be invalidated"""
+        cache = _cache()
+        counter = iter(range(10))
+
+        async def create():
+            return f"cachedContents/{next(counter)}"
+
+        first = await cache.get_or_create("k1", "m", "p", create)
+        other_key = await cache.get_or_create("k2", "m", "p", create)
+        assert first != other_key
+        cache.invalidate("k1", "m", "p")
+        assert await cache.get_or_create("k1", "m", "p", create) not in (None, first)
+
+
+class TestLLMServiceContextCache:
+    """Tests for LLMService against the local Gemini stub"""
+
+    @staticmethod
+    def _service(stub, context_cache=True):
+        from hdsp_agent_core.llm.service import LLMService
+
+        return LLMService(
+            {
+                "provider": "gemini",
+                "gemini": {
+                    "apiKey": "test-key",
+                    "model": "gemini-2.0-flash",
+                    "baseUrl": stub["gemini_base"],
+                    "contextCache": context_cache,
+                },
+            }
+        )
+
+    @staticmethod
+    def _prompt(request):
+        return prompts.format_error_analysis_prompt("ValueError", request, "")
+
+    async def test_prefix_sent_as_cached_content(self, reset_cache, llm_stub_server):
+        """Test the static prefix is registered once and replaced by the handle"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+
+        service = self._service(llm_stub_server)
+        assert await service.generate_response(self._prompt("a")) == "stub response"
+        assert await service.generate_response(self._prompt("b")) == "stub response"
+
+        assert len(llm_stub_server["cached_contents"]) == 1
+        cached = next(iter(llm_stub_server["cached_contents"].values()))
+        assert cached["model"] == "models/gemini-2.0-flash"
+        assert cached["contents"][0]["parts"][0]["text"] == (
+            prompts.ERROR_ANALYSIS_STATIC
+        )
+        for body in llm_stub_server["gemini_requests"]:
+            assert body["cachedContent"].startswith("cachedContents/")
+            text = body["contents"][0]["parts"][0]["text"]
+            assert not text.startswith(prompts.ERROR_ANALYSIS_STATIC)
+        await close_http_pool()
+
+    async def test_stream_uses_cached_content(self, reset_cache, llm_stub_server):
+        """Test streaming requests reuse the handle too"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+
+        service = self._service(llm_stub_server)
+        chunks = [c async for c in service.generate_response_stream(self._prompt("s"))]
+        assert "".join(chunks) == "stub response"
+        assert "cachedContent" in llm_stub_server["gemini_requests"][0]
+        await close_http_pool()
+
+    async def test_rejected_handle_falls_back(self, reset_cache, llm_stub_server):
+        """Test an expired handle is dropped and the full prompt resent"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.prompt_cache import get_context_cache
+
+        service = self._service(llm_stub_server)
+        await service.generate_response(self._prompt("a"))
+        llm_stub_server["cached_contents"].clear()  # expired server-side
+
+        assert await service.generate_response(self._prompt("b")) == "stub response"
+        retried = llm_stub_server["gemini_requests"][-1]
+        assert "cachedContent" not in retried
+        assert retried["contents"][0]["parts"][0]["text"].startswith(
+            prompts.ERROR_ANALYSIS_STATIC
+        )
+        assert get_context_cache().get_stats()["invalidations"] == 1
+        await close_http_pool()
+
+    async def test_fallback_does_not_use_up_retries(self, reset_cache, llm_stub_server):
+        """Test a handle rejected on the last attempt is still resent in full"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+
+        service = self._service(llm_stub_server)
+        await service.generate_response(self._prompt("a"))
+        llm_stub_server["cached_contents"].clear()
+        assert (
+            await service._call_gemini(self._prompt("b"), max_retries=1)
+            == "stub response"
+        )
+
+        await service.generate_response(self._prompt("c"))  # new handle
+        llm_stub_server["cached_contents"].clear()
+        chunks = [
+            c
+            async for c in service._call_gemini_stream(self._prompt("d"), max_retries=1)
+        ]
+        assert "".join(chunks) == "stub response"
+        assert "cachedContent" not in llm_stub_server["gemini_requests"][-1]
+        await close_http_pool()
+
+    async def test_disabled_sends_full_prompt(self, reset_cache, llm_stub_server):
+        """Test context caching is opt-in"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+
+        service = self._service(llm_stub_server, context_cache=False)
+        await service.generate_response(self._prompt("a"))
+        assert llm_stub_server["cached_contents"] == {}
+        assert "cachedContent" not in llm_stub_server["gemini_requests"][0]
+        await close_http_pool()
@@ -0,0 +1,167 @@
+"""
+HDSP Agent Core - LLM Response Cache Tests
+
+Tests for the memory/disk response cache and LLMService cache opt-in.
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from hdsp_agent_core.llm.response_cache import (
+    LLMResponseCache,
+    ResponseCacheConfig,
+    make_cache_key,
+    reset_response_cache,
+)
+
+
+@pytest.fixture
+def reset_cache():
+    """Reset LLMResponseCache singleton around each test"""
+    reset_response_cache()
+    yield
+    reset_response_cache()
+
+
+class TestCacheKey:
+    """Tests for make_cache_key"""
+
+    def test_key_is_stable(self):
+        """Test identical inputs produce identical keys"""
+        k1 = make_cache_key("gemini", "m", "p", None, {"temperature": 0.0})
+        k2 = make_cache_key("gemini", "m", "p", "", {"temperature": 0.0})
+        assert k1 == k2
+
+    def test_key_varies_with_inputs(self):
+        """Test provider, model, prompt, context and params all affect key"""
+        base = make_cache_key("gemini", "m", "p", "c", {"t": 0})
+        assert base != make_cache_key("openai", "m", "p", "c", {"t": 0})
+        assert base != make_cache_key("gemini", "m2", "p", "c", {"t": 0})
+        assert base != make_cache_key("gemini", "m", "p2", "c", {"t": 0})
+        assert base != make_cache_key("gemini", "m", "p", "c2", {"t": 0})
+        assert base != make_cache_key("gemini", "m", "p", "c", {"t": 1})
+        assert base != make_cache_key("gemini", "m", "p", "c", {"t": 0}, credential="k")
+
+
+class TestMemoryTier:
+    """Tests for LRU + TTL behaviour"""
+
+    def test_hit_and_miss_counters(self):
+        """Test get/set update hit and miss counters"""
+        cache = LLMResponseCache(ResponseCacheConfig())
+        assert cache.get("k") is None
+        cache.set("k", "v")
+        assert cache.get("k") == "v"
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_eviction(self):
+        """Test least recently used entry is evicted at capacity"""
+        cache = LLMResponseCache(ResponseCacheConfig(max_entries=2))
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """Test entries expire after ttl_seconds"""
+        cache = LLMResponseCache(ResponseCacheConfig(ttl_seconds=10))
+        with patch("hdsp_agent_core.llm.response_cache.time.time", return_value=0):
+            cache.set("k", "v")
+        with patch("hdsp_agent_core.llm.response_cache.time.time", return_value=11):
+            assert cache.get("k") is None
+
+    def test_disabled_cache(self):
+        """Test disabled cache never stores"""
+        cache = LLMResponseCache(ResponseCacheConfig(enabled=False))
+        cache.set("k", "v")
+        assert cache.get("k") is None
+
+    def test_from_env(self):
+        """Test HDSP_LLM_CACHE_* variables override defaults"""
+        env = {"HDSP_LLM_CACHE_MAX_ENTRIES": "3", "HDSP_LLM_CACHE_TTL": "5"}
+        with patch.dict(os.environ, env, clear=False):
+            config = ResponseCacheConfig.from_env()
+        assert config.max_entries == 3
+        assert config.ttl_seconds == 5.0
+
+
+class TestDiskTier:
+    """Tests for the SQLite tier"""
+
+    def test_survives_new_instance(self, tmp_path):
+        """Test disk entries are visible to a fresh cache instance"""
+        path = str(tmp_path / "cache" / "llm.sqlite")
+        first = LLMResponseCache(ResponseCacheConfig(disk_path=path))
+        first.set("k", "v")
+        first.close()
+
+        second = LLMResponseCache(ResponseCacheConfig(disk_path=path))
+        assert second.get("k") == "v"
+        stats = second.get_stats()
+        assert stats["disk_hits"] == 1
+        assert stats["memory_entries"] == 1
+        second.close()
+
+
+class TestLLMServiceCaching:
+    """Tests for generate_response cache opt-in"""
+
+    async def test_cache_opt_in(self, reset_cache, llm_stub_server):
+        """Test cached calls skip the provider and uncached calls do not"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.service import LLMService
+
+        service = LLMService(
+            {"provider": "vllm", "vllm": {"endpoint": llm_stub_server["endpoint"]}}
+        )
+        assert await service.generate_response("hi", cache=True) == "stub response"
+        assert await service.generate_response("hi", cache=True) == "stub response"
+        assert len(llm_stub_server["requests"]) == 1
+
+        await service.generate_response("hi")
+        assert len(llm_stub_server["requests"]) == 2
+        await close_http_pool()
+
+    async def test_cache_if_skips_rejected_responses(
+        self, reset_cache, llm_stub_server
+    ):
+        """Test a response the caller can't parse is not replayed"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.service import LLMService
+
+        service = LLMService(
+            {"provider": "vllm", "vllm": {"endpoint": llm_stub_server["endpoint"]}}
+        )
+        for _ in range(2):
+            await service.generate_response("hi", cache=True, cache_if=lambda r: False)
+        assert len(llm_stub_server["requests"]) == 2
+
+        accepted = lambda r: r == "stub response"  # noqa: E731
+        await service.generate_response("hi", cache=True, cache_if=accepted)
+        await service.generate_response("hi", cache=True, cache_if=accepted)
+        assert len(llm_stub_server["requests"]) == 3
+        await close_http_pool()
+
+    def test_api_key_scopes_key(self):
+        """Test callers with different API keys never share an entry"""
+        from hdsp_agent_core.llm.service import LLMService
+
+        a = LLMService({"provider": "gemini", "gemini": {"apiKey": "a", "model": "m"}})
+        b = LLMService({"provider": "gemini", "gemini": {"apiKey": "b", "model": "m"}})
+        a2 = LLMService({"provider": "gemini", "gemini": {"apiKey": "a", "model": "m"}})
+        assert a._cache_key("p") != b._cache_key("p")
+        assert a._cache_key("p") == a2._cache_key("p")
+
+        vllm = {"endpoint": "http://vllm", "model": "m"}
+        c = LLMService({"provider": "vllm", "vllm": {**vllm, "apiKey": "c"}})
+        d = LLMService({"provider": "vllm", "vllm": vllm})
+        assert c._cache_key("p") != d._cache_key("p")
@@ -0,0 +1,199 @@
+"""
+HDSP Agent Core - Latency Router Tests
+
+Tests for EWMA scoring, health tracking and LLMService failover.
+"""
+
+import pytest
+
+from hdsp_agent_core.llm.routing import (
+    METRIC_TTFT,
+    LatencyRouter,
+    RouterConfig,
+    is_failover_error,
+    is_routing_enabled,
+    reset_llm_router,
+)
+
+
+@pytest.fixture
+def reset_router():
+    """Reset LatencyRouter singleton around each test"""
+    reset_llm_router()
+    yield
+    reset_llm_router()
+
+
+class TestLatencyRouter:
+    """Tests for ranking and health"""
+
+    def test_unknown_backends_keep_preference_order(self):
+        """Test ties keep the caller's order"""
+        router = LatencyRouter(RouterConfig())
+        assert router.rank(["gemini:a", "vllm:b"]) == ["gemini:a", "vllm:b"]
+
+    def test_faster_backend_ranked_first(self):
+        """Test lower EWMA latency wins"""
+        router = LatencyRouter(RouterConfig())
+        router.record_success("gemini:a", latency=5.0)
+        router.record_success("vllm:b", latency=1.0)
+        assert router.rank(["gemini:a", "vllm:b"]) == ["vllm:b", "gemini:a"]
+
+    def test_ewma_smoothing(self):
+        """Test latency follows the EWMA formula"""
+        router = LatencyRouter(RouterConfig(alpha=0.5))
+        router.record_success("x", latency=2.0)
+        router.record_success("x", latency=4.0)
+        assert router.get_stats()["x"]["latency"] == 3.0
+
+    def test_errors_penalise_score(self):
+        """Test error rate inflates the score"""
+        router = LatencyRouter(RouterConfig(alpha=0.2, error_threshold=0.9))
+        router.record_success("gemini:a", latency=1.0)
+        router.record_success("vllm:b", latency=1.5)
+        router.record_failure("gemini:a", "boom")
+        assert router.rank(["gemini:a", "vllm:b"]) == ["vllm:b", "gemini:a"]
+
+    def test_unhealthy_backend_ranked_last(self):
+        """Test backend crossing the error threshold goes to the back"""
+        router = LatencyRouter(RouterConfig(error_threshold=0.5, cooldown_seconds=60))
+        router.record_success("gemini:a", latency=0.1)
+        for _ in range(5):
+            router.record_failure("gemini:a", "503")
+        router.record_success("vllm:b", latency=10.0)
+        assert router.rank(["gemini:a", "vllm:b"]) == ["vllm:b", "gemini:a"]
+        assert router.get_stats()["gemini:a"]["healthy"] is False
+
+    def test_latency_and_ttft_not_mixed(self):
+        """Test calls rank by latency, streams by TTFT, without falling back"""
+        router = LatencyRouter(RouterConfig())
+        router.record_success("gemini:a", latency=8.0)
+        router.record_success("vllm:b", ttft=0.5)
+        # No full-call sample for vllm: it is probed, not scored by its TTFT
+        assert router.score("vllm:b") == 0.0
+        assert router.score("gemini:a", METRIC_TTFT) == 0.0
+
+        router.record_success("vllm:b", latency=10.0)
+        router.record_success("gemini:a", ttft=2.0)
+        assert router.rank(["gemini:a", "vllm:b"]) == ["gemini:a", "vllm:b"]
+        assert router.rank(["gemini:a", "vllm:b"], METRIC_TTFT) == [
+            "vllm:b",
+            "gemini:a",
+        ]
+
+    def test_failover_errors(self):
+        """Test rate limits and config errors are not failed over"""
+        import json
+
+        assert is_failover_error(Exception("Server overloaded: 503"))
+        assert is_failover_error(json.JSONDecodeError("bad", "{", 0))
+        assert not is_failover_error(Exception("RATE_LIMIT_EXCEEDED: quota"))
+        assert not is_failover_error(ValueError("Gemini API key not configured"))
+
+    def test_routing_switch(self, monkeypatch):
+        """Test routing is enabled by config or env"""
+        monkeypatch.delenv("HDSP_LLM_ROUTING", raising=False)
+        assert not is_routing_enabled({})
+        assert is_routing_enabled({"routing": "latency"})
+        monkeypatch.setenv("HDSP_LLM_ROUTING", "latency")
+        assert is_routing_enabled({})
+
+
+class TestLLMServiceRouting:
+    """Tests for failover through LLMService"""
+
+    def _service(self, endpoint):
+        from hdsp_agent_core.llm.service import LLMService
+
+        return LLMService(
+            {
+                "provider": "gemini",
+                "routing": "latency",
+                "gemini": {"apiKey": "k", "model": "g"},
+                "vllm": {"endpoint": endpoint, "model": "v"},
+            }
+        )
+
+    def test_backends_default_first(self):
+        """Test configured provider comes first and unconfigured are skipped"""
+        service = self._service("http://localhost:1")
+        assert service._routing_backends() == {"gemini:g": "gemini", "vllm:v": "vllm"}
+
+    async def test_failover_to_healthy_backend(self, reset_router, llm_stub_server):
+        """Test a failing Gemini call fails over to vLLM"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.routing import get_llm_router
+
+        service = self._service(llm_stub_server["endpoint"])
+
+        async def failing_gemini(prompt, context=None, **kwargs):
+            raise Exception("Server overloaded: 503")
+
+        service._call_gemini = failing_gemini
+        assert await service.generate_response("q1") == "stub response"
+
+        stats = get_llm_router().get_stats()
+        assert stats["gemini:g"]["failures"] == 1
+        assert stats["vllm:v"]["requests"] == 1
+        # Gemini is now unhealthy, so vLLM is tried first
+        assert get_llm_router().rank(list(service._routing_backends()))[0] == "vllm:v"
+        await close_http_pool()
+
+    async def test_stream_failover(self, reset_router, llm_stub_server):
+        """Test a stream failing before the first chunk fails over"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+
+        service = self._service(llm_stub_server["endpoint"])
+
+        async def failing_stream(prompt, context=None):
+            raise Exception("Gemini API error: down")
+            yield  # pragma: no cover
+
+        service._call_gemini_stream = failing_stream
+        chunks = [c async for c in service.generate_response_stream("q2")]
+        assert "".join(chunks) == "stub response"
+        await close_http_pool()
+
+    async def test_all_backends_fail(self, reset_router):
+        """Test the last error is raised when every backend fails"""
+        service = self._service("http://127.0.0.1:1")
+
+        async def failing_gemini(prompt, context=None, **kwargs):
+            raise Exception("Gemini API error: down")
+
+        service._call_gemini = failing_gemini
+        with pytest.raises(Exception):
+            await service.generate_response("q3")
+
+    @pytest.mark.parametrize(
+        "error",
+        [Exception("RATE_LIMIT_EXCEEDED: quota"), ValueError("bad model config")],
+    )
+    async def test_caller_errors_not_failed_over(self, reset_router, error):
+        """Test rate limits and config errors reach the caller unrouted"""
+        from hdsp_agent_core.llm.routing import get_llm_router
+
+        service = self._service("http://127.0.0.1:1")
+        vllm_calls = []
+
+        async def failing_gemini(prompt, context=None, **kwargs):
+            raise error
+
+        async def failing_stream(prompt, context=None):
+            raise error
+            yield  # pragma: no cover
+
+        async def vllm(prompt, context=None):
+            vllm_calls.append(prompt)
+            return "vllm"
+
+        service._call_gemini = failing_gemini
+        service._call_gemini_stream = failing_stream
+        service._call_vllm = vllm
+        with pytest.raises(type(error)):
+            await service.generate_response("q4")
+        with pytest.raises(type(error)):
+            async for _ in service.generate_response_stream("q5"):
+                pass
+        assert vllm_calls == []
+        assert "gemini:g" not in get_llm_router().get_stats()
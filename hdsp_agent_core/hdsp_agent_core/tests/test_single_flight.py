@@ -0,0 +1,218 @@
+"""
+HDSP Agent Core - Single-Flight Tests
+
+Tests for coalescing identical in-flight LLM requests.
+"""
+
+import asyncio
+
+import pytest
+
+from hdsp_agent_core.llm.single_flight import SingleFlight, reset_single_flight
+
+
+@pytest.fixture
+def reset_flight():
+    """Reset SingleFlight singleton around each test"""
+    reset_single_flight()
+    yield
+    reset_single_flight()
+
+
+class TestDo:
+    """Tests for non-streaming coalescing"""
+
+    async def test_concurrent_calls_share_result(self):
+        """Test identical concurrent calls run the function once"""
+        flight = SingleFlight(enabled=True)
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "result"
+
+        results = await asyncio.gather(*[flight.do("k", work) for _ in range(5)])
+        assert results == ["result"] * 5
+        assert calls == 1
+        stats = flight.get_stats()
+        assert stats["leaders"] == 1
+        assert stats["coalesced"] == 4
+        assert stats["in_flight"] == 0
+
+    async def test_different_keys_not_coalesced(self):
+        """Test distinct keys run independently"""
+        flight = SingleFlight(enabled=True)
+        calls = []
+
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        results = await asyncio.gather(
+            flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b"))
+        )
+        assert results == ["a", "b"]
+        assert sorted(calls) == ["a", "b"]
+
+    async def test_error_propagates_to_all_waiters(self):
+        """Test upstream failure is raised in every waiter"""
+        flight = SingleFlight(enabled=True)
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            flight.do("k", work), flight.do("k", work), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def test_one_waiter_cancel_keeps_call_alive(self):
+        """Test cancelling one waiter does not cancel the shared call"""
+        flight = SingleFlight(enabled=True)
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "ok"
+
+    async def test_last_waiter_cancel_cancels_upstream(self):
+        """Test upstream is cancelled once nobody waits for it"""
+        flight = SingleFlight(enabled=True)
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.ensure_future(flight.do("k", work))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+    async def test_disabled(self):
+        """Test disabled flight runs every call"""
+        flight = SingleFlight(enabled=False)
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        await asyncio.gather(flight.do("k", work), flight.do("k", work))
+        assert calls == 2
+
+
+class TestStream:
+    """Tests for streaming fan-out"""
+
+    async def test_subscribers_receive_all_chunks(self):
+        """Test late subscribers get earlier chunks replayed"""
+        flight = SingleFlight(enabled=True)
+        upstream_calls = 0
+
+        async def source():
+            nonlocal upstream_calls
+            upstream_calls += 1
+            for chunk in ["a", "b", "c"]:
+                await asyncio.sleep(0.01)
+                yield chunk
+
+        async def collect(delay):
+            await asyncio.sleep(delay)
+            return [c async for c in flight.stream("k", source)]
+
+        results = await asyncio.gather(collect(0), collect(0.015))
+        assert results == [["a", "b", "c"], ["a", "b", "c"]]
+        assert upstream_calls == 1
+        assert flight.get_stats()["in_flight_streams"] == 0
+
+    async def test_stream_error_propagates(self):
+        """Test upstream error is raised after delivered chunks"""
+        flight = SingleFlight(enabled=True)
+
+        async def source():
+            yield "a"
+            raise RuntimeError("stream failed")
+
+        received = []
+        with pytest.raises(RuntimeError):
+            async for chunk in flight.stream("k", source):
+                received.append(chunk)
+        assert received == ["a"]
+
+
+class TestLLMServiceSingleFlight:
+    """Tests for LLMService integration"""
+
+    async def test_concurrent_generate_response(self, reset_flight, llm_stub_server):
+        """Test concurrent identical requests make one upstream call"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.service import LLMService
+
+        llm_stub_server["delay"] = 0.05
+        service = LLMService(
+            {"provider": "vllm", "vllm": {"endpoint": llm_stub_server["endpoint"]}}
+        )
+        results = await asyncio.gather(
+            *[service.generate_response("same") for _ in range(4)]
+        )
+        assert results == ["stub response"] * 4
+        assert len(llm_stub_server["requests"]) == 1
+        await close_http_pool()
+
+    async def test_different_api_keys_not_coalesced(
+        self, reset_flight, llm_stub_server
+    ):
+        """Test callers with their own keys each make their own upstream call"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.service import LLMService
+
+        llm_stub_server["delay"] = 0.05
+        services = [
+            LLMService(
+                {
+                    "provider": "vllm",
+                    "vllm": {"endpoint": llm_stub_server["endpoint"], "apiKey": key},
+                }
+            )
+            for key in ("key-a", "key-b")
+        ]
+        await asyncio.gather(*[s.generate_response("same") for s in services])
+        assert len(llm_stub_server["requests"]) == 2
+        await close_http_pool()
+
+    async def test_concurrent_streams_fan_out(self, reset_flight, llm_stub_server):
+        """Test concurrent identical streams share one upstream stream"""
+        from hdsp_agent_core.llm.http_pool import close_http_pool
+        from hdsp_agent_core.llm.service import LLMService
+
+        llm_stub_server["delay"] = 0.05
+        service = LLMService(
+            {"provider": "vllm", "vllm": {"endpoint": llm_stub_server["endpoint"]}}
+        )
+
+        async def collect():
+            return "".join(
+                [c async for c in service.generate_response_stream("same")]
+            )
+
+        results = await asyncio.gather(collect(), collect(), collect())
+        assert results == ["stub response"] * 3
+        assert len(llm_stub_server["requests"]) == 1
+        await close_http_pool()
@@ -0,0 +1,79 @@
+"""
+HDSP Agent Core - SSE Decoder Tests
+
+Tests for incremental SSE decoding across arbitrary read boundaries.
+"""
+
+import json
+
+from hdsp_agent_core.llm.sse import SSEDecoder, iter_sse_json
+
+
+def _event(data) -> bytes:
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def _decode_in_pieces(raw: bytes, size: int):
+    decoder = SSEDecoder()
+    events = []
+    for i in range(0, len(raw), size):
+        events.extend(decoder.feed(raw[i : i + size]))
+    events.extend(decoder.close())
+    return events
+
+
+class FakeStreamReader:
+    """Mimics aiohttp StreamReader.iter_any()"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    async def iter_any(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+class TestSSEDecoder:
+    """Tests for SSEDecoder"""
+
+    def test_any_read_boundary(self):
+        """Test events survive splits inside lines and UTF-8 characters"""
+        payloads = [{"text": f"토큰 {i} ✓"} for i in range(20)]
+        raw = b"".join(_event(p) for p in payloads)
+        for size in (1, 2, 3, 7, 64, len(raw)):
+            assert _decode_in_pieces(raw, size) == payloads
+
+    def test_multiline_event_and_crlf(self):
+        """Test multi-line data fields are joined and CRLF is accepted"""
+        raw = b'data: {"a":\r\ndata: 1}\r\n\r\n: keep-alive\r\nevent: x\r\n\r\n'
+        assert _decode_in_pieces(raw, 5) == [{"a": 1}]
+
+    def test_done_sentinel_stops(self):
+        """Test [DONE] ends the stream and later data is ignored"""
+        decoder = SSEDecoder()
+        events = decoder.feed(_event({"n": 1}) + b"data: [DONE]\n\n" + _event({"n": 2}))
+        assert events == [{"n": 1}]
+        assert decoder.done
+        assert decoder.feed(_event({"n": 3})) == []
+
+    def test_missing_blank_lines(self):
+        """Test servers that omit blank lines still stream per line"""
+        decoder = SSEDecoder()
+        assert decoder.feed(b'data: {"n": 1}\n') == []
+        assert decoder.feed(b'data: {"n": 2}\n') == [{"n": 1}]
+        assert decoder.close() == [{"n": 2}]
+
+    def test_trailing_event_and_garbage(self):
+        """Test close() flushes a final unterminated event; bad JSON is skipped"""
+        raw = b"data: not json\n\n" + b'data: {"last": true}'
+        assert _decode_in_pieces(raw, 4) == [{"last": True}]
+
+
+class TestIterSSEJson:
+    """Tests for the StreamReader helper"""
+
+    async def test_iter_stream(self):
+        """Test payloads are yielded from a chunked reader"""
+        raw = _event({"n": 1}) + _event({"n": 2}) + b"data: [DONE]\n\n"
+        reader = FakeStreamReader([raw[:10], raw[10:31], raw[31:]])
+        assert [d async for d in iter_sse_json(reader)] == [{"n": 1}, {"n": 2}]
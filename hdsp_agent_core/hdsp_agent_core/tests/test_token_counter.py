@@ -0,0 +1,124 @@
+"""
+HDSP Agent Core - Token Counter Tests
+
+Tests for the heuristic counter, memoization and provider registry.
+"""
+
+import pytest
+
+from hdsp_agent_core.llm.token_counter import (
+    CachedTokenCounter,
+    HeuristicTokenCounter,
+    TokenCounter,
+    count_tokens,
+    get_token_counter,
+    register_token_counter,
+    reset_token_counters,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    """Reset shared counters around each test"""
+    reset_token_counters()
+    yield
+    reset_token_counters()
+
+
+class CountingCounter(TokenCounter):
+    """One token per character, recording every call"""
+
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text: str) -> int:
+        self.calls += 1
+        return len(text)
+
+
+class TestHeuristicTokenCounter:
+    """Tests for HeuristicTokenCounter"""
+
+    def test_empty(self):
+        """Test empty text counts zero"""
+        assert HeuristicTokenCounter().count("") == 0
+
+    def test_english_words(self):
+        """Test common English words count about one token each"""
+        counter = HeuristicTokenCounter()
+        assert counter.count(" ".join(["word"] * 100)) == 100
+
+    def test_korean_counts_per_syllable(self):
+        """Test Korean is not undercounted as one token per word"""
+        counter = HeuristicTokenCounter()
+        text = "데이터프레임을 불러오고 결측치를 확인합니다"
+        assert counter.count(text) >= len(text.replace(" ", ""))
+        assert counter.count(text) > len(text.split()) * 1.3
+
+    def test_code_punctuation(self):
+        """Test code symbols and indentation are counted"""
+        counter = HeuristicTokenCounter()
+        code = "def f(x):\n    return x['a'] + 1\n"
+        assert counter.count(code) > len(code.split()) * 1.3
+
+
+class TestCachedTokenCounter:
+    """Tests for CachedTokenCounter memoization"""
+
+    def test_memoizes_by_content(self):
+        """Test repeated texts hit the cache"""
+        inner = CountingCounter()
+        counter = CachedTokenCounter(inner)
+        assert counter.count("hello") == 5
+        assert counter.count("hello") == 5
+        assert inner.calls == 1
+        assert counter.get_stats()["hits"] == 1
+
+    def test_lru_bound(self):
+        """Test cache size is bounded"""
+        counter = CachedTokenCounter(CountingCounter(), max_entries=2)
+        for text in ["a", "bb", "ccc"]:
+            counter.count(text)
+        assert counter.get_stats()["entries"] == 2
+
+    def test_count_messages(self):
+        """Test message totals sum content tokens"""
+        counter = CachedTokenCounter(CountingCounter())
+        messages = [{"role": "user", "content": "abc"}, {"role": "x", "content": None}]
+        assert counter.count_messages(messages) == 3
+
+    def test_truncate(self):
+        """Test truncation keeps the longest prefix within budget"""
+        counter = CachedTokenCounter(CountingCounter())
+        assert counter.truncate("abcdefgh", 10) == "abcdefgh"
+        assert counter.truncate("abcdefgh", 5) == "abcde"
+        assert counter.truncate("abcdefgh", 5, "..") == "abc.."
+        # Search prefixes are not memoized
+        assert counter.get_stats()["entries"] <= 3
+
+
+class TestRegistry:
+    """Tests for provider counter selection"""
+
+    def test_shared_per_provider(self):
+        """Test counters are shared per provider"""
+        assert get_token_counter("gemini") is get_token_counter("GEMINI")
+        assert get_token_counter("gemini") is not get_token_counter("vllm")
+
+    def test_default_is_heuristic(self):
+        """Test unknown providers fall back to the heuristic"""
+        assert get_token_counter("gemini").name == "heuristic"
+        assert get_token_counter().name == "heuristic"
+
+    def test_vllm_without_tokenizer_falls_back(self, monkeypatch):
+        """Test vLLM uses the heuristic when no tokenizer is configured"""
+        monkeypatch.delenv("HDSP_LLM_TOKENIZER_PATH", raising=False)
+        assert get_token_counter("vllm").name == "heuristic"
+
+    def test_register_counter(self):
+        """Test registering a provider-specific counter"""
+        register_token_counter("custom", lambda model: CountingCounter())
+        assert get_token_counter("custom").name == "counting"
+        assert count_tokens("abcd", "custom") == 4